@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+HTTP caching and compression for the API.
+
+Prediction resources are versioned by the stored prediction they are read
+from: the training-data predictions file of a tender model, or the latest
+stored prediction of a carrier or order volume model. Model details are
+versioned by their metadata. Requests for these resources get ETag,
+Last-Modified and Cache-Control headers, and a conditional request for an
+unchanged version is answered with 304 before the endpoint runs. Responses
+are compressed with brotli when ``brotli-asgi`` is installed, else gzip.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+from fastapi import FastAPI
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware
+
+from config.settings import settings
+from utils.http_cache import ConditionalGetMiddleware, Validators
+
+logger = logging.getLogger(__name__)
+
+# Already-compressed downloads are not compressed again
+EXCLUDED_CONTENT_TYPES = DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/vnd.apache.parquet",)
+
+
+def _file_validators(version: str, path: Path) -> Optional[Validators]:
+    """Version key and modification time of a stored file."""
+    if not path.exists():
+        return None
+    stat = path.stat()
+    return f"{version}:{stat.st_mtime_ns}:{stat.st_size}", stat.st_mtime
+
+
+def tender_predictions_version(model_id: str, *_) -> Optional[Validators]:
+    """Version of a tender model's training-data predictions."""
+    from services.model_service import ModelService
+
+    model_path = ModelService().get_model_path(model_id)
+    if not model_path:
+        return None
+    return _file_validators(model_id, Path(model_path) / "training_predictions" / "prediction_data.json")
+
+
+def latest_prediction_version(model_type: str):
+    """Build a resolver for the latest stored prediction of a model."""
+    def resolve(model_id: str, *_) -> Optional[Validators]:
+        from services.prediction_service import PredictionService
+
+        prediction_service = PredictionService()
+        predictions = [
+            prediction for prediction in prediction_service.list_predictions(model_id=model_id)
+            if prediction.get("model_type") == model_type
+        ]
+        if not predictions:
+            return None
+        prediction_id = predictions[0]["prediction_id"]
+        prediction_file = predictions[0].get("prediction_file") or \
+            prediction_service.base_path / prediction_id / "prediction_data.json"
+        return _file_validators(prediction_id, Path(prediction_file))
+
+    return resolve
+
+
+def model_version(model_id: str) -> Optional[Validators]:
+    """Version of a model's metadata (changes when it is promoted, distilled or compressed)."""
+    from services.model_service import ModelService
+
+    if model_id in ("list", "latest"):
+        return None
+    metadata = ModelService().get_model_metadata(model_id)
+    if not metadata:
+        return None
+    return json.dumps(metadata, sort_keys=True, default=str), None
+
+
+# Resolvers by request path; groups are passed to the resolver
+CACHE_RESOLVERS = [
+    (r"^/api/predictions/tender-performance/([^/]+)(?:/(by-lane|download))?$", tender_predictions_version),
+    (r"^/api/predictions/carrier-performance/([^/]+)(?:/(by-lane|download))?$",
+     latest_prediction_version("carrier_performance")),
+    (r"^/api/predictions/order-volume/([^/]+)(?:/(by-lane|download|rollup))?$",
+     latest_prediction_version("order_volume")),
+    (r"^/api/models/([^/]+)$", model_version),
+]
+
+
+def add_http_caching(app: FastAPI) -> None:
+    """Add conditional GET handling and response compression to the app.
+
+    Call before adding CORSMiddleware so that it stays outermost and 304
+    responses carry CORS headers too.
+    """
+    app.add_middleware(ConditionalGetMiddleware, resolvers=CACHE_RESOLVERS, max_age=settings.HTTP_CACHE_MAX_AGE)
+
+    try:
+        from brotli_asgi import BrotliMiddleware
+        app.add_middleware(BrotliMiddleware, quality=4, minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+                           gzip_fallback=True)
+        logger.info("Compressing responses with brotli (gzip fallback)")
+    except ImportError:
+        app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE, compresslevel=6,
+                           exclude_content_types=EXCLUDED_CONTENT_TYPES)
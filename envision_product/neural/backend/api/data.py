@@ -2,7 +2,6 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks
 from fastapi.responses import JSONResponse
 from typing import List, Optional, Dict, Any
-import uuid
 import os
 import pandas as pd
 from datetime import datetime
@@ -52,21 +51,23 @@ async def upload_file(
     
     try:
         # Save file to storage
-        file_id = str(uuid.uuid4())
-        file_path = await file_service.save_file(file, file_id)
+        file_id = await file_service.save_file(file)
+        file_path = file_service.get_file_path(file_id)
+        content_hash = file_service.get_content_hash(file_id)
         
-        # Generate preview in background
+        # Generate preview in background (served from the cache for known content)
         if background_tasks:
-            background_tasks.add_task(data_processor.generate_preview, file_id, file_path)
+            background_tasks.add_task(data_processor.generate_preview, file_id, file_path, content_hash)
         else:
             # For immediate preview
-            preview = data_processor.generate_preview(file_id, file_path)
+            preview = data_processor.generate_preview(file_id, file_path, content_hash)
         
         return {
             "status": "success",
             "file_id": file_id,
             "filename": file.filename,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now().isoformat(),
+            **file_service.reuse_info(file_id)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
@@ -84,7 +85,7 @@ async def get_data_preview(
         raise HTTPException(status_code=404, detail=f"File with ID {file_id} not found")
     
     # Get or generate preview
-    preview = data_processor.get_preview(file_id, file_path)
+    preview = data_processor.get_preview(file_id, file_path, file_service.get_content_hash(file_id))
     if not preview:
         raise HTTPException(status_code=500, detail=f"Failed to generate preview for file {file_id}")
     
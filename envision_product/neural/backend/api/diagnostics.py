@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any
+import logging
+
+from services.inference_tuner import InferenceTuner
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/diagnostics",
+    tags=["diagnostics"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/inference", response_model=Dict[str, Any])
+async def get_inference_diagnostics():
+    """
+    Get the inference settings of this host.
+    
+    `status` is `tuned`, `tuning`, `not_tuned` or `outdated` (tuned for other cores, workers, backend
+    or models). `host` describes what the tuning must match, `applied` the thread and batch settings
+    in effect in this worker and `tuning` the stored result with the benchmark of every setting.
+    """
+    try:
+        return await run_in_threadpool(InferenceTuner().diagnostics)
+    except Exception as e:
+        logger.error(f"Error getting inference diagnostics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting inference diagnostics: {str(e)}")
+
+@router.post("/inference/tune", response_model=Dict[str, Any])
+async def tune_inference():
+    """
+    Benchmark the inference settings of this host again and apply the best one in this worker.
+    
+    Other workers pick the new tuning up on their next start.
+    """
+    tuner = InferenceTuner()
+    if tuner.is_tuning():
+        raise HTTPException(status_code=409, detail="Inference tuning is already running")
+    
+    try:
+        tuning = await run_in_threadpool(tuner.ensure_tuned, force=True)
+    except Exception as e:
+        logger.error(f"Error tuning inference: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error tuning inference: {str(e)}")
+    
+    if tuning is None:
+        raise HTTPException(status_code=404, detail="No models registered to benchmark")
+    return tuning
@@ -45,7 +45,8 @@ async def upload_file(
             "status": "success",
             "file_id": file_id,
             "filename": file.filename,
-            "content_type": file.content_type
+            "content_type": file.content_type,
+            **file_service.reuse_info(file_id)
         }
     except Exception as e:
         logger.error(f"Error uploading file: {str(e)}")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional, Dict, Any
+import logging
+
+from services.lane_insight_service import LaneInsightService
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/lanes",
+    tags=["lanes"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/insight", response_model=Dict[str, Any])
+async def get_lane_insight(
+    source_city: str = Query(..., description="Source city name"),
+    destination_city: str = Query(..., description="Destination city name"),
+    carrier: Optional[str] = Query(None, description="Carrier filter for the performance models (optional)"),
+    order_type: Optional[str] = Query(None, description="Order type filter for the order volume model (optional)")
+):
+    """
+    Get the order volume, tender performance and carrier performance predictions for a lane in one call.
+    
+    The latest model of each type is queried concurrently. Each entry under `sources` has a `status`:
+    `ok`, `no_model`, `no_predictions` or `error`, and its own `elapsed_ms`.
+    
+    - **source_city**: The source city (required)
+    - **destination_city**: The destination city (required)
+    - **carrier**: Optional carrier filter
+    - **order_type**: Optional order type filter
+    """
+    if not source_city.strip() or not destination_city.strip():
+        raise HTTPException(status_code=400, detail="Source city and destination city are required")
+    
+    try:
+        return await LaneInsightService().get_lane_insight(
+            source_city=source_city,
+            destination_city=destination_city,
+            carrier=carrier,
+            order_type=order_type
+        )
+    except Exception as e:
+        logger.error(f"Error getting lane insight: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting lane insight: {str(e)}")
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import uuid
@@ -34,6 +35,29 @@ class TrainingParams(BaseModel):
     validation_split: float = Field(0.2, description="Validation data split ratio")
     test_size: float = Field(0.2, description="Test data split ratio")
     description: Optional[str] = Field(None, description="Model description")
+    encoding: Optional[str] = Field(None, description="Categorical encoding of performance models: onehot or hashing (defaults to CATEGORICAL_ENCODING)")
+    hash_features: Optional[int] = Field(None, ge=1, description="Hashed feature columns per categorical column (hashing encoding)")
+    warm_start_model_id: Optional[str] = Field(None, description="Performance model whose weights training starts from (same network shape)")
+    architecture: Optional[str] = Field(None, description="Order volume network: iterative (one month per input) or direct (the next horizon months per lane)")
+    horizon: Optional[int] = Field(None, ge=1, description="Months forecast per forward pass (direct order volume architecture)")
+    lags: Optional[int] = Field(None, ge=1, description="Lagged monthly volumes used as inputs (direct order volume architecture)")
+
+class DraftTrainingParams(BaseModel):
+    time_budget: Optional[float] = Field(None, gt=0, description="Maximum seconds to spend on the draft")
+    initial_fraction: float = Field(0.1, gt=0, le=1, description="Fraction of the training set used in the first stage")
+    growth_factor: float = Field(2.0, gt=1, description="Sample growth multiplier between stages")
+    epochs_per_stage: int = Field(5, ge=1, description="Epochs trained on each sample")
+    batch_size: int = Field(64, description="Training batch size")
+    tolerance: float = Field(0.02, ge=0, description="Relative MAE change considered stable")
+    validation_split: float = Field(0.1, description="Validation data split ratio")
+    test_size: float = Field(0.2, description="Test data split ratio")
+
+class DistillationParams(BaseModel):
+    architecture: str = Field("compact", description="Student architecture: compact (one narrow hidden layer) or linear")
+    synthetic_samples: int = Field(10000, ge=0, description="Number of synthetic lanes sampled for training")
+    epochs: int = Field(50, ge=1, description="Maximum number of training epochs")
+    batch_size: int = Field(256, description="Training batch size")
+    holdout: float = Field(0.2, gt=0, lt=1, description="Fraction of rows held out to measure fidelity")
 
 class ModelMetadata(BaseModel):
     model_id: str
@@ -43,6 +67,13 @@ class ModelMetadata(BaseModel):
     evaluation: Optional[Dict[str, Any]] = None
     training_data: Optional[str] = None
     training_params: Optional[Dict[str, Any]] = None
+    draft: bool = False
+    draft_info: Optional[Dict[str, Any]] = None
+    promoted_from: Optional[str] = None
+    variant_of: Optional[str] = None
+    serving_variant: Optional[str] = None
+    fidelity: Optional[Dict[str, Any]] = None
+    artifact: Optional[Dict[str, Any]] = None
 
 class PaginationMetadata(BaseModel):
     total: int = Field(..., description="Total number of items available")
@@ -59,6 +90,13 @@ class TrainingResponse(BaseModel):
     message: str
     model_id: Optional[str] = None
 
+class DraftTrainingResponse(BaseModel):
+    status: str
+    message: str
+    model_id: Optional[str] = None
+    evaluation: Optional[Dict[str, Any]] = None
+    draft_info: Optional[Dict[str, Any]] = None
+
 class OrderVolumePredictionRequest(BaseModel):
     model_id: str
     months: int = Field(6, description="Number of months to predict")
@@ -102,6 +140,7 @@ async def list_models(
     min_created_at: Optional[str] = None,
     min_accuracy: Optional[float] = None,
     max_error: Optional[float] = None,
+    include_variants: bool = False,
     model_service: ModelService = Depends(get_model_service)
 ):
     """
@@ -114,9 +153,10 @@ async def list_models(
         min_created_at: Optional minimum creation date (format: YYYY-MM-DD)
         min_accuracy: Optional minimum accuracy/r2 score
         max_error: Optional maximum error (MAE/RMSE)
+        include_variants: Include distilled serving variants
     """
     # Get all models with the specified type
-    all_models = model_service.list_models(model_type=model_type)
+    all_models = model_service.list_models(model_type=model_type, include_variants=include_variants)
     
     # Apply date filter if provided
     if min_created_at:
@@ -217,6 +257,7 @@ async def list_models_alt(
     min_created_at: Optional[str] = None,
     min_accuracy: Optional[float] = None,
     max_error: Optional[float] = None,
+    include_variants: bool = False,
     model_service: ModelService = Depends(get_model_service)
 ):
     """
@@ -238,6 +279,7 @@ async def list_models_alt(
         min_created_at=min_created_at,
         min_accuracy=min_accuracy,
         max_error=max_error,
+        include_variants=include_variants,
         model_service=model_service
     )
 
@@ -516,6 +558,198 @@ async def train_carrier_performance_model(
         "message": "Carrier performance model training started in the background. Check model list for completion status."
     }
 
+@router.post("/train/draft/{model_type}", response_model=DraftTrainingResponse)
+async def train_draft_model(
+    model_type: str,
+    data_file_id: str,
+    params: Optional[DraftTrainingParams] = None,
+    model_service: ModelService = Depends(get_model_service)
+):
+    """Train a quick draft model to gauge how predictable a file is.
+    
+    The draft trains on a stratified sample that grows until the metrics
+    stabilize and returns within the configured time budget. Drafts can be
+    promoted to a full training run with POST /models/{model_id}/promote.
+    
+    - **model_type**: order-volume, tender-performance or carrier-performance
+    - **data_file_id**: ID of the uploaded training data file
+    - **params**: Optional draft parameters (time_budget, initial_fraction, etc.)
+    """
+    from services.file_service import FileService
+    
+    model_type = model_type.replace("-", "_")
+    if model_type not in ("order_volume", "tender_performance", "carrier_performance"):
+        raise HTTPException(status_code=400, detail=f"Unsupported model type: {model_type}")
+    
+    file_service = FileService()
+    data_path = file_service.get_file_path(data_file_id)
+    
+    if not data_path:
+        raise HTTPException(status_code=404, detail=f"Data file with ID {data_file_id} not found")
+    
+    result = await run_in_threadpool(
+        model_service.train_draft_model,
+        model_type,
+        data_path,
+        params.dict() if params else None
+    )
+    
+    if not result:
+        raise HTTPException(status_code=500, detail=f"Draft training failed for data file {data_file_id}")
+    
+    return {
+        "status": "completed",
+        "message": f"Draft model trained in {result['draft_info']['elapsed_seconds']}s ({result['draft_info']['stop_reason']})",
+        **result
+    }
+
+@router.post("/{model_id}/promote", response_model=TrainingResponse)
+async def promote_draft_model(
+    model_id: str,
+    background_tasks: BackgroundTasks,
+    params: Optional[TrainingParams] = None,
+    model_service: ModelService = Depends(get_model_service)
+):
+    """Promote a draft model to a full training run.
+    
+    This is a long-running task that will be executed in the background.
+    The draft's cached preprocessing and weights are reused.
+    """
+    metadata = model_service.get_model_metadata(model_id)
+    if not metadata:
+        raise HTTPException(status_code=404, detail=f"Model {model_id} not found")
+    
+    if not metadata.get("draft"):
+        raise HTTPException(status_code=400, detail=f"Model {model_id} is not a draft model")
+    
+    # Function to run training in the background
+    def promote_model_task(model_id: str, params: Dict = None):
+        try:
+            new_model_id = model_service.promote_draft_model(
+                model_id=model_id,
+                params=params.dict() if params else None
+            )
+            logger.info(f"Draft promotion completed. Model ID: {new_model_id}")
+        except Exception as e:
+            logger.error(f"Error in background promotion task: {str(e)}")
+    
+    background_tasks.add_task(
+        promote_model_task,
+        model_id=model_id,
+        params=params
+    )
+    
+    return {
+        "status": "pending",
+        "message": f"Full training from draft {model_id} started in the background. Check model list for completion status."
+    }
+
+@router.post("/{model_id}/distill", response_model=TrainingResponse)
+async def distill_model(
+    model_id: str,
+    background_tasks: BackgroundTasks,
+    params: Optional[DistillationParams] = None,
+    model_service: ModelService = Depends(get_model_service)
+):
+    """Distill a carrier or tender performance model into a smaller student.
+    
+    This is a long-running task that will be executed in the background. The
+    student is registered as the model's serving variant (listed with
+    include_variants) and serves predictions once its MAE against the
+    teacher is within the configured tolerance.
+    """
+    metadata = model_service.get_model_metadata(model_id)
+    if not metadata:
+        raise HTTPException(status_code=404, detail=f"Model {model_id} not found")
+    
+    if metadata.get("model_type") not in ("carrier_performance", "tender_performance"):
+        raise HTTPException(
+            status_code=400,
+            detail="Distillation is only supported for carrier and tender performance models"
+        )
+    
+    # Function to run distillation in the background
+    def distill_model_task(model_id: str, params: Dict = None):
+        try:
+            result = model_service.distill_model(
+                model_id=model_id,
+                params=params.dict() if params else None
+            )
+            logger.info(f"Distillation completed: {result}")
+        except Exception as e:
+            logger.error(f"Error in background distillation task: {str(e)}")
+    
+    background_tasks.add_task(
+        distill_model_task,
+        model_id=model_id,
+        params=params
+    )
+    
+    return {
+        "status": "pending",
+        "message": f"Distillation of model {model_id} started in the background.",
+        "model_id": f"{model_id}_student"
+    }
+
+@router.post("/{model_id}/compress")
+async def compress_model(
+    model_id: str,
+    precision: str = Query("int8", description="Weight precision: float16 or int8"),
+    drop_original: bool = Query(False, description="Remove the float32 model files after compressing"),
+    model_service: ModelService = Depends(get_model_service)
+):
+    """Write a compressed artifact for a model.
+    
+    Kernels are quantized to float16 or int8 (with per-tensor scales) and the
+    encoders are stored as JSON vocabularies. The NumPy backend loads the
+    compressed weights; models whose original files were dropped are always
+    served from them.
+    """
+    if not model_service.get_model_metadata(model_id):
+        raise HTTPException(status_code=404, detail=f"Model {model_id} not found")
+    
+    if precision not in ("float16", "int8"):
+        raise HTTPException(status_code=400, detail=f"Unsupported precision: {precision}")
+    
+    manifest = await run_in_threadpool(model_service.compress_model, model_id, precision, drop_original)
+    if not manifest:
+        raise HTTPException(status_code=500, detail=f"Failed to compress model {model_id}")
+    
+    return {"model_id": model_id, **manifest}
+
+@router.get("/{model_id}/vocab/search")
+async def search_model_vocabulary(
+    model_id: str,
+    q: str = Query(..., min_length=1, description="Text to complete or correct"),
+    field: Optional[str] = Query(None, description="Field to search: carrier, source_city, dest_city or order_type (all by default)"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of results"),
+    model_service: ModelService = Depends(get_model_service)
+):
+    """Autocomplete or correct a carrier, city or order type name against a model's vocabulary.
+    
+    Names starting with the query come first (`match: prefix`); if there are
+    fewer than `limit`, the closest names by trigram similarity follow
+    (`match: fuzzy`). `exact` lists the fields in which the query is a known
+    name. Fields of hashing-encoded models have no vocabulary and are listed
+    in `unavailable_fields`.
+    """
+    from services.vocab_service import VocabService
+    
+    if not model_service.get_model_metadata(model_id):
+        raise HTTPException(status_code=404, detail=f"Model {model_id} not found")
+    
+    try:
+        result = VocabService(model_service).search(model_id, q, field=field, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching vocabulary of model {model_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error searching vocabulary: {str(e)}")
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No vocabulary found for model {model_id}")
+    return result
+
 # @router.post("/predict/order-volume", response_model=OrderVolumePredictionResponse)
 # async def predict_order_volume(
 #     request: OrderVolumePredictionRequest,
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import logging
@@ -9,8 +10,15 @@ import os
 import json
 import pandas as pd
 from datetime import datetime
+from itertools import islice
 
+from services.lane_index import load_lane_index
 from services.prediction_service import PredictionService
+from utils.archive import find_file
+from utils.streaming import (
+    LOCATION_FIELDS, csv_chunks, gzip_chunks, iter_json_array, json_document_chunks, lane_filter,
+    ndjson_chunks, select_records, simplify_prediction
+)
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +60,24 @@ class PredictionDetail(BaseModel):
     prediction_count: int
     data: Dict[str, Any]
 
+# Most lanes accepted by one bulk lane request
+MAX_BULK_LANES = 10_000
+
+class LaneQuery(BaseModel):
+    source_city: str
+    dest_city: str
+    carrier: Optional[str] = None
+    source_state: Optional[str] = None
+    source_country: Optional[str] = None
+    dest_state: Optional[str] = None
+    dest_country: Optional[str] = None
+
+class BulkLaneRequest(BaseModel):
+    lanes: List[LaneQuery] = Field(..., min_length=1, max_length=MAX_BULK_LANES,
+                                   description=f"Lanes to look up (at most {MAX_BULK_LANES:,})")
+    score_missing: bool = Field(False, description="Score lanes with a carrier that have no stored predictions with the model")
+    simplified: bool = Field(True, description="Whether to return only essential prediction fields")
+
 class FilterRequest(BaseModel):
     source_cities: Optional[List[str]] = None
     destination_cities: Optional[List[str]] = None
@@ -62,6 +88,154 @@ class FilterRequest(BaseModel):
 def get_prediction_service():
     return PredictionService()
 
+# Streamed prediction formats: media type and file extension
+STREAM_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "json": ("application/json", "json"),
+}
+
+# Predictions returned by the JSON listing endpoints (the rest are counted)
+LISTING_PAGE_SIZE = 100
+
+def _stream_predictions(records, format: str, filename: str, header: Optional[Dict[str, Any]] = None) -> StreamingResponse:
+    """Stream prediction records in a download format.
+    
+    Records are encoded as they are read, so the response starts at once and
+    memory stays flat whatever the number of predictions.
+    
+    Args:
+        records: Iterator of prediction dictionaries
+        format: One of STREAM_FORMATS
+        filename: Download file name without extension (None for inline)
+        header: Top-level fields of a JSON document (json format only)
+    
+    Returns:
+        StreamingResponse
+    """
+    media_type, extension = STREAM_FORMATS[format]
+    if format == "ndjson":
+        chunks = ndjson_chunks(records)
+    elif format == "json":
+        chunks = json_document_chunks(header or {}, records)
+    else:
+        chunks = csv_chunks(records)
+        if format == "csv.gz":
+            chunks = gzip_chunks(chunks)
+    
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{extension}"'} if filename else None
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+def _tender_predictions_file(model_service, model_id: str) -> Optional[Path]:
+    """Training-data predictions file of a tender model, generating it if needed."""
+    model_path = model_service.get_model_path(model_id)
+    if not model_path:
+        return None
+    
+    json_file = Path(model_path) / "training_predictions" / "prediction_data.json"
+    if not json_file.exists():
+        model_service.predict_tender_performance_on_training_data(model_id=model_id, return_predictions=False)
+    return json_file if json_file.exists() else None
+
+def _latest_carrier_prediction(prediction_service: PredictionService, model_service,
+                               model_id: str) -> Optional[Dict[str, Any]]:
+    """Metadata of a carrier model's latest stored predictions, generating them if needed."""
+    predictions = prediction_service.list_predictions(model_id=model_id)
+    if not predictions:
+        logger.info(f"No existing prediction for model {model_id}. Generating new predictions.")
+        if not model_service.predict_carrier_performance_on_training_data(model_id=model_id):
+            return None
+        prediction_service = PredictionService()
+        predictions = prediction_service.list_predictions(model_id=model_id)
+        if not predictions:
+            return None
+    
+    latest_prediction = predictions[0]
+    if not latest_prediction.get("prediction_file"):
+        latest_prediction = {
+            **latest_prediction,
+            "prediction_file": str(prediction_service.base_path / latest_prediction["prediction_id"] / "prediction_data.json")
+        }
+    return latest_prediction
+
+def _carrier_predictions_file(prediction_service: PredictionService, model_service, model_id: str) -> Optional[Path]:
+    """Latest stored predictions file of a carrier model, generating one if needed."""
+    latest_prediction = _latest_carrier_prediction(prediction_service, model_service, model_id)
+    return find_file(latest_prediction["prediction_file"]) if latest_prediction else None
+
+def _first_page(records, size: int = LISTING_PAGE_SIZE):
+    """First ``size`` records and the total number of records, counting the rest without keeping them."""
+    page = list(islice(records, size))
+    return page, len(page) + sum(1 for _ in records)
+
+def _performance_by_lanes(model_type: str, model_id: str, request: BulkLaneRequest,
+                          json_file: Path, model_service) -> Dict[str, Any]:
+    """Look up a list of lanes in a carrier/tender model's stored predictions.
+    
+    The lanes are resolved against the cached lane index of the predictions
+    file. With ``score_missing``, lanes that have a carrier but no stored
+    predictions are scored with the model in one batch.
+    
+    Returns:
+        Dictionary with one result per input lane, in input order
+    """
+    lanes = request.lanes
+    matches = load_lane_index(json_file).lookup_many([
+        {"source_city": lane.source_city, "destination_city": lane.dest_city, "carrier": lane.carrier}
+        for lane in lanes
+    ])
+    
+    scored = {}
+    missing = [i for i, (lane, predictions) in enumerate(zip(lanes, matches)) if not predictions and lane.carrier]
+    if request.score_missing and missing:
+        if model_type == "carrier_performance":
+            model = model_service.load_carrier_performance_model(model_id)
+        else:
+            model = model_service.load_tender_performance_model(model_id)
+        if model is None:
+            raise HTTPException(status_code=500, detail=f"Failed to load model {model_id} to score missing lanes")
+        
+        frame = pd.DataFrame([{
+            "CARRIER": lanes[i].carrier,
+            "SOURCE_CITY": lanes[i].source_city,
+            "DEST_CITY": lanes[i].dest_city,
+            **{field.upper(): getattr(lanes[i], field) or "" for field in LOCATION_FIELDS}
+        } for i in missing])
+        logger.info(f"Scoring {len(missing)} lanes without stored predictions with model {model_id}")
+        scored = dict(zip(missing, model.predict_frame(frame).tolist()))
+    
+    results = []
+    for i, (lane, predictions) in enumerate(zip(lanes, matches)):
+        if predictions:
+            source = "stored"
+            if request.simplified:
+                predictions = [simplify_prediction(prediction) for prediction in predictions]
+        elif i in scored:
+            source = "scored"
+            predictions = [{**lane.dict(exclude_none=True), "predicted_performance": scored[i]}]
+        else:
+            source = "not_found"
+        
+        performances = [p.get("predicted_performance", 0) for p in predictions]
+        results.append({
+            "index": i,
+            "lane": lane.dict(exclude_none=True),
+            "source": source,
+            "prediction_count": len(predictions),
+            "avg_predicted_performance": sum(performances) / len(performances) if performances else None,
+            "predictions": predictions
+        })
+    
+    return {
+        "model_id": model_id,
+        "lane_count": len(lanes),
+        "stored_count": sum(1 for result in results if result["source"] == "stored"),
+        "scored_count": len(scored),
+        "not_found_count": sum(1 for result in results if result["source"] == "not_found"),
+        "results": results
+    }
+
 # @router.get("/", response_model=PredictionList)
 # async def list_predictions(
 #     model_id: Optional[str] = None,
@@ -164,8 +338,7 @@ async def create_tender_performance_prediction(
         }
         
         # Save metadata
-        prediction_service.metadata["predictions"][prediction_id] = metadata
-        prediction_service._save_metadata()
+        prediction_service._update_metadata(prediction_id, metadata)
         
         # Get full prediction details including ID
         prediction = {
@@ -190,6 +363,10 @@ async def create_tender_performance_prediction(
 async def get_tender_performance_predictions(
     model_id: str,
     simplified: bool = True,
+    format: str = Query("json", description="json (first 100 predictions) or ndjson (every prediction, streamed)"),
+    source_city: Optional[str] = None,
+    dest_city: Optional[str] = None,
+    carrier: Optional[str] = None,
     prediction_service: PredictionService = Depends(get_prediction_service)
 ):
     """
@@ -202,6 +379,10 @@ async def get_tender_performance_predictions(
     
     - **model_id**: The ID of the model
     - **simplified**: Whether to return simplified predictions with only essential fields (defaults to True)
+    - **format**: json, or ndjson to stream every prediction as one JSON object per line
+    - **source_city**: Optional filter by source city
+    - **dest_city**: Optional filter by destination city
+    - **carrier**: Optional filter by carrier
     """
     try:
         # Use the model service directly
@@ -218,54 +399,35 @@ async def get_tender_performance_predictions(
         
         # Get or generate predictions
         logger.info(f"Fetching tender performance predictions for model {model_id}")
-        result = model_service.predict_tender_performance_on_training_data(model_id=model_id)
-        
-        if not result:
+        json_file = _tender_predictions_file(model_service, model_id)
+        if not json_file:
             raise HTTPException(
                 status_code=500, 
                 detail=f"Failed to retrieve or generate predictions with model {model_id}"
             )
         
-        # Get all predictions
-        predictions = result.get("predictions", [])
+        fields = {}
+        records = select_records(iter_json_array(json_file, fields=fields),
+                                 lane_filter(source_city, dest_city, carrier), simplify=simplified)
         
-        # Simplify predictions if requested
-        if simplified:
-            simplified_predictions = []
-            for pred in predictions:
-                simplified_pred = {
-                    'carrier': pred.get('carrier', ''),
-                    'source_city': pred.get('source_city', ''),
-                    'dest_city': pred.get('dest_city', '')
-                }
-                
-                # Include state and country information if available (for new format)
-                if "source_state" in pred:
-                    simplified_pred["source_state"] = pred.get("source_state", "")
-                if "source_country" in pred:
-                    simplified_pred["source_country"] = pred.get("source_country", "")
-                if "dest_state" in pred:
-                    simplified_pred["dest_state"] = pred.get("dest_state", "")
-                if "dest_country" in pred:
-                    simplified_pred["dest_country"] = pred.get("dest_country", "")
-                
-                # Add predicted performance as the final field
-                simplified_pred['predicted_performance'] = pred.get('predicted_performance', 0)
-                
-                simplified_predictions.append(simplified_pred)
-            
-            # Replace full predictions with simplified ones
-            predictions = simplified_predictions
+        # Stream every prediction straight from the stored file
+        if format.lower() == "ndjson":
+            return _stream_predictions(records, "ndjson", filename=None)
+        
+        # Keep the first page and count the rest as they are read
+        predictions, prediction_count = _first_page(records)
         
         # Prepare the response
         return {
             "model_id": model_id,
-            "prediction_count": len(predictions),
-            "metrics": result.get("metrics", {}) if not simplified else {},
-            "predictions": predictions[:100],  # Limit to first 100 for API response
-            "note": "Only showing first 100 predictions in the API response. Full data available via download endpoint."
+            "prediction_count": prediction_count,
+            "metrics": fields.get("metrics", {}) if not simplified else {},
+            "predictions": predictions,
+            "note": f"Only showing first {LISTING_PAGE_SIZE} predictions in the API response. Full data available via download endpoint or with format=ndjson."
         }
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         logger.error(f"Error retrieving predictions: {str(e)}")
         raise HTTPException(
             status_code=500,
@@ -389,6 +551,45 @@ async def get_tender_performance_by_lane(
             detail=f"Error retrieving predictions by lane: {str(e)}"
         )
 
+@router.post("/tender-performance/{model_id}/by-lanes", response_model=Dict[str, Any])
+async def get_tender_performance_by_lanes(
+    model_id: str,
+    request: BulkLaneRequest,
+    prediction_service: PredictionService = Depends(get_prediction_service)
+):
+    """
+    Get tender performance predictions for many lanes in one request.
+    
+    Lanes are resolved against an in-memory index of the model's stored predictions.
+    `results[i]` answers `lanes[i]`, with `source` set to `stored`, `scored` (with
+    `score_missing`) or `not_found`.
+    
+    - **model_id**: The ID of the model
+    - **lanes**: Lanes with `source_city`, `dest_city` and optional `carrier` and location fields
+    - **score_missing**: Score lanes with a carrier that have no stored predictions
+    - **simplified**: Whether to return simplified predictions (defaults to True)
+    """
+    model_service = prediction_service.model_service
+    model_metadata = model_service.get_model_metadata(model_id)
+    if not model_metadata:
+        raise HTTPException(status_code=404, detail=f"Model {model_id} not found")
+    if model_metadata.get("model_type") != "tender_performance":
+        raise HTTPException(status_code=400, detail=f"Model {model_id} is not a tender performance model")
+    
+    try:
+        json_file = await run_in_threadpool(_tender_predictions_file, model_service, model_id)
+        if not json_file:
+            raise HTTPException(status_code=500, detail=f"Failed to retrieve or generate predictions with model {model_id}")
+        
+        return await run_in_threadpool(
+            _performance_by_lanes, "tender_performance", model_id, request, json_file, model_service
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving tender performance by lanes: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving predictions by lanes: {str(e)}")
+
 @router.get("/tender-performance/{model_id}/download")
 async def download_tender_performance_predictions(
     model_id: str,
@@ -403,15 +604,23 @@ async def download_tender_performance_predictions(
     Download tender performance predictions.
     
     This endpoint provides download access to the full set of predictions.
+    Filtered and simplified downloads are streamed from the stored predictions.
     
     - **model_id**: The ID of the model
-    - **format**: The format to download (csv or json, defaults to csv)
-    - **simplified**: Whether to provide a simplified CSV with only essential fields (defaults to True)
+    - **format**: The format to download (csv, csv.gz, ndjson or json, defaults to csv)
+    - **simplified**: Whether to keep only essential fields in csv and ndjson downloads (defaults to True)
     - **source_city**: Optional filter by source city
     - **dest_city**: Optional filter by destination city
     - **carrier**: Optional filter by carrier
     """
     try:
+        format = format.lower()
+        if format not in STREAM_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid format. Use one of: {', '.join(STREAM_FORMATS)}"
+            )
+        
         # Get the model path
         from services.model_service import ModelService
         model_service = ModelService()
@@ -423,199 +632,38 @@ async def download_tender_performance_predictions(
                 detail=f"Model {model_id} not found"
             )
             
-        # Check for the training predictions directory
-        training_predictions_dir = os.path.join(model_path, "training_predictions")
-        if not os.path.exists(training_predictions_dir):
-            # Try to generate them if they don't exist
-            result = model_service.predict_tender_performance_on_training_data(model_id=model_id)
-            if not result:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Predictions not found for model {model_id} and could not be generated"
-                )
-        
-        # Check for the specific format requested
-        json_file = os.path.join(training_predictions_dir, "prediction_data.json")
-        csv_file = os.path.join(training_predictions_dir, "prediction_data.csv")
-        simplified_csv_file = os.path.join(training_predictions_dir, "prediction_data_simplified.csv")
-        
-        # Handle filtering if requested
-        if source_city or dest_city or carrier:
-            # Need to load, filter and re-save
-            try:
-                # Load the predictions
-                with open(json_file, 'r') as f:
-                    data = json.load(f)
-                
-                predictions = data.get('predictions', [])
-                # Apply filters
-                filtered_predictions = []
-                for pred in predictions:
-                    if ((not source_city or pred.get('source_city') == source_city) and
-                        (not dest_city or pred.get('dest_city') == dest_city) and
-                        (not carrier or pred.get('carrier') == carrier)):
-                        filtered_predictions.append(pred)
-                
-                # Create filtered files
-                filtered_json = {
-                    "model_id": model_id,
-                    "prediction_time": data.get("prediction_time", datetime.now().isoformat()),
-                    "predictions": filtered_predictions,
-                    "filter_applied": {
-                        "source_city": source_city,
-                        "dest_city": dest_city,
-                        "carrier": carrier
-                    }
-                }
-                
-                # Save filtered JSON
-                filtered_json_path = os.path.join(training_predictions_dir, "filtered_predictions.json")
-                with open(filtered_json_path, 'w') as f:
-                    json.dump(filtered_json, f, indent=2)
-                
-                # Save filtered CSV
-                filtered_csv_path = os.path.join(training_predictions_dir, "filtered_predictions.csv")
-                filtered_df = pd.DataFrame(filtered_predictions)
-                filtered_df.to_csv(filtered_csv_path, index=False)
-                
-                # Also create simplified filtered CSV if needed
-                if simplified and format.lower() == "csv":
-                    simplified_filtered_csv_path = os.path.join(training_predictions_dir, "filtered_predictions_simplified.csv")
-                    # Keep only the essential fields
-                    simplified_data = []
-                    for pred in filtered_predictions:
-                        simplified_pred = {
-                            'carrier': pred.get('carrier', ''),
-                            'source_city': pred.get('source_city', ''),
-                            'dest_city': pred.get('dest_city', '')
-                        }
-                        
-                        # Include state and country information if available (for new format)
-                        if "source_state" in pred:
-                            simplified_pred["source_state"] = pred.get("source_state", "")
-                        if "source_country" in pred:
-                            simplified_pred["source_country"] = pred.get("source_country", "")
-                        if "dest_state" in pred:
-                            simplified_pred["dest_state"] = pred.get("dest_state", "")
-                        if "dest_country" in pred:
-                            simplified_pred["dest_country"] = pred.get("dest_country", "")
-                        
-                        # Add predicted performance as the final field
-                        simplified_pred['predicted_performance'] = pred.get('predicted_performance', 0)
-                        
-                        simplified_data.append(simplified_pred)
-                    simplified_df = pd.DataFrame(simplified_data)
-                    simplified_df.to_csv(simplified_filtered_csv_path, index=False)
-                    filtered_csv_path = simplified_filtered_csv_path
-                
-                # Update file paths to use filtered data
-                json_file = filtered_json_path
-                csv_file = filtered_csv_path
-                
-            except Exception as e:
-                logger.error(f"Error filtering predictions: {str(e)}")
-                # Continue with unfiltered data if filtering fails
-                
-        # For unfiltered CSV, generate the simplified version if needed
-        if simplified and format.lower() == "csv" and not (source_city or dest_city or carrier):
-            # Check if simplified file exists, if not generate it
-            if not os.path.exists(simplified_csv_file):
-                try:
-                    from utils.file_converters import convert_tender_performance_simplified
-                    simplified_csv_path = convert_tender_performance_simplified(training_predictions_dir)
-                    if simplified_csv_path:
-                        csv_file = str(simplified_csv_path)
-                        logger.info(f"Generated simplified CSV file: {csv_file}")
-                except Exception as e:
-                    logger.error(f"Error generating simplified CSV: {str(e)}")
-                    # Continue with regular CSV if simplified generation fails
-            else:
-                csv_file = simplified_csv_file
-                logger.info(f"Using existing simplified CSV file: {csv_file}")
-        
-        if format.lower() == "json" and os.path.exists(json_file):
-            filename = f"tender_performance_predictions_{model_id}.json"
-            if source_city or dest_city or carrier:
-                filename = f"tender_performance_predictions_{model_id}_filtered.json"
-            
-            return FileResponse(
-                path=json_file,
-                filename=filename,
-                media_type="application/json"
-            )
-        elif format.lower() == "csv" and os.path.exists(csv_file):
-            filename = f"tender_performance_predictions_{model_id}.csv"
-            if source_city or dest_city or carrier:
-                filename = f"tender_performance_predictions_{model_id}_filtered.csv"
-            if simplified:
-                filename = f"tender_performance_predictions_{model_id}_simplified.csv"
-                if source_city or dest_city or carrier:
-                    filename = f"tender_performance_predictions_{model_id}_filtered_simplified.csv"
-                
-            return FileResponse(
-                path=csv_file,
-                filename=filename,
-                media_type="text/csv"
-            )
-        elif os.path.exists(json_file) and format.lower() == "csv":
-            # Try to generate CSV if it doesn't exist but JSON does
-            try:
-                if simplified:
-                    from utils.file_converters import convert_tender_performance_simplified
-                    csv_path = convert_tender_performance_simplified(training_predictions_dir)
-                else:
-                    from utils.file_converters import convert_tender_performance_training_predictions
-                    csv_path = convert_tender_performance_training_predictions(training_predictions_dir)
-                
-                if csv_path and os.path.exists(csv_path):
-                    filename = f"tender_performance_predictions_{model_id}.csv"
-                    if source_city or dest_city or carrier:
-                        filename = f"tender_performance_predictions_{model_id}_filtered.csv"
-                    if simplified:
-                        filename = f"tender_performance_predictions_{model_id}_simplified.csv"
-                        if source_city or dest_city or carrier:
-                            filename = f"tender_performance_predictions_{model_id}_filtered_simplified.csv"
-                    
-                    return FileResponse(
-                        path=str(csv_path),
-                        filename=filename,
-                        media_type="text/csv"
-                    )
-            except Exception as e:
-                logger.error(f"Failed to generate CSV on demand: {str(e)}")
-                
-            # Fallback to JSON if CSV generation failed
-            filename = f"tender_performance_predictions_{model_id}.json"
-            if source_city or dest_city or carrier:
-                filename = f"tender_performance_predictions_{model_id}_filtered.json"
-                
-            return FileResponse(
-                path=json_file,
-                filename=filename,
-                media_type="application/json",
-                headers={"X-File-Format-Fallback": "true"}
-            )
-        elif os.path.exists(csv_file) and format.lower() == "json":
-            # Return CSV if JSON doesn't exist
-            filename = f"tender_performance_predictions_{model_id}.csv"
-            if source_city or dest_city or carrier:
-                filename = f"tender_performance_predictions_{model_id}_filtered.csv"
-            if simplified:
-                filename = f"tender_performance_predictions_{model_id}_simplified.csv"
-                if source_city or dest_city or carrier:
-                    filename = f"tender_performance_predictions_{model_id}_filtered_simplified.csv"
-                
-            return FileResponse(
-                path=csv_file,
-                filename=filename,
-                media_type="text/csv",
-                headers={"X-File-Format-Fallback": "true"}
-            )
-        else:
+        json_file = _tender_predictions_file(model_service, model_id)
+        if not json_file:
             raise HTTPException(
                 status_code=404,
-                detail=f"No prediction files found for model {model_id}"
+                detail=f"Predictions not found for model {model_id} and could not be generated"
             )
+        
+        filtered = bool(source_city or dest_city or carrier)
+        simplify = simplified and format != "json"
+        filename = f"tender_performance_predictions_{model_id}"
+        if filtered:
+            filename += "_filtered"
+        if simplify:
+            filename += "_simplified"
+        
+        # Unfiltered downloads of files written with the predictions are served as they are
+        if not filtered:
+            stored_csv = json_file.parent / ("prediction_data_simplified.csv" if simplified else "prediction_data.csv")
+            if format == "json":
+                return FileResponse(path=json_file, filename=f"{filename}.json", media_type="application/json")
+            if format == "csv" and stored_csv.exists():
+                return FileResponse(path=stored_csv, filename=f"{filename}.csv", media_type="text/csv")
+        
+        # Otherwise filter, simplify and encode while streaming from the stored JSON
+        records = select_records(
+            iter_json_array(json_file), lane_filter(source_city, dest_city, carrier), simplify=simplify
+        )
+        header = {
+            "model_id": model_id,
+            "filter_applied": {"source_city": source_city, "dest_city": dest_city, "carrier": carrier}
+        }
+        return _stream_predictions(records, format, filename, header=header)
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
@@ -853,19 +901,61 @@ async def order_volume_by_lane(
         logger.error(f"Unexpected error in order_volume_by_lane endpoint: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
+@router.get("/order-volume/{model_id}/rollup", response_model=Dict[str, Any])
+async def get_order_volume_rollup(
+    model_id: str,
+    by: str = Query("total", description="Comma-separated dimensions: source, destination, type, month (at most two), or total"),
+    prediction_service: PredictionService = Depends(get_prediction_service)
+):
+    """
+    Get forecast totals of the latest order volume prediction, grouped by up to two dimensions.
+    
+    Served from rollups precomputed when the prediction was saved.
+    
+    - **model_id**: The ID of the model
+    - **by**: e.g. `source`, `destination,month`, `type` or `total`
+    """
+    try:
+        result = prediction_service.get_order_volume_rollup(model_id=model_id, by=by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting order volume rollup: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting order volume rollup: {str(e)}")
+    
+    if not result:
+        raise HTTPException(status_code=404, detail=f"Order volume predictions not found for model {model_id}")
+    return result
+
 @router.get("/order-volume/{model_id}/download")
 async def download_order_volume_predictions(
     model_id: str,
     format: Optional[str] = "csv",
+    source_city: Optional[str] = None,
+    destination_city: Optional[str] = None,
+    order_type: Optional[str] = None,
     prediction_service: PredictionService = Depends(get_prediction_service)
 ):
     """
     Download order volume predictions as CSV for a specific model.
     
+    Filtered downloads, and formats not stored with the predictions, are
+    streamed from the stored JSON.
+    
     - **model_id**: The ID of the model
-    - **format**: Format to download (csv or json, defaults to csv)
+    - **format**: Format to download (csv, csv.gz, ndjson or json, defaults to csv)
+    - **source_city**: Optional filter by source city
+    - **destination_city**: Optional filter by destination city
+    - **order_type**: Optional filter by order type
     """
     try:
+        format = (format or "csv").lower()
+        if format not in STREAM_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid format. Use one of: {', '.join(STREAM_FORMATS)}"
+            )
+        
         # Get the latest prediction for this model
         model_predictions = [p for p in prediction_service.list_predictions(model_id=model_id)
                            if p.get("model_type") == "order_volume"]
@@ -885,52 +975,45 @@ async def download_order_volume_predictions(
         csv_file = prediction_dir / "prediction_data.csv"
         json_file = prediction_dir / "prediction_data.json"
         
-        # Check if files exist
-        has_json = json_file.exists()
-        has_csv = csv_file.exists()
-        
-        # Try to generate CSV if it doesn't exist but JSON does
-        if not has_csv and has_json and format.lower() == "csv":
-            logger.info(f"CSV file not found for prediction {prediction_id}. Attempting to generate it.")
-            try:
-                from utils.file_converters import convert_order_volume_predictions
-                csv_path = convert_order_volume_predictions(prediction_dir)
-                has_csv = csv_path is not None and Path(csv_path).exists()
-                if has_csv:
-                    logger.info(f"Successfully generated CSV file on demand: {csv_path}")
-            except Exception as e:
-                logger.error(f"Failed to generate CSV on demand: {str(e)}")
-                has_csv = False
-        
-        # Check if user explicitly requested JSON
-        if format.lower() == "json" and has_json:
-            return FileResponse(
-                path=str(json_file),
-                filename=f"order_volume_predictions_{model_id}.json",
-                media_type="application/json"
-            )
+        filtered = bool(source_city or destination_city or order_type)
+        filename = f"order_volume_predictions_{model_id}" + ("_filtered" if filtered else "")
         
-        # Return CSV if available
-        if has_csv:
-            return FileResponse(
-                path=str(csv_file),
-                filename=f"order_volume_predictions_{model_id}.csv",
-                media_type="text/csv"
-            )
-        # Fallback to JSON if CSV not available
-        elif has_json:
-            logger.warning(f"CSV file not available for prediction {prediction_id}, serving JSON instead")
-            return FileResponse(
-                path=str(json_file),
-                filename=f"order_volume_predictions_{model_id}.json",
-                media_type="application/json",
-                headers={"X-File-Format-Fallback": "true"}
-            )
-        else:
+        # Unfiltered downloads of files written with the predictions are served as they are
+        if not filtered:
+            if format == "json" and json_file.exists():
+                return FileResponse(
+                    path=str(json_file),
+                    filename=f"{filename}.json",
+                    media_type="application/json"
+                )
+            if format == "csv" and csv_file.exists():
+                return FileResponse(
+                    path=str(csv_file),
+                    filename=f"{filename}.csv",
+                    media_type="text/csv"
+                )
+        
+        if not json_file.exists():
             raise HTTPException(
                 status_code=404,
                 detail=f"No prediction files found for model {model_id}"
             )
+        
+        # Otherwise filter and encode while streaming from the stored JSON
+        records = select_records(
+            iter_json_array(json_file),
+            lane_filter(source_city, destination_city, order_type=order_type)
+        )
+        header = {
+            "prediction_id": prediction_id,
+            "model_id": model_id,
+            "filter_applied": {
+                "source_city": source_city,
+                "destination_city": destination_city,
+                "order_type": order_type
+            }
+        }
+        return _stream_predictions(records, format, filename, header=header)
             
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -1011,8 +1094,7 @@ async def create_carrier_performance_prediction(
         }
         
         # Save metadata
-        prediction_service.metadata["predictions"][prediction_id] = metadata
-        prediction_service._save_metadata()
+        prediction_service._update_metadata(prediction_id, metadata)
         
         # Get full prediction details including ID
         prediction = {
@@ -1034,6 +1116,10 @@ async def create_carrier_performance_prediction(
 async def get_carrier_performance_predictions(
     model_id: str,
     simplified: bool = True,
+    format: str = Query("json", description="json (first 100 predictions) or ndjson (every prediction, streamed)"),
+    source_city: Optional[str] = None,
+    dest_city: Optional[str] = None,
+    carrier: Optional[str] = None,
     prediction_service: PredictionService = Depends(get_prediction_service)
 ):
     """
@@ -1045,6 +1131,10 @@ async def get_carrier_performance_predictions(
     
     - **model_id**: The ID of the model to retrieve predictions for
     - **simplified**: Whether to return simplified prediction data (default: True)
+    - **format**: json, or ndjson to stream the predictions as one JSON object per line
+    - **source_city**: Optional filter by source city
+    - **dest_city**: Optional filter by destination city
+    - **carrier**: Optional filter by carrier
     """
     try:
         # Get model metadata to confirm it exists
@@ -1064,70 +1154,51 @@ async def get_carrier_performance_predictions(
                 content={"detail": f"Model {model_id} is not a carrier performance model"}
             )
         
-        # Find the most recent prediction for this model
-        predictions = prediction_service.list_predictions(model_id=model_id)
+        predicate = lane_filter(source_city, dest_city, carrier)
         
-        if not predictions:
-            # If no prediction exists, try to generate one
-            logger.info(f"No existing prediction for model {model_id}. Generating new predictions.")
-            
-            result = model_service.predict_carrier_performance_on_training_data(model_id=model_id)
-            if not result:
+        # Stream every prediction straight from the stored file
+        if format.lower() == "ndjson":
+            json_file = _carrier_predictions_file(prediction_service, model_service, model_id)
+            if not json_file:
                 return JSONResponse(
                     status_code=500,
                     content={"detail": f"Failed to generate predictions for model {model_id}"}
                 )
-            
-            # Get the predictions we just created
-            predictions = prediction_service.list_predictions(model_id=model_id)
-            if not predictions:
-                return JSONResponse(
-                    status_code=500,
-                    content={"detail": "Failed to retrieve newly generated predictions"}
-                )
+            records = select_records(iter_json_array(json_file), predicate, simplify=simplified)
+            if simplified:
+                records = (dict(record, predicted_ontime_performance=record["predicted_performance"])
+                           for record in records)
+            return _stream_predictions(records, "ndjson", filename=None)
         
-        # Get the most recent prediction
-        latest_prediction = predictions[0]
-        prediction_id = latest_prediction["prediction_id"]
+        # Read the first page of the most recent predictions and count the rest
+        latest_prediction = _latest_carrier_prediction(prediction_service, model_service, model_id)
+        if not latest_prediction:
+            return JSONResponse(
+                status_code=500,
+                content={"detail": f"Failed to generate predictions for model {model_id}"}
+            )
         
-        # Get the full prediction data
-        prediction = prediction_service.get_prediction(prediction_id)
-        if not prediction:
+        prediction_id = latest_prediction["prediction_id"]
+        json_file = find_file(latest_prediction["prediction_file"])
+        if not json_file:
             return JSONResponse(
                 status_code=404,
                 content={"detail": f"Prediction {prediction_id} not found"}
             )
         
-        # Filter the data based on simplified flag
-        if simplified and "data" in prediction and "predictions" in prediction["data"]:
-            simplified_predictions = []
-            for pred in prediction["data"]["predictions"]:
-                # Build simplified prediction with correct field order
-                simplified_pred = {
-                    "carrier": pred.get("carrier", ""),
-                    "source_city": pred.get("source_city", ""),
-                    "dest_city": pred.get("dest_city", ""),
-                    "predicted_performance": pred.get("predicted_performance", 0)
-                }
-                
-                # Include state and country information if available (for new format)
-                if "source_state" in pred:
-                    simplified_pred["source_state"] = pred.get("source_state", "")
-                if "source_country" in pred:
-                    simplified_pred["source_country"] = pred.get("source_country", "")
-                if "dest_state" in pred:
-                    simplified_pred["dest_state"] = pred.get("dest_state", "")
-                if "dest_country" in pred:
-                    simplified_pred["dest_country"] = pred.get("dest_country", "")
-                
-                # Add predicted performance as the final field
-                simplified_pred["predicted_ontime_performance"] = pred.get("predicted_performance", 0)
-                
-                simplified_predictions.append(simplified_pred)
-            
-            prediction["data"]["predictions"] = simplified_predictions
+        fields = {}
+        records = select_records(iter_json_array(json_file, fields=fields), predicate, simplify=simplified)
+        if simplified:
+            records = (dict(record, predicted_ontime_performance=record["predicted_performance"])
+                       for record in records)
+        predictions, prediction_count = _first_page(records)
         
-        return prediction
+        return {
+            "prediction_id": prediction_id,
+            **latest_prediction,
+            "data": {**fields, "predictions": predictions, "prediction_count": prediction_count},
+            "note": f"Only showing first {LISTING_PAGE_SIZE} predictions in the API response. Full data available via download endpoint or with format=ndjson."
+        }
         
     except Exception as e:
         logger.error(f"Error retrieving carrier performance predictions: {str(e)}")
@@ -1306,6 +1377,45 @@ async def get_carrier_performance_by_lane(
         logger.error(f"Error retrieving carrier performance by lane: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/carrier-performance/{model_id}/by-lanes", response_model=Dict[str, Any])
+async def get_carrier_performance_by_lanes(
+    model_id: str,
+    request: BulkLaneRequest,
+    prediction_service: PredictionService = Depends(get_prediction_service)
+):
+    """
+    Get carrier performance predictions for many lanes in one request.
+    
+    Lanes are resolved against an in-memory index of the model's latest stored
+    predictions. `results[i]` answers `lanes[i]`, with `source` set to `stored`,
+    `scored` (with `score_missing`) or `not_found`.
+    
+    - **model_id**: The ID of the model
+    - **lanes**: Lanes with `source_city`, `dest_city` and optional `carrier` and location fields
+    - **score_missing**: Score lanes with a carrier that have no stored predictions
+    - **simplified**: Whether to return simplified predictions (defaults to True)
+    """
+    model_service = prediction_service.model_service
+    model_metadata = model_service.get_model_metadata(model_id)
+    if not model_metadata:
+        raise HTTPException(status_code=404, detail=f"Model {model_id} not found")
+    if model_metadata.get("model_type") != "carrier_performance":
+        raise HTTPException(status_code=400, detail=f"Model {model_id} is not a carrier performance model")
+    
+    try:
+        json_file = await run_in_threadpool(_carrier_predictions_file, prediction_service, model_service, model_id)
+        if not json_file:
+            raise HTTPException(status_code=500, detail=f"Failed to generate predictions for model {model_id}")
+        
+        return await run_in_threadpool(
+            _performance_by_lanes, "carrier_performance", model_id, request, json_file, model_service
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving carrier performance by lanes: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving predictions by lanes: {str(e)}")
+
 @router.get("/carrier-performance/{model_id}/download")
 async def download_carrier_performance_predictions(
     model_id: str,
@@ -1319,23 +1429,25 @@ async def download_carrier_performance_predictions(
     """
     Download carrier performance predictions.
     
-    This endpoint allows downloading the prediction data in either CSV or JSON format.
-    The data can be filtered by source city, destination city, and carrier, and
-    can be simplified to include only essential fields.
+    This endpoint allows downloading the prediction data as CSV, gzipped CSV,
+    NDJSON or JSON. The data can be filtered by source city, destination city,
+    and carrier, and can be simplified to include only essential fields.
+    Filtered and simplified downloads are streamed from the stored predictions.
     
     - **model_id**: The ID of the model to download predictions for
-    - **format**: The format to download (csv or json, default: csv)
-    - **simplified**: Whether to download simplified data (default: True)
+    - **format**: The format to download (csv, csv.gz, ndjson or json, default: csv)
+    - **simplified**: Whether to keep only essential fields in csv and ndjson downloads (default: True)
     - **source_city**: Optional source city to filter by
     - **dest_city**: Optional destination city to filter by
     - **carrier**: Optional carrier to filter by
     """
     try:
         # Validate the format
-        if format.lower() not in ["csv", "json"]:
+        format = format.lower()
+        if format not in STREAM_FORMATS:
             return JSONResponse(
                 status_code=400,
-                content={"detail": "Invalid format. Use 'csv' or 'json'."}
+                content={"detail": f"Invalid format. Use one of: {', '.join(STREAM_FORMATS)}"}
             )
         
         # Get model metadata to confirm it exists
@@ -1355,161 +1467,139 @@ async def download_carrier_performance_predictions(
                 content={"detail": f"Model {model_id} is not a carrier performance model"}
             )
         
-        # Find the most recent prediction for this model
-        predictions = prediction_service.list_predictions(model_id=model_id)
-        
-        if not predictions:
-            # If no prediction exists, try to generate one
-            logger.info(f"No existing prediction for model {model_id}. Generating new predictions.")
-            
-            result = model_service.predict_carrier_performance_on_training_data(model_id=model_id)
-            if not result:
-                return JSONResponse(
-                    status_code=500,
-                    content={"detail": f"Failed to generate predictions for model {model_id}"}
-                )
-            
-            # Get the predictions we just created
-            predictions = prediction_service.list_predictions(model_id=model_id)
-            if not predictions:
-                return JSONResponse(
-                    status_code=500,
-                    content={"detail": "Failed to retrieve newly generated predictions"}
-                )
-        
-        # Get the most recent prediction
-        latest_prediction = predictions[0]
-        prediction_id = latest_prediction["prediction_id"]
-        
-        # Get the prediction directory
-        prediction_dir = prediction_service.base_path / prediction_id
-        
-        # Determine the file path based on format and simplified flag
-        file_path = None
-        content_type = "application/octet-stream"
-        
-        if format.lower() == "csv":
-            # If we need filtering, we'll need to generate a custom CSV
-            if source_city or dest_city or carrier:
-                # Get filtered data first
-                response = await get_carrier_performance_by_lane(
-                    model_id=model_id,
-                    source_city=source_city or "ALL",
-                    dest_city=dest_city or "ALL",
-                    carrier=carrier,
-                    simplified=simplified,
-                    prediction_service=prediction_service
-                )
-                
-                # Create a custom CSV file
-                filtered_predictions = response.get("predictions", [])
-                
-                if not filtered_predictions:
-                    return JSONResponse(
-                        status_code=404,
-                        content={"detail": "No predictions found matching the filter criteria"}
-                    )
-                
-                # Create a pandas DataFrame and save to CSV
-                df = pd.DataFrame(filtered_predictions)
-                
-                # Create a filename with filter info
-                filter_info = ""
-                if source_city:
-                    filter_info += f"_src_{source_city}"
-                if dest_city:
-                    filter_info += f"_dst_{dest_city}"
-                if carrier:
-                    filter_info += f"_carrier_{carrier}"
-                
-                # Save to a temporary file
-                import tempfile
-                temp_dir = Path(tempfile.gettempdir())
-                
-                filtered_file = temp_dir / f"carrier_performance_{model_id}{filter_info}_{datetime.now().strftime('%Y%m%d%H%M%S')}.csv"
-                df.to_csv(filtered_file, index=False)
-                
-                file_path = filtered_file
-                
-            else:
-                # Use existing CSV files
-                if simplified:
-                    file_path = prediction_dir / "prediction_data_simplified.csv"
-                    if not file_path.exists():
-                        # Try to generate it
-                        try:
-                            from utils.file_converters import convert_carrier_performance_simplified
-                            file_path = convert_carrier_performance_simplified(prediction_dir)
-                        except Exception as e:
-                            logger.error(f"Error generating simplified CSV: {str(e)}")
-                            
-                else:
-                    file_path = prediction_dir / "prediction_data.csv"
-                    if not file_path.exists():
-                        # Try to generate it
-                        try:
-                            from utils.file_converters import convert_carrier_performance_training_predictions
-                            file_path = convert_carrier_performance_training_predictions(prediction_dir)
-                        except Exception as e:
-                            logger.error(f"Error generating CSV: {str(e)}")
-            
-            content_type = "text/csv"
-            
-        else:  # JSON format
-            json_file = prediction_dir / "prediction_data.json"
-            
-            if source_city or dest_city or carrier:
-                # Get filtered data
-                response = await get_carrier_performance_by_lane(
-                    model_id=model_id,
-                    source_city=source_city or "ALL",
-                    dest_city=dest_city or "ALL",
-                    carrier=carrier,
-                    simplified=simplified,
-                    prediction_service=prediction_service
-                )
-                
-                # Create a temporary JSON file
-                import tempfile
-                temp_dir = Path(tempfile.gettempdir())
-                
-                filter_info = ""
-                if source_city:
-                    filter_info += f"_src_{source_city}"
-                if dest_city:
-                    filter_info += f"_dst_{dest_city}"
-                if carrier:
-                    filter_info += f"_carrier_{carrier}"
-                
-                filtered_file = temp_dir / f"carrier_performance_{model_id}{filter_info}_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
-                
-                with open(filtered_file, "w") as f:
-                    json.dump(response, f, indent=2)
-                
-                file_path = filtered_file
-                
-            else:
-                file_path = json_file
-            
-            content_type = "application/json"
-        
-        # Check if file exists
-        if not file_path or not file_path.exists():
+        json_file = _carrier_predictions_file(prediction_service, model_service, model_id)
+        if not json_file:
             return JSONResponse(
-                status_code=404,
-                content={"detail": f"Prediction file not found in format {format}"}
+                status_code=500,
+                content={"detail": f"Failed to generate predictions for model {model_id}"}
             )
         
-        # Generate a filename for the download
-        filename = file_path.name
-        
-        # Return the file
-        return FileResponse(
-            path=file_path,
-            media_type=content_type,
-            filename=filename
+        filtered = bool(source_city or dest_city or carrier)
+        simplify = simplified and format != "json"
+        filename = f"carrier_performance_{model_id}"
+        if source_city:
+            filename += f"_src_{source_city}"
+        if dest_city:
+            filename += f"_dst_{dest_city}"
+        if carrier:
+            filename += f"_carrier_{carrier}"
+        
+        # Unfiltered downloads of files written with the predictions are served as they are
+        if not filtered:
+            stored_csv = json_file.parent / ("prediction_data_simplified.csv" if simplified else "prediction_data.csv")
+            if format == "json":
+                return FileResponse(path=json_file, media_type="application/json", filename=json_file.name)
+            if format == "csv" and stored_csv.exists():
+                return FileResponse(path=stored_csv, media_type="text/csv", filename=stored_csv.name)
+        
+        # Otherwise filter, simplify and encode while streaming from the stored JSON
+        records = select_records(
+            iter_json_array(json_file), lane_filter(source_city, dest_city, carrier), simplify=simplify
         )
+        header = {
+            "prediction_id": json_file.parent.name,
+            "model_id": model_id,
+            "source_city": source_city,
+            "dest_city": dest_city,
+            "carrier": carrier
+        }
+        return _stream_predictions(records, format, filename, header=header)
         
     except Exception as e:
         logger.error(f"Error downloading carrier performance predictions: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+@router.post("/maintenance/retention", response_model=Dict[str, Any])
+async def run_prediction_retention(
+    dry_run: bool = Query(False, description="Only report what would be archived and deleted"),
+    prediction_service: PredictionService = Depends(get_prediction_service)
+):
+    """
+    Apply the prediction retention policy now.
+    
+    Keeps the `PREDICTION_HOT_COUNT` most recent predictions of each model as they are,
+    compresses older ones in place and deletes the predictions and score caches of
+    deleted models. Returns the report with the bytes reclaimed.
+    """
+    from services.retention_service import RetentionService
+    
+    try:
+        return await run_in_threadpool(RetentionService(prediction_service).run, dry_run)
+    except Exception as e:
+        logger.error(f"Error running prediction retention: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error running prediction retention: {str(e)}")
+
+@router.post("/{model_type}/{model_id}/score-file")
+async def score_file(
+    model_type: str,
+    model_id: str,
+    background_tasks: BackgroundTasks,
+    file_id: str = Query(..., description="ID of the uploaded file to score"),
+    incremental: Optional[bool] = Query(None, description="Reuse cached scores of rows scored before")
+):
+    """
+    Score every row of an uploaded file with a registered model.
+    
+    The file is streamed in chunks through the model's vectorized feature path
+    by worker processes, and the scored rows are written incrementally to a
+    Parquet result. Scoring runs in the background; poll the returned job with
+    GET /predictions/score-jobs/{job_id} and download the result from
+    GET /predictions/score-jobs/{job_id}/download.
+    
+    Incremental jobs (the default) only send rows the model has not scored
+    before through it; unchanged rows reuse their cached scores.
+    
+    - **model_type**: order-volume, tender-performance or carrier-performance
+    - **model_id**: The ID of the model to score with
+    - **file_id**: The ID of the uploaded file
+    - **incremental**: Reuse cached scores (defaults to SCORING_INCREMENTAL)
+    """
+    from services.file_service import FileService
+    from services.model_service import ModelService
+    from services.scoring_service import PREDICTION_COLUMNS, ScoringService
+    
+    model_type = model_type.replace("-", "_")
+    if model_type not in PREDICTION_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unsupported model type: {model_type}")
+    
+    metadata = ModelService().get_model_metadata(model_id)
+    if not metadata or metadata.get("model_type") != model_type:
+        raise HTTPException(status_code=404, detail=f"No {model_type} model with ID {model_id}")
+    
+    file_path = FileService().get_file_path(file_id)
+    if not file_path or not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail=f"File with ID {file_id} not found")
+    
+    scoring_service = ScoringService()
+    job = scoring_service.create_job(model_type, model_id, file_id, file_path, incremental=incremental)
+    background_tasks.add_task(scoring_service.run_job, job["job_id"])
+    
+    return job
+
+@router.get("/score-jobs/{job_id}")
+async def get_scoring_job(job_id: str):
+    """Get the status and progress of a file scoring job."""
+    from services.scoring_service import ScoringService
+    
+    job = ScoringService().get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Scoring job {job_id} not found")
+    
+    return job
+
+@router.get("/score-jobs/{job_id}/download")
+async def download_scoring_result(job_id: str):
+    """Download the Parquet result of a completed file scoring job."""
+    from services.scoring_service import ScoringService
+    
+    job = ScoringService().get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Scoring job {job_id} not found")
+    
+    if job["status"] != "completed" or not job.get("result_path") or not os.path.exists(job["result_path"]):
+        raise HTTPException(status_code=409, detail=f"Scoring job {job_id} is {job['status']}")
+    
+    return FileResponse(
+        path=job["result_path"],
+        media_type="application/vnd.apache.parquet",
+        filename=f"{job_id}.parquet"
+    )
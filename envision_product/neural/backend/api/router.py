@@ -4,10 +4,14 @@ from .files import router as files_router
 from .data import router as data_router
 from .models import router as models_router
 from .predictions import router as predictions_router
+from .lanes import router as lanes_router
+from .diagnostics import router as diagnostics_router
 
 router = APIRouter()
 
 router.include_router(files_router, prefix="/files", tags=["files"])
 router.include_router(data_router, prefix="/data", tags=["data"])
 router.include_router(models_router, tags=["models"])
-router.include_router(predictions_router, tags=["predictions"]) 
\ No newline at end of file
+router.include_router(predictions_router, tags=["predictions"])
+router.include_router(lanes_router, tags=["lanes"])
+router.include_router(diagnostics_router, tags=["diagnostics"]) 
\ No newline at end of file
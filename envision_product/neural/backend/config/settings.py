@@ -7,6 +7,8 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = True
+    HTTP_CACHE_MAX_AGE: int = 300  # Cache-Control max-age (seconds) for versioned resources
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # smallest response body (bytes) that is compressed
     
     # CORS settings
     CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:5173"]
@@ -14,9 +16,32 @@ class Settings(BaseSettings):
     # File storage settings
     STORAGE_PATH: str = "./storage"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    PREVIEW_CHUNK_ROWS: int = 100_000  # rows per chunk when profiling an upload
+    PREVIEW_WORKERS: int = 4  # chunks profiled concurrently
     
     # Training settings
     MAX_TRAINING_TIME: int = 3600  # 1 hour in seconds
+    DRAFT_TIME_BUDGET: int = 60  # seconds a draft training run may take
+    CATEGORICAL_ENCODING: str = "onehot"  # onehot or hashing (fixed-width hashed features)
+    HASH_FEATURES: int = 64  # hashed feature columns per categorical column
+    
+    # Inference settings
+    INFERENCE_BACKEND: str = "keras"  # keras, onnx or numpy
+    XLA_INFERENCE: bool = True  # serve keras models through XLA functions compiled per batch-size bucket
+    SERVE_COMPRESSED_WEIGHTS: bool = False  # serve quantized weights of compressed models even when the float32 export exists
+    INFERENCE_AUTOTUNE: bool = True  # benchmark inference threads and batch size on startup until tuned for this host
+    API_WORKERS: int = 0  # uvicorn workers sharing the host's cores (0 = WEB_CONCURRENCY or 1)
+    DISTILLATION_FIDELITY_TOLERANCE: float = 1.0  # max student MAE vs teacher (percentage points) to serve it
+    SCORING_WORKERS: int = 0  # processes scoring file chunks (0 = one per CPU)
+    SCORING_CHUNK_ROWS: int = 50_000  # rows per chunk when scoring a file
+    SCORING_INCREMENTAL: bool = True  # reuse cached scores of rows scored before
+    SCORE_CACHE_MAX_ROWS: int = 5_000_000  # rows kept per model in the score cache
+    PREDICTION_HOT_COUNT: int = 3  # most recent predictions per model kept uncompressed
+    ARCHIVE_CODEC: str = "zstd"  # zstd (needs zstandard, else gzip) or gzip for older predictions
+    RETENTION_INTERVAL_HOURS: float = 24  # hours between prediction retention runs (0 disables)
+    WARM_UP_ON_STARTUP: bool = True  # import the model runtime in the background after startup
+    MODEL_SHARING: bool = False  # serve memory-mapped weights shared by all workers
+    SHARED_MODEL_PATH: str = ""  # published models directory (default /dev/shm/envision_models)
 
     class Config:
         env_file = ".env"
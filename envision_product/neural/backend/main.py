@@ -3,9 +3,11 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import os
+import threading
 from pathlib import Path
 import uvicorn
 
+from api.caching import add_http_caching
 from api.router import router as api_router
 
 # Import configuration
@@ -25,6 +27,9 @@ app = FastAPI(
     version="0.1.0",
 )
 
+# Add HTTP caching and compression (before CORS, which must stay outermost)
+add_http_caching(app)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +54,40 @@ for directory in data_dirs:
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
+@app.on_event("startup")
+async def tune_inference():
+    """Apply this host's inference tuning, benchmarking in the background if there is none."""
+    if settings.INFERENCE_AUTOTUNE:
+        from services.inference_tuner import InferenceTuner, autotune
+        tuner = InferenceTuner()
+        # Applied before the warm-up imports the model runtime, which sizes its thread pools once
+        if tuner.is_current(tuner.get_tuning()):
+            tuner.apply()
+        else:
+            threading.Thread(target=autotune, name="inference-autotune", daemon=True).start()
+
+@app.on_event("startup")
+async def warm_up_models():
+    """Import the model runtime in the background once the server is up."""
+    if settings.WARM_UP_ON_STARTUP:
+        from services.model_service import warm_up
+        threading.Thread(target=warm_up, name="model-warm-up", daemon=True).start()
+
+@app.on_event("startup")
+async def start_prediction_retention():
+    """Run the prediction retention job periodically in the background."""
+    if settings.RETENTION_INTERVAL_HOURS > 0:
+        from services.retention_service import run_retention_loop
+        app.state.retention_stop = threading.Event()
+        threading.Thread(target=run_retention_loop, args=(settings.RETENTION_INTERVAL_HOURS, app.state.retention_stop),
+                         name="prediction-retention", daemon=True).start()
+
+@app.on_event("shutdown")
+async def stop_prediction_retention():
+    """Stop the background prediction retention job."""
+    if getattr(app.state, "retention_stop", None):
+        app.state.retention_stop.set()
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -1,6 +1,20 @@
 # Models package
-# This package contains machine learning model implementations 
+# This package contains machine learning model implementations
 
-from .order_volume_model import OrderVolumeModel
-from .tender_performance_model import TenderPerformanceModel
-from .carrier_performance_model import CarrierPerformanceModel 
\ No newline at end of file
+# Model classes are imported on first attribute access so that importing the
+# package does not load scikit-learn or TensorFlow
+_LAZY_CLASSES = {
+    "OrderVolumeModel": ".order_volume_model",
+    "TenderPerformanceModel": ".tender_performance_model",
+    "CarrierPerformanceModel": ".carrier_performance_model",
+}
+
+__all__ = list(_LAZY_CLASSES)
+
+
+def __getattr__(name):
+    if name in _LAZY_CLASSES:
+        import importlib
+        module = importlib.import_module(_LAZY_CLASSES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
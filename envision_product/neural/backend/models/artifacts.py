@@ -0,0 +1,346 @@
+"""
+Compressed model artifact format.
+
+A compressed model directory stores:
+
+- ``model_weights_compressed.npz``: Dense kernels quantized to float16, or to
+  int8 with one float32 scale per tensor (biases stay float32)
+- ``vocab.json``: encoder categories and scaler statistics as plain JSON
+  instead of pickled scikit-learn objects
+- ``artifact.json``: manifest with the precision, sizes and accuracy delta
+
+Loading dequantizes the weights into a ``NumpyInferenceModel`` and rebuilds
+the encoders as ``VocabularyEncoder``/``VocabularyScaler`` objects, which
+implement the subset of the scikit-learn API the model classes use for
+prediction (``transform`` and ``categories_``). Hashing encoders have no
+vocabulary and are stored by their width.
+"""
+
+import os
+import json
+import pickle
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .features import HashingEncoder
+from .inference import (
+    KERAS_MODEL_FILE,
+    NUMPY_WEIGHTS_FILE,
+    ONNX_MODEL_FILE,
+    NumpyInferenceModel,
+    load_numpy_weights,
+)
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED_WEIGHTS_FILE = "model_weights_compressed.npz"
+VOCAB_FILE = "vocab.json"
+ARTIFACT_MANIFEST = "artifact.json"
+
+PRECISIONS = ("float16", "int8")
+
+# Pickled preprocessor files written by the model classes
+PREPROCESSOR_FILES = ("preprocessors.pkl", "encoders.pkl")
+
+# Float32 files that the compressed artifact replaces
+ORIGINAL_FILES = (KERAS_MODEL_FILE, ONNX_MODEL_FILE, NUMPY_WEIGHTS_FILE, "sample_features.csv") + PREPROCESSOR_FILES
+
+
+def quantize_tensor(tensor: np.ndarray, precision: str) -> Dict[str, np.ndarray]:
+    """Quantize a float32 tensor.
+
+    Args:
+        tensor: Tensor to quantize
+        precision: float16 or int8
+
+    Returns:
+        Dictionary with ``values`` and, for int8, a per-tensor ``scale``
+    """
+    if precision == "float16":
+        return {"values": tensor.astype(np.float16)}
+
+    if precision == "int8":
+        max_abs = float(np.max(np.abs(tensor))) if tensor.size else 0.0
+        scale = max_abs / 127.0 if max_abs > 0 else 1.0
+        values = np.clip(np.rint(tensor / scale), -127, 127).astype(np.int8)
+        return {"values": values, "scale": np.float32(scale)}
+
+    raise ValueError(f"Unknown precision: {precision}. Expected one of {PRECISIONS}")
+
+
+def dequantize_tensor(values: np.ndarray, scale: Optional[float] = None) -> np.ndarray:
+    """Restore a float32 tensor from its quantized values."""
+    if scale is None:
+        return values.astype(np.float32)
+    return values.astype(np.float32) * np.float32(scale)
+
+
+def save_compressed_weights(dense_layers: List[Dict[str, Any]], path: str, precision: str = "int8") -> None:
+    """Save Dense layers with quantized kernels.
+
+    Args:
+        dense_layers: Layers as returned by ``extract_dense_layers``
+        path: Output ``.npz`` file path
+        precision: float16 or int8
+    """
+    arrays = {
+        "activations": np.array([layer["activation"] for layer in dense_layers]),
+        "precision": np.array(precision)
+    }
+    for i, layer in enumerate(dense_layers):
+        quantized = quantize_tensor(layer["kernel"], precision)
+        arrays[f"kernel_{i}"] = quantized["values"]
+        if "scale" in quantized:
+            arrays[f"kernel_scale_{i}"] = quantized["scale"]
+        arrays[f"bias_{i}"] = layer["bias"].astype(np.float32)
+    np.savez_compressed(path, **arrays)
+
+
+def load_compressed_weights(path: str) -> List[Dict[str, Any]]:
+    """Load and dequantize Dense layers saved by ``save_compressed_weights``.
+
+    Args:
+        path: Path to the ``.npz`` file
+
+    Returns:
+        List of dictionaries with float32 ``kernel``, ``bias`` and ``activation``
+    """
+    with np.load(path, allow_pickle=False) as data:
+        activations = [str(activation) for activation in data["activations"]]
+        dense_layers = []
+        for i, activation in enumerate(activations):
+            scale_key = f"kernel_scale_{i}"
+            scale = float(data[scale_key]) if scale_key in data.files else None
+            dense_layers.append({
+                "kernel": dequantize_tensor(data[f"kernel_{i}"], scale),
+                "bias": data[f"bias_{i}"].astype(np.float32),
+                "activation": activation
+            })
+        return dense_layers
+
+
+class VocabularyEncoder:
+    """One-hot encoder rebuilt from a stored category list.
+
+    Matches ``OneHotEncoder(sparse_output=False, handle_unknown='ignore')``:
+    unknown values encode to an all-zero row.
+    """
+
+    def __init__(self, categories: List[Any]) -> None:
+        self.categories_ = [np.array(categories, dtype=object)]
+        self._index = pd.Index(self.categories_[0])
+
+    def transform(self, X) -> np.ndarray:
+        """One-hot encode the first column of ``X``."""
+        values = np.asarray(X, dtype=object)
+        if values.ndim == 2:
+            values = values[:, 0]
+
+        codes = self._index.get_indexer(values)
+        encoded = np.zeros((len(values), len(self._index)), dtype=np.float64)
+        known = codes >= 0
+        encoded[np.flatnonzero(known), codes[known]] = 1.0
+        return encoded
+
+
+class VocabularyScaler:
+    """Standard scaler rebuilt from stored means and scales."""
+
+    def __init__(self, mean: List[float], scale: List[float], columns: Optional[List[str]] = None) -> None:
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        if columns:
+            self.feature_names_in_ = np.array(columns, dtype=object)
+
+    def transform(self, X) -> np.ndarray:
+        """Standardize ``X`` with the stored statistics."""
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+def _to_json_value(value: Any) -> Any:
+    """Convert numpy scalars and arrays to JSON-serializable values."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_to_json_value(item) for item in value]
+    return value
+
+
+def encode_vocabularies(preprocessors: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a model's preprocessor dictionary into a JSON vocabulary.
+
+    Args:
+        preprocessors: Dictionary as pickled by the model classes
+
+    Returns:
+        JSON-serializable vocabulary dictionary
+    """
+    entries = {}
+    for name, value in preprocessors.items():
+        if value is None:
+            entries[name] = None
+        elif isinstance(value, HashingEncoder):
+            entries[name] = {
+                "type": "hashing",
+                "n_features": value.n_features,
+                "signed": value.signed,
+                "max_value": _to_json_value(value.max_value_)
+            }
+        elif hasattr(value, "categories_"):
+            entries[name] = {"type": "onehot", "categories": _to_json_value(value.categories_[0])}
+        elif hasattr(value, "mean_") and hasattr(value, "scale_"):
+            entries[name] = {
+                "type": "standard",
+                "mean": _to_json_value(value.mean_),
+                "scale": _to_json_value(value.scale_),
+                "columns": _to_json_value(getattr(value, "feature_names_in_", []))
+            }
+        else:
+            entries[name] = {"type": "value", "value": _to_json_value(value)}
+    return {"version": 1, "entries": entries}
+
+
+def decode_vocabularies(vocabulary: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild a preprocessor dictionary from a JSON vocabulary.
+
+    Args:
+        vocabulary: Dictionary produced by ``encode_vocabularies``
+
+    Returns:
+        Dictionary with the same keys as the pickled preprocessors
+    """
+    preprocessors = {}
+    for name, entry in vocabulary.get("entries", {}).items():
+        if entry is None:
+            preprocessors[name] = None
+        elif entry["type"] == "onehot":
+            preprocessors[name] = VocabularyEncoder(entry["categories"])
+        elif entry["type"] == "hashing":
+            encoder = HashingEncoder(entry["n_features"], entry.get("signed", True))
+            encoder.max_value_ = entry.get("max_value")
+            preprocessors[name] = encoder
+        elif entry["type"] == "standard":
+            preprocessors[name] = VocabularyScaler(entry["mean"], entry["scale"], entry.get("columns"))
+        else:
+            preprocessors[name] = entry.get("value")
+    return preprocessors
+
+
+def load_vocabularies(path: str) -> Optional[Dict[str, Any]]:
+    """Load the preprocessors of a model directory from ``vocab.json``.
+
+    Args:
+        path: Model directory
+
+    Returns:
+        Preprocessor dictionary, or None if the directory has no vocabulary
+    """
+    vocab_path = os.path.join(path, VOCAB_FILE)
+    if not os.path.exists(vocab_path):
+        return None
+
+    with open(vocab_path, "r") as f:
+        return decode_vocabularies(json.load(f))
+
+
+def load_compressed_model(path: str) -> Optional[NumpyInferenceModel]:
+    """Load the dequantized NumPy forward pass of a compressed model directory.
+
+    Args:
+        path: Model directory
+
+    Returns:
+        NumpyInferenceModel, or None if the directory has no compressed weights
+    """
+    weights_path = os.path.join(path, COMPRESSED_WEIGHTS_FILE)
+    if not os.path.exists(weights_path):
+        return None
+    return NumpyInferenceModel(load_compressed_weights(weights_path))
+
+
+def _directory_size(path: str, names) -> int:
+    """Total size in bytes of the named files that exist in ``path``."""
+    return sum(
+        os.path.getsize(os.path.join(path, name))
+        for name in names
+        if os.path.exists(os.path.join(path, name))
+    )
+
+
+def compress_model_directory(path: str, precision: str = "int8", drop_original: bool = False) -> Dict[str, Any]:
+    """Write the compressed artifact for a saved model directory.
+
+    The directory must contain the exported ``model_weights.npz`` (see
+    ``export_inference_artifacts``) and a pickled preprocessor file.
+
+    Args:
+        path: Model directory
+        precision: float16 or int8
+        drop_original: Remove the float32 model files afterwards. The model can
+            then only be served with the NumPy backend and cannot be retrained
+            from its weights.
+
+    Returns:
+        The manifest written to ``artifact.json``
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}. Expected one of {PRECISIONS}")
+
+    weights_path = os.path.join(path, NUMPY_WEIGHTS_FILE)
+    if not os.path.exists(weights_path):
+        raise FileNotFoundError(f"Exported weights not found at {weights_path}")
+
+    preprocessor_path = next(
+        (os.path.join(path, name) for name in PREPROCESSOR_FILES if os.path.exists(os.path.join(path, name))),
+        None
+    )
+    if preprocessor_path is None:
+        raise FileNotFoundError(f"No preprocessor file found in {path}")
+
+    original_bytes = _directory_size(path, ORIGINAL_FILES)
+
+    dense_layers = load_numpy_weights(weights_path)
+    save_compressed_weights(dense_layers, os.path.join(path, COMPRESSED_WEIGHTS_FILE), precision)
+
+    with open(preprocessor_path, "rb") as f:
+        preprocessors = pickle.load(f)
+    with open(os.path.join(path, VOCAB_FILE), "w") as f:
+        json.dump(encode_vocabularies(preprocessors), f)
+
+    # Measure the accuracy delta on one-hot-like inputs of the right width
+    rng = np.random.default_rng(42)
+    input_dim = dense_layers[0]["kernel"].shape[0]
+    X = (rng.random((1000, input_dim)) < 0.05).astype(np.float32)
+    reference = NumpyInferenceModel(dense_layers).predict(X)
+    compressed = NumpyInferenceModel(load_compressed_weights(os.path.join(path, COMPRESSED_WEIGHTS_FILE))).predict(X)
+    delta = np.abs(reference - compressed)
+
+    manifest = {
+        "format": "compressed",
+        "version": 1,
+        "precision": precision,
+        "original_bytes": original_bytes,
+        "compressed_bytes": _directory_size(path, (COMPRESSED_WEIGHTS_FILE, VOCAB_FILE)),
+        "mean_abs_delta": float(delta.mean()),
+        "max_abs_delta": float(delta.max()),
+        "original_files_dropped": drop_original
+    }
+    with open(os.path.join(path, ARTIFACT_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    if drop_original:
+        for name in ORIGINAL_FILES:
+            file_path = os.path.join(path, name)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    logger.info(
+        f"Compressed {path} to {precision}: {manifest['original_bytes']} -> {manifest['compressed_bytes']} bytes, "
+        f"max output delta {manifest['max_abs_delta']:.2e}"
+    )
+    return manifest
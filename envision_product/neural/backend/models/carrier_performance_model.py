@@ -4,25 +4,35 @@
 # and generates predictions for carrier on-time performance by carrier and lane.
 
 import os
+import time
 import pandas as pd
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras import layers, models
-from sklearn.preprocessing import StandardScaler, OneHotEncoder, LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import matplotlib.pyplot as plt
 from datetime import datetime
 import pickle
 import logging
 import json
-from typing import Dict, Optional, Any, List
+from typing import Callable, Dict, Optional, Any, List
+
+from .inference import import_tensorflow, load_inference_model, export_inference_artifacts, warm_start_weights
+from .artifacts import load_vocabularies
+from .features import (
+    DEFAULT_HASH_FEATURES,
+    assemble_features,
+    encoder_categories,
+    fit_one_hot,
+    group_infrequent,
+    group_unknown,
+    latest_category,
+    make_encoder,
+    one_hot_block,
+)
+from .preprocessing import fill_missing, lane_codes
+from .records import error_columns, frame_records, prediction_frame, write_records_json
 
 logger = logging.getLogger(__name__)
 
 # Set random seed for reproducibility
 np.random.seed(42)
-tf.random.set_seed(42)
 
 class CarrierPerformanceModel:
     """
@@ -32,15 +42,33 @@ class CarrierPerformanceModel:
     expanded geographic features including state and country information.
     """
     
-    def __init__(self, data_path: Optional[str] = None, model_path: Optional[str] = None) -> None:
+    def __init__(self, data_path: Optional[str] = None, model_path: Optional[str] = None,
+                 inference_backend: Optional[str] = None, encoding: str = 'onehot',
+                 hash_features: int = DEFAULT_HASH_FEATURES,
+                 inference_loader: Optional[Callable[[str, Optional[str]], Any]] = None) -> None:
         """Initialize the Carrier Performance prediction model.
         
         Args:
             data_path: Path to the CSV data file
             model_path: Path to load a pre-trained model
+            inference_backend: Backend used to serve a loaded model
+                (keras, onnx or numpy; defaults to keras)
+            encoding: Encoding of categorical columns when training: onehot,
+                or hashing for a fixed number of hashed feature columns per
+                column whatever the vocabulary (a loaded model keeps the
+                encoding it was trained with)
+            hash_features: Feature columns per categorical column with
+                hashing encoding
+            inference_loader: Function loading the network of a model
+                directory for a backend (defaults to load_inference_model;
+                ModelService passes its cached serving loader)
         """
         self.data_path = data_path
         self.model_path = model_path
+        self.inference_backend = inference_backend
+        self.inference_loader = inference_loader or load_inference_model
+        self.encoding = encoding
+        self.hash_features = hash_features
         self.model = None
         self.carrier_encoder = None
         self.source_city_encoder = None
@@ -99,8 +127,10 @@ class CarrierPerformanceModel:
     
     def load_data(self) -> pd.DataFrame:
         """Load and perform initial preprocessing of the data."""
+        from utils.columnar import read_table
+        
         logger.info(f"Loading data from {self.data_path}...")
-        self.raw_data = pd.read_csv(self.data_path)
+        self.raw_data = read_table(self.data_path, categorical=True)
         
         # Detect data format
         self.data_format = self._detect_data_format(self.raw_data)
@@ -109,7 +139,7 @@ class CarrierPerformanceModel:
         # Check data integrity
         if self.raw_data.isnull().sum().sum() > 0:
             logger.warning("Data contains missing values. Filling with appropriate values.")
-            self.raw_data.fillna(0, inplace=True)
+            fill_missing(self.raw_data, 0)
         
         logger.info(f"Data loaded successfully. Shape: {self.raw_data.shape}")
         return self.raw_data
@@ -130,61 +160,60 @@ class CarrierPerformanceModel:
     
     def _preprocess_new_format(self, data: pd.DataFrame) -> pd.DataFrame:
         """Preprocess data in the new format with tracking months and expanded location data."""
+        from sklearn.preprocessing import StandardScaler
+        
         logger.info("Preprocessing new format data with tracking months and expanded location features...")
         
-        # Create comprehensive lane identifier
-        data['LANE_ID'] = (data['SOURCE_CITY'] + '_' + data['SOURCE_STATE'] + '_' + 
-                          data['SOURCE_COUNTRY'] + '_TO_' + data['DEST_CITY'] + '_' + 
-                          data['DEST_STATE'] + '_' + data['DEST_COUNTRY'])
+        # Create comprehensive lane identifier (integer lane number, grouped on category codes)
+        data['LANE_ID'] = lane_codes(data, ['SOURCE_CITY', 'SOURCE_STATE', 'SOURCE_COUNTRY',
+                                            'DEST_CITY', 'DEST_STATE', 'DEST_COUNTRY'])
         
         # One-hot encoding for categorical variables
         logger.info("Encoding categorical variables for new format...")
         
         # Time encoding (tracking month)
-        self.time_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        time_encoded = self.time_encoder.fit_transform(data[['TRACKING_MONTH']])
+        self.time_encoder = make_encoder(self.encoding, self.hash_features)
+        time_encoded = fit_one_hot(self.time_encoder, data['TRACKING_MONTH'], 'TRACKING_MONTH')
         time_columns = [f'TRACKING_MONTH_{i}' for i in range(time_encoded.shape[1])]
         time_df = pd.DataFrame(time_encoded, columns=time_columns)
         
         # Carrier encoding
-        self.carrier_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        carrier_encoded = self.carrier_encoder.fit_transform(data[['CARRIER']])
+        self.carrier_encoder = make_encoder(self.encoding, self.hash_features)
+        carrier_encoded = fit_one_hot(self.carrier_encoder, data['CARRIER'], 'CARRIER')
         carrier_columns = [f'CARRIER_{i}' for i in range(carrier_encoded.shape[1])]
         carrier_df = pd.DataFrame(carrier_encoded, columns=carrier_columns)
         
         # Source location encoding
-        self.source_city_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_city_encoded = self.source_city_encoder.fit_transform(data[['SOURCE_CITY']])
+        self.source_city_encoder = make_encoder(self.encoding, self.hash_features)
+        source_city_encoded = fit_one_hot(self.source_city_encoder, data['SOURCE_CITY'], 'SOURCE_CITY')
         source_city_columns = [f'SOURCE_CITY_{i}' for i in range(source_city_encoded.shape[1])]
         source_city_df = pd.DataFrame(source_city_encoded, columns=source_city_columns)
         
-        self.source_state_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_state_encoded = self.source_state_encoder.fit_transform(data[['SOURCE_STATE']])
+        self.source_state_encoder = make_encoder(self.encoding, self.hash_features)
+        source_state_encoded = fit_one_hot(self.source_state_encoder, data['SOURCE_STATE'], 'SOURCE_STATE')
         source_state_columns = [f'SOURCE_STATE_{i}' for i in range(source_state_encoded.shape[1])]
         source_state_df = pd.DataFrame(source_state_encoded, columns=source_state_columns)
         
-        self.source_country_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_country_encoded = self.source_country_encoder.fit_transform(data[['SOURCE_COUNTRY']])
+        self.source_country_encoder = make_encoder(self.encoding, self.hash_features)
+        source_country_encoded = fit_one_hot(self.source_country_encoder, data['SOURCE_COUNTRY'], 'SOURCE_COUNTRY')
         source_country_columns = [f'SOURCE_COUNTRY_{i}' for i in range(source_country_encoded.shape[1])]
         source_country_df = pd.DataFrame(source_country_encoded, columns=source_country_columns)
         
         # Destination location encoding - handle high cardinality for cities
-        dest_city_counts = data['DEST_CITY'].value_counts()
-        top_dest_cities = dest_city_counts.nlargest(50).index.tolist()  # Use top 50 destination cities
-        data['DEST_CITY_GROUPED'] = data['DEST_CITY'].apply(lambda x: x if x in top_dest_cities else 'OTHER')
+        data['DEST_CITY_GROUPED'] = group_infrequent(data['DEST_CITY'], 50, self.encoding)  # Use top 50 destination cities
         
-        self.dest_city_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_city_encoded = self.dest_city_encoder.fit_transform(data[['DEST_CITY_GROUPED']])
+        self.dest_city_encoder = make_encoder(self.encoding, self.hash_features)
+        dest_city_encoded = fit_one_hot(self.dest_city_encoder, data['DEST_CITY_GROUPED'], 'DEST_CITY_GROUPED')
         dest_city_columns = [f'DEST_CITY_{i}' for i in range(dest_city_encoded.shape[1])]
         dest_city_df = pd.DataFrame(dest_city_encoded, columns=dest_city_columns)
         
-        self.dest_state_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_state_encoded = self.dest_state_encoder.fit_transform(data[['DEST_STATE']])
+        self.dest_state_encoder = make_encoder(self.encoding, self.hash_features)
+        dest_state_encoded = fit_one_hot(self.dest_state_encoder, data['DEST_STATE'], 'DEST_STATE')
         dest_state_columns = [f'DEST_STATE_{i}' for i in range(dest_state_encoded.shape[1])]
         dest_state_df = pd.DataFrame(dest_state_encoded, columns=dest_state_columns)
         
-        self.dest_country_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_country_encoded = self.dest_country_encoder.fit_transform(data[['DEST_COUNTRY']])
+        self.dest_country_encoder = make_encoder(self.encoding, self.hash_features)
+        dest_country_encoded = fit_one_hot(self.dest_country_encoder, data['DEST_COUNTRY'], 'DEST_COUNTRY')
         dest_country_columns = [f'DEST_COUNTRY_{i}' for i in range(dest_country_encoded.shape[1])]
         dest_country_df = pd.DataFrame(dest_country_encoded, columns=dest_country_columns)
         
@@ -237,14 +266,16 @@ class CarrierPerformanceModel:
         # Save information about the features for later use
         self.feature_info = {
             'data_format': 'new',
-            'time_categories': self.time_encoder.categories_[0].tolist(),
-            'carrier_categories': self.carrier_encoder.categories_[0].tolist(),
-            'source_city_categories': self.source_city_encoder.categories_[0].tolist(),
-            'source_state_categories': self.source_state_encoder.categories_[0].tolist(),
-            'source_country_categories': self.source_country_encoder.categories_[0].tolist(),
-            'dest_city_categories': self.dest_city_encoder.categories_[0].tolist(),
-            'dest_state_categories': self.dest_state_encoder.categories_[0].tolist(),
-            'dest_country_categories': self.dest_country_encoder.categories_[0].tolist(),
+            'encoding': self.encoding,
+            'hash_features': self.hash_features,
+            'time_categories': encoder_categories(self.time_encoder),
+            'carrier_categories': encoder_categories(self.carrier_encoder),
+            'source_city_categories': encoder_categories(self.source_city_encoder),
+            'source_state_categories': encoder_categories(self.source_state_encoder),
+            'source_country_categories': encoder_categories(self.source_country_encoder),
+            'dest_city_categories': encoder_categories(self.dest_city_encoder),
+            'dest_state_categories': encoder_categories(self.dest_state_encoder),
+            'dest_country_categories': encoder_categories(self.dest_country_encoder),
             'numerical_columns': numerical_cols if not numerical_df.empty else [],
             'feature_columns': self.feature_columns
         }
@@ -253,42 +284,41 @@ class CarrierPerformanceModel:
     
     def _preprocess_legacy_format(self, data: pd.DataFrame) -> pd.DataFrame:
         """Preprocess data in the legacy format with quarters and city-only location data."""
+        from sklearn.preprocessing import StandardScaler
+        
         logger.info("Preprocessing legacy format data with quarters...")
         
-        # Create lane identifier (combination of source and destination)
-        data['LANE_ID'] = data['SOURCE_CITY'] + '_' + data['DEST_CITY']
+        # Create lane identifier (integer number of each source and destination combination)
+        data['LANE_ID'] = lane_codes(data, ['SOURCE_CITY', 'DEST_CITY'])
         
         # One-hot encoding for categorical variables
         logger.info("Encoding categorical variables for legacy format...")
         
         # Quarter encoding
-        self.time_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        time_encoded = self.time_encoder.fit_transform(data[['QTR']])
+        self.time_encoder = make_encoder(self.encoding, self.hash_features)
+        time_encoded = fit_one_hot(self.time_encoder, data['QTR'], 'QTR')
         time_columns = [f'QTR_{i}' for i in range(time_encoded.shape[1])]
         time_df = pd.DataFrame(time_encoded, columns=time_columns)
         
         # Carrier encoding
-        self.carrier_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        carrier_encoded = self.carrier_encoder.fit_transform(data[['CARRIER']])
+        self.carrier_encoder = make_encoder(self.encoding, self.hash_features)
+        carrier_encoded = fit_one_hot(self.carrier_encoder, data['CARRIER'], 'CARRIER')
         carrier_columns = [f'CARRIER_{i}' for i in range(carrier_encoded.shape[1])]
         carrier_df = pd.DataFrame(carrier_encoded, columns=carrier_columns)
         
         # Source city encoding
-        self.source_city_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_encoded = self.source_city_encoder.fit_transform(data[['SOURCE_CITY']])
+        self.source_city_encoder = make_encoder(self.encoding, self.hash_features)
+        source_encoded = fit_one_hot(self.source_city_encoder, data['SOURCE_CITY'], 'SOURCE_CITY')
         source_columns = [f'SOURCE_{i}' for i in range(source_encoded.shape[1])]
         source_df = pd.DataFrame(source_encoded, columns=source_columns)
         
         # Destination city encoding - handle high cardinality
-        dest_counts = data['DEST_CITY'].value_counts()
-        top_dests = dest_counts.nlargest(50).index.tolist()  # Use top 50 destinations
-        
-        # Group less frequent destinations as 'OTHER'
-        data['DEST_CITY_GROUPED'] = data['DEST_CITY'].apply(lambda x: x if x in top_dests else 'OTHER')
+        # Group less frequent destinations as 'OTHER' (top 50 destinations are kept)
+        data['DEST_CITY_GROUPED'] = group_infrequent(data['DEST_CITY'], 50, self.encoding)
         
         # One-hot encode the grouped destinations
-        self.dest_city_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_encoded = self.dest_city_encoder.fit_transform(data[['DEST_CITY_GROUPED']])
+        self.dest_city_encoder = make_encoder(self.encoding, self.hash_features)
+        dest_encoded = fit_one_hot(self.dest_city_encoder, data['DEST_CITY_GROUPED'], 'DEST_CITY_GROUPED')
         dest_columns = [f'DEST_{i}' for i in range(dest_encoded.shape[1])]
         dest_df = pd.DataFrame(dest_encoded, columns=dest_columns)
         
@@ -339,10 +369,12 @@ class CarrierPerformanceModel:
         # Save information about the features for later use
         self.feature_info = {
             'data_format': 'legacy',
-            'quarter_categories': self.time_encoder.categories_[0].tolist(),
-            'carrier_categories': self.carrier_encoder.categories_[0].tolist(),
-            'source_categories': self.source_city_encoder.categories_[0].tolist(),
-            'dest_categories': self.dest_city_encoder.categories_[0].tolist(),
+            'encoding': self.encoding,
+            'hash_features': self.hash_features,
+            'quarter_categories': encoder_categories(self.time_encoder),
+            'carrier_categories': encoder_categories(self.carrier_encoder),
+            'source_categories': encoder_categories(self.source_city_encoder),
+            'dest_categories': encoder_categories(self.dest_city_encoder),
             'numerical_columns': numerical_cols if not numerical_df.empty else [],
             'feature_columns': self.feature_columns
         }
@@ -351,20 +383,21 @@ class CarrierPerformanceModel:
     
     def _preprocess_hybrid_format(self, data: pd.DataFrame) -> pd.DataFrame:
         """Preprocess data in the hybrid format with state/country data but possibly using quarters or no time dimension."""
+        from sklearn.preprocessing import StandardScaler
+        
         logger.info("Preprocessing hybrid format data with expanded location features...")
         
-        # Create comprehensive lane identifier
-        data['LANE_ID'] = (data['SOURCE_CITY'] + '_' + data['SOURCE_STATE'] + '_' + 
-                          data['SOURCE_COUNTRY'] + '_TO_' + data['DEST_CITY'] + '_' + 
-                          data['DEST_STATE'] + '_' + data['DEST_COUNTRY'])
+        # Create comprehensive lane identifier (integer lane number, grouped on category codes)
+        data['LANE_ID'] = lane_codes(data, ['SOURCE_CITY', 'SOURCE_STATE', 'SOURCE_COUNTRY',
+                                            'DEST_CITY', 'DEST_STATE', 'DEST_COUNTRY'])
         
         # One-hot encoding for categorical variables
         logger.info("Encoding categorical variables for hybrid format...")
         
         # Time encoding (if available)
         if 'QTR' in data.columns:
-            self.time_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-            time_encoded = self.time_encoder.fit_transform(data[['QTR']])
+            self.time_encoder = make_encoder(self.encoding, self.hash_features)
+            time_encoded = fit_one_hot(self.time_encoder, data['QTR'], 'QTR')
             time_columns = [f'QTR_{i}' for i in range(time_encoded.shape[1])]
             time_df = pd.DataFrame(time_encoded, columns=time_columns)
         else:
@@ -373,44 +406,42 @@ class CarrierPerformanceModel:
             time_df = pd.DataFrame({'DEFAULT_TIME': [1] * len(data)})
         
         # Carrier encoding
-        self.carrier_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        carrier_encoded = self.carrier_encoder.fit_transform(data[['CARRIER']])
+        self.carrier_encoder = make_encoder(self.encoding, self.hash_features)
+        carrier_encoded = fit_one_hot(self.carrier_encoder, data['CARRIER'], 'CARRIER')
         carrier_columns = [f'CARRIER_{i}' for i in range(carrier_encoded.shape[1])]
         carrier_df = pd.DataFrame(carrier_encoded, columns=carrier_columns)
         
         # Source location encoding
-        self.source_city_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_city_encoded = self.source_city_encoder.fit_transform(data[['SOURCE_CITY']])
+        self.source_city_encoder = make_encoder(self.encoding, self.hash_features)
+        source_city_encoded = fit_one_hot(self.source_city_encoder, data['SOURCE_CITY'], 'SOURCE_CITY')
         source_city_columns = [f'SOURCE_CITY_{i}' for i in range(source_city_encoded.shape[1])]
         source_city_df = pd.DataFrame(source_city_encoded, columns=source_city_columns)
         
-        self.source_state_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_state_encoded = self.source_state_encoder.fit_transform(data[['SOURCE_STATE']])
+        self.source_state_encoder = make_encoder(self.encoding, self.hash_features)
+        source_state_encoded = fit_one_hot(self.source_state_encoder, data['SOURCE_STATE'], 'SOURCE_STATE')
         source_state_columns = [f'SOURCE_STATE_{i}' for i in range(source_state_encoded.shape[1])]
         source_state_df = pd.DataFrame(source_state_encoded, columns=source_state_columns)
         
-        self.source_country_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_country_encoded = self.source_country_encoder.fit_transform(data[['SOURCE_COUNTRY']])
+        self.source_country_encoder = make_encoder(self.encoding, self.hash_features)
+        source_country_encoded = fit_one_hot(self.source_country_encoder, data['SOURCE_COUNTRY'], 'SOURCE_COUNTRY')
         source_country_columns = [f'SOURCE_COUNTRY_{i}' for i in range(source_country_encoded.shape[1])]
         source_country_df = pd.DataFrame(source_country_encoded, columns=source_country_columns)
         
         # Destination location encoding - handle high cardinality for cities
-        dest_city_counts = data['DEST_CITY'].value_counts()
-        top_dest_cities = dest_city_counts.nlargest(50).index.tolist()  # Use top 50 destination cities
-        data['DEST_CITY_GROUPED'] = data['DEST_CITY'].apply(lambda x: x if x in top_dest_cities else 'OTHER')
+        data['DEST_CITY_GROUPED'] = group_infrequent(data['DEST_CITY'], 50, self.encoding)  # Use top 50 destination cities
         
-        self.dest_city_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_city_encoded = self.dest_city_encoder.fit_transform(data[['DEST_CITY_GROUPED']])
+        self.dest_city_encoder = make_encoder(self.encoding, self.hash_features)
+        dest_city_encoded = fit_one_hot(self.dest_city_encoder, data['DEST_CITY_GROUPED'], 'DEST_CITY_GROUPED')
         dest_city_columns = [f'DEST_CITY_{i}' for i in range(dest_city_encoded.shape[1])]
         dest_city_df = pd.DataFrame(dest_city_encoded, columns=dest_city_columns)
         
-        self.dest_state_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_state_encoded = self.dest_state_encoder.fit_transform(data[['DEST_STATE']])
+        self.dest_state_encoder = make_encoder(self.encoding, self.hash_features)
+        dest_state_encoded = fit_one_hot(self.dest_state_encoder, data['DEST_STATE'], 'DEST_STATE')
         dest_state_columns = [f'DEST_STATE_{i}' for i in range(dest_state_encoded.shape[1])]
         dest_state_df = pd.DataFrame(dest_state_encoded, columns=dest_state_columns)
         
-        self.dest_country_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_country_encoded = self.dest_country_encoder.fit_transform(data[['DEST_COUNTRY']])
+        self.dest_country_encoder = make_encoder(self.encoding, self.hash_features)
+        dest_country_encoded = fit_one_hot(self.dest_country_encoder, data['DEST_COUNTRY'], 'DEST_COUNTRY')
         dest_country_columns = [f'DEST_COUNTRY_{i}' for i in range(dest_country_encoded.shape[1])]
         dest_country_df = pd.DataFrame(dest_country_encoded, columns=dest_country_columns)
         
@@ -463,15 +494,17 @@ class CarrierPerformanceModel:
         # Save information about the features for later use
         self.feature_info = {
             'data_format': 'hybrid',
+            'encoding': self.encoding,
+            'hash_features': self.hash_features,
             'has_qtr': 'QTR' in data.columns,
-            'time_categories': self.time_encoder.categories_[0].tolist() if hasattr(self.time_encoder, 'categories_') else [],
-            'carrier_categories': self.carrier_encoder.categories_[0].tolist(),
-            'source_city_categories': self.source_city_encoder.categories_[0].tolist(),
-            'source_state_categories': self.source_state_encoder.categories_[0].tolist(),
-            'source_country_categories': self.source_country_encoder.categories_[0].tolist(),
-            'dest_city_categories': self.dest_city_encoder.categories_[0].tolist(),
-            'dest_state_categories': self.dest_state_encoder.categories_[0].tolist(),
-            'dest_country_categories': self.dest_country_encoder.categories_[0].tolist(),
+            'time_categories': encoder_categories(self.time_encoder),
+            'carrier_categories': encoder_categories(self.carrier_encoder),
+            'source_city_categories': encoder_categories(self.source_city_encoder),
+            'source_state_categories': encoder_categories(self.source_state_encoder),
+            'source_country_categories': encoder_categories(self.source_country_encoder),
+            'dest_city_categories': encoder_categories(self.dest_city_encoder),
+            'dest_state_categories': encoder_categories(self.dest_state_encoder),
+            'dest_country_categories': encoder_categories(self.dest_country_encoder),
             'numerical_columns': numerical_cols if not numerical_df.empty else [],
             'feature_columns': self.feature_columns
         }
@@ -480,6 +513,8 @@ class CarrierPerformanceModel:
     
     def prepare_train_test_split(self, test_size=0.2):
         """Split the preprocessed data into training and testing sets."""
+        from sklearn.model_selection import train_test_split
+        
         logger.info(f"Splitting data with test_size={test_size}...")
         
         if self.preprocessed_data is None:
@@ -503,6 +538,8 @@ class CarrierPerformanceModel:
     def build_model(self):
         """Build the neural network model architecture."""
         logger.info("Building neural network model...")
+        tf = import_tensorflow()
+        layers, models = tf.keras.layers, tf.keras.models
         
         # Get input shape from training data
         input_dim = self.X_train.shape[1]
@@ -531,9 +568,27 @@ class CarrierPerformanceModel:
         model.summary()
         return model
     
+    def warm_start(self, path: str) -> bool:
+        """Initialize the network with the weights of a previously saved model.
+        
+        Models trained with hashing encoding keep their input width when the
+        data gains new carriers or locations, so retraining can continue
+        from the model it replaces.
+        
+        Args:
+            path: Directory of the saved model
+            
+        Returns:
+            True if the weights were loaded, False if the networks differ in shape
+        """
+        if self.model is None:
+            self.build_model()
+        return warm_start_weights(self.model, path)
+    
     def train(self, epochs=100, batch_size=32, validation_split=0.2, callbacks=None):
         """Train the neural network model."""
         logger.info(f"Training model with {epochs} epochs and batch_size={batch_size}...")
+        tf = import_tensorflow()
         
         if self.X_train is None or self.y_train is None:
             self.prepare_train_test_split()
@@ -572,6 +627,8 @@ class CarrierPerformanceModel:
     
     def evaluate(self, plot_path=None):
         """Evaluate the model performance on the test set."""
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        
         logger.info("Evaluating model performance...")
         
         if self.X_test is None or self.y_test is None:
@@ -603,6 +660,10 @@ class CarrierPerformanceModel:
         
         # Optionally plot actual vs predicted values
         if plot_path:
+            import matplotlib
+            matplotlib.use("Agg")  # headless backend, the API has no display
+            import matplotlib.pyplot as plt
+            
             plt.figure(figsize=(10, 6))
             plt.scatter(y_test_original, y_pred_original, alpha=0.5)
             plt.plot([0, 100], [0, 100], 'r--')
@@ -721,7 +782,7 @@ class CarrierPerformanceModel:
                 input_data['TRACKING_MONTH'] = [tracking_month]
             else:
                 # Use the most recent tracking month from training data
-                input_data['TRACKING_MONTH'] = [self.time_encoder.categories_[0][-1]]
+                input_data['TRACKING_MONTH'] = [latest_category(self.time_encoder)]
             
             # Add numerical features with defaults
             numerical_features = {}
@@ -753,9 +814,7 @@ class CarrierPerformanceModel:
             
             # Destination location encodings
             # Handle destination city grouping
-            dest_city_categories = self.dest_city_encoder.categories_[0]
-            dest_city_grouped = dest_city if dest_city in dest_city_categories else 'OTHER'
-            input_data['DEST_CITY_GROUPED'] = [dest_city_grouped]
+            input_data['DEST_CITY_GROUPED'] = group_unknown(input_data['DEST_CITY'], self.dest_city_encoder)
             
             dest_city_encoded = self.dest_city_encoder.transform(input_data[['DEST_CITY_GROUPED']])
             dest_city_df = pd.DataFrame(dest_city_encoded, columns=[f'DEST_CITY_{i}' for i in range(dest_city_encoded.shape[1])])
@@ -865,9 +924,9 @@ class CarrierPerformanceModel:
                 # Quarter encoding
                 time_encoded = self.time_encoder.transform(input_data[['QTR']])
                 time_df = pd.DataFrame(time_encoded, columns=[f'QTR_{i}' for i in range(time_encoded.shape[1])])
-            elif has_qtr and hasattr(self.time_encoder, 'categories_'):
+            elif has_qtr and self.time_encoder is not None:
                 # Use the most recent quarter from training data
-                input_data['QTR'] = [self.time_encoder.categories_[0][-1]]
+                input_data['QTR'] = [latest_category(self.time_encoder)]
                 time_encoded = self.time_encoder.transform(input_data[['QTR']])
                 time_df = pd.DataFrame(time_encoded, columns=[f'QTR_{i}' for i in range(time_encoded.shape[1])])
             else:
@@ -900,9 +959,7 @@ class CarrierPerformanceModel:
             
             # Destination location encodings
             # Handle destination city grouping
-            dest_city_categories = self.dest_city_encoder.categories_[0]
-            dest_city_grouped = dest_city if dest_city in dest_city_categories else 'OTHER'
-            input_data['DEST_CITY_GROUPED'] = [dest_city_grouped]
+            input_data['DEST_CITY_GROUPED'] = group_unknown(input_data['DEST_CITY'], self.dest_city_encoder)
             
             dest_city_encoded = self.dest_city_encoder.transform(input_data[['DEST_CITY_GROUPED']])
             dest_city_df = pd.DataFrame(dest_city_encoded, columns=[f'DEST_CITY_{i}' for i in range(dest_city_encoded.shape[1])])
@@ -993,7 +1050,7 @@ class CarrierPerformanceModel:
                 input_data['QTR'] = [quarter]
             else:
                 # Use the most recent quarter from training data
-                input_data['QTR'] = [self.time_encoder.categories_[0][-1]]
+                input_data['QTR'] = [latest_category(self.time_encoder)]
             
             # Add optional numerical features
             numerical_features = {}
@@ -1027,9 +1084,7 @@ class CarrierPerformanceModel:
             
             # Destination city encoding
             # Check if dest_city is in the top destinations, otherwise use 'OTHER'
-            top_dests = self.dest_city_encoder.categories_[0]
-            dest_city_grouped = dest_city if dest_city in top_dests else 'OTHER'
-            input_data['DEST_CITY_GROUPED'] = [dest_city_grouped]
+            input_data['DEST_CITY_GROUPED'] = group_unknown(input_data['DEST_CITY'], self.dest_city_encoder)
             
             dest_encoded = self.dest_city_encoder.transform(input_data[['DEST_CITY_GROUPED']])
             dest_df = pd.DataFrame(
@@ -1116,13 +1171,98 @@ class CarrierPerformanceModel:
                 results.append(prediction)
                 
         return results
-    
-    def predict_on_training_data(self, output_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+
+    def transform_features(self, data: pd.DataFrame) -> np.ndarray:
+        """Build model inputs for every row of a frame at once.
+
+        Produces the same features as ``predict`` does for one lane. Rows
+        without a TRACKING_MONTH/QTR use the most recent period seen in
+        training. The numerical features are used when the frame has any of
+        ORDER_COUNT, AVG_TRANSIT_DAYS and ACTUAL_TRANSIT_DAYS, with the same
+        defaults as ``predict`` for missing values.
+
+        Args:
+            data: Frame with CARRIER, SOURCE_CITY and DEST_CITY columns (plus
+                SOURCE_STATE, SOURCE_COUNTRY, DEST_STATE and DEST_COUNTRY for
+                new and hybrid format models)
+
+        Returns:
+            float32 feature matrix with one row per input row
+        """
+        feature_info = getattr(self, 'feature_info', None) or {}
+        model_format = feature_info.get('data_format', self.data_format or 'legacy')
+        if model_format in ['hybrid', 'hybrid_no_time']:
+            has_time = model_format == 'hybrid' and feature_info.get('has_qtr', False)
+        else:
+            has_time = True
+        has_time = has_time and self.time_encoder is not None
+
+        blocks = []
+        if has_time:
+            time_column = 'TRACKING_MONTH' if model_format == 'new' else 'QTR'
+            latest_period = latest_category(self.time_encoder)
+            if time_column in data.columns:
+                periods = data[time_column].fillna(latest_period)
+            else:
+                periods = pd.Series(latest_period, index=data.index)
+            blocks.append(one_hot_block(self.time_encoder, periods, time_column, time_column))
+        elif model_format in ['hybrid', 'hybrid_no_time']:
+            blocks.append((np.ones((len(data), 1), dtype=np.float32), ['DEFAULT_TIME']))
+
+        dest_city_grouped = group_unknown(data['DEST_CITY'], self.dest_city_encoder)
+        if model_format in ['new', 'hybrid', 'hybrid_no_time']:
+            blocks.extend([
+                one_hot_block(self.carrier_encoder, data['CARRIER'], 'CARRIER', 'CARRIER'),
+                one_hot_block(self.source_city_encoder, data['SOURCE_CITY'], 'SOURCE_CITY', 'SOURCE_CITY'),
+                one_hot_block(self.source_state_encoder, data['SOURCE_STATE'], 'SOURCE_STATE', 'SOURCE_STATE'),
+                one_hot_block(self.source_country_encoder, data['SOURCE_COUNTRY'], 'SOURCE_COUNTRY', 'SOURCE_COUNTRY'),
+                one_hot_block(self.dest_city_encoder, dest_city_grouped, 'DEST_CITY_GROUPED', 'DEST_CITY'),
+                one_hot_block(self.dest_state_encoder, data['DEST_STATE'], 'DEST_STATE', 'DEST_STATE'),
+                one_hot_block(self.dest_country_encoder, data['DEST_COUNTRY'], 'DEST_COUNTRY', 'DEST_COUNTRY')
+            ])
+        else:
+            blocks.extend([
+                one_hot_block(self.carrier_encoder, data['CARRIER'], 'CARRIER', 'CARRIER'),
+                one_hot_block(self.source_city_encoder, data['SOURCE_CITY'], 'SOURCE_CITY', 'SOURCE'),
+                one_hot_block(self.dest_city_encoder, dest_city_grouped, 'DEST_CITY_GROUPED', 'DEST')
+            ])
+
+        numerical_defaults = {'ORDER_COUNT': 1, 'AVG_TRANSIT_DAYS': 2, 'ACTUAL_TRANSIT_DAYS': 2}
+        if self.scaler is not None and any(column in data.columns for column in numerical_defaults):
+            num_data = pd.DataFrame({
+                column: data[column].fillna(default) if column in data.columns else default
+                for column, default in numerical_defaults.items()
+            }, index=data.index)
+            scaled_numerical = np.asarray(self.scaler.transform(num_data), dtype=np.float32)
+            blocks.append((scaled_numerical, list(numerical_defaults)))
+
+        return assemble_features(blocks, self.feature_columns)
+
+    def predict_frame(self, data: pd.DataFrame) -> np.ndarray:
+        """Predict on-time performance (percent) for every row of a frame.
+
+        Args:
+            data: Frame accepted by ``transform_features``
+
+        Returns:
+            Array of predicted on-time performance percentages
+        """
+        if self.model is None:
+            raise ValueError("No model available for prediction. Train or load a model first.")
+
+        features = self.transform_features(data)
+        return self.model.predict(features, verbose=0).reshape(-1) * 100.0
+
+    def predict_on_training_data(self, output_dir: Optional[str] = None,
+                                 return_predictions: bool = True) -> Optional[Dict[str, Any]]:
         """
         Generate predictions on the training data and calculate performance metrics.
         
         Args:
             output_dir: Directory to save prediction results
+            return_predictions: Whether to include the per-row prediction
+                dictionaries in the result (callers that only need the
+                saved files can skip building them)
             
         Returns:
             Dictionary with predictions and performance metrics
@@ -1147,85 +1287,79 @@ class CarrierPerformanceModel:
             
             # Get features and make predictions
             X = self.preprocessed_data.drop('ONTIME_PERFORMANCE', axis=1)
-            y_actual = self.preprocessed_data['ONTIME_PERFORMANCE']
+            y_actual = self.preprocessed_data['ONTIME_PERFORMANCE'].to_numpy(dtype=np.float64)
             
             # Generate predictions
+            started = time.perf_counter()
             y_pred_normalized = self.model.predict(X)
-            y_pred = y_pred_normalized.flatten() * 100  # Convert back to percentage
-            
-            # Calculate individual errors
-            absolute_errors = np.abs(y_actual - y_pred)
-            percentage_errors = np.abs((y_actual - y_pred) / y_actual) * 100
+            y_pred = np.asarray(y_pred_normalized).flatten() * 100  # Convert back to percentage
+            predict_seconds = time.perf_counter() - started
             
             # Add predictions and errors to the original data
+            started = time.perf_counter()
+            errors = error_columns(y_actual, y_pred)
             data['predicted_performance'] = y_pred
-            data['absolute_error'] = absolute_errors
-            data['percent_error'] = percentage_errors
+            data['absolute_error'] = errors['absolute_error']
+            data['percent_error'] = errors['percent_error']
             
             # Calculate overall metrics
-            mae = np.mean(absolute_errors)
+            percentage_errors = errors['percent_error']
+            mae = np.mean(errors['absolute_error'])
             mape = np.mean(percentage_errors[~np.isinf(percentage_errors)])  # Exclude inf values from zero division
             rmse = np.sqrt(np.mean(np.square(y_actual - y_pred)))
             
-            # Prepare results based on data format
-            predictions = []
-            for i, row in data.iterrows():
-                if self.data_format == 'new':
-                    # New format with tracking month and expanded location data
-                    prediction = {
-                        'carrier': row['CARRIER'],
-                        'source_city': row['SOURCE_CITY'],
-                        'source_state': row['SOURCE_STATE'],
-                        'source_country': row['SOURCE_COUNTRY'],
-                        'dest_city': row['DEST_CITY'],
-                        'dest_state': row['DEST_STATE'],
-                        'dest_country': row['DEST_COUNTRY'],
-                        'tracking_month': row['TRACKING_MONTH'],
-                        'order_count': int(row['ORDER_COUNT']),
-                        'avg_transit_days': float(row['AVG_TRANSIT_DAYS']),
-                        'actual_transit_days': float(row['ACTUAL_TRANSIT_DAYS']),
-                        'actual_performance': float(row['ONTIME_PERFORMANCE']),
-                        'predicted_performance': float(row['predicted_performance']),
-                        'absolute_error': float(row['absolute_error']),
-                        'percent_error': float(row['percent_error']) if not np.isinf(row['percent_error']) else None
-                    }
-                elif self.data_format in ['hybrid', 'hybrid_no_time']:
-                    # Hybrid format with expanded location data and optional quarter
-                    prediction = {
-                        'carrier': row['CARRIER'],
-                        'source_city': row['SOURCE_CITY'],
-                        'source_state': row['SOURCE_STATE'],
-                        'source_country': row['SOURCE_COUNTRY'],
-                        'dest_city': row['DEST_CITY'],
-                        'dest_state': row['DEST_STATE'],
-                        'dest_country': row['DEST_COUNTRY'],
-                        'order_count': int(row['ORDER_COUNT']),
-                        'avg_transit_days': float(row['AVG_TRANSIT_DAYS']),
-                        'actual_transit_days': float(row['ACTUAL_TRANSIT_DAYS']),
-                        'actual_performance': float(row['ONTIME_PERFORMANCE']),
-                        'predicted_performance': float(row['predicted_performance']),
-                        'absolute_error': float(row['absolute_error']),
-                        'percent_error': float(row['percent_error']) if not np.isinf(row['percent_error']) else None
-                    }
-                    # Add quarter if available
-                    if 'QTR' in data.columns and 'QTR' in row:
-                        prediction['quarter'] = row['QTR']
-                else:
-                    # Legacy format with quarter and city-only data
-                    prediction = {
-                        'carrier': row['CARRIER'],
-                        'source_city': row['SOURCE_CITY'],
-                        'dest_city': row['DEST_CITY'],
-                        'quarter': row['QTR'],
-                        'order_count': int(row['ORDER_COUNT']),
-                        'avg_transit_days': float(row['AVG_TRANSIT_DAYS']),
-                        'actual_transit_days': float(row['ACTUAL_TRANSIT_DAYS']),
-                        'actual_performance': float(row['ONTIME_PERFORMANCE']),
-                        'predicted_performance': float(row['predicted_performance']),
-                        'absolute_error': float(row['absolute_error']),
-                        'percent_error': float(row['percent_error']) if not np.isinf(row['percent_error']) else None
-                    }
-                predictions.append(prediction)
+            # Output fields based on data format
+            if self.data_format == 'new':
+                # New format with tracking month and expanded location data
+                fields = {
+                    'carrier': 'CARRIER',
+                    'source_city': 'SOURCE_CITY',
+                    'source_state': 'SOURCE_STATE',
+                    'source_country': 'SOURCE_COUNTRY',
+                    'dest_city': 'DEST_CITY',
+                    'dest_state': 'DEST_STATE',
+                    'dest_country': 'DEST_COUNTRY',
+                    'tracking_month': 'TRACKING_MONTH'
+                }
+            elif self.data_format in ['hybrid', 'hybrid_no_time']:
+                # Hybrid format with expanded location data
+                fields = {
+                    'carrier': 'CARRIER',
+                    'source_city': 'SOURCE_CITY',
+                    'source_state': 'SOURCE_STATE',
+                    'source_country': 'SOURCE_COUNTRY',
+                    'dest_city': 'DEST_CITY',
+                    'dest_state': 'DEST_STATE',
+                    'dest_country': 'DEST_COUNTRY'
+                }
+            else:
+                # Legacy format with quarter and city-only data
+                fields = {
+                    'carrier': 'CARRIER',
+                    'source_city': 'SOURCE_CITY',
+                    'dest_city': 'DEST_CITY',
+                    'quarter': 'QTR'
+                }
+            fields.update({
+                'order_count': 'ORDER_COUNT',
+                'avg_transit_days': 'AVG_TRANSIT_DAYS',
+                'actual_transit_days': 'ACTUAL_TRANSIT_DAYS',
+                'actual_performance': 'ONTIME_PERFORMANCE',
+                'predicted_performance': 'predicted_performance',
+                'absolute_error': 'absolute_error',
+                'percent_error': 'percent_error'
+            })
+            # Hybrid data carries an optional quarter
+            if self.data_format in ['hybrid', 'hybrid_no_time'] and 'QTR' in data.columns:
+                fields['quarter'] = 'QTR'
+            
+            result_frame = prediction_frame(
+                data, fields,
+                ints=('order_count',),
+                floats=('avg_transit_days', 'actual_transit_days', 'actual_performance',
+                        'predicted_performance', 'absolute_error', 'percent_error')
+            )
+            assembly_seconds = time.perf_counter() - started
             
             # Prepare metrics
             metrics = {
@@ -1235,22 +1369,20 @@ class CarrierPerformanceModel:
                 'records_analyzed': len(data),
                 'data_format': self.data_format
             }
+            header = {
+                'prediction_time': datetime.now().isoformat(),
+                'data_format': self.data_format,
+                'metrics': metrics
+            }
             
             # Save results to file if output directory is specified
+            started = time.perf_counter()
             if output_dir:
                 os.makedirs(output_dir, exist_ok=True)
                 
                 # Save as JSON
-                output_json = {
-                    'prediction_time': datetime.now().isoformat(),
-                    'data_format': self.data_format,
-                    'metrics': metrics,
-                    'predictions': predictions
-                }
-                
                 json_path = os.path.join(output_dir, "prediction_data.json")
-                with open(json_path, 'w') as f:
-                    json.dump(output_json, f, indent=2)
+                write_records_json(json_path, header, result_frame)
                 logger.info(f"Predictions saved to JSON: {json_path}")
                 
                 # Also save as CSV for easier analysis (format-specific columns)
@@ -1279,14 +1411,16 @@ class CarrierPerformanceModel:
                 df_to_save = data[csv_columns]
                 df_to_save.to_csv(csv_path, index=False)
                 logger.info(f"Predictions saved to CSV: {csv_path}")
+            write_seconds = time.perf_counter() - started
+            
+            logger.info(f"Training data predictions for {len(data)} rows: predict {predict_seconds:.2f}s, "
+                        f"assembly {assembly_seconds:.2f}s, write {write_seconds:.2f}s")
             
             # Return the results
-            return {
-                'prediction_time': datetime.now().isoformat(),
-                'data_format': self.data_format,
-                'metrics': metrics,
-                'predictions': predictions
-            }
+            result = dict(header, prediction_count=len(result_frame))
+            if return_predictions:
+                result['predictions'] = frame_records(result_frame)
+            return result
             
         except Exception as e:
             logger.error(f"Error generating predictions on training data: {str(e)}")
@@ -1317,6 +1451,12 @@ class CarrierPerformanceModel:
             self.model.save(model_path)
             logger.info(f"Neural network model saved to {model_path}")
             
+            # Export the weights for TensorFlow-free serving
+            try:
+                export_inference_artifacts(self.model, path)
+            except Exception as e:
+                logger.warning(f"Could not export inference artifacts: {str(e)}")
+            
             # Save the preprocessors and other necessary components
             # Include all possible encoders (some may be None for legacy format)
             preprocessors = {
@@ -1329,7 +1469,9 @@ class CarrierPerformanceModel:
                 'dest_country_encoder': getattr(self, 'dest_country_encoder', None),
                 'time_encoder': self.time_encoder,
                 'scaler': self.scaler,
-                'data_format': getattr(self, 'data_format', 'legacy')  # Save the data format
+                'data_format': getattr(self, 'data_format', 'legacy'),  # Save the data format
+                'encoding': self.encoding,
+                'hash_features': self.hash_features
             }
             
             with open(os.path.join(path, "preprocessors.pkl"), 'wb') as f:
@@ -1367,21 +1509,22 @@ class CarrierPerformanceModel:
         logger.info(f"Loading model from {path}...")
         
         try:
-            # Load the Keras model
-            model_path = os.path.join(path, "model.keras")
-            if os.path.exists(model_path):
-                self.model = tf.keras.models.load_model(model_path)
-                logger.info(f"Neural network model loaded from {model_path}")
-            else:
-                logger.error(f"Model file not found at {model_path}")
+            # Load the network with the configured inference backend
+            try:
+                self.model = self.inference_loader(path, self.inference_backend)
+                logger.info(f"Neural network model loaded from {path} ({getattr(self.model, 'backend', 'keras')} backend)")
+            except FileNotFoundError as e:
+                logger.error(str(e))
                 return False
             
-            # Load the preprocessors
+            # Load the preprocessors, preferring the compressed vocabulary
+            preprocessors = load_vocabularies(path)
             preprocessor_path = os.path.join(path, "preprocessors.pkl")
-            if os.path.exists(preprocessor_path):
+            if preprocessors is None and os.path.exists(preprocessor_path):
                 with open(preprocessor_path, 'rb') as f:
                     preprocessors = pickle.load(f)
-                
+            
+            if preprocessors is not None:
                 # Load common encoders
                 self.carrier_encoder = preprocessors.get('carrier_encoder')
                 self.source_city_encoder = preprocessors.get('source_city_encoder')
@@ -1397,6 +1540,8 @@ class CarrierPerformanceModel:
                 
                 # Get data format (default to legacy for backward compatibility)
                 self.data_format = preprocessors.get('data_format', 'legacy')
+                self.encoding = preprocessors.get('encoding', 'onehot')
+                self.hash_features = preprocessors.get('hash_features', self.hash_features)
                 
                 # Backward compatibility: handle old preprocessor structure
                 if self.source_city_encoder is None and 'source_encoder' in preprocessors:
@@ -0,0 +1,148 @@
+"""
+Knowledge distillation helpers for the carrier and tender performance models.
+
+A student network is trained to reproduce a registered teacher's outputs on
+the teacher's compiled feature vectors. Synthetic lanes are sampled by
+recombining the one-hot feature groups of real rows, so the student also sees
+carrier/lane combinations that never occur in the training data.
+"""
+
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .inference import import_tensorflow
+
+logger = logging.getLogger(__name__)
+
+STUDENT_ARCHITECTURES = {
+    # One narrow hidden layer
+    "compact": [32],
+    # Logistic-linear model on the compiled feature vector
+    "linear": [],
+}
+
+
+def feature_groups(columns: List[str]) -> Dict[str, List[str]]:
+    """Group one-hot feature columns by their encoder prefix.
+
+    ``CARRIER_0`` and ``CARRIER_12`` share the group ``CARRIER``; columns
+    without a numeric suffix (scaled numerical features) form their own group.
+
+    Args:
+        columns: Feature column names
+
+    Returns:
+        Ordered mapping of group name to its columns
+    """
+    groups: Dict[str, List[str]] = {}
+    for column in columns:
+        prefix, _, suffix = column.rpartition('_')
+        key = prefix if prefix and suffix.isdigit() else column
+        groups.setdefault(key, []).append(column)
+    return groups
+
+
+def synthesize_feature_rows(X: pd.DataFrame, n_samples: int, seed: int = 42) -> pd.DataFrame:
+    """Sample synthetic lanes by recombining feature groups of real rows.
+
+    Each feature group (carrier, source city, destination state, ...) is
+    copied from an independently drawn real row, which yields valid one-hot
+    vectors for combinations absent from the training data.
+
+    Args:
+        X: Compiled feature matrix of real rows
+        n_samples: Number of synthetic rows to draw
+        seed: Random seed
+
+    Returns:
+        DataFrame of synthetic rows with the same columns as ``X``
+    """
+    rng = np.random.default_rng(seed)
+    values = X.to_numpy(dtype=np.float32)
+    column_index = {column: i for i, column in enumerate(X.columns)}
+    synthetic = np.empty((n_samples, X.shape[1]), dtype=np.float32)
+
+    for columns in feature_groups(list(X.columns)).values():
+        positions = [column_index[column] for column in columns]
+        rows = rng.integers(0, len(X), size=n_samples)
+        synthetic[:, positions] = values[rows][:, positions]
+
+    return pd.DataFrame(synthetic, columns=X.columns)
+
+
+def build_student_network(input_dim: int, architecture: str = "compact"):
+    """Build a student network with a sigmoid output in [0, 1].
+
+    Args:
+        input_dim: Number of input features
+        architecture: Key of ``STUDENT_ARCHITECTURES``
+
+    Returns:
+        Compiled Keras model
+    """
+    if architecture not in STUDENT_ARCHITECTURES:
+        raise ValueError(f"Unknown student architecture: {architecture}. Expected one of {list(STUDENT_ARCHITECTURES)}")
+
+    tf = import_tensorflow()
+    layers = tf.keras.layers
+
+    stack = [layers.Input(shape=(input_dim,))]
+    stack += [layers.Dense(units, activation='relu') for units in STUDENT_ARCHITECTURES[architecture]]
+    stack.append(layers.Dense(1, activation='sigmoid'))
+
+    model = tf.keras.models.Sequential(stack)
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=0.003),
+        loss='mean_squared_error',
+        metrics=['mean_absolute_error']
+    )
+    return model
+
+
+def fit_student(student, X: np.ndarray, y: np.ndarray, epochs: int = 50, batch_size: int = 256):
+    """Fit a student network on teacher outputs.
+
+    Args:
+        student: Compiled student model
+        X: Feature matrix
+        y: Teacher outputs (normalized to [0, 1])
+        epochs: Maximum number of epochs
+        batch_size: Training batch size
+
+    Returns:
+        Keras training history
+    """
+    tf = import_tensorflow()
+    callbacks = [
+        tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
+    ]
+    return student.fit(
+        X, y,
+        epochs=epochs,
+        batch_size=batch_size,
+        validation_split=0.1,
+        callbacks=callbacks,
+        verbose=0
+    )
+
+
+def measure_fidelity(student_outputs: np.ndarray, teacher_outputs: np.ndarray) -> Dict[str, float]:
+    """Compare student and teacher outputs in percentage points.
+
+    Args:
+        student_outputs: Student predictions (normalized to [0, 1])
+        teacher_outputs: Teacher predictions (normalized to [0, 1])
+
+    Returns:
+        Dictionary with mae, p95_abs_error and max_abs_error
+    """
+    errors = np.abs(np.ravel(student_outputs) - np.ravel(teacher_outputs)) * 100.0
+    return {
+        "mae": float(errors.mean()),
+        "p95_abs_error": float(np.percentile(errors, 95)),
+        "max_abs_error": float(errors.max()),
+        "samples": int(errors.size)
+    }
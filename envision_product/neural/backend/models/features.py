@@ -0,0 +1,220 @@
+"""
+Vectorized feature construction shared by the model classes.
+
+The per-lane ``predict`` methods build a one-row DataFrame for each call.
+These helpers build the same features for a whole frame at once: each
+categorical column is one-hot encoded with its fitted encoder (a scikit-learn
+``OneHotEncoder``, a ``VocabularyEncoder`` or a ``HashingEncoder``), blocks
+are stacked into one float32 matrix and the columns are arranged in training
+order. Categorical columns are encoded once per category and gathered by code.
+
+With ``encoding='hashing'`` the model classes encode categorical columns with
+the hashing trick instead of one-hot vocabularies: each value is hashed into
+a fixed number of signed feature columns. The input width then no longer
+depends on how many carriers, cities or months the training data has, values
+unseen in training need no lookup, and a retrained model keeps the network
+shape of the model it replaces.
+"""
+
+import zlib
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .preprocessing import group_other, top_categories
+
+# A block of feature columns: values and column names
+FeatureBlock = Tuple[np.ndarray, List[str]]
+
+ENCODINGS = ("onehot", "hashing")
+
+# Hashed feature columns per categorical column
+DEFAULT_HASH_FEATURES = 64
+
+
+def _hash_key(value) -> str:
+    """String form a value is hashed by."""
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class HashingEncoder:
+    """Signed feature-hashing encoder for one categorical column.
+
+    Each value is hashed (CRC-32 of its string form, so the features are the
+    same in every process) into one of ``n_features`` columns, with a sign
+    taken from another bit of the hash so that collisions cancel out in
+    expectation rather than add up. Integral floats hash like the integer, so
+    a 202401.0 read from a column with missing values encodes like 202401 and
+    "202401". Missing values encode to an all-zero row.
+    Implements the subset of the scikit-learn encoder API the model classes
+    use (``fit``, ``transform`` and ``fit_transform``); there is no
+    ``categories_``, since nothing about the vocabulary is stored.
+    """
+
+    def __init__(self, n_features: int = DEFAULT_HASH_FEATURES, signed: bool = True) -> None:
+        if n_features < 1:
+            raise ValueError(f"n_features must be positive, got {n_features}")
+        self.n_features = int(n_features)
+        self.signed = signed
+        self.max_value_ = None  # largest value seen in fit (the latest period of a time column)
+
+    def _hash(self, values) -> Tuple[np.ndarray, np.ndarray]:
+        """Feature column and sign of each value."""
+        hashes = np.array([zlib.crc32(_hash_key(value).encode("utf-8")) for value in values], dtype=np.uint64)
+        columns = (hashes % self.n_features).astype(np.int64)
+        if not self.signed:
+            return columns, np.ones(len(hashes))
+        return columns, np.where(hashes >> np.uint64(31), -1.0, 1.0)
+
+    def fit(self, X, y=None) -> "HashingEncoder":
+        """Record the largest value of the first column of ``X``."""
+        values = pd.Series(np.asarray(X, dtype=object).reshape(len(X), -1)[:, 0]).dropna()
+        if len(values):
+            self.max_value_ = max(values.unique())
+        return self
+
+    def transform(self, X) -> np.ndarray:
+        """Hash the first column of ``X`` into ``n_features`` signed columns."""
+        values = np.asarray(X, dtype=object).reshape(len(X), -1)[:, 0]
+        codes, uniques = pd.factorize(values)
+        columns, signs = self._hash(uniques)
+
+        encoded = np.zeros((len(values), self.n_features), dtype=np.float64)
+        rows = np.flatnonzero(codes >= 0)
+        encoded[rows, columns[codes[rows]]] = signs[codes[rows]]
+        return encoded
+
+    def fit_transform(self, X, y=None) -> np.ndarray:
+        """Fit on and hash ``X``."""
+        return self.fit(X).transform(X)
+
+
+def make_encoder(encoding: str = "onehot", hash_features: int = DEFAULT_HASH_FEATURES):
+    """Unfitted encoder for a categorical column.
+
+    Args:
+        encoding: onehot (a scikit-learn ``OneHotEncoder`` ignoring unknown
+            values) or hashing (a ``HashingEncoder``)
+        hash_features: Feature columns of a hashing encoder
+
+    Returns:
+        Encoder
+    """
+    if encoding == "onehot":
+        from sklearn.preprocessing import OneHotEncoder
+        return OneHotEncoder(sparse_output=False, handle_unknown='ignore')
+    if encoding == "hashing":
+        return HashingEncoder(hash_features)
+    raise ValueError(f"Unknown encoding: {encoding}. Expected one of {ENCODINGS}")
+
+
+def encoder_categories(encoder) -> List[Any]:
+    """Categories of a fitted one-hot encoder (none for hashing encoders)."""
+    if not hasattr(encoder, "categories_"):
+        return []
+    return encoder.categories_[0].tolist()
+
+
+def latest_category(encoder) -> Any:
+    """Most recent period a fitted time encoder has seen (its largest category)."""
+    if isinstance(encoder, HashingEncoder):
+        return encoder.max_value_
+    return encoder.categories_[0][-1]
+
+
+def group_infrequent(values: pd.Series, n: int, encoding: str = "onehot", other: str = "OTHER") -> pd.Series:
+    """Group values outside the ``n`` most frequent as ``other`` before one-hot encoding.
+
+    Hashed features have the same width whatever the number of values, so
+    values to be hashed are returned as they are.
+    """
+    if encoding == "hashing":
+        return values
+    return group_other(values, top_categories(values, n), other)
+
+
+def group_unknown(values: pd.Series, encoder, other: str = "OTHER") -> pd.Series:
+    """Replace values missing from a grouped encoder's categories with ``other``.
+
+    Hashing encoders take any value, so nothing is replaced.
+    """
+    if not hasattr(encoder, "categories_"):
+        return values
+    return group_other(values, encoder.categories_[0], other)
+
+
+def _gather_by_code(values: pd.Series) -> bool:
+    """Whether a column can be encoded once per category and gathered by code."""
+    return (isinstance(values.dtype, pd.CategoricalDtype) and len(values.cat.categories) > 0
+            and not values.isna().any())
+
+
+def fit_one_hot(encoder, values: pd.Series, column: str) -> np.ndarray:
+    """Fit an encoder on a column and encode it (``fit_transform`` on one column).
+
+    Categoricals are fitted on their observed categories and encoded by code.
+
+    Args:
+        encoder: Unfitted encoder
+        values: Values to fit and encode
+        column: Column name to fit the encoder on
+
+    Returns:
+        Encoded values, as returned by the encoder
+    """
+    if not _gather_by_code(values):
+        return encoder.fit_transform(values.to_frame(column))
+
+    observed = values.cat.remove_unused_categories()
+    categories = pd.Series(observed.cat.categories, name=column).to_frame()
+    encoder.fit(categories)
+    return np.asarray(encoder.transform(categories))[observed.cat.codes.to_numpy()]
+
+
+def one_hot_block(encoder, values: pd.Series, column: str, prefix: str) -> FeatureBlock:
+    """One-hot encode a column with a fitted encoder.
+
+    Args:
+        encoder: Fitted encoder
+        values: Values to encode
+        column: Column name the encoder was fitted on
+        prefix: Feature column prefix (``<prefix>_<i>``)
+
+    Returns:
+        Encoded values and their feature column names
+    """
+    if _gather_by_code(values):
+        # Encode each category once and gather rows by code
+        categories = pd.Series(values.cat.categories, name=column)
+        encoded = np.asarray(encoder.transform(categories.to_frame()), dtype=np.float32)
+        encoded = encoded[values.cat.codes.to_numpy()]
+    else:
+        encoded = np.asarray(encoder.transform(values.to_frame(column)), dtype=np.float32)
+    return encoded, [f"{prefix}_{i}" for i in range(encoded.shape[1])]
+
+
+def assemble_features(blocks: Sequence[FeatureBlock], feature_columns: Optional[List[str]] = None) -> np.ndarray:
+    """Stack feature blocks and arrange them in training column order.
+
+    Args:
+        blocks: Feature blocks in construction order
+        feature_columns: Training feature columns; columns missing from the
+            blocks are zero and extra columns are dropped (like ``reindex``)
+
+    Returns:
+        float32 feature matrix
+    """
+    matrix = np.hstack([values for values, _ in blocks]).astype(np.float32, copy=False)
+    if not feature_columns:
+        return matrix
+
+    names = [name for _, block_names in blocks for name in block_names]
+    positions = {name: i for i, name in enumerate(names)}
+    source = np.array([positions.get(column, -1) for column in feature_columns])
+    features = np.zeros((matrix.shape[0], len(feature_columns)), dtype=np.float32)
+    present = source >= 0
+    features[:, present] = matrix[:, source[present]]
+    return features
@@ -0,0 +1,644 @@
+"""
+Inference backends for the Envision neural models.
+
+The networks built by the model classes are small stacks of Dense layers, so
+serving them does not require the TensorFlow runtime. ``save_model`` exports
+the trained weights next to ``model.keras`` as a NumPy archive and an ONNX
+graph, and ``load_inference_model`` picks the backend used for predictions:
+
+- ``keras``: the Keras model (imports TensorFlow), served through XLA-compiled
+  functions per batch-size bucket unless ``xla`` is off
+- ``onnx``: an onnxruntime session over ``model.onnx``
+- ``numpy``: a pure NumPy forward pass over ``model_weights.npz``
+
+Every backend exposes a Keras-compatible ``predict(inputs)`` returning a
+``(n_samples, n_outputs)`` float32 array. ``configure_inference`` sets the
+thread pools and the batch size predictions are run in (see
+``services.inference_tuner``).
+"""
+
+import os
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KERAS_MODEL_FILE = "model.keras"
+ONNX_MODEL_FILE = "model.onnx"
+NUMPY_WEIGHTS_FILE = "model_weights.npz"
+
+INFERENCE_BACKENDS = ("keras", "onnx", "numpy")
+
+# Batch sizes with a pre-compiled XLA function; inputs are padded up to the next bucket
+BATCH_BUCKETS = (1, 8, 64, 512, 4096)
+
+_tensorflow = None
+
+# Thread pools and batch size of the inference backends, set by configure_inference
+# (None leaves the runtime defaults)
+INFERENCE_CONFIG: Dict[str, Optional[int]] = {
+    "intra_op_threads": None,
+    "inter_op_threads": None,
+    "batch_size": None,
+}
+
+# Active BLAS thread limit of the NumPy backend
+_blas_limits = None
+
+
+def _set_tensorflow_threads(tf) -> bool:
+    """Apply the configured thread pools to TensorFlow.
+
+    Returns:
+        False if TensorFlow was already initialized with other pools
+    """
+    try:
+        if INFERENCE_CONFIG["intra_op_threads"]:
+            tf.config.threading.set_intra_op_parallelism_threads(INFERENCE_CONFIG["intra_op_threads"])
+        if INFERENCE_CONFIG["inter_op_threads"]:
+            tf.config.threading.set_inter_op_parallelism_threads(INFERENCE_CONFIG["inter_op_threads"])
+        return True
+    except RuntimeError as e:
+        logger.warning(f"TensorFlow thread pools are already initialized, new settings apply after a restart: {str(e)}")
+        return False
+
+
+def import_tensorflow():
+    """Import TensorFlow on first use and seed it for reproducibility.
+
+    The thread pools set by ``configure_inference`` are applied on import,
+    before TensorFlow creates them.
+
+    Returns:
+        The ``tensorflow`` module
+    """
+    global _tensorflow
+    if _tensorflow is None:
+        import tensorflow as tf
+        tf.random.set_seed(42)
+        _set_tensorflow_threads(tf)
+        _tensorflow = tf
+    return _tensorflow
+
+
+def configure_inference(intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None,
+                        batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """Set the thread pools and batch size used for inference in this process.
+
+    ``intra_op_threads`` sizes the TensorFlow and onnxruntime intra-op pools
+    and limits the BLAS threads of the NumPy backend (with ``threadpoolctl``);
+    ``inter_op_threads`` sizes the TensorFlow inter-op pool. Predictions are
+    run in chunks of ``batch_size`` rows. TensorFlow pools can only be sized
+    before TensorFlow first runs, and ONNX sessions pick up the settings when
+    they are created, so models loaded earlier keep theirs.
+
+    Args:
+        intra_op_threads: Threads per operation
+        inter_op_threads: Operations run concurrently (TensorFlow only)
+        batch_size: Rows per forward pass
+
+    Returns:
+        The settings and whether TensorFlow and BLAS picked them up
+    """
+    global _blas_limits
+    INFERENCE_CONFIG.update(intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads,
+                            batch_size=batch_size)
+    applied = {**INFERENCE_CONFIG, "tensorflow": None, "blas": None}
+
+    if _tensorflow is not None:
+        applied["tensorflow"] = _set_tensorflow_threads(_tensorflow)
+
+    try:
+        from threadpoolctl import threadpool_limits
+
+        if _blas_limits is not None:
+            _blas_limits.restore_original_limits()
+            _blas_limits = None
+        if intra_op_threads:
+            _blas_limits = threadpool_limits(limits=intra_op_threads, user_api="blas")
+        applied["blas"] = True
+    except ImportError:
+        logger.warning("threadpoolctl is not installed, NumPy inference keeps the default BLAS threads")
+        applied["blas"] = False
+
+    logger.info(f"Inference configured with {intra_op_threads or 'default'} intra-op threads, "
+                f"{inter_op_threads or 'default'} inter-op threads and batch size {batch_size or 'unlimited'}")
+    return applied
+
+
+def _batches(x: np.ndarray, batch_size: Optional[int]):
+    """Split a feature matrix into chunks of the given (or configured) batch size."""
+    batch_size = batch_size or INFERENCE_CONFIG["batch_size"]
+    if not batch_size or x.shape[0] <= batch_size:
+        return [x]
+    return [x[start:start + batch_size] for start in range(0, x.shape[0], batch_size)]
+
+
+def extract_dense_layers(keras_model) -> List[Dict[str, Any]]:
+    """Convert a Sequential Dense network into a list of affine layers.
+
+    Dropout is the identity at inference time and is skipped. Each
+    BatchNormalization layer is folded into the kernel and bias of the Dense
+    layer that follows it, so the exported network is Dense layers only.
+
+    Args:
+        keras_model: Trained Keras Sequential model
+
+    Returns:
+        List of dictionaries with ``kernel``, ``bias`` and ``activation``
+    """
+    dense_layers = []
+    pending_scale = None
+    pending_shift = None
+
+    for layer in keras_model.layers:
+        kind = layer.__class__.__name__
+
+        if kind == "Dense":
+            weights = layer.get_weights()
+            kernel = np.asarray(weights[0], dtype=np.float64)
+            bias = np.asarray(weights[1], dtype=np.float64) if len(weights) > 1 else np.zeros(kernel.shape[1])
+
+            # (x * s + t) @ W + b == x @ (s[:, None] * W) + (t @ W + b)
+            if pending_scale is not None:
+                bias = bias + pending_shift @ kernel
+                kernel = kernel * pending_scale[:, None]
+                pending_scale = pending_shift = None
+
+            dense_layers.append({
+                "kernel": kernel.astype(np.float32),
+                "bias": bias.astype(np.float32),
+                "activation": layer.get_config().get("activation") or "linear"
+            })
+        elif kind == "BatchNormalization":
+            gamma, beta, moving_mean, moving_variance = [np.asarray(w, dtype=np.float64) for w in layer.get_weights()]
+            scale = gamma / np.sqrt(moving_variance + layer.epsilon)
+            shift = beta - moving_mean * scale
+
+            if pending_scale is None:
+                pending_scale, pending_shift = scale, shift
+            else:
+                pending_scale, pending_shift = pending_scale * scale, pending_shift * scale + shift
+        elif kind in ("Dropout", "InputLayer"):
+            continue
+        else:
+            raise ValueError(f"Unsupported layer type for export: {kind}")
+
+    # A trailing normalization becomes a diagonal linear layer
+    if pending_scale is not None:
+        dense_layers.append({
+            "kernel": np.diag(pending_scale).astype(np.float32),
+            "bias": pending_shift.astype(np.float32),
+            "activation": "linear"
+        })
+
+    return dense_layers
+
+
+def save_numpy_weights(dense_layers: List[Dict[str, Any]], path: str) -> None:
+    """Save Dense layers as a NumPy archive readable without pickle.
+
+    Args:
+        dense_layers: Layers as returned by ``extract_dense_layers``
+        path: Output ``.npz`` file path
+    """
+    arrays = {"activations": np.array([layer["activation"] for layer in dense_layers])}
+    for i, layer in enumerate(dense_layers):
+        arrays[f"kernel_{i}"] = layer["kernel"]
+        arrays[f"bias_{i}"] = layer["bias"]
+    np.savez(path, **arrays)
+
+
+def load_numpy_weights(path: str) -> List[Dict[str, Any]]:
+    """Load Dense layers saved by ``save_numpy_weights``.
+
+    Args:
+        path: Path to the ``.npz`` file
+
+    Returns:
+        List of dictionaries with ``kernel``, ``bias`` and ``activation``
+    """
+    with np.load(path, allow_pickle=False) as data:
+        activations = [str(activation) for activation in data["activations"]]
+        return [
+            {
+                "kernel": data[f"kernel_{i}"].astype(np.float32),
+                "bias": data[f"bias_{i}"].astype(np.float32),
+                "activation": activation
+            }
+            for i, activation in enumerate(activations)
+        ]
+
+
+def save_onnx_graph(dense_layers: List[Dict[str, Any]], path: str) -> None:
+    """Build an ONNX graph (Gemm + activation per layer) from Dense layers.
+
+    Args:
+        dense_layers: Layers as returned by ``extract_dense_layers``
+        path: Output ``.onnx`` file path
+    """
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+
+    nodes = []
+    initializers = []
+    current = "input"
+
+    for i, layer in enumerate(dense_layers):
+        initializers.append(numpy_helper.from_array(layer["kernel"], name=f"kernel_{i}"))
+        initializers.append(numpy_helper.from_array(layer["bias"], name=f"bias_{i}"))
+        nodes.append(helper.make_node("Gemm", [current, f"kernel_{i}", f"bias_{i}"], [f"dense_{i}"]))
+        current = f"dense_{i}"
+
+        activation = layer["activation"]
+        if activation == "relu":
+            nodes.append(helper.make_node("Relu", [current], [f"relu_{i}"]))
+            current = f"relu_{i}"
+        elif activation == "sigmoid":
+            nodes.append(helper.make_node("Sigmoid", [current], [f"sigmoid_{i}"]))
+            current = f"sigmoid_{i}"
+        elif activation != "linear":
+            raise ValueError(f"Unsupported activation for ONNX export: {activation}")
+
+    nodes.append(helper.make_node("Identity", [current], ["output"]))
+
+    input_dim = dense_layers[0]["kernel"].shape[0]
+    output_dim = dense_layers[-1]["kernel"].shape[1]
+    graph = helper.make_graph(
+        nodes,
+        "envision_dense_network",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", input_dim])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, ["batch", output_dim])],
+        initializer=initializers
+    )
+
+    onnx_model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)], producer_name="envision")
+    onnx_model.ir_version = 8
+    onnx.checker.check_model(onnx_model)
+    onnx.save(onnx_model, path)
+
+
+def export_inference_artifacts(keras_model, path: str) -> List[str]:
+    """Export the NumPy weights and ONNX graph for a trained Keras model.
+
+    The ONNX graph is skipped with a warning when the ``onnx`` package is not
+    installed; the NumPy archive needs nothing beyond NumPy.
+
+    Args:
+        keras_model: Trained Keras Sequential model
+        path: Model directory to write the artifacts to
+
+    Returns:
+        List of files written
+    """
+    dense_layers = extract_dense_layers(keras_model)
+    written = []
+
+    weights_path = os.path.join(path, NUMPY_WEIGHTS_FILE)
+    save_numpy_weights(dense_layers, weights_path)
+    written.append(weights_path)
+
+    onnx_path = os.path.join(path, ONNX_MODEL_FILE)
+    try:
+        save_onnx_graph(dense_layers, onnx_path)
+        written.append(onnx_path)
+    except ImportError:
+        logger.warning("onnx is not installed, skipping ONNX export")
+
+    logger.info(f"Inference artifacts exported to {path}")
+    return written
+
+
+def warm_start_weights(keras_model, path: str) -> bool:
+    """Copy the weights of a saved Keras model into a freshly built one.
+
+    Only possible when both networks have the same shape, which models
+    trained with hashed categorical features keep when they are retrained
+    on data with new carriers, cities or months.
+
+    Args:
+        keras_model: Built (untrained) Keras model
+        path: Directory of the saved model to start from
+
+    Returns:
+        True if the weights were copied, False if there is no saved Keras
+        model or the shapes differ
+    """
+    keras_path = os.path.join(path, KERAS_MODEL_FILE)
+    if not os.path.exists(keras_path):
+        logger.warning(f"No Keras model found at {keras_path}, training from scratch")
+        return False
+
+    tf = import_tensorflow()
+    previous_weights = tf.keras.models.load_model(keras_path, compile=False).get_weights()
+    current_shapes = [weights.shape for weights in keras_model.get_weights()]
+    if [weights.shape for weights in previous_weights] != current_shapes:
+        logger.warning(f"Network shape differs from the model at {path}, training from scratch")
+        return False
+
+    keras_model.set_weights(previous_weights)
+    logger.info(f"Warm-started from the weights of the model at {path}")
+    return True
+
+
+def _as_float32(inputs) -> np.ndarray:
+    """Convert a DataFrame or array of features to a contiguous float32 array."""
+    return np.ascontiguousarray(np.asarray(inputs, dtype=np.float32))
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0.0, out=x)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # tanh form is numerically stable for large negative inputs
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+def _linear(x: np.ndarray) -> np.ndarray:
+    return x
+
+
+ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "relu": _relu,
+    "sigmoid": _sigmoid,
+    "linear": _linear,
+}
+
+
+class NumpyInferenceModel:
+    """Pure NumPy forward pass for exported Dense networks."""
+
+    backend = "numpy"
+
+    def __init__(self, dense_layers: List[Dict[str, Any]]) -> None:
+        """Initialize the forward pass.
+
+        Args:
+            dense_layers: Layers as returned by ``extract_dense_layers``
+        """
+        for layer in dense_layers:
+            if layer["activation"] not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation for NumPy inference: {layer['activation']}")
+
+        self._layers = [
+            (layer["kernel"], layer["bias"], ACTIVATIONS[layer["activation"]])
+            for layer in dense_layers
+        ]
+        self.input_shape = (None, dense_layers[0]["kernel"].shape[0])
+        self.output_shape = (None, dense_layers[-1]["kernel"].shape[1])
+
+    @classmethod
+    def from_file(cls, path: str) -> "NumpyInferenceModel":
+        """Create the forward pass from a saved NumPy archive."""
+        return cls(load_numpy_weights(path))
+
+    def predict(self, inputs, batch_size: Optional[int] = None, verbose: int = 0) -> np.ndarray:
+        """Run the forward pass.
+
+        Args:
+            inputs: Feature matrix (DataFrame or array)
+            batch_size: Rows per forward pass (defaults to the configured
+                batch size, else all rows at once)
+            verbose: Accepted for Keras compatibility, unused
+
+        Returns:
+            Array of shape (n_samples, n_outputs)
+        """
+        outputs = []
+        for x in _batches(_as_float32(inputs), batch_size):
+            for kernel, bias, activation in self._layers:
+                x = x @ kernel
+                x += bias
+                x = activation(x)
+            outputs.append(x)
+        return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+
+class OnnxInferenceModel:
+    """onnxruntime session serving an exported ONNX graph."""
+
+    backend = "onnx"
+
+    def __init__(self, path: str, intra_op_threads: Optional[int] = None) -> None:
+        """Create the inference session.
+
+        Args:
+            path: Path to the ``.onnx`` file
+            intra_op_threads: Optional number of intra-op threads (defaults
+                to the configured ones)
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        intra_op_threads = intra_op_threads or INFERENCE_CONFIG["intra_op_threads"]
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+        self.input_shape = (None, model_input.shape[1])
+        self.output_shape = (None, self.session.get_outputs()[0].shape[1])
+
+    def predict(self, inputs, batch_size: Optional[int] = None, verbose: int = 0) -> np.ndarray:
+        """Run the session.
+
+        Args:
+            inputs: Feature matrix (DataFrame or array)
+            batch_size: Rows per run (defaults to the configured batch size,
+                else all rows at once)
+            verbose: Accepted for Keras compatibility, unused
+
+        Returns:
+            Array of shape (n_samples, n_outputs)
+        """
+        outputs = [self.session.run(None, {self._input_name: x})[0]
+                   for x in _batches(_as_float32(inputs), batch_size)]
+        return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+
+class XLAInferenceModel:
+    """Keras model served through XLA-compiled functions per batch-size bucket.
+
+    For networks this small, ``model.predict`` spends most of its time in
+    Python and graph dispatch. One ``tf.function(jit_compile=True)`` with a
+    fixed input shape is traced per bucket at construction time, and inputs
+    are zero-padded up to the nearest bucket, so the request path never
+    retraces. Batches larger than the largest bucket are processed in chunks.
+
+    Attribute access other than ``predict`` is delegated to the wrapped Keras
+    model, so ``fit``, ``save`` and ``layers`` keep working and the compiled
+    functions see any weight updates.
+    """
+
+    backend = "keras"
+
+    def __init__(self, keras_model, buckets=BATCH_BUCKETS) -> None:
+        """Compile the per-bucket functions.
+
+        Args:
+            keras_model: Loaded Keras model
+            buckets: Batch sizes to compile
+        """
+        tf = import_tensorflow()
+
+        self.keras_model = keras_model
+        self.buckets = tuple(sorted(buckets))
+        self.input_dim = int(keras_model.input_shape[-1])
+        self.output_dim = int(keras_model.output_shape[-1])
+
+        def forward(x):
+            return keras_model(x, training=False)
+
+        self._functions = {}
+        for bucket in self.buckets:
+            function = tf.function(
+                forward,
+                jit_compile=True,
+                input_signature=[tf.TensorSpec((bucket, self.input_dim), tf.float32)]
+            )
+            # Trace and compile now rather than on the first request
+            function(tf.zeros((bucket, self.input_dim), tf.float32))
+            self._functions[bucket] = function
+
+    def __getattr__(self, name: str):
+        if name == "keras_model":
+            raise AttributeError(name)
+        return getattr(self.keras_model, name)
+
+    def predict(self, inputs, batch_size: Optional[int] = None, verbose: int = 0) -> np.ndarray:
+        """Run the compiled function for the nearest bucket.
+
+        Args:
+            inputs: Feature matrix (DataFrame or array)
+            batch_size: Largest chunk to run (defaults to the configured
+                batch size); chunks never exceed the largest bucket
+            verbose: Accepted for Keras compatibility, unused
+
+        Returns:
+            Array of shape (n_samples, n_outputs)
+        """
+        x = _as_float32(inputs)
+        n_samples = x.shape[0]
+        if n_samples == 0:
+            return np.zeros((0, self.output_dim), dtype=np.float32)
+
+        batch_size = batch_size or INFERENCE_CONFIG["batch_size"] or self.buckets[-1]
+        largest = max([size for size in self.buckets if size <= batch_size], default=self.buckets[0])
+        outputs = []
+        for start in range(0, n_samples, largest):
+            chunk = x[start:start + largest]
+            rows = chunk.shape[0]
+            bucket = next(size for size in self.buckets if size >= rows)
+
+            if rows < bucket:
+                padded = np.zeros((bucket, self.input_dim), dtype=np.float32)
+                padded[:rows] = chunk
+                chunk = padded
+
+            outputs.append(self._functions[bucket](chunk).numpy()[:rows])
+
+        return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+
+def compile_for_serving(keras_model, xla: bool = True):
+    """Wrap a Keras model in ``XLAInferenceModel`` when XLA serving is enabled.
+
+    Args:
+        keras_model: Loaded Keras model
+        xla: Compile the per-bucket XLA functions
+
+    Returns:
+        The wrapped model, or the Keras model itself if XLA is disabled or
+        compilation fails
+    """
+    if not xla:
+        return keras_model
+
+    try:
+        return XLAInferenceModel(keras_model)
+    except Exception as e:
+        logger.warning(f"XLA compilation failed, serving with plain Keras predict: {str(e)}")
+        return keras_model
+
+
+def load_inference_model(path: str, backend: Optional[str] = None, xla: bool = True, compressed: bool = False):
+    """Load a saved model directory with the requested inference backend.
+
+    Falls back from ``onnx`` to ``numpy`` when onnxruntime or the graph is
+    missing, and to ``keras`` when no exported weights exist. The quantized
+    weights of a compressed artifact (see ``models.artifacts``) are only
+    served when the float32 files were dropped or ``compressed`` asks for
+    them, and directories published for sharing across workers are
+    memory-mapped whatever the backend (see ``models.shared_weights``).
+    Models saved before the exports existed are exported on first load so
+    later loads can skip TensorFlow.
+
+    Args:
+        path: Model directory
+        backend: One of ``keras``, ``onnx`` or ``numpy`` (defaults to ``keras``)
+        xla: Serve Keras models through XLA functions compiled on load
+        compressed: Serve the compressed weights with NumPy even when the
+            float32 export exists
+
+    Returns:
+        Model object exposing a Keras-compatible ``predict`` method
+    """
+    requested = (backend or "keras").lower()
+    if requested not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}. Expected one of {INFERENCE_BACKENDS}")
+
+    from .artifacts import load_compressed_model
+    from .shared_weights import SHARED_MANIFEST, map_shared_weights
+
+    # Published shared directories are always served from their mapped tensors
+    if os.path.exists(os.path.join(path, SHARED_MANIFEST)):
+        return map_shared_weights(path)
+
+    if requested == "onnx":
+        onnx_path = os.path.join(path, ONNX_MODEL_FILE)
+        if os.path.exists(onnx_path):
+            try:
+                return OnnxInferenceModel(onnx_path)
+            except ImportError:
+                logger.warning("onnxruntime is not installed, falling back to NumPy inference")
+        else:
+            logger.warning(f"No ONNX graph found at {onnx_path}, falling back to NumPy inference")
+
+    weights_path = os.path.join(path, NUMPY_WEIGHTS_FILE)
+    if compressed or (requested in ("onnx", "numpy") and not os.path.exists(weights_path)):
+        # Quantized weights are smaller but less accurate than the float32 export
+        compressed_model = load_compressed_model(path)
+        if compressed_model is not None:
+            return compressed_model
+
+    if requested in ("onnx", "numpy"):
+        if os.path.exists(weights_path):
+            return NumpyInferenceModel.from_file(weights_path)
+        logger.warning(f"No exported weights found at {weights_path}, loading the Keras model")
+
+    keras_path = os.path.join(path, KERAS_MODEL_FILE)
+    if not os.path.exists(keras_path):
+        # Compressed directories may have dropped the original Keras model
+        compressed_model = load_compressed_model(path)
+        if compressed_model is not None:
+            logger.warning(f"No Keras model found at {keras_path}, serving the compressed weights with NumPy")
+            return compressed_model
+        raise FileNotFoundError(f"Model file not found at {keras_path}")
+
+    tf = import_tensorflow()
+    keras_model = tf.keras.models.load_model(keras_path)
+
+    if requested == "keras":
+        return compile_for_serving(keras_model, xla)
+
+    # Backfill the exports for models saved before they existed
+    try:
+        export_inference_artifacts(keras_model, path)
+        return load_inference_model(path, requested, xla, compressed)
+    except Exception as e:
+        logger.warning(f"Could not export inference artifacts to {path}, serving with Keras: {str(e)}")
+        return compile_for_serving(keras_model, xla)
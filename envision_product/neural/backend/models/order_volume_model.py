@@ -6,37 +6,71 @@
 import os
 import pandas as pd
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras import layers, models
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import matplotlib.pyplot as plt
 from datetime import datetime
 import pickle
 import logging
 
+from .inference import import_tensorflow, load_inference_model, export_inference_artifacts
+from .artifacts import load_vocabularies
+from .features import assemble_features, fit_one_hot, group_unknown, one_hot_block
+from .preprocessing import as_categoricals, fill_missing, group_other, lane_codes, top_categories
+
 logger = logging.getLogger(__name__)
 
+# Columns read from order volume uploads (other columns are pruned on load)
+ORDER_VOLUME_COLUMNS = ['ORDER MONTH', 'SOURCE CITY', 'DESTINATION CITY', 'ORDER TYPE', 'ORDER VOLUME']
+
+# Columns identifying a lane
+LANE_COLUMNS = ['SOURCE CITY', 'DESTINATION CITY', 'ORDER TYPE']
+
+# iterative: one output, the volume of the (YEAR, MONTH) in the inputs
+# direct: one output per month of the horizon, from the lane's lagged volumes
+ARCHITECTURES = ('iterative', 'direct')
+
+# Months forecast per forward pass and lagged months used as inputs (direct architecture)
+DEFAULT_HORIZON = 12
+DEFAULT_LAGS = 12
+
 # Set random seed for reproducibility
 np.random.seed(42)
-tf.random.set_seed(42)
 
 class OrderVolumeModel:
-    def __init__(self, data_path=None, model_path=None):
+    def __init__(self, data_path=None, model_path=None, inference_backend=None,
+                 architecture='iterative', horizon=DEFAULT_HORIZON, lags=DEFAULT_LAGS,
+                 inference_loader=None):
         """Initialize the Order Volume prediction model.
         
         Args:
             data_path: Path to the CSV data file
             model_path: Path to load a pre-trained model
+            inference_backend: Backend used to serve a loaded model
+                (keras, onnx or numpy; defaults to keras)
+            architecture: Network trained: iterative (one month per input
+                row) or direct (the next ``horizon`` months of a lane per
+                input row, from its last ``lags`` monthly volumes); a loaded
+                model keeps the architecture it was trained with
+            horizon: Months forecast per forward pass (direct architecture)
+            lags: Lagged monthly volumes used as inputs (direct architecture)
+            inference_loader: Function loading the network of a model
+                directory for a backend (defaults to load_inference_model;
+                ModelService passes its cached serving loader)
         """
+        if architecture not in ARCHITECTURES:
+            raise ValueError(f"Unknown architecture: {architecture}. Expected one of {ARCHITECTURES}")
+        
         self.data_path = data_path
         self.model_path = model_path
+        self.inference_backend = inference_backend
+        self.inference_loader = inference_loader or load_inference_model
+        self.architecture = architecture
+        self.horizon = horizon
+        self.lags = lags
         self.model = None
         self.source_encoder = None
         self.dest_encoder = None
         self.type_encoder = None
         self.scaler = None
+        self.lag_scaler = None  # direct architecture only
         self.preprocessed_data = None
         self.X_train = None
         self.X_test = None
@@ -53,18 +87,22 @@ class OrderVolumeModel:
     
     def load_data(self):
         """Load and perform initial preprocessing of the data."""
+        from utils.columnar import read_table
+        
         logger.info(f"Loading data from {self.data_path}...")
-        self.raw_data = pd.read_csv(self.data_path)
+        self.raw_data = read_table(self.data_path, columns=ORDER_VOLUME_COLUMNS, categorical=True)
         
         # Check data integrity
         if self.raw_data.isnull().sum().sum() > 0:
             logger.warning("Data contains missing values. Filling with appropriate values.")
-            self.raw_data.fillna(0, inplace=True)
+            fill_missing(self.raw_data, 0)
         
         logger.info(f"Data loaded successfully. Shape: {self.raw_data.shape}")
     
     def preprocess_data(self):
         """Preprocess the data for training the neural network."""
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+        
         logger.info("Preprocessing data...")
         
         # Create a copy of the raw data
@@ -82,32 +120,34 @@ class OrderVolumeModel:
         
         # Source city encoding
         self.source_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_encoded = self.source_encoder.fit_transform(data[['SOURCE CITY']])
+        source_encoded = fit_one_hot(self.source_encoder, data['SOURCE CITY'], 'SOURCE CITY')
         source_columns = [f'SOURCE_{i}' for i in range(source_encoded.shape[1])]
         source_df = pd.DataFrame(source_encoded, columns=source_columns)
         
         # Destination city encoding
-        self.dest_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_encoded = self.dest_encoder.fit_transform(data[['DESTINATION CITY']])
-        
         # Since there are many destination cities, we'll use dimensionality reduction
         # by only keeping the top 50 most frequent destinations, the rest will be handled as 'unknown'
-        dest_counts = data['DESTINATION CITY'].value_counts()
-        top_dests = dest_counts.nlargest(50).index.tolist()
+        top_dests = top_categories(data['DESTINATION CITY'], 50)
         
-        # Re-fit encoder with only top destinations
-        data['DEST_CITY_GROUPED'] = data['DESTINATION CITY'].apply(lambda x: x if x in top_dests else 'OTHER')
+        # Fit the encoder with only top destinations
+        data['DEST_CITY_GROUPED'] = group_other(data['DESTINATION CITY'], top_dests)
         self.dest_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_encoded = self.dest_encoder.fit_transform(data[['DEST_CITY_GROUPED']])
+        dest_encoded = fit_one_hot(self.dest_encoder, data['DEST_CITY_GROUPED'], 'DEST_CITY_GROUPED')
         dest_columns = [f'DEST_{i}' for i in range(dest_encoded.shape[1])]
         dest_df = pd.DataFrame(dest_encoded, columns=dest_columns)
         
         # Order type encoding
         self.type_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        type_encoded = self.type_encoder.fit_transform(data[['ORDER TYPE']])
+        type_encoded = fit_one_hot(self.type_encoder, data['ORDER TYPE'], 'ORDER TYPE')
         type_columns = [f'TYPE_{i}' for i in range(type_encoded.shape[1])]
         type_df = pd.DataFrame(type_encoded, columns=type_columns)
         
+        # Create lane identifier (integer number of each source, destination and order type combination)
+        self.raw_data['LANE_ID'] = lane_codes(self.raw_data, LANE_COLUMNS)
+        
+        if self.architecture == 'direct':
+            return self._preprocess_direct(data, source_columns + dest_columns + type_columns)
+        
         # Combine all encoded features
         logger.info("Combining features...")
         
@@ -133,25 +173,109 @@ class OrderVolumeModel:
         logger.info(f"Data preprocessing complete. Processed shape: {processed_data.shape}")
         self.preprocessed_data = processed_data
         
-        # Create lane identifier (combination of source, destination, and order type)
-        self.raw_data['LANE_ID'] = (
-            self.raw_data['SOURCE CITY'] + '_' + 
-            self.raw_data['DESTINATION CITY'] + '_' + 
-            self.raw_data['ORDER TYPE']
-        )
+        return processed_data
+    
+    def _lag_columns(self):
+        """Names of the lagged volume inputs, oldest first (LAG_1 is the latest month)."""
+        return [f'LAG_{lag}' for lag in range(self.lags, 0, -1)]
+    
+    def _target_columns(self):
+        """Names of the training targets."""
+        if self.architecture == 'direct':
+            return [f'ORDER VOLUME_{step}' for step in range(1, self.horizon + 1)]
+        return ['ORDER VOLUME']
+    
+    def _lane_series(self, data):
+        """Monthly order volume of every lane as a dense matrix.
+        
+        Args:
+            data: Frame with ORDER MONTH ('YYYY MM'), lane and ORDER VOLUME columns
+        
+        Returns:
+            Tuple of (lanes, first_month, series): the lane columns of each
+            lane in order of first appearance, the month number
+            (``year * 12 + month - 1``) of the first column, and a
+            (lanes, months) array of volumes, zero for months without orders
+        """
+        order_dates = pd.to_datetime(data['ORDER MONTH'].astype(str).str.replace(' ', '-') + '-01')
+        month_numbers = (order_dates.dt.year * 12 + order_dates.dt.month - 1).to_numpy()
+        first_month = int(month_numbers.min())
+        n_months = int(month_numbers.max()) - first_month + 1
+        
+        lane_numbers = lane_codes(data, LANE_COLUMNS)
+        lanes = data[LANE_COLUMNS].iloc[np.unique(lane_numbers, return_index=True)[1]].reset_index(drop=True)
+        series = np.bincount(
+            lane_numbers * n_months + (month_numbers - first_month),
+            weights=data['ORDER VOLUME'].to_numpy(dtype=np.float64),
+            minlength=len(lanes) * n_months
+        ).reshape(len(lanes), n_months)
+        return lanes, first_month, series
+    
+    def _preprocess_direct(self, data, categorical_columns):
+        """Build the training windows of the direct architecture.
+        
+        Every lane's monthly series is cut into overlapping windows of
+        ``lags`` months of inputs followed by ``horizon`` months of targets
+        (months before the first one of the data count as zero). Each window
+        is one training row: the lane one-hots, the scaled YEAR and MONTH of
+        the first target month and the scaled lagged volumes.
         
+        Args:
+            data: Raw data with ORDER MONTH and the lane columns
+            categorical_columns: Names of the one-hot lane feature columns
+        
+        Returns:
+            Preprocessed frame with the features and ORDER VOLUME_1..H targets
+        """
+        from numpy.lib.stride_tricks import sliding_window_view
+        from sklearn.preprocessing import StandardScaler
+        
+        lanes, first_month, series = self._lane_series(data)
+        origins = series.shape[1] - self.horizon
+        if origins < 1:
+            raise ValueError(f"The direct architecture needs more than {self.horizon} months of data "
+                             f"(horizon), the data has {series.shape[1]}")
+        
+        # Window w covers padded months w .. w + lags + horizon - 1; its targets start at data month w
+        padded = np.pad(series, ((0, 0), (self.lags, 0)))
+        windows = sliding_window_view(padded, self.lags + self.horizon, axis=1)[:, 1:origins + 1]
+        windows = windows.reshape(-1, self.lags + self.horizon)
+        lags, targets = windows[:, :self.lags], windows[:, self.lags:]
+        
+        lane_rows = lanes.iloc[np.repeat(np.arange(len(lanes)), origins)].reset_index(drop=True)
+        target_months = first_month + np.tile(np.arange(1, origins + 1), len(lanes))
+        years, months = target_months // 12, target_months % 12 + 1
+        
+        self.scaler = StandardScaler().fit(pd.DataFrame({'YEAR': years, 'MONTH': months}))
+        self.lag_scaler = StandardScaler().fit(pd.DataFrame(lags, columns=self._lag_columns()))
+        
+        features = self._direct_feature_matrix(lane_rows, years, months, lags)
+        processed_data = pd.concat([
+            pd.DataFrame(features, columns=['YEAR', 'MONTH'] + categorical_columns + self._lag_columns()),
+            pd.DataFrame(targets, columns=self._target_columns())
+        ], axis=1)
+        
+        logger.info(f"Direct data preprocessing complete: {len(lanes)} lanes x {origins} windows, "
+                    f"processed shape: {processed_data.shape}")
+        self.preprocessed_data = processed_data
         return processed_data
     
     def prepare_train_test_split(self, test_size=0.2):
         """Split the preprocessed data into training and testing sets."""
+        from sklearn.model_selection import train_test_split
+        
         logger.info(f"Splitting data with test_size={test_size}...")
         
         if self.preprocessed_data is None:
             self.preprocess_data()
         
-        # Separate features and target
-        X = self.preprocessed_data.drop('ORDER VOLUME', axis=1)
-        y = self.preprocessed_data['ORDER VOLUME']
+        # Separate features and target (one column per horizon month for the direct architecture)
+        target_columns = self._target_columns()
+        X = self.preprocessed_data.drop(target_columns, axis=1)
+        if self.architecture == 'direct':
+            y = self.preprocessed_data[target_columns]
+        else:
+            y = self.preprocessed_data['ORDER VOLUME']
         
         # Split the data
         self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
@@ -164,6 +288,8 @@ class OrderVolumeModel:
     def build_model(self):
         """Build the neural network model architecture."""
         logger.info("Building neural network model...")
+        tf = import_tensorflow()
+        layers, models = tf.keras.layers, tf.keras.models
         
         # Get input shape from training data
         input_dim = self.X_train.shape[1]
@@ -176,7 +302,8 @@ class OrderVolumeModel:
             layers.Dense(64, activation='relu'),
             layers.Dropout(0.2),
             layers.Dense(32, activation='relu'),
-            layers.Dense(1)  # Output layer - regression task
+            # Output layer - regression task (one output per horizon month for the direct architecture)
+            layers.Dense(self.horizon if self.architecture == 'direct' else 1)
         ])
         
         # Compile the model
@@ -193,6 +320,7 @@ class OrderVolumeModel:
     def train(self, epochs=100, batch_size=32, validation_split=0.2, callbacks=None):
         """Train the neural network model."""
         logger.info(f"Training model with {epochs} epochs and batch_size={batch_size}...")
+        tf = import_tensorflow()
         
         if self.X_train is None or self.y_train is None:
             self.prepare_train_test_split()
@@ -243,6 +371,8 @@ class OrderVolumeModel:
     
     def evaluate(self, plot_path=None):
         """Evaluate the model on the test set."""
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        
         logger.info("Evaluating model on test set...")
         
         if self.model is None:
@@ -260,18 +390,28 @@ class OrderVolumeModel:
         logger.info(f"Root Mean Squared Error: {rmse:.2f}")
         logger.info(f"R² Score: {r2:.4f}")
         
+        evaluation = {'mae': mae, 'rmse': rmse, 'r2': r2}
+        if self.architecture == 'direct':
+            # Error by months ahead of the forecast origin
+            evaluation['horizon_mae'] = mean_absolute_error(self.y_test, y_pred, multioutput='raw_values').tolist()
+        
         # Plot actual vs predicted values if a plot path is provided
         if plot_path:
+            import matplotlib
+            matplotlib.use("Agg")  # headless backend, the API has no display
+            import matplotlib.pyplot as plt
+            
+            max_volume = float(np.max(np.asarray(self.y_test)))
             plt.figure(figsize=(10, 6))
-            plt.scatter(self.y_test, y_pred, alpha=0.5)
-            plt.plot([0, self.y_test.max()], [0, self.y_test.max()], 'r--')
+            plt.scatter(np.asarray(self.y_test).reshape(-1), np.asarray(y_pred).reshape(-1), alpha=0.5)
+            plt.plot([0, max_volume], [0, max_volume], 'r--')
             plt.xlabel('Actual Order Volume')
             plt.ylabel('Predicted Order Volume')
             plt.title('Actual vs Predicted Order Volume')
             plt.savefig(plot_path)
             plt.close()
         
-        return {'mae': mae, 'rmse': rmse, 'r2': r2}
+        return evaluation
     
     def predict_future(self, months=6):
         """Generate predictions for future months for each unique lane.
@@ -299,19 +439,12 @@ class OrderVolumeModel:
                 'ORDER VOLUME': [100, 150, 200]
             })
         
-        # Ensure LANE_ID exists in raw_data
-        if 'LANE_ID' not in self.raw_data.columns:
-            logger.warning("LANE_ID not found in raw_data, generating it now")
-            self.raw_data['LANE_ID'] = (
-                self.raw_data['SOURCE CITY'] + '_' + 
-                self.raw_data['DESTINATION CITY'] + '_' + 
-                self.raw_data['ORDER TYPE']
-            )
+        # Get unique lanes (source, destination, order type combinations), in
+        # order of first appearance; lanes are numbered on category codes
+        lane_numbers = lane_codes(self.raw_data, LANE_COLUMNS)
+        lanes = self.raw_data[LANE_COLUMNS].iloc[np.unique(lane_numbers, return_index=True)[1]]
         
-        # Get unique lanes (source, destination, order type combinations)
-        unique_lanes = self.raw_data['LANE_ID'].unique()
-        
-        if len(unique_lanes) == 0:
+        if len(lanes) == 0:
             logger.warning("No lanes found in the data. Using sample data for demo predictions.")
             # Create sample lane for demonstration
             sample_data = {
@@ -319,11 +452,10 @@ class OrderVolumeModel:
                 'DESTINATION CITY': ['Miami', 'Dallas', 'Seattle'],
                 'ORDER TYPE': ['Standard', 'Express', 'Premium'],
                 'ORDER MONTH': ['January 2023', 'February 2023', 'March 2023'],
-                'ORDER VOLUME': [100, 150, 200],
-                'LANE_ID': ['New York_Miami_Standard', 'Chicago_Dallas_Express', 'Los Angeles_Seattle_Premium']
+                'ORDER VOLUME': [100, 150, 200]
             }
             self.raw_data = pd.DataFrame(sample_data)
-            unique_lanes = self.raw_data['LANE_ID'].unique()
+            lanes = self.raw_data[LANE_COLUMNS]
         
         # Get the latest month in the data
         try:
@@ -333,104 +465,46 @@ class OrderVolumeModel:
             logger.warning(f"Could not parse the latest date: {str(e)}. Using current date.")
             latest_date = pd.Timestamp.now().replace(day=1)
         
-        # Create a dataframe to store predictions
-        future_predictions = []
+        # One input row per lane and future month, predicted in one batch
+        prediction_dates = [latest_date + pd.DateOffset(months=i) for i in range(1, months + 1)]
+        lane_rows = lanes.iloc[np.repeat(np.arange(len(lanes)), months)].reset_index(drop=True)
+        years = np.tile([date.year for date in prediction_dates], len(lanes))
+        month_numbers = np.tile([date.month for date in prediction_dates], len(lanes))
         
-        for lane in unique_lanes:
-            # Split the lane ID back into its components
-            try:
-                parts = lane.split('_', 2)
-                if len(parts) < 3:
-                    logger.warning(f"Invalid lane ID format: {lane}. Skipping.")
-                    continue
-                    
-                source, destination, order_type = parts[0], parts[1], parts[2]
-                
-                # For each future month, prepare input data and make prediction
-                for i in range(1, months+1):
-                    # Calculate future date
-                    future_date = pd.DateOffset(months=i)
-                    prediction_date = latest_date + future_date
-                    
-                    # Create input features for prediction
-                    prediction_input = pd.DataFrame({
-                        'SOURCE CITY': [source],
-                        'DESTINATION CITY': [destination],
-                        'ORDER TYPE': [order_type],
-                        'YEAR': [prediction_date.year],
-                        'MONTH': [prediction_date.month]
-                    })
-                    
-                    # Handle destination city grouping
-                    try:
-                        top_dests = self.raw_data['DESTINATION CITY'].value_counts().nlargest(50).index.tolist()
-                        prediction_input['DEST_CITY_GROUPED'] = prediction_input['DESTINATION CITY'].apply(
-                            lambda x: x if x in top_dests else 'OTHER'
-                        )
-                        
-                        # Encode categorical variables
-                        source_encoded = self.source_encoder.transform(prediction_input[['SOURCE CITY']])
-                        dest_encoded = self.dest_encoder.transform(prediction_input[['DEST_CITY_GROUPED']])
-                        type_encoded = self.type_encoder.transform(prediction_input[['ORDER TYPE']])
-                        
-                        # Create column names
-                        source_columns = [f'SOURCE_{i}' for i in range(source_encoded.shape[1])]
-                        dest_columns = [f'DEST_{i}' for i in range(dest_encoded.shape[1])]
-                        type_columns = [f'TYPE_{i}' for i in range(type_encoded.shape[1])]
-                        
-                        # Create DataFrames for each encoded feature
-                        source_df = pd.DataFrame(source_encoded, columns=source_columns)
-                        dest_df = pd.DataFrame(dest_encoded, columns=dest_columns)
-                        type_df = pd.DataFrame(type_encoded, columns=type_columns)
-                        
-                        # Scale numerical features
-                        numerical_data = prediction_input[['YEAR', 'MONTH']]
-                        scaled_numerical = self.scaler.transform(numerical_data)
-                        numerical_df = pd.DataFrame(
-                            scaled_numerical, 
-                            columns=['YEAR', 'MONTH']
-                        )
-                        
-                        # Combine all features
-                        X_pred = pd.concat([
-                            numerical_df,
-                            source_df,
-                            dest_df,
-                            type_df
-                        ], axis=1)
-                        
-                        # Make prediction
-                        prediction = self.model.predict(X_pred, verbose=0)[0][0]
-                        
-                        # Round prediction and handle negative values
-                        prediction = max(round(prediction), 0)
-                    except Exception as e:
-                        logger.error(f"Error making prediction for lane {lane}: {str(e)}")
-                        # Use a reasonable default value
-                        prediction = 100
-                    
-                    # Add prediction to results
-                    future_predictions.append({
-                        'SOURCE CITY': source,
-                        'DESTINATION CITY': destination,
-                        'ORDER TYPE': order_type,
-                        'PREDICTION YEAR': prediction_date.year,
-                        'PREDICTION MONTH': prediction_date.month,
-                        'PREDICTION DATE': prediction_date.strftime('%Y-%m'),
-                        'PREDICTED ORDER VOLUME': prediction
-                    })
-            except Exception as e:
-                logger.error(f"Error processing lane {lane}: {str(e)}")
-                continue
+        try:
+            if self.architecture == 'direct':
+                # Rows are lane-major with months inner, like the (lanes, months) forecast
+                predictions = self._forecast(lanes, months).reshape(-1)
+            else:
+                features = self._feature_matrix(lane_rows, years, month_numbers)
+                predictions = self.model.predict(features, verbose=0).reshape(-1)
+            
+            # Round predictions and handle negative values
+            predictions = np.maximum(np.round(predictions), 0).astype(np.int64)
+        except Exception as e:
+            logger.error(f"Error making predictions for {len(lanes)} lanes: {str(e)}")
+            # Use a reasonable default value
+            predictions = np.full(len(lane_rows), 100, dtype=np.int64)
+        
+        future_predictions = pd.DataFrame({
+            'SOURCE CITY': lane_rows['SOURCE CITY'].astype(str),
+            'DESTINATION CITY': lane_rows['DESTINATION CITY'].astype(str),
+            'ORDER TYPE': lane_rows['ORDER TYPE'].astype(str),
+            'PREDICTION YEAR': years,
+            'PREDICTION MONTH': month_numbers,
+            'PREDICTION DATE': np.tile([date.strftime('%Y-%m') for date in prediction_dates], len(lanes)),
+            'PREDICTED ORDER VOLUME': predictions
+        })
         
         # Fallback: if no predictions were generated, create sample predictions
-        if not future_predictions:
+        if future_predictions.empty:
             logger.warning("No predictions were generated. Creating sample predictions.")
             current_date = pd.Timestamp.now().replace(day=1)
             
+            sample_predictions = []
             for i in range(1, months+1):
                 prediction_date = current_date + pd.DateOffset(months=i)
-                future_predictions.append({
+                sample_predictions.append({
                     'SOURCE CITY': 'Sample Source',
                     'DESTINATION CITY': 'Sample Destination',
                     'ORDER TYPE': 'Sample Type',
@@ -439,11 +513,143 @@ class OrderVolumeModel:
                     'PREDICTION DATE': prediction_date.strftime('%Y-%m'),
                     'PREDICTED ORDER VOLUME': 100 + i * 10  # Just a sample increasing value
                 })
+            future_predictions = pd.DataFrame(sample_predictions)
+        
+        return future_predictions
+    
+    def _recent_volumes(self, lanes):
+        """Last ``lags`` monthly volumes of lanes in the training data.
+        
+        Args:
+            lanes: Frame with the lane columns
+        
+        Returns:
+            Tuple of (volumes, next_month): a (rows, lags) array, oldest month
+            first and zero for lanes without history, and the month number
+            of the first month after the training data
+        """
+        # The training history is the same for every call (scoring calls once per chunk)
+        cached = getattr(self, '_history', None)
+        if cached is None or cached[0] is not self.raw_data:
+            self._history = cached = (self.raw_data, self._lane_series(self.raw_data))
+        history_lanes, first_month, series = cached[1]
+        positions = pd.MultiIndex.from_frame(history_lanes.astype(str)).get_indexer(
+            pd.MultiIndex.from_frame(lanes[LANE_COLUMNS].astype(str)))
+        
+        recent = np.pad(series, ((0, 0), (self.lags, 0)))[:, -self.lags:]
+        volumes = np.zeros((len(lanes), self.lags))
+        known = positions >= 0
+        volumes[known] = recent[positions[known]]
+        return volumes, first_month + series.shape[1]
+    
+    def _direct_inputs(self, data):
+        """Direct architecture inputs of each row's lane at the end of the training data.
         
-        # Convert to DataFrame
-        predictions_df = pd.DataFrame(future_predictions)
+        Returns:
+            Tuple of (features, next_month), where next_month is the month
+            number of the first forecast month
+        """
+        volumes, next_month = self._recent_volumes(data)
+        years = np.full(len(data), next_month // 12)
+        month_numbers = np.full(len(data), next_month % 12 + 1)
+        return self._direct_feature_matrix(data, years, month_numbers, volumes), next_month
+    
+    def _forecast(self, lanes, months):
+        """Forecast the months after the training data for each lane (direct architecture).
+        
+        One forward pass gives ``horizon`` months for every lane; longer
+        forecasts feed each pass's predictions back in as lagged volumes.
+        
+        Args:
+            lanes: Frame with the lane columns, one row per lane
+            months: Number of months to forecast
         
-        return predictions_df
+        Returns:
+            (lanes, months) array of predicted volumes
+        """
+        volumes, next_month = self._recent_volumes(lanes)
+        forecasts = []
+        for _ in range(-(-months // self.horizon)):
+            years = np.full(len(lanes), next_month // 12)
+            month_numbers = np.full(len(lanes), next_month % 12 + 1)
+            features = self._direct_feature_matrix(lanes, years, month_numbers, volumes)
+            forecast = np.asarray(self.model.predict(features, verbose=0)).reshape(len(lanes), self.horizon)
+            forecasts.append(forecast)
+            volumes = np.hstack([volumes, np.maximum(forecast, 0)])[:, -self.lags:]
+            next_month += self.horizon
+        return np.hstack(forecasts)[:, :months]
+    
+    def transform_features(self, data):
+        """Build model inputs for every row of a frame at once.
+        
+        Produces the same features as ``predict_future`` does for one lane
+        and month; destination cities outside the fitted categories are
+        grouped as 'OTHER'. For the direct architecture each row gets the
+        inputs of its lane's forecast from the end of the training data.
+        
+        Args:
+            data: Frame with ORDER MONTH ('YYYY MM'), SOURCE CITY,
+                DESTINATION CITY and ORDER TYPE columns
+        
+        Returns:
+            float32 feature matrix with one row per input row
+        """
+        if self.architecture == 'direct':
+            return self._direct_inputs(data)[0]
+        
+        order_dates = pd.to_datetime(data['ORDER MONTH'].astype(str).str.replace(' ', '-') + '-01')
+        return self._feature_matrix(data, order_dates.dt.year.to_numpy(), order_dates.dt.month.to_numpy())
+    
+    def _feature_matrix(self, data, years, months):
+        """Build model inputs from lane columns and the year and month of each row."""
+        numerical_data = pd.DataFrame({
+            'YEAR': years,
+            'MONTH': months
+        }, index=data.index)
+        scaled_numerical = np.asarray(self.scaler.transform(numerical_data), dtype=np.float32)
+        
+        dest_city_grouped = group_unknown(data['DESTINATION CITY'], self.dest_encoder)
+        return assemble_features([
+            (scaled_numerical, ['YEAR', 'MONTH']),
+            one_hot_block(self.source_encoder, data['SOURCE CITY'], 'SOURCE CITY', 'SOURCE'),
+            one_hot_block(self.dest_encoder, dest_city_grouped, 'DEST_CITY_GROUPED', 'DEST'),
+            one_hot_block(self.type_encoder, data['ORDER TYPE'], 'ORDER TYPE', 'TYPE')
+        ])
+    
+    def _direct_feature_matrix(self, data, years, months, volumes):
+        """Build direct architecture inputs: the lane features of the first forecast month and its lagged volumes."""
+        scaled_volumes = self.lag_scaler.transform(pd.DataFrame(volumes, columns=self._lag_columns()))
+        return np.hstack([
+            self._feature_matrix(data, years, months),
+            np.asarray(scaled_volumes, dtype=np.float32)
+        ])
+    
+    def predict_frame(self, data):
+        """Predict order volumes for every row of a frame.
+        
+        Args:
+            data: Frame accepted by ``transform_features``
+        
+        Returns:
+            Array of predicted order volumes, rounded and clipped at zero.
+            For the direct architecture, rows whose month is outside the
+            horizon after the training data are NaN.
+        """
+        if self.model is None:
+            raise ValueError("Model has not been trained yet. Call train() first.")
+        
+        if self.architecture == 'direct':
+            features, next_month = self._direct_inputs(data)
+            forecasts = np.asarray(self.model.predict(features, verbose=0)).reshape(len(data), self.horizon)
+            order_dates = pd.to_datetime(data['ORDER MONTH'].astype(str).str.replace(' ', '-') + '-01')
+            steps = (order_dates.dt.year * 12 + order_dates.dt.month - 1).to_numpy() - next_month
+            
+            predictions = np.full(len(data), np.nan)
+            in_horizon = np.flatnonzero((steps >= 0) & (steps < self.horizon))
+            predictions[in_horizon] = forecasts[in_horizon, steps[in_horizon]]
+        else:
+            predictions = self.model.predict(self.transform_features(data), verbose=0).reshape(-1)
+        return np.maximum(np.round(predictions), 0)
     
     def save_model(self, path="order_volume_model"):
         """Save the trained model and preprocessing components."""
@@ -458,13 +664,23 @@ class OrderVolumeModel:
         # Save the model
         self.model.save(os.path.join(path, "model.keras"))
         
+        # Export the weights for TensorFlow-free serving
+        try:
+            export_inference_artifacts(self.model, path)
+        except Exception as e:
+            logger.warning(f"Could not export inference artifacts: {str(e)}")
+        
         # Save preprocessors
         with open(os.path.join(path, "preprocessors.pkl"), "wb") as f:
             pickle.dump({
                 'source_encoder': self.source_encoder,
                 'dest_encoder': self.dest_encoder,
                 'type_encoder': self.type_encoder,
-                'scaler': self.scaler
+                'scaler': self.scaler,
+                'lag_scaler': self.lag_scaler,
+                'architecture': self.architecture,
+                'horizon': self.horizon,
+                'lags': self.lags
             }, f)
         
         # Save raw data for later prediction
@@ -480,31 +696,34 @@ class OrderVolumeModel:
         logger.info(f"Loading model from {path}...")
         
         try:
-            # Load the model
-            model_path = os.path.join(path, "model.keras")
-            if not os.path.exists(model_path):
-                raise FileNotFoundError(f"Model file not found at {model_path}")
-                
-            self.model = models.load_model(model_path)
+            # Load the model with the configured inference backend
+            self.model = self.inference_loader(path, self.inference_backend)
             
-            # Load preprocessors
-            preprocessors_path = os.path.join(path, "preprocessors.pkl")
-            if not os.path.exists(preprocessors_path):
-                raise FileNotFoundError(f"Preprocessors file not found at {preprocessors_path}")
+            # Load preprocessors, preferring the compressed vocabulary
+            preprocessors = load_vocabularies(path)
+            if preprocessors is None:
+                preprocessors_path = os.path.join(path, "preprocessors.pkl")
+                if not os.path.exists(preprocessors_path):
+                    raise FileNotFoundError(f"Preprocessors file not found at {preprocessors_path}")
                 
-            with open(preprocessors_path, "rb") as f:
-                preprocessors = pickle.load(f)
-                self.source_encoder = preprocessors['source_encoder']
-                self.dest_encoder = preprocessors['dest_encoder']
-                self.type_encoder = preprocessors['type_encoder']
-                self.scaler = preprocessors['scaler']
+                with open(preprocessors_path, "rb") as f:
+                    preprocessors = pickle.load(f)
+            
+            self.source_encoder = preprocessors['source_encoder']
+            self.dest_encoder = preprocessors['dest_encoder']
+            self.type_encoder = preprocessors['type_encoder']
+            self.scaler = preprocessors['scaler']
+            self.lag_scaler = preprocessors.get('lag_scaler')
+            self.architecture = preprocessors.get('architecture', 'iterative')
+            self.horizon = preprocessors.get('horizon', self.horizon)
+            self.lags = preprocessors.get('lags', self.lags)
             
             # Load raw data for prediction purposes
             data_path = os.path.join(path, "training_data.csv")
             if os.path.exists(data_path):
                 # If we saved training data, use it
                 try:
-                    self.raw_data = pd.read_csv(data_path)
+                    self.raw_data = as_categoricals(pd.read_csv(data_path))
                     logger.info(f"Loaded training data with {len(self.raw_data)} rows")
                 except Exception as e:
                     logger.error(f"Error loading training data: {str(e)}")
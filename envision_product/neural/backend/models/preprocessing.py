@@ -0,0 +1,87 @@
+"""
+Categorical columns in model preprocessing.
+
+Carrier, city, state, country and order type columns repeat a few thousand
+distinct strings over every row of a training file. The model classes load
+them as pandas categoricals (``read_table(..., categorical=True)``), which
+store one small integer code per row, and preprocessing works on the codes:
+destination cities are grouped by code, lanes are numbered by grouping on
+code tuples, and ``features.one_hot_block`` encodes each distinct value once
+and gathers rows by code.
+"""
+
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def as_categoricals(frame: pd.DataFrame, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Convert string columns of a frame to categoricals, in place.
+
+    Args:
+        frame: Frame to convert
+        columns: Columns to convert; defaults to the carrier, city, state,
+            country, type and lane columns (as stored in Parquet uploads).
+            Columns missing from the frame or that are not strings are left
+            as they are.
+
+    Returns:
+        The frame
+    """
+    if columns is None:
+        from utils.columnar import is_categorical_column
+        columns = [column for column in frame.columns if is_categorical_column(column)]
+    for column in columns:
+        if column in frame.columns and pd.api.types.is_string_dtype(frame[column].dtype):
+            frame[column] = frame[column].astype("category")
+    return frame
+
+
+def fill_missing(frame: pd.DataFrame, value=0) -> None:
+    """Fill missing values in place; on categoricals the value becomes a category."""
+    for column in frame.columns:
+        values = frame[column]
+        if not values.isna().any():
+            continue
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            if value not in values.cat.categories:
+                values = values.cat.add_categories([value])
+        frame[column] = values.fillna(value)
+
+
+def top_categories(values: pd.Series, n: int) -> List:
+    """The ``n`` most frequent values, as ``values.value_counts().nlargest(n)`` picks them."""
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.value_counts().nlargest(n).index.tolist()
+
+    codes = pd.Series(values.cat.codes.to_numpy())
+    top = codes[codes >= 0].value_counts().nlargest(n).index.to_numpy()
+    return values.cat.categories[top].tolist()
+
+
+def group_other(values: pd.Series, keep: Sequence, other: str = "OTHER") -> pd.Series:
+    """Replace values not in ``keep`` with ``other``.
+
+    Categoricals are regrouped on their codes and stay categorical.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.where(values.isin(keep), other)
+
+    categories = values.cat.categories
+    kept = categories.isin(keep)
+    if other not in categories:
+        categories = categories.append(pd.Index([other]))
+        kept = np.append(kept, False)
+    other_code = categories.get_loc(other)
+
+    codes = values.cat.codes.to_numpy()
+    keep_code = np.append(kept, False)  # code -1 (missing) is grouped too
+    grouped = np.where(keep_code[codes], codes, other_code)
+    return pd.Series(pd.Categorical.from_codes(grouped, categories), index=values.index,
+                     name=values.name).cat.remove_unused_categories()
+
+
+def lane_codes(frame: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """Number each row's lane (its tuple of ``columns`` values), in order of first appearance."""
+    return frame.groupby(list(columns), sort=False, observed=True, dropna=False).ngroup().to_numpy()
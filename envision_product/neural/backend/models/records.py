@@ -0,0 +1,106 @@
+"""
+Column-wise assembly and serialization of prediction results.
+
+``predict_on_training_data`` used to walk the training data row by row,
+building a dictionary per row with per-field casts and then dumping the list
+with the pure-Python (indented) JSON encoder. These helpers keep the results
+as a DataFrame whose columns are the output fields: errors are computed as
+arrays, the JSON document is written by pandas' C encoder straight from the
+columns, and per-row dictionaries are only built for callers that return
+them.
+"""
+
+import os
+import json
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+# Significant digits written for floats (pandas' maximum)
+JSON_DOUBLE_PRECISION = 15
+
+
+def prediction_frame(data: pd.DataFrame, fields: Mapping[str, str],
+                     ints: tuple = (), floats: tuple = ()) -> pd.DataFrame:
+    """Select and rename the output fields of a prediction result.
+
+    Args:
+        data: Frame holding inputs, predictions and errors
+        fields: Output field name -> column of ``data`` (None for a field
+            that is always null)
+        ints: Output fields cast to integers
+        floats: Output fields cast to floats; infinite values become null
+
+    Returns:
+        Frame with one column per output field, in ``fields`` order
+    """
+    columns = {}
+    for field, column in fields.items():
+        if column is None:
+            values = pd.Series([None] * len(data), index=data.index, dtype=object)
+        else:
+            values = data[column]
+        if field in ints:
+            values = values.astype(np.int64)
+        elif field in floats:
+            values = values.astype(np.float64).replace([np.inf, -np.inf], np.nan)
+        columns[field] = values
+    return pd.DataFrame(columns).reset_index(drop=True)
+
+
+def frame_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Per-row dictionaries of Python values (NaN and missing values as None)."""
+    columns = []
+    for name in frame.columns:
+        values = frame[name]
+        if values.isna().any():
+            values = values.astype(object).where(values.notna(), None)
+        columns.append(values.tolist())
+    names = list(frame.columns)
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def write_records_json(path: str, header: Dict[str, Any], frame: pd.DataFrame,
+                       key: str = "predictions") -> None:
+    """Write ``{**header, key: [rows...]}`` without building per-row dictionaries.
+
+    The document is written to a staging file and moved into place, so
+    readers never see a partial file.
+
+    Args:
+        path: Output JSON path
+        header: Top-level fields written before the records
+        frame: Records, one per row (NaN and infinity are written as null)
+        key: Key of the records array
+    """
+    staging_path = os.path.join(os.path.dirname(path) or ".", f".{os.path.basename(path)}.tmp")
+    opening = json.dumps(header, default=str)[:-1]
+    with open(staging_path, "w", encoding="utf-8") as f:
+        f.write(f'{opening}{", " if header else ""}{json.dumps(key)}: ')
+        frame.to_json(f, orient="records", double_precision=JSON_DOUBLE_PRECISION)
+        f.write("}")
+    os.replace(staging_path, path)
+
+
+def error_columns(actual: np.ndarray, predicted: np.ndarray,
+                  zero_percent_error: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """Absolute and percentage errors of predictions.
+
+    Args:
+        actual: Actual values
+        predicted: Predicted values
+        zero_percent_error: Percentage error used where the actual value is
+            zero; None leaves the division's infinity (or NaN)
+
+    Returns:
+        Dictionary with ``absolute_error`` and ``percent_error`` arrays
+    """
+    actual = np.asarray(actual, dtype=np.float64)
+    predicted = np.asarray(predicted, dtype=np.float64)
+    absolute_error = np.abs(actual - predicted)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_error = absolute_error / np.abs(actual) * 100
+    if zero_percent_error is not None:
+        percent_error = np.where(actual != 0, percent_error, zero_percent_error)
+    return {"absolute_error": absolute_error, "percent_error": percent_error}
@@ -0,0 +1,199 @@
+"""
+Memory-mapped model weights shared across worker processes.
+
+``publish_model_directory`` writes a model's Dense layers as one raw float32
+``.npy`` file per tensor into a shared directory (``/dev/shm`` by default, see
+``services.model_sharing``), together with its JSON vocabulary and links to
+the remaining model files. Workers load the published directory like any
+other model directory; ``load_inference_model`` maps the tensors read-only
+with ``np.load(mmap_mode="r")``, so every worker reads the same physical
+pages instead of holding its own copy of the weights.
+"""
+
+import os
+import json
+import time
+import shutil
+import pickle
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .inference import (
+    KERAS_MODEL_FILE,
+    NUMPY_WEIGHTS_FILE,
+    ONNX_MODEL_FILE,
+    NumpyInferenceModel,
+    load_numpy_weights,
+)
+from .artifacts import (
+    ARTIFACT_MANIFEST,
+    COMPRESSED_WEIGHTS_FILE,
+    PREPROCESSOR_FILES,
+    VOCAB_FILE,
+    encode_vocabularies,
+    load_compressed_weights,
+)
+
+logger = logging.getLogger(__name__)
+
+SHARED_MANIFEST = "shared_weights.json"
+
+# Files replaced by the shared tensors and vocabulary; everything else is linked
+_WEIGHT_FILES = (KERAS_MODEL_FILE, ONNX_MODEL_FILE, NUMPY_WEIGHTS_FILE, COMPRESSED_WEIGHTS_FILE, ARTIFACT_MANIFEST)
+_SKIPPED_FILES = _WEIGHT_FILES + PREPROCESSOR_FILES + (VOCAB_FILE,)
+
+
+def source_signature(model_dir: str) -> str:
+    """Signature of the weight and preprocessor files of a model directory.
+
+    A published copy whose signature differs from its source is stale.
+    """
+    parts = []
+    for name in _WEIGHT_FILES + PREPROCESSOR_FILES + (VOCAB_FILE,):
+        file_path = os.path.join(model_dir, name)
+        if os.path.exists(file_path):
+            stat = os.stat(file_path)
+            parts.append(f"{name}:{stat.st_size}:{int(stat.st_mtime_ns)}")
+    return "|".join(parts)
+
+
+def is_published(model_dir: str, target_dir: str, compressed: bool = False) -> bool:
+    """Whether ``target_dir`` holds an up-to-date published copy of ``model_dir``."""
+    manifest_path = os.path.join(target_dir, SHARED_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return False
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+    return (manifest.get("source_signature") == source_signature(model_dir)
+            and manifest.get("compressed", False) == compressed)
+
+
+def _read_dense_layers(model_dir: str, compressed: bool = False) -> List[Dict[str, Any]]:
+    """Read float32 Dense layers from the exported weights, or the compressed ones when asked or dropped."""
+    weights_path = os.path.join(model_dir, NUMPY_WEIGHTS_FILE)
+    compressed_path = os.path.join(model_dir, COMPRESSED_WEIGHTS_FILE)
+    if os.path.exists(compressed_path) and (compressed or not os.path.exists(weights_path)):
+        return load_compressed_weights(compressed_path)
+
+    if os.path.exists(weights_path):
+        return load_numpy_weights(weights_path)
+
+    raise FileNotFoundError(f"No exported weights found in {model_dir}")
+
+
+def _write_vocabulary(model_dir: str, target_dir: str) -> None:
+    """Copy or build the JSON vocabulary of a model directory."""
+    vocab_path = os.path.join(model_dir, VOCAB_FILE)
+    if os.path.exists(vocab_path):
+        shutil.copy2(vocab_path, os.path.join(target_dir, VOCAB_FILE))
+        return
+
+    for name in PREPROCESSOR_FILES:
+        preprocessor_path = os.path.join(model_dir, name)
+        if os.path.exists(preprocessor_path):
+            with open(preprocessor_path, "rb") as f:
+                preprocessors = pickle.load(f)
+            with open(os.path.join(target_dir, VOCAB_FILE), "w") as f:
+                json.dump(encode_vocabularies(preprocessors), f)
+            return
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    """Symlink ``source`` to ``target``, copying where symlinks are unavailable."""
+    try:
+        os.symlink(os.path.abspath(source), target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def publish_model_directory(model_dir: str, target_dir: str, compressed: bool = False) -> Dict[str, Any]:
+    """Publish a model directory for memory-mapped serving.
+
+    The copy is assembled in a temporary directory and renamed into place,
+    so workers never map a partially written model.
+
+    Args:
+        model_dir: Saved model directory (with exported or compressed weights)
+        target_dir: Directory to publish to
+        compressed: Publish the dequantized compressed weights even when the
+            float32 export exists
+
+    Returns:
+        The manifest written to ``shared_weights.json``
+    """
+    dense_layers = _read_dense_layers(model_dir, compressed)
+    staging_dir = f"{target_dir}.staging-{os.getpid()}"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+
+    try:
+        layers = []
+        total_bytes = 0
+        for i, layer in enumerate(dense_layers):
+            entry = {"activation": layer["activation"]}
+            for key in ("kernel", "bias"):
+                name = f"{key}_{i}.npy"
+                tensor = np.ascontiguousarray(layer[key], dtype=np.float32)
+                np.save(os.path.join(staging_dir, name), tensor)
+                entry[key] = name
+                total_bytes += tensor.nbytes
+            layers.append(entry)
+
+        _write_vocabulary(model_dir, staging_dir)
+
+        for name in os.listdir(model_dir):
+            source = os.path.join(model_dir, name)
+            if name not in _SKIPPED_FILES and os.path.isfile(source):
+                _link_or_copy(source, os.path.join(staging_dir, name))
+
+        manifest = {
+            "source": os.path.abspath(model_dir),
+            "source_signature": source_signature(model_dir),
+            "published_at": time.time(),
+            "weight_bytes": total_bytes,
+            "compressed": compressed,
+            "layers": layers
+        }
+        with open(os.path.join(staging_dir, SHARED_MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap the new copy into place; processes that mapped the old tensors keep them
+        retired_dir = f"{target_dir}.retired-{os.getpid()}"
+        if os.path.exists(target_dir):
+            os.rename(target_dir, retired_dir)
+        os.rename(staging_dir, target_dir)
+        shutil.rmtree(retired_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    logger.info(f"Published {model_dir} to {target_dir} ({total_bytes} bytes of weights)")
+    return manifest
+
+
+def map_shared_weights(target_dir: str) -> NumpyInferenceModel:
+    """Map the tensors of a published model directory read-only.
+
+    Args:
+        target_dir: Directory written by ``publish_model_directory``
+
+    Returns:
+        NumpyInferenceModel over memory-mapped kernels and biases
+    """
+    with open(os.path.join(target_dir, SHARED_MANIFEST), "r") as f:
+        manifest = json.load(f)
+
+    dense_layers = [
+        {
+            "kernel": np.load(os.path.join(target_dir, layer["kernel"]), mmap_mode="r"),
+            "bias": np.load(os.path.join(target_dir, layer["bias"]), mmap_mode="r"),
+            "activation": layer["activation"]
+        }
+        for layer in manifest["layers"]
+    ]
+    return NumpyInferenceModel(dense_layers)
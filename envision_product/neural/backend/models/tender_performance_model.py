@@ -4,25 +4,33 @@
 # and generates predictions for tender performance by carrier and lane.
 
 import os
+import time
 import pandas as pd
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras import layers, models
-from sklearn.preprocessing import StandardScaler, OneHotEncoder, LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import matplotlib.pyplot as plt
 from datetime import datetime
 import pickle
 import logging
 import json
-from typing import Dict, Optional, Any, List
+from typing import Callable, Dict, Optional, Any, List
+
+from .inference import import_tensorflow, load_inference_model, export_inference_artifacts, warm_start_weights
+from .artifacts import load_vocabularies
+from .features import (
+    DEFAULT_HASH_FEATURES,
+    assemble_features,
+    fit_one_hot,
+    group_infrequent,
+    group_unknown,
+    make_encoder,
+    one_hot_block,
+)
+from .preprocessing import as_categoricals, fill_missing, lane_codes
+from .records import error_columns, frame_records, prediction_frame, write_records_json
 
 logger = logging.getLogger(__name__)
 
 # Set random seed for reproducibility
 np.random.seed(42)
-tf.random.set_seed(42)
 
 class TenderPerformanceModel:
     """
@@ -32,15 +40,33 @@ class TenderPerformanceModel:
     geographic features including state and country information.
     """
     
-    def __init__(self, data_path: Optional[str] = None, model_path: Optional[str] = None) -> None:
+    def __init__(self, data_path: Optional[str] = None, model_path: Optional[str] = None,
+                 inference_backend: Optional[str] = None, encoding: str = 'onehot',
+                 hash_features: int = DEFAULT_HASH_FEATURES,
+                 inference_loader: Optional[Callable[[str, Optional[str]], Any]] = None) -> None:
         """Initialize the Tender Performance prediction model.
         
         Args:
             data_path: Path to the CSV data file
             model_path: Path to load a pre-trained model
+            inference_backend: Backend used to serve a loaded model
+                (keras, onnx or numpy; defaults to keras)
+            encoding: Encoding of categorical columns when training: onehot,
+                or hashing for a fixed number of hashed feature columns per
+                column whatever the vocabulary (a loaded model keeps the
+                encoding it was trained with)
+            hash_features: Feature columns per categorical column with
+                hashing encoding
+            inference_loader: Function loading the network of a model
+                directory for a backend (defaults to load_inference_model;
+                ModelService passes its cached serving loader)
         """
         self.data_path = data_path
         self.model_path = model_path
+        self.inference_backend = inference_backend
+        self.inference_loader = inference_loader or load_inference_model
+        self.encoding = encoding
+        self.hash_features = hash_features
         self.model = None
         self.carrier_encoder = None
         self.source_city_encoder = None
@@ -94,8 +120,10 @@ class TenderPerformanceModel:
     
     def load_data(self) -> pd.DataFrame:
         """Load and perform initial preprocessing of the data."""
+        from utils.columnar import read_table
+        
         logger.info(f"Loading data from {self.data_path}...")
-        self.raw_data = pd.read_csv(self.data_path)
+        self.raw_data = read_table(self.data_path, categorical=True)
         
         # Detect data format
         self.data_format = self._detect_data_format(self.raw_data)
@@ -104,7 +132,7 @@ class TenderPerformanceModel:
         # Check data integrity
         if self.raw_data.isnull().sum().sum() > 0:
             logger.warning("Data contains missing values. Filling with appropriate values.")
-            self.raw_data.fillna(0, inplace=True)
+            fill_missing(self.raw_data, 0)
         
         # Standardize target column name
         if 'TENDER_PERF_PERCENTAGE' in self.raw_data.columns:
@@ -139,53 +167,50 @@ class TenderPerformanceModel:
         """Preprocess data in the new format with expanded location data."""
         logger.info("Preprocessing new format data with expanded location features...")
         
-        # Create comprehensive lane identifier
-        data['LANE_ID'] = (data['SOURCE_CITY'] + '_' + data['SOURCE_STATE'] + '_' + 
-                          data['SOURCE_COUNTRY'] + '_TO_' + data['DEST_CITY'] + '_' + 
-                          data['DEST_STATE'] + '_' + data['DEST_COUNTRY'])
+        # Create comprehensive lane identifier (integer lane number, grouped on category codes)
+        data['LANE_ID'] = lane_codes(data, ['SOURCE_CITY', 'SOURCE_STATE', 'SOURCE_COUNTRY',
+                                            'DEST_CITY', 'DEST_STATE', 'DEST_COUNTRY'])
         
         # One-hot encoding for categorical variables
         logger.info("Encoding categorical variables for new format...")
         
         # Carrier encoding
-        self.carrier_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        carrier_encoded = self.carrier_encoder.fit_transform(data[['CARRIER']])
+        self.carrier_encoder = make_encoder(self.encoding, self.hash_features)
+        carrier_encoded = fit_one_hot(self.carrier_encoder, data['CARRIER'], 'CARRIER')
         carrier_columns = [f'CARRIER_{i}' for i in range(carrier_encoded.shape[1])]
         carrier_df = pd.DataFrame(carrier_encoded, columns=carrier_columns)
         
         # Source location encoding
-        self.source_city_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_city_encoded = self.source_city_encoder.fit_transform(data[['SOURCE_CITY']])
+        self.source_city_encoder = make_encoder(self.encoding, self.hash_features)
+        source_city_encoded = fit_one_hot(self.source_city_encoder, data['SOURCE_CITY'], 'SOURCE_CITY')
         source_city_columns = [f'SOURCE_CITY_{i}' for i in range(source_city_encoded.shape[1])]
         source_city_df = pd.DataFrame(source_city_encoded, columns=source_city_columns)
         
-        self.source_state_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_state_encoded = self.source_state_encoder.fit_transform(data[['SOURCE_STATE']])
+        self.source_state_encoder = make_encoder(self.encoding, self.hash_features)
+        source_state_encoded = fit_one_hot(self.source_state_encoder, data['SOURCE_STATE'], 'SOURCE_STATE')
         source_state_columns = [f'SOURCE_STATE_{i}' for i in range(source_state_encoded.shape[1])]
         source_state_df = pd.DataFrame(source_state_encoded, columns=source_state_columns)
         
-        self.source_country_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_country_encoded = self.source_country_encoder.fit_transform(data[['SOURCE_COUNTRY']])
+        self.source_country_encoder = make_encoder(self.encoding, self.hash_features)
+        source_country_encoded = fit_one_hot(self.source_country_encoder, data['SOURCE_COUNTRY'], 'SOURCE_COUNTRY')
         source_country_columns = [f'SOURCE_COUNTRY_{i}' for i in range(source_country_encoded.shape[1])]
         source_country_df = pd.DataFrame(source_country_encoded, columns=source_country_columns)
         
         # Destination location encoding - handle high cardinality for cities
-        dest_city_counts = data['DEST_CITY'].value_counts()
-        top_dest_cities = dest_city_counts.nlargest(50).index.tolist()  # Use top 50 destination cities
-        data['DEST_CITY_GROUPED'] = data['DEST_CITY'].apply(lambda x: x if x in top_dest_cities else 'OTHER')
+        data['DEST_CITY_GROUPED'] = group_infrequent(data['DEST_CITY'], 50, self.encoding)  # Use top 50 destination cities
         
-        self.dest_city_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_city_encoded = self.dest_city_encoder.fit_transform(data[['DEST_CITY_GROUPED']])
+        self.dest_city_encoder = make_encoder(self.encoding, self.hash_features)
+        dest_city_encoded = fit_one_hot(self.dest_city_encoder, data['DEST_CITY_GROUPED'], 'DEST_CITY_GROUPED')
         dest_city_columns = [f'DEST_CITY_{i}' for i in range(dest_city_encoded.shape[1])]
         dest_city_df = pd.DataFrame(dest_city_encoded, columns=dest_city_columns)
         
-        self.dest_state_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_state_encoded = self.dest_state_encoder.fit_transform(data[['DEST_STATE']])
+        self.dest_state_encoder = make_encoder(self.encoding, self.hash_features)
+        dest_state_encoded = fit_one_hot(self.dest_state_encoder, data['DEST_STATE'], 'DEST_STATE')
         dest_state_columns = [f'DEST_STATE_{i}' for i in range(dest_state_encoded.shape[1])]
         dest_state_df = pd.DataFrame(dest_state_encoded, columns=dest_state_columns)
         
-        self.dest_country_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_country_encoded = self.dest_country_encoder.fit_transform(data[['DEST_COUNTRY']])
+        self.dest_country_encoder = make_encoder(self.encoding, self.hash_features)
+        dest_country_encoded = fit_one_hot(self.dest_country_encoder, data['DEST_COUNTRY'], 'DEST_COUNTRY')
         dest_country_columns = [f'DEST_COUNTRY_{i}' for i in range(dest_country_encoded.shape[1])]
         dest_country_df = pd.DataFrame(dest_country_encoded, columns=dest_country_columns)
         
@@ -220,35 +245,31 @@ class TenderPerformanceModel:
         """Preprocess data in the legacy format with city-only location data."""
         logger.info("Preprocessing legacy format data with city-only location features...")
         
-        # Create lane identifier (combination of source and destination)
-        data['LANE_ID'] = data['SOURCE_CITY'] + '_' + data['DEST_CITY']
+        # Create lane identifier (integer number of each source and destination combination)
+        data['LANE_ID'] = lane_codes(data, ['SOURCE_CITY', 'DEST_CITY'])
         
         # One-hot encoding for categorical variables
         logger.info("Encoding categorical variables for legacy format...")
         
         # Carrier encoding
-        self.carrier_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        carrier_encoded = self.carrier_encoder.fit_transform(data[['CARRIER']])
+        self.carrier_encoder = make_encoder(self.encoding, self.hash_features)
+        carrier_encoded = fit_one_hot(self.carrier_encoder, data['CARRIER'], 'CARRIER')
         carrier_columns = [f'CARRIER_{i}' for i in range(carrier_encoded.shape[1])]
         carrier_df = pd.DataFrame(carrier_encoded, columns=carrier_columns)
         
         # Source city encoding
-        self.source_city_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        source_encoded = self.source_city_encoder.fit_transform(data[['SOURCE_CITY']])
+        self.source_city_encoder = make_encoder(self.encoding, self.hash_features)
+        source_encoded = fit_one_hot(self.source_city_encoder, data['SOURCE_CITY'], 'SOURCE_CITY')
         source_columns = [f'SOURCE_{i}' for i in range(source_encoded.shape[1])]
         source_df = pd.DataFrame(source_encoded, columns=source_columns)
         
         # Destination city encoding - handle high cardinality
-        # Get top N destination cities
-        dest_counts = data['DEST_CITY'].value_counts()
-        top_dests = dest_counts.nlargest(50).index.tolist()  # Use top 50 destinations
-        
-        # Group less frequent destinations as 'OTHER'
-        data['DEST_CITY_GROUPED'] = data['DEST_CITY'].apply(lambda x: x if x in top_dests else 'OTHER')
+        # Group less frequent destinations as 'OTHER' (top 50 destinations are kept)
+        data['DEST_CITY_GROUPED'] = group_infrequent(data['DEST_CITY'], 50, self.encoding)
         
         # One-hot encode the grouped destinations
-        self.dest_city_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
-        dest_encoded = self.dest_city_encoder.fit_transform(data[['DEST_CITY_GROUPED']])
+        self.dest_city_encoder = make_encoder(self.encoding, self.hash_features)
+        dest_encoded = fit_one_hot(self.dest_city_encoder, data['DEST_CITY_GROUPED'], 'DEST_CITY_GROUPED')
         dest_columns = [f'DEST_{i}' for i in range(dest_encoded.shape[1])]
         dest_df = pd.DataFrame(dest_encoded, columns=dest_columns)
         
@@ -273,6 +294,8 @@ class TenderPerformanceModel:
     
     def prepare_train_test_split(self, test_size: float = 0.2) -> None:
         """Split the preprocessed data into training and testing sets."""
+        from sklearn.model_selection import train_test_split
+        
         logger.info(f"Splitting data with test_size={test_size}...")
         
         if self.preprocessed_data is None:
@@ -300,6 +323,8 @@ class TenderPerformanceModel:
     def build_model(self):
         """Build the neural network model architecture."""
         logger.info("Building neural network model...")
+        tf = import_tensorflow()
+        layers, models = tf.keras.layers, tf.keras.models
         
         # Get input shape from training data
         input_dim = self.X_train.shape[1]
@@ -326,9 +351,27 @@ class TenderPerformanceModel:
         model.summary()
         return model
     
+    def warm_start(self, path: str) -> bool:
+        """Initialize the network with the weights of a previously saved model.
+        
+        Models trained with hashing encoding keep their input width when the
+        data gains new carriers or locations, so retraining can continue
+        from the model it replaces.
+        
+        Args:
+            path: Directory of the saved model
+            
+        Returns:
+            True if the weights were loaded, False if the networks differ in shape
+        """
+        if self.model is None:
+            self.build_model()
+        return warm_start_weights(self.model, path)
+    
     def train(self, epochs=100, batch_size=32, validation_split=0.2, callbacks=None):
         """Train the neural network model."""
         logger.info(f"Training model with {epochs} epochs and batch_size={batch_size}...")
+        tf = import_tensorflow()
         
         if self.X_train is None or self.y_train is None:
             self.prepare_train_test_split()
@@ -360,6 +403,8 @@ class TenderPerformanceModel:
     
     def evaluate(self, plot_path=None):
         """Evaluate the model on the test data and generate metrics."""
+        from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+        
         logger.info("Evaluating model performance...")
         
         if self.model is None:
@@ -385,6 +430,10 @@ class TenderPerformanceModel:
         
         # Create an evaluation plot if path provided
         if plot_path:
+            import matplotlib
+            matplotlib.use("Agg")  # headless backend, the API has no display
+            import matplotlib.pyplot as plt
+            
             plt.figure(figsize=(10, 6))
             plt.scatter(y_test_scaled, y_pred_scaled, alpha=0.5)
             plt.plot([0, 100], [0, 100], 'r--')
@@ -468,12 +517,9 @@ class TenderPerformanceModel:
             })
             
             # Handle destination cities not in the training data
-            dest_city_categories = self.dest_city_encoder.categories_[0]
-            if dest_city not in dest_city_categories:
+            sample['DEST_CITY_GROUPED'] = group_unknown(sample['DEST_CITY'], self.dest_city_encoder)
+            if sample['DEST_CITY_GROUPED'].iloc[0] != dest_city:
                 logger.warning(f"Destination city {dest_city} not found in training data. Using 'OTHER'.")
-                sample['DEST_CITY_GROUPED'] = ['OTHER']
-            else:
-                sample['DEST_CITY_GROUPED'] = [dest_city]
             
             # Transform all categorical features
             carrier_encoded = self.carrier_encoder.transform(sample[['CARRIER']])
@@ -550,12 +596,9 @@ class TenderPerformanceModel:
             })
             
             # Handle destination cities not in the training data
-            dest_city_categories = self.dest_city_encoder.categories_[0]
-            if dest_city not in dest_city_categories:
+            sample['DEST_CITY_GROUPED'] = group_unknown(sample['DEST_CITY'], self.dest_city_encoder)
+            if sample['DEST_CITY_GROUPED'].iloc[0] != dest_city:
                 logger.warning(f"Destination city {dest_city} not found in training data. Using 'OTHER'.")
-                sample['DEST_CITY_GROUPED'] = ['OTHER']
-            else:
-                sample['DEST_CITY_GROUPED'] = [dest_city]
             
             # Transform the categorical features
             carrier_encoded = self.carrier_encoder.transform(sample[['CARRIER']])
@@ -638,16 +681,73 @@ class TenderPerformanceModel:
             results.append(prediction)
         
         return results
-    
-    def predict_on_training_data(self, output_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+
+    def transform_features(self, data: pd.DataFrame) -> np.ndarray:
+        """Build model inputs for every row of a frame at once.
+
+        Produces the same features as ``predict`` does for one lane:
+        destination cities outside the fitted categories are grouped as
+        'OTHER' and columns are arranged in training order.
+
+        Args:
+            data: Frame with CARRIER, SOURCE_CITY and DEST_CITY columns (plus
+                SOURCE_STATE, SOURCE_COUNTRY, DEST_STATE and DEST_COUNTRY for
+                new format models)
+
+        Returns:
+            float32 feature matrix with one row per input row
+        """
+        dest_city_grouped = group_unknown(data['DEST_CITY'], self.dest_city_encoder)
+
+        if self.data_format == 'new':
+            blocks = [
+                one_hot_block(self.carrier_encoder, data['CARRIER'], 'CARRIER', 'CARRIER'),
+                one_hot_block(self.source_city_encoder, data['SOURCE_CITY'], 'SOURCE_CITY', 'SOURCE_CITY'),
+                one_hot_block(self.source_state_encoder, data['SOURCE_STATE'], 'SOURCE_STATE', 'SOURCE_STATE'),
+                one_hot_block(self.source_country_encoder, data['SOURCE_COUNTRY'], 'SOURCE_COUNTRY', 'SOURCE_COUNTRY'),
+                one_hot_block(self.dest_city_encoder, dest_city_grouped, 'DEST_CITY_GROUPED', 'DEST_CITY'),
+                one_hot_block(self.dest_state_encoder, data['DEST_STATE'], 'DEST_STATE', 'DEST_STATE'),
+                one_hot_block(self.dest_country_encoder, data['DEST_COUNTRY'], 'DEST_COUNTRY', 'DEST_COUNTRY')
+            ]
+        else:
+            blocks = [
+                one_hot_block(self.carrier_encoder, data['CARRIER'], 'CARRIER', 'CARRIER'),
+                one_hot_block(self.source_city_encoder, data['SOURCE_CITY'], 'SOURCE_CITY', 'SOURCE'),
+                one_hot_block(self.dest_city_encoder, dest_city_grouped, 'DEST_CITY_GROUPED', 'DEST')
+            ]
+
+        return assemble_features(blocks, self.feature_columns)
+
+    def predict_frame(self, data: pd.DataFrame) -> np.ndarray:
+        """Predict tender performance (percent) for every row of a frame.
+
+        Args:
+            data: Frame accepted by ``transform_features``
+
+        Returns:
+            Array of predicted tender performance percentages
+        """
+        if self.model is None:
+            raise ValueError("Model not loaded or trained. Cannot make predictions.")
+
+        features = self.transform_features(data)
+        return self.model.predict(features, verbose=0).reshape(-1) * 100.0
+
+    def predict_on_training_data(self, output_dir: Optional[str] = None,
+                                 return_predictions: bool = True) -> Optional[Dict[str, Any]]:
         """Predict tender performance on the training data.
         
         This method uses the trained model to make predictions on the same data
         that was used for training, which can help evaluate model performance.
+        All rows are predicted in one batch and the results are assembled
+        column-wise.
         
         Args:
             output_dir: Directory to save the prediction files. If None,
                        a default directory will be created in the model path.
+            return_predictions: Whether to include the per-row prediction
+                       dictionaries in the result (callers that only need the
+                       saved files can skip building them)
                        
         Returns:
             Dictionary with prediction results including input features and predictions
@@ -663,75 +763,55 @@ class TenderPerformanceModel:
             return None
         
         try:
-            # Make predictions for each row in the raw data
-            predictions = []
-            actual_values = []
-            
-            for index, row in self.raw_data.iterrows():
-                # Extract parameters based on data format
-                carrier = row['CARRIER']
-                source_city = row['SOURCE_CITY']
-                dest_city = row['DEST_CITY']
-                actual_performance = row[self.target_column]
-                
-                # Initialize location variables with default values
-                source_state = None
-                source_country = None
-                dest_state = None
-                dest_country = None
-                
-                if self.data_format == 'new':
-                    # Use new format with state/country information
-                    source_state = row['SOURCE_STATE']
-                    source_country = row['SOURCE_COUNTRY']
-                    dest_state = row['DEST_STATE']
-                    dest_country = row['DEST_COUNTRY']
-                    
-                    prediction_result = self.predict(
-                        carrier, source_city, dest_city,
-                        source_state, source_country, dest_state, dest_country
-                    )
-                else:
-                    # Use legacy format
-                    prediction_result = self.predict(carrier, source_city, dest_city)
-                
-                if prediction_result:
-                    predicted_performance = prediction_result['predicted_performance']
-                    
-                    # Calculate errors
-                    absolute_error = abs(actual_performance - predicted_performance)
-                    percent_error = (absolute_error / actual_performance) * 100 if actual_performance != 0 else 0
-                    
-                    # Create detailed prediction record with consistent structure
-                    prediction_record = {
-                        'carrier': carrier,
-                        'source_city': source_city,
-                        'source_state': source_state,  # Always include, even if None for legacy
-                        'source_country': source_country,  # Always include, even if None for legacy
-                        'dest_city': dest_city,
-                        'dest_state': dest_state,  # Always include, even if None for legacy
-                        'dest_country': dest_country,  # Always include, even if None for legacy
-                        'actual_performance': actual_performance,
-                        'predicted_performance': predicted_performance,
-                        'absolute_error': absolute_error,
-                        'percent_error': percent_error
-                    }
-                    
-                    predictions.append(prediction_record)
-                    actual_values.append(actual_performance)
-                else:
-                    logger.warning(f"Failed to predict for row {index}")
-            
-            if not predictions:
+            data = self.raw_data.reset_index(drop=True)
+            if data.empty:
                 logger.error("No predictions were generated successfully")
                 return None
             
+            # Predict every row of the raw data at once
+            started = time.perf_counter()
+            predicted = self.predict_frame(data)
+            predict_seconds = time.perf_counter() - started
+            
+            # Calculate errors (percent error is 0 where the actual performance is 0)
+            started = time.perf_counter()
+            actual = data[self.target_column].to_numpy(dtype=np.float64)
+            errors = error_columns(actual, predicted, zero_percent_error=0.0)
+            columns = pd.DataFrame({
+                'actual_performance': actual,
+                'predicted_performance': predicted,
+                'absolute_error': errors['absolute_error'],
+                'percent_error': errors['percent_error']
+            })
+            
+            # Location fields are always included, even if None for legacy
+            location = ['SOURCE_STATE', 'SOURCE_COUNTRY', 'DEST_STATE', 'DEST_COUNTRY']
+            fields = {
+                'carrier': 'CARRIER',
+                'source_city': 'SOURCE_CITY',
+                'source_state': 'SOURCE_STATE',
+                'source_country': 'SOURCE_COUNTRY',
+                'dest_city': 'DEST_CITY',
+                'dest_state': 'DEST_STATE',
+                'dest_country': 'DEST_COUNTRY',
+                'actual_performance': 'actual_performance',
+                'predicted_performance': 'predicted_performance',
+                'absolute_error': 'absolute_error',
+                'percent_error': 'percent_error'
+            }
+            if self.data_format != 'new':
+                fields.update({field.lower(): None for field in location})
+            result_frame = prediction_frame(
+                pd.concat([data, columns], axis=1), fields,
+                floats=('actual_performance', 'predicted_performance', 'absolute_error', 'percent_error')
+            )
+            
             # Calculate overall metrics
-            predicted_values = [p['predicted_performance'] for p in predictions]
-            mae = np.mean([p['absolute_error'] for p in predictions])
-            mape = np.mean([p['percent_error'] for p in predictions])
+            mae = np.mean(errors['absolute_error'])
+            mape = np.mean(errors['percent_error'])
+            assembly_seconds = time.perf_counter() - started
             
-            logger.info(f"Generated {len(predictions)} predictions")
+            logger.info(f"Generated {len(result_frame)} predictions")
             logger.info(f"Overall MAE: {mae:.2f}")
             logger.info(f"Overall MAPE: {mape:.2f}%")
             
@@ -746,49 +826,39 @@ class TenderPerformanceModel:
             os.makedirs(output_dir, exist_ok=True)
             
             # Save predictions to JSON
-            result = {
+            started = time.perf_counter()
+            header = {
                 "model_info": {
                     "data_format": self.data_format,
                     "target_column": self.target_column,
-                    "prediction_count": len(predictions)
+                    "prediction_count": len(result_frame)
                 },
                 "metrics": {
                     "mae": float(mae),
                     "mape": float(mape),
-                    "count": len(predictions)
-                },
-                "predictions": predictions
+                    "count": len(result_frame)
+                }
             }
             
             # Save to JSON file
             json_path = os.path.join(output_dir, "prediction_data.json")
-            with open(json_path, 'w') as f:
-                json.dump(result, f, indent=2)
+            write_records_json(json_path, header, result_frame)
             
             logger.info(f"Predictions saved to {json_path}")
             
-            # Save to CSV file with consistent column structure
+            # Save to CSV file with consistent column structure (the same for
+            # every data format; state/country columns are empty for legacy)
             csv_path = os.path.join(output_dir, "prediction_data.csv")
-            predictions_df = pd.DataFrame(predictions)
-            
-            # Ensure consistent column order regardless of data format
-            if self.data_format == 'new':
-                # New format CSV columns
-                csv_columns = ['carrier', 'source_city', 'source_state', 'source_country', 
-                              'dest_city', 'dest_state', 'dest_country', 'actual_performance', 
-                              'predicted_performance', 'absolute_error', 'percent_error']
-            else:
-                # Legacy format CSV columns (still include state/country columns but they'll be None/empty)
-                csv_columns = ['carrier', 'source_city', 'source_state', 'source_country', 
-                              'dest_city', 'dest_state', 'dest_country', 'actual_performance', 
-                              'predicted_performance', 'absolute_error', 'percent_error']
-            
-            # Reorder columns and save
-            predictions_df = predictions_df.reindex(columns=csv_columns)
-            predictions_df.to_csv(csv_path, index=False)
+            result_frame.to_csv(csv_path, index=False)
+            write_seconds = time.perf_counter() - started
             
             logger.info(f"Predictions also saved to {csv_path}")
+            logger.info(f"Training data predictions for {len(result_frame)} rows: predict {predict_seconds:.2f}s, "
+                        f"assembly {assembly_seconds:.2f}s, write {write_seconds:.2f}s")
             
+            result = dict(header)
+            if return_predictions:
+                result["predictions"] = frame_records(result_frame)
             return result
             
         except Exception as e:
@@ -819,6 +889,12 @@ class TenderPerformanceModel:
             self.model.save(model_file)
             logger.info(f"Model saved to {model_file}")
             
+            # Export the weights for TensorFlow-free serving
+            try:
+                export_inference_artifacts(self.model, path)
+            except Exception as e:
+                logger.warning(f"Could not export inference artifacts: {str(e)}")
+            
             # Ensure all required encoders are available based on data format
             if self.data_format == 'new':
                 required_encoders = [
@@ -843,7 +919,9 @@ class TenderPerformanceModel:
                 "dest_city_encoder": self.dest_city_encoder,
                 "target_column": self.target_column,
                 "data_format": self.data_format,
-                "feature_columns": getattr(self, 'feature_columns', None)
+                "feature_columns": getattr(self, 'feature_columns', None),
+                "encoding": self.encoding,
+                "hash_features": self.hash_features
             }
             
             # Add new format encoders if available
@@ -863,6 +941,7 @@ class TenderPerformanceModel:
             metadata = {
                 "model_type": "tender_performance",
                 "data_format": self.data_format,
+                "encoding": self.encoding,
                 "target_column": self.target_column,
                 "feature_count": len(self.feature_columns) if self.feature_columns else None,
                 "save_time": datetime.now().isoformat(),
@@ -905,27 +984,30 @@ class TenderPerformanceModel:
         logger.info(f"Loading model from {path}...")
         
         try:
-            # Load the neural network model
-            model_file = os.path.join(path, "model.keras")
-            if not os.path.exists(model_file):
-                logger.error(f"Model file not found: {model_file}")
+            # Load the neural network model with the configured inference backend
+            try:
+                self.model = self.inference_loader(path, self.inference_backend)
+            except FileNotFoundError as e:
+                logger.error(str(e))
                 return False
+            logger.info(f"Model loaded successfully ({getattr(self.model, 'backend', 'keras')} backend)")
             
-            self.model = tf.keras.models.load_model(model_file)
-            logger.info("Model loaded successfully")
-            
-            # Load encoders
+            # Load encoders, preferring the compressed vocabulary
+            encoders = load_vocabularies(path)
             encoders_file = os.path.join(path, "encoders.pkl")
-            if os.path.exists(encoders_file):
+            if encoders is None and os.path.exists(encoders_file):
                 with open(encoders_file, "rb") as f:
                     encoders = pickle.load(f)
-                
+            
+            if encoders is not None:
                 self.carrier_encoder = encoders.get("carrier_encoder")
                 self.source_city_encoder = encoders.get("source_city_encoder")
                 self.dest_city_encoder = encoders.get("dest_city_encoder")
                 self.target_column = encoders.get("target_column", "TENDER_PERF_PERCENTAGE")
                 self.data_format = encoders.get("data_format", "legacy")
                 self.feature_columns = encoders.get("feature_columns", None)
+                self.encoding = encoders.get("encoding", "onehot")
+                self.hash_features = encoders.get("hash_features", self.hash_features)
                 
                 # Load new format encoders if available
                 if self.data_format == 'new':
@@ -951,13 +1033,13 @@ class TenderPerformanceModel:
             # Try to load full training data for training data predictions
             training_data_file = os.path.join(path, "training_data.csv")
             if os.path.exists(training_data_file):
-                self.raw_data = pd.read_csv(training_data_file)
+                self.raw_data = as_categoricals(pd.read_csv(training_data_file))
                 logger.info(f"Full training data loaded for training data prediction: {len(self.raw_data)} rows")
             else:
                 # Fallback to sample data for feature compatibility
                 sample_data_file = os.path.join(path, "sample_data.csv")
                 if os.path.exists(sample_data_file):
-                    self.raw_data = pd.read_csv(sample_data_file)
+                    self.raw_data = as_categoricals(pd.read_csv(sample_data_file))
                     logger.warning("Only sample training data available - predictions will be limited to sample data")
                 else:
                     logger.warning("No training data available - predict_on_training_data will not work")
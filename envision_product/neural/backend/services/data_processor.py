@@ -2,11 +2,15 @@
 import os
 import json
 import pandas as pd
-import numpy as np
 import logging
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+from config.settings import settings
+from utils.columnar import iter_table_chunks, read_table
+from utils.hashing import file_sha256
+from utils.profiling import profile_chunks
+
 logger = logging.getLogger(__name__)
 
 class DataProcessor:
@@ -17,72 +21,72 @@ class DataProcessor:
         self.preview_path = Path(preview_path)
         self.preview_path.mkdir(parents=True, exist_ok=True)
     
-    def generate_preview(self, file_id: str, file_path: str) -> Dict[str, Any]:
+    def _cached_preview(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Load a preview previously computed for the same file content"""
+        cache_file = self.preview_path / "by_hash" / f"{content_hash}.json"
+        if not cache_file.exists():
+            return None
+        try:
+            with open(cache_file, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading cached preview {content_hash}: {str(e)}")
+            return None
+    
+    def generate_preview(self, file_id: str, file_path: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
         """Generate a preview of data from a file
         
+        The file is profiled in a single streaming pass over chunks (see
+        ``utils.profiling``): row and missing counts, min, max and mean are
+        exact, medians come from a quantile sketch (exact up to 2048 values)
+        and top values from a heavy-hitter summary. Previews are cached by
+        content hash, so a file uploaded twice is profiled once.
+        
         Args:
             file_id: ID of the file
             file_path: Path to the file
+            content_hash: SHA-256 of the file content, computed if not given
             
         Returns:
             Dictionary with preview information
         """
         try:
-            # Read CSV file
-            df = pd.read_csv(file_path)
-            
-            # Get basic information
-            total_rows = len(df)
-            total_columns = len(df.columns)
-            
-            # Sample rows (first 10)
-            sample_rows = df.head(10).to_dict(orient='records')
+            content_hash = content_hash or file_sha256(file_path)
+            preview = self._cached_preview(content_hash)
             
-            # Generate column information
-            column_info = {}
-            for col in df.columns:
-                col_type = str(df[col].dtype)
-                column_info[col] = {
-                    "type": col_type,
-                    "missing": int(df[col].isna().sum())
+            if preview is None:
+                # Stream the file (Parquet copy when available)
+                chunks = iter_table_chunks(file_path, chunk_rows=settings.PREVIEW_CHUNK_ROWS)
+                profile = profile_chunks(chunks, max_workers=settings.PREVIEW_WORKERS)
+                
+                column_info = {col: column.to_dict() for col, column in profile.columns.items()}
+                missing_by_column = {col: info["missing"] for col, info in column_info.items() if info["missing"] > 0}
+                missing_data_summary = {
+                    "total_missing": sum(missing_by_column.values()),
+                    "columns_with_missing": len(missing_by_column),
+                    "missing_by_column": missing_by_column
                 }
                 
-                # Add statistics based on column type
-                if np.issubdtype(df[col].dtype, np.number):
-                    # Numerical column
-                    column_info[col].update({
-                        "min": float(df[col].min()) if not pd.isna(df[col].min()) else None,
-                        "max": float(df[col].max()) if not pd.isna(df[col].max()) else None,
-                        "mean": float(df[col].mean()) if not pd.isna(df[col].mean()) else None,
-                        "median": float(df[col].median()) if not pd.isna(df[col].median()) else None
-                    })
-                else:
-                    # Categorical/string column
-                    value_counts = df[col].value_counts().head(5).to_dict()
-                    column_info[col]["top_values"] = {str(k): int(v) for k, v in value_counts.items()}
-            
-            # Missing data summary
-            missing_data = df.isna().sum()
-            missing_data_summary = {
-                "total_missing": int(missing_data.sum()),
-                "columns_with_missing": int((missing_data > 0).sum()),
-                "missing_by_column": {col: int(count) for col, count in missing_data.items() if count > 0}
-            }
+                preview = {
+                    "total_rows": profile.rows,
+                    "total_columns": len(profile.columns),
+                    "sample_rows": profile.sample_rows,
+                    "column_info": column_info,
+                    "missing_data_summary": missing_data_summary,
+                    "content_hash": content_hash
+                }
+                
+                cache_dir = self.preview_path / "by_hash"
+                cache_dir.mkdir(exist_ok=True)
+                with open(cache_dir / f"{content_hash}.json", "w") as f:
+                    json.dump(preview, f, indent=2, default=str)
             
-            # Create preview object
-            preview = {
-                "file_id": file_id,
-                "total_rows": total_rows,
-                "total_columns": total_columns,
-                "sample_rows": sample_rows,
-                "column_info": column_info,
-                "missing_data_summary": missing_data_summary
-            }
+            preview = {"file_id": file_id, **preview}
             
             # Save preview to file
             preview_file = self.preview_path / f"{file_id}.json"
             with open(preview_file, "w") as f:
-                json.dump(preview, f, indent=2)
+                json.dump(preview, f, indent=2, default=str)
             
             return preview
             
@@ -99,12 +103,13 @@ class DataProcessor:
                 "error": str(e)
             }
     
-    def get_preview(self, file_id: str, file_path: str) -> Optional[Dict[str, Any]]:
+    def get_preview(self, file_id: str, file_path: str, content_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get or generate a preview for a file
         
         Args:
             file_id: ID of the file
             file_path: Path to the file
+            content_hash: SHA-256 of the file content, computed if not given
             
         Returns:
             Dictionary with preview data or None if preview cannot be generated
@@ -120,20 +125,23 @@ class DataProcessor:
                 logger.error(f"Error loading preview for file {file_id}: {str(e)}")
         
         # Generate new preview
-        return self.generate_preview(file_id, file_path)
+        return self.generate_preview(file_id, file_path, content_hash)
     
-    def read_file(self, file_id: str, file_path: str) -> Optional[pd.DataFrame]:
+    def read_file(self, file_id: str, file_path: str, columns: Optional[List[str]] = None,
+                  categorical: bool = False) -> Optional[pd.DataFrame]:
         """Read a file into a pandas DataFrame
         
         Args:
             file_id: ID of the file
             file_path: Path to the file
+            columns: Optional columns to load
+            categorical: Load carrier/city/state/type columns as categoricals
             
         Returns:
             DataFrame or None if file cannot be read
         """
         try:
-            return pd.read_csv(file_path)
+            return read_table(file_path, columns=columns, categorical=categorical)
         except Exception as e:
             logger.error(f"Error reading file {file_id}: {str(e)}")
             return None 
\ No newline at end of file
@@ -2,13 +2,20 @@
 import os
 import shutil
 import uuid
+import hashlib
 from datetime import datetime
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 import json
+import logging
+from contextlib import contextmanager
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
 from config.settings import settings
+from utils.columnar import convert_csv_to_parquet, parquet_path_for
+
+logger = logging.getLogger(__name__)
 
 class FileService:
     def __init__(self, storage_path: str = "data/uploads"):
@@ -32,9 +39,34 @@ class FileService:
         with open(self.metadata_file, "w") as f:
             json.dump(self.metadata, f, indent=2)
     
+    @contextmanager
+    def _metadata_lock(self):
+        """Hold an exclusive lock while the metadata is read, changed and saved (no-op without fcntl)"""
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        
+        with open(self.storage_path / ".metadata.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _blob_path(self, content_hash: str) -> Path:
+        """Storage path of the blob holding some content"""
+        return self.storage_path / "blobs" / content_hash
+    
     async def save_file(self, file: UploadFile) -> str:
         """Save an uploaded file and return its ID
         
+        Uploads are stored content-addressed: the file is hashed while it
+        streams to disk and kept once under ``blobs/<sha256>``, however many
+        file IDs refer to it. Identical content reuses the existing blob and
+        its Parquet copy, so previews and other content-keyed caches hit.
+        
         Args:
             file: The uploaded file
             
@@ -44,41 +76,137 @@ class FileService:
         # Generate a unique file ID
         file_id = str(uuid.uuid4())
         
-        # Create file path
-        file_path = self.storage_path / file_id
-        
-        # Save the file
-        with open(file_path, "wb") as f:
+        # Stream to a staging file, hashing as we go
+        (self.storage_path / "blobs").mkdir(exist_ok=True)
+        staging_path = self.storage_path / f".{file_id}.upload"
+        digest = hashlib.sha256()
+        with open(staging_path, "wb") as f:
             # Read file in chunks to handle large files
             chunk_size = 1024 * 1024  # 1MB chunks
             while True:
                 chunk = await file.read(chunk_size)
                 if not chunk:
                     break
+                digest.update(chunk)
                 f.write(chunk)
         
         # Get file size
-        file_size = os.path.getsize(file_path)
+        file_size = os.path.getsize(staging_path)
         
         # Check if file is too large (100MB limit)
         max_size = 100 * 1024 * 1024
         if file_size > max_size:
-            os.remove(file_path)
+            os.remove(staging_path)
             raise ValueError(f"File too large. Maximum size is 100MB.")
         
-        # Store metadata
-        self.metadata["files"][file_id] = {
-            "file_id": file_id,
-            "filename": file.filename,
-            "content_type": file.content_type,
-            "size": file_size,
-            "upload_time": datetime.now().isoformat(),
-            "path": str(file_path)
-        }
+        content_hash = digest.hexdigest()
         
-        self._save_metadata()
+        # Convert CSV uploads to Parquet once so readers skip CSV parsing. This
+        # happens before the metadata is touched, so no await separates reading
+        # the refcount from saving it.
+        schema = None
+        blob = self._load_metadata().get("blobs", {}).get(content_hash)
+        if (file.filename or "").lower().endswith(".csv") and not (blob and "parquet_path" in blob):
+            schema = await run_in_threadpool(convert_csv_to_parquet, str(staging_path))
+        
+        await run_in_threadpool(self._register_upload, file_id, file.filename, file.content_type,
+                                staging_path, content_hash, file_size, schema)
         return file_id
     
+    def _register_upload(self, file_id: str, filename: Optional[str], content_type: Optional[str],
+                         staging_path: Path, content_hash: str, file_size: int,
+                         schema: Optional[Dict[str, Any]]) -> None:
+        """Move a staged upload into its blob and record it, under the metadata lock"""
+        file_path = self._blob_path(content_hash)
+        staged_parquet = parquet_path_for(str(staging_path))
+        
+        with self._metadata_lock():
+            # Other FileService instances and workers may have changed the metadata since we loaded it
+            self.metadata = self._load_metadata()
+            blobs = self.metadata.setdefault("blobs", {})
+            blob = blobs.get(content_hash)
+            
+            if blob is not None and file_path.exists():
+                # Identical content: drop the new bytes and reference the blob
+                os.remove(staging_path)
+                blob["refcount"] += 1
+                logger.info(f"Upload {file_id} duplicates content {content_hash[:12]}, reusing the stored blob")
+            else:
+                os.replace(staging_path, file_path)
+                # Keep the references of a blob whose file went missing
+                refcount = blob["refcount"] + 1 if blob is not None else 1
+                blob = {"path": str(file_path), "size": file_size, "refcount": refcount}
+                blobs[content_hash] = blob
+            
+            if schema and "parquet_path" not in blob:
+                os.replace(staged_parquet, parquet_path_for(str(file_path)))
+                blob["parquet_path"] = parquet_path_for(str(file_path))
+                blob["schema"] = schema
+            elif os.path.exists(staged_parquet):
+                os.remove(staged_parquet)
+            
+            # Store metadata
+            self.metadata["files"][file_id] = {
+                "file_id": file_id,
+                "filename": filename,
+                "content_type": content_type,
+                "size": file_size,
+                "upload_time": datetime.now().isoformat(),
+                "path": str(file_path),
+                "content_hash": content_hash
+            }
+            for key in ("parquet_path", "schema"):
+                if key in blob:
+                    self.metadata["files"][file_id][key] = blob[key]
+            
+            self._save_metadata()
+    
+    def get_content_hash(self, file_id: str) -> Optional[str]:
+        """Get the SHA-256 of a file's content (None for files stored before hashing)"""
+        return self.metadata["files"].get(file_id, {}).get("content_hash")
+    
+    def find_duplicates(self, file_id: str) -> List[str]:
+        """IDs of other files with the same content as a file
+        
+        Args:
+            file_id: The file ID
+            
+        Returns:
+            List[str]: IDs of the other files, oldest first
+        """
+        content_hash = self.get_content_hash(file_id)
+        if not content_hash:
+            return []
+        
+        duplicates = [
+            metadata for other_id, metadata in self.metadata["files"].items()
+            if other_id != file_id and metadata.get("content_hash") == content_hash
+        ]
+        duplicates.sort(key=lambda metadata: metadata["upload_time"])
+        return [metadata["file_id"] for metadata in duplicates]
+    
+    def reuse_info(self, file_id: str) -> Dict[str, Any]:
+        """Describe what already exists for the content of a file
+        
+        Args:
+            file_id: The file ID
+            
+        Returns:
+            Dict: Content hash, whether the content was uploaded before, the
+            IDs of the earlier uploads and the models trained on it
+        """
+        from services.model_service import ModelService
+        
+        content_hash = self.get_content_hash(file_id)
+        duplicates = self.find_duplicates(file_id)
+        models = ModelService().find_models_for_content(content_hash) if content_hash else []
+        return {
+            "content_hash": content_hash,
+            "duplicate": bool(duplicates),
+            "duplicate_of": duplicates,
+            "models": [model["model_id"] for model in models]
+        }
+    
     def get_file_path(self, file_id: str) -> Optional[str]:
         """Get the file path for a given file ID
         
@@ -119,14 +247,35 @@ class FileService:
         Returns:
             bool: True if deletion was successful, False otherwise
         """
+        with self._metadata_lock():
+            return self._delete_file(file_id)
+    
+    def _delete_file(self, file_id: str) -> bool:
+        """Delete a file while holding the metadata lock"""
+        self.metadata = self._load_metadata()
         if file_id not in self.metadata["files"]:
             return False
         
         file_path = self.metadata["files"][file_id]["path"]
+        content_hash = self.metadata["files"][file_id].get("content_hash")
         try:
-            os.remove(file_path)
+            blob = self.metadata.get("blobs", {}).get(content_hash) if content_hash else None
+            if blob is not None:
+                # The blob is freed when its last file is deleted
+                blob["refcount"] -= 1
+                remove_content = blob["refcount"] <= 0
+                if remove_content:
+                    del self.metadata["blobs"][content_hash]
+            else:
+                remove_content = True
+            
+            if remove_content:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                if os.path.exists(parquet_path_for(file_path)):
+                    os.remove(parquet_path_for(file_path))
             del self.metadata["files"][file_id]
             self._save_metadata()
             return True
         except:
-            return False 
\ No newline at end of file
+            return False
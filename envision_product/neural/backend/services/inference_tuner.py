@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Autotuning of the inference thread pools and batch size per host.
+
+The best thread settings depend on how many uvicorn workers share the host's
+cores: every worker that sizes its pools to the whole machine oversubscribes
+it. The tuner benchmarks the latest model of each type with the configured
+inference backend over a grid of intra-op threads (up to the cores per
+worker), inter-op threads (TensorFlow only) and batch sizes on synthetic
+input. Each thread setting is measured in fresh processes, since TensorFlow
+pools cannot be resized once created, with one process per API worker
+running at the same time, and is scored by the rows per second of all of
+them together. The fastest setting is persisted per host in
+``data/models/inference_tuning.json`` and applied with
+``configure_inference``. Later starts on the same host, with the same cores,
+workers, backend and models, apply the stored setting without benchmarking.
+"""
+
+import os
+import json
+import time
+import socket
+import logging
+import multiprocessing
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from services.model_service import MODEL_CLASSES, ModelService
+
+logger = logging.getLogger(__name__)
+
+TUNING_FILE = "inference_tuning.json"
+TUNING_LOCK_FILE = ".inference_tuning.lock"
+
+# Batch sizes benchmarked, and rows of synthetic input scored per measurement
+AUTOTUNE_BATCH_SIZES = (256, 1024, 4096, 16384)
+AUTOTUNE_ROWS = 16384
+
+# Least time spent scoring per measurement
+AUTOTUNE_MIN_SECONDS = 0.2
+
+# Settings within this fraction of the best throughput count as ties, won by fewer threads
+AUTOTUNE_TOLERANCE = 0.05
+
+# Seconds after which the lock of a tuning run is considered abandoned
+TUNING_LOCK_TIMEOUT = 900
+
+
+def cpu_count() -> int:
+    """Cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def api_workers() -> int:
+    """Number of API worker processes sharing the host."""
+    return settings.API_WORKERS or int(os.environ.get("WEB_CONCURRENCY", 1) or 1)
+
+
+def thread_grid(cores: int, workers: int, backend: str) -> List[Tuple[int, int]]:
+    """Intra-op and inter-op thread settings to benchmark.
+
+    Intra-op threads go up in powers of two to the cores per worker; the
+    inter-op pool is only varied for TensorFlow.
+
+    Args:
+        cores: Cores of the host
+        workers: API workers sharing them
+        backend: Inference backend
+
+    Returns:
+        List of (intra-op threads, inter-op threads)
+    """
+    budget = max(1, cores // max(1, workers))
+    intra = sorted({2 ** i for i in range(budget.bit_length()) if 2 ** i <= budget} | {budget})
+    inter = (1, 2) if backend == "keras" and budget > 1 else (1,)
+    return [(intra_op, inter_op) for intra_op in intra for inter_op in inter]
+
+
+def choose_best(results: List[Dict[str, Any]], tolerance: float = AUTOTUNE_TOLERANCE) -> Dict[str, Any]:
+    """Fastest setting, preferring fewer threads and smaller batches among near ties.
+
+    Args:
+        results: Benchmark results with ``intra_op_threads``,
+            ``inter_op_threads``, ``batch_size`` and ``rows_per_second``
+        tolerance: Fraction of the best throughput within which settings tie
+
+    Returns:
+        The chosen result
+    """
+    best = max(result["rows_per_second"] for result in results)
+    candidates = [result for result in results if result["rows_per_second"] >= best * (1 - tolerance)]
+    return min(candidates, key=lambda result: (result["intra_op_threads"] * result["inter_op_threads"],
+                                               result["batch_size"], -result["rows_per_second"]))
+
+
+def _benchmark_worker(queue, barrier, model_paths: List[str], backend: str, intra_op_threads: int,
+                      inter_op_threads: int, batch_sizes: Tuple[int, ...], rows: int, min_seconds: float) -> None:
+    """Time the models at each batch size in a fresh process and put the seconds per pass on the queue."""
+    try:
+        from models.inference import configure_inference, load_inference_model
+
+        configure_inference(intra_op_threads, inter_op_threads)
+        models = [load_inference_model(path, backend) for path in model_paths]
+        rng = np.random.default_rng(0)
+        inputs = [rng.standard_normal((rows, int(model.input_shape[-1])), dtype=np.float32) for model in models]
+        for model, x in zip(models, inputs):
+            model.predict(x[:max(batch_sizes)], batch_size=max(batch_sizes))
+
+        # Start measuring together with the other workers of this setting
+        barrier.wait(timeout=TUNING_LOCK_TIMEOUT)
+        seconds = {}
+        for batch_size in batch_sizes:
+            passes, start = 0, time.perf_counter()
+            while True:
+                for model, x in zip(models, inputs):
+                    model.predict(x, batch_size=batch_size)
+                passes += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= min_seconds:
+                    break
+            seconds[batch_size] = elapsed / passes
+        queue.put(("ok", seconds))
+    except Exception as e:
+        barrier.abort()
+        queue.put(("error", str(e)))
+
+
+def benchmark_setting(model_paths: List[str], backend: str, intra_op_threads: int, inter_op_threads: int,
+                      workers: int = 1, batch_sizes: Tuple[int, ...] = AUTOTUNE_BATCH_SIZES,
+                      rows: int = AUTOTUNE_ROWS, min_seconds: float = AUTOTUNE_MIN_SECONDS) -> List[Dict[str, Any]]:
+    """Benchmark one thread setting with ``workers`` processes scoring concurrently.
+
+    Args:
+        model_paths: Model directories to score with
+        backend: Inference backend
+        intra_op_threads: Intra-op threads per process
+        inter_op_threads: Inter-op threads per process
+        workers: Processes running at the same time, as API workers would
+        batch_sizes: Batch sizes to measure
+        rows: Rows of synthetic input scored per model and pass
+        min_seconds: Least time spent per measurement
+
+    Returns:
+        One result per batch size, with the rows per second of all processes
+
+    Raises:
+        RuntimeError: If a benchmark process fails
+    """
+    # spawn: every setting needs processes whose runtime pools are not created yet
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    barrier = context.Barrier(workers)
+    processes = [
+        context.Process(target=_benchmark_worker, daemon=True,
+                        args=(queue, barrier, model_paths, backend, intra_op_threads, inter_op_threads,
+                              tuple(batch_sizes), rows, min_seconds))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        outcomes = [queue.get(timeout=TUNING_LOCK_TIMEOUT) for _ in processes]
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+    errors = [detail for status, detail in outcomes if status == "error"]
+    if errors:
+        raise RuntimeError(f"Benchmark of {intra_op_threads}x{inter_op_threads} threads failed: {errors[0]}")
+
+    rows_scored = rows * len(model_paths)
+    return [
+        {
+            "intra_op_threads": intra_op_threads,
+            "inter_op_threads": inter_op_threads,
+            "batch_size": batch_size,
+            "rows_per_second": round(sum(rows_scored / seconds[batch_size] for _, seconds in outcomes), 1)
+        }
+        for batch_size in batch_sizes
+    ]
+
+
+class InferenceTuner:
+    """Service tuning, persisting and applying the inference settings of this host."""
+
+    def __init__(self, model_service: Optional[ModelService] = None, backend: Optional[str] = None,
+                 workers: Optional[int] = None):
+        """Initialize the tuner.
+
+        Args:
+            model_service: Model service whose models are benchmarked
+            backend: Inference backend (defaults to INFERENCE_BACKEND)
+            workers: API workers sharing the host (defaults to API_WORKERS,
+                else WEB_CONCURRENCY, else 1)
+        """
+        self.model_service = model_service or ModelService()
+        self.backend = (backend or settings.INFERENCE_BACKEND).lower()
+        self.workers = workers or api_workers()
+        self.tuning_file = self.model_service.base_path / TUNING_FILE
+        self.lock_file = self.model_service.base_path / TUNING_LOCK_FILE
+
+    def benchmark_models(self) -> Dict[str, str]:
+        """Serving model directory of the latest model of each type."""
+        model_paths = {}
+        for model_type in MODEL_CLASSES:
+            models = self.model_service.list_models(model_type)
+            if models:
+                serving_id = self.model_service.resolve_serving_model_id(models[0]["model_id"])
+                model_paths[serving_id] = str(self.model_service.get_model_path(serving_id))
+        return model_paths
+
+    def profile(self) -> Dict[str, Any]:
+        """What a stored tuning must match to be reused on this host."""
+        return {
+            "host": socket.gethostname(),
+            "cpu_count": cpu_count(),
+            "workers": self.workers,
+            "backend": self.backend,
+            "models": sorted(self.benchmark_models())
+        }
+
+    def _load(self) -> Dict[str, Any]:
+        if self.tuning_file.exists():
+            try:
+                with open(self.tuning_file, "r") as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                logger.error("Error parsing inference tuning file. Tuning again.")
+        return {"hosts": {}}
+
+    def get_tuning(self) -> Optional[Dict[str, Any]]:
+        """Stored tuning of this host, if any."""
+        return self._load()["hosts"].get(socket.gethostname())
+
+    def is_current(self, tuning: Optional[Dict[str, Any]]) -> bool:
+        """Whether a stored tuning was made for this host's cores, workers, backend and models."""
+        return bool(tuning) and all(tuning.get(key) == value for key, value in self.profile().items())
+
+    def _save(self, tuning: Dict[str, Any]) -> None:
+        """Store the tuning of this host, keeping those of other hosts."""
+        document = self._load()
+        document["hosts"][tuning["host"]] = tuning
+        staging_file = self.tuning_file.with_name(f".{TUNING_FILE}.tmp")
+        with open(staging_file, "w") as f:
+            json.dump(document, f, indent=2)
+        os.replace(staging_file, self.tuning_file)
+
+    def tune(self, batch_sizes: Tuple[int, ...] = AUTOTUNE_BATCH_SIZES, rows: int = AUTOTUNE_ROWS,
+             min_seconds: float = AUTOTUNE_MIN_SECONDS) -> Optional[Dict[str, Any]]:
+        """Benchmark the setting grid, then store and return the tuning of this host.
+
+        Args:
+            batch_sizes: Batch sizes to measure
+            rows: Rows of synthetic input scored per model and pass
+            min_seconds: Least time spent per measurement
+
+        Returns:
+            Tuning dictionary, or None if there are no models to benchmark
+        """
+        profile = self.profile()
+        model_paths = list(self.benchmark_models().values())
+        if not model_paths:
+            logger.info("No models registered, skipping inference autotuning")
+            return None
+
+        start = time.perf_counter()
+        results = []
+        for intra_op_threads, inter_op_threads in thread_grid(profile["cpu_count"], self.workers, self.backend):
+            try:
+                results.extend(benchmark_setting(model_paths, self.backend, intra_op_threads, inter_op_threads,
+                                                 workers=self.workers, batch_sizes=batch_sizes, rows=rows,
+                                                 min_seconds=min_seconds))
+            except Exception as e:
+                logger.error(f"Error benchmarking inference settings: {str(e)}")
+        if not results:
+            return None
+
+        best = choose_best(results)
+        tuning = {
+            **profile,
+            "intra_op_threads": best["intra_op_threads"],
+            "inter_op_threads": best["inter_op_threads"],
+            "batch_size": best["batch_size"],
+            "rows_per_second": best["rows_per_second"],
+            "results": results,
+            "tuned_at": datetime.now().isoformat(),
+            "elapsed_seconds": round(time.perf_counter() - start, 2)
+        }
+        self._save(tuning)
+        logger.info(f"Inference tuned for {profile['cpu_count']} cores and {self.workers} workers: "
+                    f"{best['intra_op_threads']} intra-op, {best['inter_op_threads']} inter-op threads, "
+                    f"batch size {best['batch_size']} ({best['rows_per_second']:,.0f} rows/s)")
+        return tuning
+
+    def apply(self, tuning: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Configure inference in this process with the stored (or given) tuning."""
+        from models.inference import configure_inference
+
+        tuning = tuning or self.get_tuning()
+        if not tuning:
+            return None
+        return configure_inference(tuning["intra_op_threads"], tuning["inter_op_threads"], tuning["batch_size"])
+
+    def _acquire_lock(self) -> bool:
+        """Take the tuning lock so that one worker benchmarks at a time."""
+        try:
+            if self.lock_file.exists() and time.time() - self.lock_file.stat().st_mtime > TUNING_LOCK_TIMEOUT:
+                self.lock_file.unlink()
+            os.close(os.open(self.lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            return False
+
+    def is_tuning(self) -> bool:
+        """Whether a tuning run holds the lock."""
+        return self.lock_file.exists() and time.time() - self.lock_file.stat().st_mtime <= TUNING_LOCK_TIMEOUT
+
+    def ensure_tuned(self, force: bool = False, poll_seconds: float = 5.0) -> Optional[Dict[str, Any]]:
+        """Apply the stored tuning of this host, tuning first if it is missing or outdated.
+
+        When another worker is already tuning, waits for its result instead
+        of benchmarking at the same time.
+
+        Args:
+            force: Tune again even if the stored tuning is current
+            poll_seconds: Interval between checks for another worker's result
+
+        Returns:
+            Tuning dictionary, or None if there are no models to benchmark
+        """
+        tuning = self.get_tuning()
+        if force or not self.is_current(tuning):
+            if self._acquire_lock():
+                try:
+                    tuning = self.tune()
+                finally:
+                    self.lock_file.unlink(missing_ok=True)
+            else:
+                logger.info("Inference autotuning is running in another worker, waiting for its result")
+                while self.is_tuning():
+                    time.sleep(poll_seconds)
+                tuning = self.get_tuning()
+        if tuning:
+            self.apply(tuning)
+        return tuning
+
+    def diagnostics(self) -> Dict[str, Any]:
+        """Host profile, stored tuning and the settings in effect in this process."""
+        from models.inference import INFERENCE_CONFIG
+
+        tuning = self.get_tuning()
+        if self.is_tuning():
+            status = "tuning"
+        elif not tuning:
+            status = "not_tuned"
+        else:
+            status = "tuned" if self.is_current(tuning) else "outdated"
+        return {
+            "status": status,
+            "host": self.profile(),
+            "applied": dict(INFERENCE_CONFIG),
+            "tuning": tuning
+        }
+
+
+def autotune() -> None:
+    """Tune inference for this host and apply the result.
+
+    Called in a background thread on startup when the host has no current
+    tuning, so the server does not wait for the benchmark.
+    """
+    try:
+        InferenceTuner().ensure_tuned()
+    except Exception as e:
+        logger.warning(f"Inference autotuning failed: {str(e)}")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Lane indexes of stored predictions.
+
+Lane lookups used to load a whole prediction file and filter every record on
+each request. A LaneIndex reads a prediction file once and keeps its records
+with their row positions grouped by lane (normalized source and destination
+city), so a lookup is a dictionary access followed by carrier and order type
+checks on the lane's rows only. Indexes are cached per file and rebuilt when
+the file changes.
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.lane_utils import LaneFrame, normalize_city_name
+from utils.streaming import iter_json_array
+
+logger = logging.getLogger(__name__)
+
+# Prediction files whose indexes are kept in memory
+LANE_INDEX_CACHE_SIZE = 8
+
+_indexes: "OrderedDict[str, Tuple[Tuple[int, int], LaneIndex]]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+class LaneIndex:
+    """Prediction records grouped by lane for constant-time lane lookups.
+
+    Matching follows filter_by_lane: cities are compared with
+    normalize_city_name, carriers and order types case-insensitively.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        """Index prediction records by lane.
+
+        Args:
+            records: Prediction dictionaries (any lane field name variation)
+        """
+        self.records = records
+        self.frame = LaneFrame.from_records(records) if records else None
+        self._lanes: Dict[Tuple[str, str], np.ndarray] = {}
+        if self.frame is None:
+            return
+
+        source, destination = self.frame.source_city, self.frame.destination_city
+        valid = np.flatnonzero((source.key_codes >= 0) & (destination.key_codes >= 0))
+        codes = pd.DataFrame({"source": source.key_codes[valid], "destination": destination.key_codes[valid]})
+        for (source_code, destination_code), positions in codes.groupby(["source", "destination"]).indices.items():
+            self._lanes[(source.keys[source_code], destination.keys[destination_code])] = valid[positions]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def lane_count(self) -> int:
+        return len(self._lanes)
+
+    @staticmethod
+    def _matches(column, key: str, positions: np.ndarray) -> np.ndarray:
+        """Positions among ``positions`` whose ``column`` key equals ``key``."""
+        position = np.searchsorted(column.keys, key)
+        if position >= len(column.keys) or column.keys[position] != key:
+            return positions[:0]
+        return positions[column.key_codes[positions] == position]
+
+    def lookup(
+        self,
+        source_city: str,
+        destination_city: str,
+        carrier: Optional[str] = None,
+        order_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Records of a lane, in file order.
+
+        Args:
+            source_city: Source city of the lane
+            destination_city: Destination city of the lane
+            carrier: Optional carrier filter
+            order_type: Optional order type filter
+
+        Returns:
+            Matching prediction records
+        """
+        positions = self._lanes.get((normalize_city_name(source_city), normalize_city_name(destination_city)))
+        if positions is None:
+            return []
+        if carrier:
+            positions = self._matches(self.frame.carrier, carrier.upper(), positions)
+        if order_type:
+            positions = self._matches(self.frame.order_type, order_type.upper(), positions)
+        return [self.records[i] for i in positions.tolist()]
+
+    def lookup_many(self, lanes: Sequence[Dict[str, Optional[str]]]) -> List[List[Dict[str, Any]]]:
+        """Records of each of a list of lanes, in input order.
+
+        Args:
+            lanes: Dictionaries of ``lookup`` arguments (source_city,
+                destination_city and optionally carrier and order_type)
+
+        Returns:
+            Matching prediction records of each lane
+        """
+        return [self.lookup(**lane) for lane in lanes]
+
+
+def load_lane_index(path: Union[str, Path], key: str = "predictions") -> LaneIndex:
+    """Lane index of a stored prediction file, cached until the file changes.
+
+    Args:
+        path: JSON prediction file (records under ``key``)
+        key: Key of the records array
+
+    Returns:
+        LaneIndex of the file's records
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _indexes_lock:
+        cached = _indexes.get(path)
+        if cached and cached[0] == version:
+            _indexes.move_to_end(path)
+            return cached[1]
+
+    logger.info(f"Building lane index of {path}")
+    index = LaneIndex(list(iter_json_array(path, key)))
+
+    with _indexes_lock:
+        _indexes[path] = (version, index)
+        _indexes.move_to_end(path)
+        while len(_indexes) > LANE_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def clear_lane_indexes() -> None:
+    """Drop all cached lane indexes."""
+    with _indexes_lock:
+        _indexes.clear()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Lane insight: what every model type predicts for one lane.
+
+The lane views used to call the order volume, tender performance and carrier
+performance by-lane endpoints one after another, each reading the metadata
+and loading a full prediction file. LaneInsightService reads the metadata
+once, resolves the latest model of each type and queries their lane indexes
+concurrently, so a lane insight takes as long as the slowest source.
+"""
+
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from services.lane_index import load_lane_index
+from services.prediction_service import PredictionService
+
+logger = logging.getLogger(__name__)
+
+# Model types queried for a lane insight, in response order
+INSIGHT_MODEL_TYPES = ("order_volume", "tender_performance", "carrier_performance")
+
+
+def _summary(model_type: str, predictions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Lane summary of one model type's predictions."""
+    if not predictions:
+        return {}
+    if model_type == "order_volume":
+        volumes = [p.get("PREDICTED ORDER VOLUME", 0) or 0 for p in predictions]
+        return {
+            "total_volume": sum(volumes),
+            "months": len({p.get("PREDICTION DATE") for p in predictions})
+        }
+
+    performances = [p.get("predicted_performance", 0) or 0 for p in predictions]
+    return {
+        "avg_predicted_performance": float(sum(performances) / len(performances)),
+        "carrier_count": len({p.get("carrier", "") for p in predictions})
+    }
+
+
+class LaneInsightService:
+    """Service combining the lane predictions of the latest model of each type."""
+
+    def __init__(self, prediction_service: Optional[PredictionService] = None):
+        """Initialize the lane insight service.
+
+        Args:
+            prediction_service: Prediction service to resolve models and
+                predictions with (a new one by default)
+        """
+        self.prediction_service = prediction_service or PredictionService()
+        self.model_service = self.prediction_service.model_service
+
+    def _prediction_file(self, model_type: str, model_id: str) -> Optional[Path]:
+        """Stored predictions of a model, or None if it has none yet."""
+        if model_type == "tender_performance":
+            # Tender models keep their predictions on the training data with the model
+            model_path = self.model_service.get_model_path(model_id)
+            json_file = Path(model_path) / "training_predictions" / "prediction_data.json" if model_path else None
+        else:
+            predictions = [p for p in self.prediction_service.list_predictions(model_id=model_id)
+                           if p.get("model_type") == model_type]
+            if not predictions:
+                return None
+            latest_prediction = predictions[0]
+            json_file = Path(latest_prediction.get("prediction_file") or
+                             self.prediction_service.base_path / latest_prediction["prediction_id"] / "prediction_data.json")
+        return json_file if json_file and json_file.exists() else None
+
+    def _query(self, model_type: str, source_city: str, destination_city: str,
+               carrier: Optional[str], order_type: Optional[str]) -> Dict[str, Any]:
+        """Lane predictions of the latest model of a type (runs in a worker thread)."""
+        start = time.perf_counter()
+        result: Dict[str, Any] = {"model_id": None}
+        try:
+            models = self.model_service.list_models(model_type=model_type)
+            if not models:
+                result["status"] = "no_model"
+            else:
+                model_id = models[0]["model_id"]
+                result["model_id"] = model_id
+                json_file = self._prediction_file(model_type, model_id)
+                if json_file is None:
+                    result["status"] = "no_predictions"
+                else:
+                    # Order volume forecasts have no carrier; performance predictions no order type
+                    predictions = load_lane_index(json_file).lookup(
+                        source_city, destination_city,
+                        carrier=carrier if model_type != "order_volume" else None,
+                        order_type=order_type if model_type == "order_volume" else None
+                    )
+                    result.update({
+                        "status": "ok",
+                        "prediction_count": len(predictions),
+                        "summary": _summary(model_type, predictions),
+                        "predictions": predictions
+                    })
+        except Exception as e:
+            logger.error(f"Error getting {model_type} lane insight: {str(e)}")
+            result.update({"status": "error", "detail": str(e)})
+
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    async def get_lane_insight(
+        self,
+        source_city: str,
+        destination_city: str,
+        carrier: Optional[str] = None,
+        order_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Predictions of the latest model of each type for a lane.
+
+        The model types are queried concurrently. A type without a model or
+        stored predictions, or whose query fails, is reported by its status
+        and does not fail the others.
+
+        Args:
+            source_city: Source city of the lane
+            destination_city: Destination city of the lane
+            carrier: Optional carrier filter (performance models)
+            order_type: Optional order type filter (order volume models)
+
+        Returns:
+            Dictionary with the lane, one entry per model type under
+            ``sources`` (status, model_id, predictions, summary, elapsed_ms)
+            and the total elapsed_ms
+        """
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            run_in_threadpool(self._query, model_type, source_city, destination_city, carrier, order_type)
+            for model_type in INSIGHT_MODEL_TYPES
+        ))
+        return {
+            "lane": {
+                "source_city": source_city,
+                "destination_city": destination_city,
+                "carrier": carrier,
+                "order_type": order_type
+            },
+            "sources": dict(zip(INSIGHT_MODEL_TYPES, results)),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
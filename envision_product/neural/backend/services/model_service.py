@@ -1,18 +1,140 @@
 import os
 import json
+import time
 import logging
 import shutil
-from typing import Dict, List, Optional, Any, Union
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime
 from pathlib import Path
 import traceback
 
-from models.order_volume_model import OrderVolumeModel
-from models.tender_performance_model import TenderPerformanceModel
-from models.carrier_performance_model import CarrierPerformanceModel
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+from utils.hashing import file_sha256
+
+if TYPE_CHECKING:
+    from models import OrderVolumeModel, TenderPerformanceModel, CarrierPerformanceModel
 
 logger = logging.getLogger(__name__)
 
+# Model class names by type. The classes are imported on first use (see
+# get_model_class) so that importing the service does not load scikit-learn.
+MODEL_CLASSES = {
+    "order_volume": "OrderVolumeModel",
+    "tender_performance": "TenderPerformanceModel",
+    "carrier_performance": "CarrierPerformanceModel",
+}
+
+# Columns used to stratify draft samples so every carrier/lane keeps its share
+DRAFT_STRATIFY_COLUMNS = {
+    "order_volume": ["SOURCE CITY", "DESTINATION CITY", "ORDER TYPE"],
+    "tender_performance": ["CARRIER", "SOURCE_CITY", "DEST_CITY"],
+    "carrier_performance": ["CARRIER", "SOURCE_CITY", "DEST_CITY"],
+}
+
+# File holding the preprocessed feature frame of a draft model
+DRAFT_PREPROCESSING_CACHE = "preprocessed_data.pkl"
+
+# Networks loaded for serving that are kept in memory (see load_serving_network)
+SERVING_NETWORK_CACHE_SIZE = 16
+
+_serving_networks: "OrderedDict[Tuple[str, str], Tuple[Tuple, Any]]" = OrderedDict()
+_serving_networks_lock = threading.Lock()
+
+
+def get_model_class(model_type: str):
+    """Import and return the model class for a model type.
+    
+    Args:
+        model_type: Key of MODEL_CLASSES
+        
+    Returns:
+        The model class
+    """
+    import models
+    return getattr(models, MODEL_CLASSES[model_type])
+
+
+def _directory_version(path: str) -> Tuple:
+    """Names, sizes and modification times of the files in a model directory."""
+    return tuple(sorted(
+        (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+        for entry in os.scandir(path) if entry.is_file()
+    ))
+
+
+def load_serving_network(path: str, backend: Optional[str] = None):
+    """Inference network of a model directory, cached until its files change.
+    
+    The loaders build a new model object for every prediction request; its
+    network (and, for Keras, the XLA functions compiled for it on load) is
+    shared from this cache per directory and backend instead. Networks served
+    from here are only used for predictions, never trained.
+    
+    Args:
+        path: Model directory
+        backend: Inference backend (keras, onnx or numpy)
+        
+    Returns:
+        Model object exposing a Keras-compatible ``predict`` method
+    """
+    from models.inference import load_inference_model
+    
+    key = (os.path.abspath(path), (backend or "keras").lower())
+    with _serving_networks_lock:
+        cached = _serving_networks.get(key)
+        if cached and cached[0] == _directory_version(path):
+            _serving_networks.move_to_end(key)
+            return cached[1]
+    
+    network = load_inference_model(path, backend, xla=settings.XLA_INFERENCE,
+                                   compressed=settings.SERVE_COMPRESSED_WEIGHTS)
+    
+    # Versioned after loading: older models get their exports written on first load
+    with _serving_networks_lock:
+        _serving_networks[key] = (_directory_version(path), network)
+        _serving_networks.move_to_end(key)
+        while len(_serving_networks) > SERVING_NETWORK_CACHE_SIZE:
+            _serving_networks.popitem(last=False)
+    return network
+
+
+def clear_serving_networks() -> None:
+    """Drop all cached serving networks."""
+    with _serving_networks_lock:
+        _serving_networks.clear()
+
+
+def warm_up() -> None:
+    """Import the model classes and the configured inference runtime.
+    
+    Called in a background thread once the server is accepting requests, so
+    the first training or prediction request does not pay for importing
+    scikit-learn and TensorFlow (or onnxruntime).
+    """
+    start = time.time()
+    try:
+        for model_type in MODEL_CLASSES:
+            get_model_class(model_type)
+        
+        # Needed to unpickle the encoders of models without a compressed vocabulary
+        import sklearn.preprocessing  # noqa: F401
+        
+        backend = settings.INFERENCE_BACKEND.lower()
+        if backend == "keras":
+            from models.inference import import_tensorflow
+            import_tensorflow()
+        elif backend == "onnx":
+            import onnxruntime  # noqa: F401
+        
+        logger.info(f"Model runtime warmed up in {time.time() - start:.2f}s ({backend} backend)")
+    except Exception as e:
+        logger.warning(f"Model runtime warm-up failed: {str(e)}")
+
 class ModelService:
     """Service for managing machine learning models."""
     
@@ -43,17 +165,21 @@ class ModelService:
         with open(self.metadata_file, "w") as f:
             json.dump(self.metadata, f, indent=2)
             
-    def list_models(self, model_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    def list_models(self, model_type: Optional[str] = None, include_variants: bool = False) -> List[Dict[str, Any]]:
         """List all available models with their metadata.
         
         Args:
             model_type: Optional filter by model type
+            include_variants: Whether to include serving variants (distilled
+                students) registered for other models
             
         Returns:
             List of model metadata dictionaries
         """
         result = []
         for model_id, metadata in self.metadata["models"].items():
+            if metadata.get("variant_of") and not include_variants:
+                continue
             if model_type is None or metadata.get("model_type") == model_type:
                 model_info = {
                     "model_id": model_id,
@@ -65,6 +191,20 @@ class ModelService:
         result.sort(key=lambda x: x.get("created_at", ""), reverse=True)
         return result
     
+    def find_models_for_content(self, content_hash: str) -> List[Dict[str, Any]]:
+        """List models trained on data with a given content hash.
+        
+        Args:
+            content_hash: SHA-256 of the training data file
+            
+        Returns:
+            List of model metadata dictionaries (newest first)
+        """
+        return [
+            model for model in self.list_models()
+            if model.get("training_data_hash") == content_hash
+        ]
+    
     def get_model_path(self, model_id: str) -> Optional[Path]:
         """Get the filesystem path for a model.
         
@@ -102,11 +242,26 @@ class ModelService:
         if model_id not in self.metadata["models"]:
             return False
         
+        metadata = self.metadata["models"][model_id]
+        
+        # Serving variants are removed together with their teacher
+        variant_id = metadata.get("serving_variant")
+        if variant_id and variant_id in self.metadata["models"]:
+            self.delete_model(variant_id)
+        
         model_path = self.get_model_path(model_id)
         if model_path and model_path.exists():
             try:
+                from services.model_sharing import remove_published
+                remove_published(model_id)
+                
                 shutil.rmtree(model_path)
                 del self.metadata["models"][model_id]
+                
+                teacher = self.metadata["models"].get(metadata.get("variant_of", ""))
+                if teacher and teacher.get("serving_variant") == model_id:
+                    del teacher["serving_variant"]
+                
                 self._save_metadata()
                 return True
             except Exception as e:
@@ -114,12 +269,13 @@ class ModelService:
                 return False
         return False
     
-    def register_model(self, model_path: Union[str, Path], metadata: Dict) -> str:
+    def register_model(self, model_path: Union[str, Path], metadata: Dict, model_id: Optional[str] = None) -> str:
         """Register a new model with metadata.
         
         Args:
             model_path: Path to the model files
             metadata: Dictionary of metadata for the model
+            model_id: Optional explicit ID (generated from type and timestamp by default)
             
         Returns:
             ID of the registered model
@@ -129,9 +285,16 @@ class ModelService:
             raise ValueError(f"Model path does not exist: {model_path}")
         
         # Generate a unique model ID based on timestamp and model type
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        model_type = metadata.get("model_type", "unknown")
-        model_id = f"{model_type}_{timestamp}"
+        if not model_id:
+            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+            model_type = metadata.get("model_type", "unknown")
+            model_id = f"{model_type}_{timestamp}"
+            
+            # Models registered within the same second (a quick draft and its promotion) get a suffix
+            suffix = 1
+            while model_id in self.metadata["models"] or (self.base_path / model_id).exists():
+                suffix += 1
+                model_id = f"{model_type}_{timestamp}_{suffix}"
         
         # Create a directory for the model
         target_path = self.base_path / model_id
@@ -154,16 +317,70 @@ class ModelService:
             "model_path": str(target_path)
         }
         
+        # Record the training content so re-uploads of the same data find this model
+        training_data = metadata.get("training_data")
+        if training_data and "training_data_hash" not in full_metadata and os.path.exists(training_data):
+            full_metadata["training_data_hash"] = file_sha256(training_data)
+        
         self.metadata["models"][model_id] = full_metadata
         self._save_metadata()
         
         return model_id
     
-    def load_order_volume_model(self, model_id: str) -> Optional[OrderVolumeModel]:
+    def resolve_serving_model_id(self, model_id: str) -> str:
+        """Return the ID of the model that should serve predictions for a model.
+        
+        A distilled student registered as the model's serving variant is used
+        when its MAE against the teacher is within DISTILLATION_FIDELITY_TOLERANCE.
+        
+        Args:
+            model_id: ID of the requested (teacher) model
+            
+        Returns:
+            ID of the student variant, or model_id itself
+        """
+        metadata = self.get_model_metadata(model_id) or {}
+        variant_id = metadata.get("serving_variant")
+        variant = self.get_model_metadata(variant_id) if variant_id else None
+        if not variant or not (self.base_path / variant_id).exists():
+            return model_id
+        
+        mae = variant.get("fidelity", {}).get("mae")
+        if mae is not None and mae <= settings.DISTILLATION_FIDELITY_TOLERANCE:
+            logger.info(f"Serving model {model_id} with student {variant_id} (MAE vs teacher {mae:.3f})")
+            return variant_id
+        
+        return model_id
+    
+    def _serving_model_path(self, model_id: str, model_path: Path, backend: Optional[str] = None) -> Path:
+        """Return the directory the loaders construct a model from.
+        
+        With MODEL_SHARING enabled and no explicit backend, this is the
+        model's published copy with memory-mapped weights (see
+        services.model_sharing); otherwise the model directory itself.
+        
+        Args:
+            model_id: ID of the model
+            model_path: Model directory
+            backend: Explicitly requested inference backend
+            
+        Returns:
+            Directory to load the model from
+        """
+        if backend is not None or not settings.MODEL_SHARING:
+            return model_path
+        
+        from services.model_sharing import ensure_published
+        shared_path = ensure_published(model_id, model_path, self.export_inference_artifacts)
+        return shared_path or model_path
+    
+    def load_order_volume_model(self, model_id: str, backend: Optional[str] = None) -> Optional['OrderVolumeModel']:
         """Load an order volume model by ID.
         
         Args:
             model_id: ID of the model to load
+            backend: Inference backend (keras, onnx or numpy); defaults to
+                the INFERENCE_BACKEND setting
             
         Returns:
             Loaded OrderVolumeModel instance or None if loading fails
@@ -179,64 +396,154 @@ class ModelService:
             return None
         
         try:
-            model = OrderVolumeModel(model_path=str(model_path))
+            model = get_model_class("order_volume")(
+                model_path=str(self._serving_model_path(model_id, model_path, backend)),
+                inference_backend=backend or settings.INFERENCE_BACKEND,
+                inference_loader=load_serving_network
+            )
             return model
         except Exception as e:
             logger.error(f"Error loading order volume model {model_id}: {str(e)}")
             return None
     
-    def load_tender_performance_model(self, model_id: str) -> Optional[TenderPerformanceModel]:
+    def load_tender_performance_model(self, model_id: str, backend: Optional[str] = None,
+                          prefer_variant: bool = True) -> Optional['TenderPerformanceModel']:
         """Load a tender performance model by ID.
         
         Args:
             model_id: ID of the model to load
+            backend: Inference backend (keras, onnx or numpy); defaults to
+                the INFERENCE_BACKEND setting
+            prefer_variant: Serve a distilled student instead of the model
+                when its fidelity is within tolerance
             
         Returns:
             Loaded TenderPerformanceModel instance or None if loading fails
         """
-        model_path = self.get_model_path(model_id)
-        if not model_path or not model_path.exists():
-            logger.error(f"Model path does not exist: {model_path}")
-            return None
-        
         metadata = self.get_model_metadata(model_id)
         if not metadata or metadata.get("model_type") != "tender_performance":
             logger.error(f"Model {model_id} is not a tender performance model")
             return None
         
+        if prefer_variant:
+            model_id = self.resolve_serving_model_id(model_id)
+        
+        model_path = self.get_model_path(model_id)
+        if not model_path or not model_path.exists():
+            logger.error(f"Model path does not exist: {model_path}")
+            return None
+        
         try:
-            model = TenderPerformanceModel(model_path=str(model_path))
+            model = get_model_class("tender_performance")(
+                model_path=str(self._serving_model_path(model_id, model_path, backend)),
+                inference_backend=backend or settings.INFERENCE_BACKEND,
+                inference_loader=load_serving_network
+            )
             return model
         except Exception as e:
             logger.error(f"Error loading tender performance model {model_id}: {str(e)}")
             return None
     
-    def load_carrier_performance_model(self, model_id: str) -> Optional[CarrierPerformanceModel]:
+    def load_carrier_performance_model(self, model_id: str, backend: Optional[str] = None,
+                          prefer_variant: bool = True) -> Optional['CarrierPerformanceModel']:
         """Load a carrier performance model by ID.
         
         Args:
             model_id: ID of the model to load
+            backend: Inference backend (keras, onnx or numpy); defaults to
+                the INFERENCE_BACKEND setting
+            prefer_variant: Serve a distilled student instead of the model
+                when its fidelity is within tolerance
             
         Returns:
             Loaded CarrierPerformanceModel instance or None if loading fails
         """
-        model_path = self.get_model_path(model_id)
-        if not model_path or not model_path.exists():
-            logger.error(f"Model path does not exist: {model_path}")
-            return None
-        
         metadata = self.get_model_metadata(model_id)
         if not metadata or metadata.get("model_type") != "carrier_performance":
             logger.error(f"Model {model_id} is not a carrier performance model")
             return None
         
+        if prefer_variant:
+            model_id = self.resolve_serving_model_id(model_id)
+        
+        model_path = self.get_model_path(model_id)
+        if not model_path or not model_path.exists():
+            logger.error(f"Model path does not exist: {model_path}")
+            return None
+        
         try:
-            model = CarrierPerformanceModel(model_path=str(model_path))
+            model = get_model_class("carrier_performance")(
+                model_path=str(self._serving_model_path(model_id, model_path, backend)),
+                inference_backend=backend or settings.INFERENCE_BACKEND,
+                inference_loader=load_serving_network
+            )
             return model
         except Exception as e:
             logger.error(f"Error loading carrier performance model {model_id}: {str(e)}")
             return None
     
+    def export_inference_artifacts(self, model_id: str) -> bool:
+        """Export the ONNX graph and NumPy weights for an existing model.
+        
+        Models trained before the exports existed can be backfilled with this
+        so they can be served without TensorFlow.
+        
+        Args:
+            model_id: ID of the model to export
+            
+        Returns:
+            True if the export was successful, False otherwise
+        """
+        model_path = self.get_model_path(model_id)
+        if not model_path or not model_path.exists():
+            logger.error(f"Model path does not exist: {model_path}")
+            return False
+        
+        try:
+            from models.inference import KERAS_MODEL_FILE, import_tensorflow, export_inference_artifacts
+            tf = import_tensorflow()
+            keras_model = tf.keras.models.load_model(str(model_path / KERAS_MODEL_FILE))
+            export_inference_artifacts(keras_model, str(model_path))
+            return True
+        except Exception as e:
+            logger.error(f"Error exporting inference artifacts for model {model_id}: {str(e)}")
+            return False
+    
+    def compress_model(self, model_id: str, precision: str = "int8", drop_original: bool = False) -> Optional[Dict[str, Any]]:
+        """Write the compressed artifact (quantized weights and JSON vocabularies) for a model.
+        
+        Args:
+            model_id: ID of the model to compress
+            precision: Weight precision, float16 or int8
+            drop_original: Remove the float32 model files once the compressed
+                artifact is written. The model is then served with NumPy and
+                can no longer be promoted or warm-started.
+            
+        Returns:
+            The artifact manifest or None if compression fails
+        """
+        model_path = self.get_model_path(model_id)
+        if not model_path or not model_path.exists():
+            logger.error(f"Model path does not exist: {model_path}")
+            return None
+        
+        try:
+            from models.inference import NUMPY_WEIGHTS_FILE
+            from models.artifacts import compress_model_directory
+            
+            # Older models need their NumPy export before they can be quantized
+            if not (model_path / NUMPY_WEIGHTS_FILE).exists() and not self.export_inference_artifacts(model_id):
+                return None
+            
+            manifest = compress_model_directory(str(model_path), precision, drop_original)
+            
+            self.metadata["models"][model_id]["artifact"] = manifest
+            self._save_metadata()
+            return manifest
+        except Exception as e:
+            logger.error(f"Error compressing model {model_id}: {str(e)}")
+            return None
+    
     def train_order_volume_model(self, data_path: str, params: Dict = None) -> Optional[str]:
         """Train a new order volume model.
         
@@ -271,7 +578,11 @@ class ModelService:
             os.makedirs(temp_model_dir, exist_ok=True)
             
             # Train the model
-            model = OrderVolumeModel(data_path=data_path)
+            model = get_model_class("order_volume")(
+                data_path=data_path,
+                **{key: training_params[key] for key in ("architecture", "horizon", "lags")
+                   if training_params.get(key) is not None}
+            )
             
             # Make sure raw_data is loaded and processed
             if not hasattr(model, 'raw_data') or model.raw_data is None:
@@ -322,6 +633,28 @@ class ModelService:
             logger.error(f"Error training order volume model: {str(e)}")
             return None
             
+    def _encoding_params(self, params: Dict) -> Dict[str, Any]:
+        """Categorical encoding arguments of a performance model, from training params or settings."""
+        return {
+            "encoding": params.get("encoding") or settings.CATEGORICAL_ENCODING,
+            "hash_features": params.get("hash_features") or settings.HASH_FEATURES
+        }
+    
+    def _warm_start(self, model, model_id: Optional[str]) -> None:
+        """Start training from the weights of a registered model, if one is given.
+        
+        Args:
+            model: Model instance with its network built
+            model_id: ID of the model to start from (None to train from scratch)
+        """
+        if not model_id:
+            return
+        model_path = self.get_model_path(model_id)
+        if model_path is None:
+            logger.warning(f"Warm-start model {model_id} not found, training from scratch")
+            return
+        model.warm_start(str(model_path))
+    
     def train_tender_performance_model(self, data_path: str, params: Dict = None) -> Optional[str]:
         """Train a new tender performance model.
         
@@ -356,7 +689,7 @@ class ModelService:
             os.makedirs(temp_model_dir, exist_ok=True)
             
             # Train the model
-            model = TenderPerformanceModel(data_path=data_path)
+            model = get_model_class("tender_performance")(data_path=data_path, **self._encoding_params(training_params))
             
             # Make sure raw_data is loaded and processed
             if not hasattr(model, 'raw_data') or model.raw_data is None:
@@ -365,6 +698,7 @@ class ModelService:
             model.preprocess_data()
             model.prepare_train_test_split(test_size=training_params["test_size"])
             model.build_model()
+            self._warm_start(model, training_params.get("warm_start_model_id"))
             
             # Use a smaller number of epochs for testing
             actual_epochs = 5 if os.environ.get("TESTING", "0") == "1" else training_params["epochs"]
@@ -416,6 +750,9 @@ class ModelService:
                 - epochs: Number of training epochs
                 - batch_size: Batch size for training
                 - test_size: Fraction of data to use for testing
+                - encoding: onehot or hashing (defaults to CATEGORICAL_ENCODING)
+                - hash_features: Hashed features per categorical column
+                - warm_start_model_id: Model whose weights training starts from
                 
         Returns:
             ID of the trained model or None if training fails
@@ -432,10 +769,11 @@ class ModelService:
             tmp_path = Path(tmp_dir)
             
             # Initialize and train the model
-            model = CarrierPerformanceModel(data_path=data_path)
+            model = get_model_class("carrier_performance")(data_path=data_path, **self._encoding_params(params))
             model.preprocess_data()
             model.prepare_train_test_split(test_size=params.get("test_size", 0.2))
             model.build_model()
+            self._warm_start(model, params.get("warm_start_model_id"))
             
             # Train the model
             history = model.train(
@@ -480,6 +818,445 @@ class ModelService:
             logger.error(f"Error training carrier performance model: {str(e)}")
             return None
     
+    def _draft_sample_ranks(self, model, model_type: str, train_index) -> tuple:
+        """Assign every training row a rank within its carrier/lane stratum.
+        
+        Rows are shuffled once, so taking all rows with ``rank < ceil(f * size)``
+        gives a stratified sample of fraction ``f`` in which each sample is a
+        superset of every smaller one.
+        
+        Args:
+            model: Model instance with ``raw_data`` loaded
+            model_type: Type of the model being drafted
+            train_index: Index of the training rows in the preprocessed data
+            
+        Returns:
+            Tuple of (rank, stratum_size) arrays aligned with ``train_index``
+        """
+        rows = model.raw_data.iloc[np.asarray(train_index)]
+        columns = [col for col in DRAFT_STRATIFY_COLUMNS.get(model_type, []) if col in rows.columns]
+        
+        if columns:
+            stratum = rows.groupby(columns, sort=False, observed=True, dropna=False).ngroup().to_numpy()
+        else:
+            logger.warning("No stratification columns found, drafting on a plain random sample")
+            stratum = np.zeros(len(rows), dtype=np.int64)
+        
+        rng = np.random.default_rng(42)
+        order = rng.permutation(len(stratum))
+        rank = np.empty(len(stratum), dtype=np.int64)
+        rank[order] = pd.Series(stratum[order]).groupby(stratum[order]).cumcount().to_numpy()
+        stratum_size = np.bincount(stratum)[stratum]
+        
+        return rank, stratum_size
+    
+    def train_draft_model(self, model_type: str, data_path: str, params: Dict = None) -> Optional[Dict[str, Any]]:
+        """Train a provisional model on a progressively growing stratified sample.
+        
+        The data is preprocessed once on the full file. Training then starts on a
+        small sample stratified by carrier/lane and keeps growing it until the
+        test-set MAE stabilizes, the full training set is used, or the time
+        budget would be exceeded by the next stage. The preprocessed frame is
+        cached in the model directory so the draft can later be promoted to a
+        full training run without preprocessing again.
+        
+        Args:
+            model_type: Type of model to draft (order_volume, tender_performance
+                or carrier_performance)
+            data_path: Path to the training data file
+            params: Dictionary of draft parameters
+                - time_budget: Maximum seconds to spend training
+                - initial_fraction: Fraction of the training set used first
+                - growth_factor: Multiplier applied to the fraction per stage
+                - epochs_per_stage: Epochs trained on each sample
+                - tolerance: Relative MAE change considered stable
+                
+        Returns:
+            Dictionary with the draft model ID, evaluation and stage history,
+            or None if drafting fails
+        """
+        if model_type not in MODEL_CLASSES:
+            logger.error(f"Unknown model type for draft training: {model_type}")
+            return None
+        
+        if not os.path.exists(data_path):
+            logger.error(f"Training data not found: {data_path}")
+            return None
+        
+        # Default parameters
+        default_params = {
+            "time_budget": settings.DRAFT_TIME_BUDGET,
+            "initial_fraction": 0.1,
+            "growth_factor": 2.0,
+            "epochs_per_stage": 5,
+            "batch_size": 64,
+            "tolerance": 0.02,
+            "validation_split": 0.1,
+            "test_size": 0.2
+        }
+        
+        # Override defaults with provided params
+        if params:
+            draft_params = {**default_params, **{k: v for k, v in params.items() if v is not None}}
+        else:
+            draft_params = default_params
+        
+        try:
+            import tempfile
+            start_time = time.monotonic()
+            tmp_path = Path(tempfile.mkdtemp(prefix=f"{model_type}_draft_"))
+            
+            # Preprocess the full data once so the feature space matches a full run
+            model = get_model_class(model_type)(data_path=data_path)
+            model.preprocess_data()
+            model.prepare_train_test_split(test_size=draft_params["test_size"])
+            model.build_model()
+            
+            full_X_train, full_y_train = model.X_train, model.y_train
+            rank, stratum_size = self._draft_sample_ranks(model, model_type, full_X_train.index)
+            
+            fraction = min(1.0, float(draft_params["initial_fraction"]))
+            stages = []
+            previous_mae = None
+            stop_reason = "full_sample"
+            
+            while True:
+                mask = rank < np.ceil(fraction * stratum_size)
+                model.X_train = full_X_train[mask]
+                model.y_train = full_y_train[mask]
+                
+                # Warm-start from the previous stage so each stage only refines
+                stage_start = time.monotonic()
+                model.train(
+                    epochs=draft_params["epochs_per_stage"],
+                    batch_size=draft_params["batch_size"],
+                    validation_split=draft_params["validation_split"]
+                )
+                evaluation = model.evaluate()
+                stage_seconds = time.monotonic() - stage_start
+                
+                mae = float(evaluation["mae"])
+                stages.append({
+                    "fraction": round(fraction, 4),
+                    "samples": int(mask.sum()),
+                    "seconds": round(stage_seconds, 3),
+                    "evaluation": {key: float(value) for key, value in evaluation.items()}
+                })
+                logger.info(f"Draft stage {len(stages)}: {int(mask.sum())} samples, MAE {mae:.4f}, {stage_seconds:.1f}s")
+                
+                if previous_mae is not None and abs(previous_mae - mae) <= draft_params["tolerance"] * max(abs(previous_mae), 1e-9):
+                    stop_reason = "stable"
+                    break
+                if fraction >= 1.0:
+                    stop_reason = "full_sample"
+                    break
+                
+                # Stage cost grows roughly with the sample size
+                elapsed = time.monotonic() - start_time
+                if elapsed + stage_seconds * draft_params["growth_factor"] > draft_params["time_budget"]:
+                    stop_reason = "time_budget"
+                    break
+                
+                previous_mae = mae
+                fraction = min(1.0, fraction * draft_params["growth_factor"])
+            
+            # Restore the full split so the saved sample features are representative
+            model.X_train, model.y_train = full_X_train, full_y_train
+            model.save_model(str(tmp_path))
+            model.preprocessed_data.to_pickle(tmp_path / DRAFT_PREPROCESSING_CACHE)
+            
+            training_data_file = os.path.join(tmp_path, "training_data.csv")
+            if not os.path.exists(training_data_file):
+                shutil.copy2(data_path, training_data_file)
+            
+            draft_info = {
+                "stages": stages,
+                "stop_reason": stop_reason,
+                "stable": stop_reason == "stable",
+                "elapsed_seconds": round(time.monotonic() - start_time, 3)
+            }
+            final_evaluation = stages[-1]["evaluation"]
+            
+            metadata = {
+                "model_type": model_type,
+                "training_data": data_path,
+                "training_params": draft_params,
+                "evaluation": final_evaluation,
+                "draft": True,
+                "draft_info": draft_info,
+                "description": f"Draft {model_type.replace('_', ' ')} model trained on {os.path.basename(data_path)}"
+            }
+            if getattr(model, "feature_info", None):
+                metadata["feature_info"] = model.feature_info
+            
+            model_id = self.register_model(tmp_path, metadata)
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            
+            logger.info(f"Draft {model_type} model {model_id} ready after {draft_info['elapsed_seconds']}s ({stop_reason})")
+            return {
+                "model_id": model_id,
+                "evaluation": final_evaluation,
+                "draft_info": draft_info
+            }
+            
+        except Exception as e:
+            logger.error(f"Error training draft {model_type} model: {str(e)}")
+            logger.error(traceback.format_exc())
+            return None
+    
+    def promote_draft_model(self, model_id: str, params: Dict = None) -> Optional[str]:
+        """Run a full training from a draft model, reusing its cached preprocessing.
+        
+        The draft's fitted encoders and preprocessed frame are reused as-is and
+        training continues from the draft weights.
+        
+        Args:
+            model_id: ID of the draft model to promote
+            params: Dictionary of training parameters
+            
+        Returns:
+            ID of the newly trained model or None if promotion fails
+        """
+        metadata = self.get_model_metadata(model_id)
+        if not metadata or not metadata.get("draft"):
+            logger.error(f"Model {model_id} is not a draft model")
+            return None
+        
+        model_type = metadata.get("model_type")
+        model_path = self.get_model_path(model_id)
+        if model_type not in MODEL_CLASSES or not model_path or not model_path.exists():
+            logger.error(f"Draft model {model_id} cannot be loaded")
+            return None
+        
+        # Default parameters
+        default_params = {
+            "epochs": 100,
+            "batch_size": 32,
+            "validation_split": 0.2,
+            "test_size": metadata.get("training_params", {}).get("test_size", 0.2)
+        }
+        
+        # Override defaults with provided params
+        if params:
+            training_params = {**default_params, **params}
+        else:
+            training_params = default_params
+        
+        try:
+            import tempfile
+            tmp_path = Path(tempfile.mkdtemp(prefix=f"{model_type}_promoted_"))
+            
+            # Loading the draft restores its encoders and weights
+            model = get_model_class(model_type)(model_path=str(model_path), inference_backend="keras")
+            model.data_path = str(model_path / "training_data.csv")
+            model.load_data()
+            
+            cache_file = model_path / DRAFT_PREPROCESSING_CACHE
+            if cache_file.exists():
+                logger.info(f"Reusing cached preprocessing from draft {model_id}")
+                model.preprocessed_data = pd.read_pickle(cache_file)
+            else:
+                logger.warning(f"No cached preprocessing for draft {model_id}, preprocessing again")
+                model.preprocessed_data = None
+                model.preprocess_data()
+            
+            model.prepare_train_test_split(test_size=training_params["test_size"])
+            
+            # Only warm-start when the feature space still matches the draft network
+            if model.model is None or model.model.input_shape[-1] != model.X_train.shape[1]:
+                model.build_model()
+            
+            actual_epochs = 5 if os.environ.get("TESTING", "0") == "1" else training_params["epochs"]
+            model.train(
+                epochs=actual_epochs,
+                batch_size=training_params["batch_size"],
+                validation_split=training_params["validation_split"]
+            )
+            evaluation = model.evaluate()
+            
+            model.save_model(str(tmp_path))
+            training_data_file = os.path.join(tmp_path, "training_data.csv")
+            if not os.path.exists(training_data_file):
+                shutil.copy2(model_path / "training_data.csv", training_data_file)
+            
+            promoted_metadata = {
+                "model_type": model_type,
+                "training_data": metadata.get("training_data"),
+                "training_params": training_params,
+                "evaluation": evaluation,
+                "promoted_from": model_id,
+                "description": f"{model_type.replace('_', ' ').capitalize()} model promoted from draft {model_id}"
+            }
+            if getattr(model, "feature_info", None):
+                promoted_metadata["feature_info"] = model.feature_info
+            
+            new_model_id = self.register_model(tmp_path, promoted_metadata)
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            
+            logger.info(f"Promoted draft {model_id} to full model {new_model_id}")
+            return new_model_id
+            
+        except Exception as e:
+            logger.error(f"Error promoting draft model {model_id}: {str(e)}")
+            logger.error(traceback.format_exc())
+            return None
+    
+    def distill_model(self, model_id: str, params: Dict = None) -> Optional[Dict[str, Any]]:
+        """Distill a carrier or tender performance model into a smaller student.
+        
+        The student is trained to match the teacher's outputs on the training
+        data plus synthetic lanes, then registered as the teacher's serving
+        variant with its fidelity (MAE vs teacher, in percentage points) measured
+        on held-out rows. The API serves the student when that MAE is within
+        DISTILLATION_FIDELITY_TOLERANCE.
+        
+        Args:
+            model_id: ID of the teacher model
+            params: Dictionary of distillation parameters
+                - architecture: Student architecture (compact or linear)
+                - synthetic_samples: Number of synthetic lanes to add
+                - epochs: Maximum training epochs
+                - batch_size: Training batch size
+                - holdout: Fraction of rows held out to measure fidelity
+                
+        Returns:
+            Dictionary with the student model ID and fidelity, or None if
+            distillation fails
+        """
+        from models.distillation import (
+            build_student_network, fit_student, measure_fidelity, synthesize_feature_rows
+        )
+        
+        metadata = self.get_model_metadata(model_id)
+        if not metadata:
+            logger.error(f"Model {model_id} not found")
+            return None
+        
+        model_type = metadata.get("model_type")
+        if model_type not in ("carrier_performance", "tender_performance"):
+            logger.error(f"Distillation is only supported for carrier and tender performance models, not {model_type}")
+            return None
+        
+        if metadata.get("variant_of"):
+            logger.error(f"Model {model_id} is already a serving variant")
+            return None
+        
+        # Default parameters
+        default_params = {
+            "architecture": "compact",
+            "synthetic_samples": 10000,
+            "epochs": 50,
+            "batch_size": 256,
+            "holdout": 0.2
+        }
+        
+        # Override defaults with provided params
+        if params:
+            distill_params = {**default_params, **{k: v for k, v in params.items() if v is not None}}
+        else:
+            distill_params = default_params
+        
+        model_path = self.get_model_path(model_id)
+        training_data_path = model_path / "training_data.csv" if model_path else None
+        if not training_data_path or not training_data_path.exists():
+            logger.error(f"Training data for model {model_id} not found")
+            return None
+        
+        try:
+            import tempfile
+            
+            # Teacher outputs can come from any backend; the network itself is not trained
+            teacher = self.load_carrier_performance_model(model_id, prefer_variant=False) \
+                if model_type == "carrier_performance" \
+                else self.load_tender_performance_model(model_id, prefer_variant=False)
+            if not teacher:
+                return None
+            
+            teacher.data_path = str(training_data_path)
+            teacher.load_data()
+            teacher.preprocess_data()
+            
+            target_column = "ONTIME_PERFORMANCE" if model_type == "carrier_performance" else teacher.target_column
+            X_real = teacher.preprocessed_data.drop(columns=[target_column])
+            if getattr(teacher, "feature_columns", None):
+                X_real = X_real.reindex(columns=teacher.feature_columns, fill_value=0)
+            
+            input_dim = teacher.model.input_shape[-1]
+            if X_real.shape[1] != input_dim:
+                logger.error(f"Feature count {X_real.shape[1]} does not match teacher input size {input_dim}")
+                return None
+            
+            X_synthetic = synthesize_feature_rows(X_real, int(distill_params["synthetic_samples"]))
+            X_all = np.vstack([
+                X_real.to_numpy(dtype=np.float32),
+                X_synthetic.to_numpy(dtype=np.float32)
+            ])
+            y_all = np.asarray(teacher.model.predict(X_all), dtype=np.float32).reshape(-1)
+            
+            # Hold out rows to measure fidelity on data the student has not seen
+            rng = np.random.default_rng(42)
+            order = rng.permutation(len(X_all))
+            n_holdout = max(1, int(len(X_all) * distill_params["holdout"]))
+            holdout_idx, train_idx = order[:n_holdout], order[n_holdout:]
+            
+            student = build_student_network(input_dim, distill_params["architecture"])
+            fit_student(
+                student,
+                X_all[train_idx],
+                y_all[train_idx],
+                epochs=distill_params["epochs"],
+                batch_size=distill_params["batch_size"]
+            )
+            fidelity = measure_fidelity(student.predict(X_all[holdout_idx], verbose=0), y_all[holdout_idx])
+            logger.info(f"Student for {model_id}: MAE vs teacher {fidelity['mae']:.3f} percentage points")
+            
+            # Save the student with the teacher's encoders so it is a complete model directory
+            tmp_path = Path(tempfile.mkdtemp(prefix=f"{model_type}_student_"))
+            teacher.model = student
+            if not teacher.save_model(str(tmp_path)):
+                logger.error("Failed to save student model")
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                return None
+            
+            training_data_file = tmp_path / "training_data.csv"
+            if not training_data_file.exists():
+                shutil.copy2(training_data_path, training_data_file)
+            
+            # Replace any previous student of this teacher
+            student_id = f"{model_id}_student"
+            if student_id in self.metadata["models"]:
+                self.delete_model(student_id)
+            
+            student_metadata = {
+                "model_type": model_type,
+                "training_data": metadata.get("training_data"),
+                "training_params": distill_params,
+                "variant_of": model_id,
+                "architecture": distill_params["architecture"],
+                "fidelity": fidelity,
+                "description": f"Distilled {distill_params['architecture']} student of {model_id}"
+            }
+            if getattr(teacher, "feature_info", None):
+                student_metadata["feature_info"] = teacher.feature_info
+            
+            self.register_model(tmp_path, student_metadata, model_id=student_id)
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            
+            self.metadata["models"][model_id]["serving_variant"] = student_id
+            self._save_metadata()
+            
+            return {
+                "model_id": student_id,
+                "variant_of": model_id,
+                "fidelity": fidelity,
+                "serving": fidelity["mae"] <= settings.DISTILLATION_FIDELITY_TOLERANCE
+            }
+            
+        except Exception as e:
+            logger.error(f"Error distilling model {model_id}: {str(e)}")
+            logger.error(traceback.format_exc())
+            return None
+    
     def predict_future_order_volumes(self, model_id: str, months: int = 6) -> Optional[Dict]:
         """Generate predictions for future order volumes.
         
@@ -594,7 +1371,8 @@ class ModelService:
             logger.error(f"Error generating tender performance predictions with model {model_id}: {str(e)}")
             return None
 
-    def predict_tender_performance_on_training_data(self, model_id: str) -> Optional[Dict]:
+    def predict_tender_performance_on_training_data(self, model_id: str,
+                                                    return_predictions: bool = True) -> Optional[Dict]:
         """Generate predictions for tender performance on the training data.
         
         This method loads the tender performance model and predicts on the data
@@ -603,6 +1381,8 @@ class ModelService:
         
         Args:
             model_id: ID of the model to use for prediction
+            return_predictions: Whether newly generated results include the
+                per-row predictions (False when only the saved files are needed)
             
         Returns:
             Dictionary with prediction results or None if prediction fails
@@ -655,9 +1435,9 @@ class ModelService:
         else:
             logger.info(f"No existing predictions found for model {model_id}, generating new predictions")
         
-        # Load the model
+        # Load the model itself: training predictions and metrics describe it, not a distilled student
         logger.info(f"Loading tender performance model {model_id} for training data prediction")
-        model = self.load_tender_performance_model(model_id)
+        model = self.load_tender_performance_model(model_id, prefer_variant=False)
         if not model:
             logger.error(f"Failed to load model {model_id}")
             return None
@@ -665,7 +1445,8 @@ class ModelService:
         try:
             # Generate predictions on training data
             logger.info(f"Generating predictions on training data for model {model_id}")
-            result = model.predict_on_training_data(output_dir=training_predictions_dir)
+            result = model.predict_on_training_data(output_dir=training_predictions_dir,
+                                                    return_predictions=return_predictions)
             
             if not result:
                 logger.error("Failed to generate predictions on training data")
@@ -737,8 +1518,8 @@ class ModelService:
             logger.error(f"Model {model_id} is not a carrier performance model")
             return None
         
-        # Load the model
-        model = self.load_carrier_performance_model(model_id)
+        # Load the model itself: training predictions and metrics describe it, not a distilled student
+        model = self.load_carrier_performance_model(model_id, prefer_variant=False)
         if not model:
             logger.error(f"Failed to load carrier performance model {model_id}")
             return None
@@ -795,21 +1576,15 @@ class ModelService:
                 logger.error("No training data available for generating predictions after trying all options")
                 return None
             
-            # Generate predictions on the training data
+            # Generate predictions on the training data; the model writes them
+            # to prediction_data.json in the prediction directory
             logger.info("Generating predictions on training data...")
-            prediction_results = model.predict_on_training_data()
+            prediction_results = model.predict_on_training_data(output_dir=str(prediction_dir))
             
             if not prediction_results:
                 logger.error("Failed to generate predictions on training data")
                 return None
             
-            # Ensure the directory exists
-            prediction_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Save the predictions
-            with open(prediction_file, "w") as f:
-                json.dump(prediction_results, f, indent=2)
-            
             logger.info(f"Successfully generated carrier performance predictions for model {model_id}")
             return prediction_results
             
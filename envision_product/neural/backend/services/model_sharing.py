@@ -0,0 +1,134 @@
+"""
+Model sharing across uvicorn workers.
+
+With ``MODEL_SHARING`` enabled, ModelService loaders serve each model from a
+published copy under ``SHARED_MODEL_PATH`` (``/dev/shm/envision_models`` by
+default) whose weights are memory-mapped read-only, so adding workers does
+not multiply the memory used by model weights. The first worker to load a
+model publishes it under a file lock; run ``python -m services.model_sharing``
+before starting the workers to publish every registered model up front.
+"""
+
+import os
+import shutil
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def shared_root() -> Path:
+    """Directory holding the published models."""
+    if settings.SHARED_MODEL_PATH:
+        root = Path(settings.SHARED_MODEL_PATH)
+    elif os.path.isdir("/dev/shm"):
+        root = Path("/dev/shm/envision_models")
+    else:
+        root = Path("data/shared_models")
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def shared_model_path(model_id: str) -> Path:
+    """Published directory of a model."""
+    return shared_root() / model_id
+
+
+@contextmanager
+def _publish_lock(model_id: str):
+    """Hold an exclusive lock while a model is published (no-op without fcntl)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+
+    with open(shared_root() / f".{model_id}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def ensure_published(model_id: str, model_dir: Path,
+                     export: Optional[Callable[[str], bool]] = None) -> Optional[Path]:
+    """Publish a model for shared serving unless an up-to-date copy exists.
+
+    Args:
+        model_id: ID of the model
+        model_dir: Saved model directory
+        export: Optional callback exporting the NumPy weights of models saved
+            before the exports existed
+
+    Returns:
+        The published directory, or None if the model could not be published
+    """
+    from models.inference import NUMPY_WEIGHTS_FILE
+    from models.artifacts import COMPRESSED_WEIGHTS_FILE
+    from models.shared_weights import is_published, publish_model_directory
+
+    target_dir = shared_model_path(model_id)
+    compressed = settings.SERVE_COMPRESSED_WEIGHTS
+    if is_published(str(model_dir), str(target_dir), compressed):
+        return target_dir
+
+    try:
+        with _publish_lock(model_id):
+            # Another worker may have published while we waited for the lock
+            if is_published(str(model_dir), str(target_dir), compressed):
+                return target_dir
+
+            has_weights = (model_dir / NUMPY_WEIGHTS_FILE).exists() or (model_dir / COMPRESSED_WEIGHTS_FILE).exists()
+            if not has_weights and (export is None or not export(model_id)):
+                logger.warning(f"Model {model_id} has no exported weights, serving it without sharing")
+                return None
+
+            publish_model_directory(str(model_dir), str(target_dir), compressed)
+            return target_dir
+    except Exception as e:
+        logger.error(f"Error publishing model {model_id} for sharing: {str(e)}")
+        return None
+
+
+def remove_published(model_id: str) -> None:
+    """Remove the published copy of a model, if any."""
+    target_dir = shared_model_path(model_id)
+    if target_dir.exists():
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+
+def publish_all() -> Dict[str, bool]:
+    """Publish every registered model.
+
+    Returns:
+        Mapping of model ID to whether it was published
+    """
+    from services.model_service import ModelService
+
+    model_service = ModelService()
+    results = {}
+    for model in model_service.list_models(include_variants=True):
+        model_id = model["model_id"]
+        model_dir = model_service.get_model_path(model_id)
+        results[model_id] = ensure_published(model_id, model_dir, model_service.export_inference_artifacts) is not None
+    return results
+
+
+def main():
+    """Publish all registered models before starting the API workers."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    results = publish_all()
+    published = sum(results.values())
+    logger.info(f"Published {published} of {len(results)} models to {shared_root()}")
+
+
+if __name__ == "__main__":
+    main()
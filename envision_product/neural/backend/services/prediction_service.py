@@ -2,12 +2,16 @@ import os
 import json
 import logging
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union
 
 from services.model_service import ModelService
+from utils.archive import find_file, open_text
 from utils.file_converters import json_to_csv, convert_order_volume_predictions, convert_tender_performance_predictions
+from utils.rollups import ROLLUPS_FILE, parse_rollup, read_rollup, write_rollups
+from utils.streaming import iter_json_array
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +46,47 @@ class PredictionService:
         with open(self.metadata_file, "w") as f:
             json.dump(self.metadata, f, indent=2)
     
+    @contextmanager
+    def _metadata_lock(self):
+        """Hold an exclusive lock while the metadata is read, changed and saved (no-op without fcntl)."""
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        
+        with open(self.base_path / ".metadata.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _update_metadata(self, prediction_id: str, metadata: Optional[Dict[str, Any]], merge: bool = False) -> None:
+        """Record, update or remove the metadata of one prediction.
+        
+        The retention job and other workers save the same metadata file, so it
+        is reloaded under the lock and only this prediction's entry changes.
+        
+        Args:
+            prediction_id: ID of the prediction
+            metadata: Metadata of the prediction, or None to remove it
+            merge: Update the fields of the stored entry instead of replacing it
+                (nothing is recorded if the prediction was deleted meanwhile)
+        """
+        with self._metadata_lock():
+            self.metadata = self._load_metadata()
+            predictions = self.metadata["predictions"]
+            if metadata is None:
+                predictions.pop(prediction_id, None)
+            elif merge:
+                if prediction_id not in predictions:
+                    return
+                predictions[prediction_id].update(metadata)
+            else:
+                predictions[prediction_id] = metadata
+            self._save_metadata()
+    
     def _generate_prediction_id(self) -> str:
         """Generate a unique ID for a prediction."""
         return f"pred_{uuid.uuid4().hex[:8]}_{datetime.now().strftime('%Y%m%d')}"
@@ -85,8 +130,14 @@ class PredictionService:
             "prediction_file": str(prediction_file)
         }
         
-        self.metadata["predictions"][prediction_id] = metadata
-        self._save_metadata()
+        # Precompute the dashboard rollups of order volume forecasts
+        if metadata["model_type"] == "order_volume":
+            try:
+                write_rollups(prediction_dir, prediction_data.get("predictions", []))
+            except Exception as e:
+                logger.error(f"Error computing rollups for prediction {prediction_id}: {str(e)}")
+        
+        self._update_metadata(prediction_id, metadata)
         
         return prediction_id
     
@@ -114,13 +165,14 @@ class PredictionService:
         if not metadata:
             return None
         
-        prediction_file = metadata.get("prediction_file")
-        if not prediction_file or not Path(prediction_file).exists():
+        # Archived predictions are read from their compressed copy
+        prediction_file = find_file(metadata["prediction_file"]) if metadata.get("prediction_file") else None
+        if not prediction_file:
             logger.error(f"Prediction file not found for ID {prediction_id}")
             return None
         
         try:
-            with open(prediction_file, "r") as f:
+            with open_text(prediction_file) as f:
                 prediction_data = json.load(f)
                 
             # Include prediction_id in the top level of the response
@@ -160,23 +212,25 @@ class PredictionService:
         Returns:
             True if deletion was successful, False otherwise
         """
-        if prediction_id not in self.metadata["predictions"]:
-            return False
-        
-        prediction_dir = self.base_path / prediction_id
-        if prediction_dir.exists():
-            try:
-                for file in prediction_dir.iterdir():
-                    file.unlink()
-                prediction_dir.rmdir()
-                
-                del self.metadata["predictions"][prediction_id]
-                self._save_metadata()
-                return True
-            except Exception as e:
-                logger.error(f"Error deleting prediction {prediction_id}: {str(e)}")
+        with self._metadata_lock():
+            self.metadata = self._load_metadata()
+            if prediction_id not in self.metadata["predictions"]:
                 return False
-        return False
+            
+            prediction_dir = self.base_path / prediction_id
+            if prediction_dir.exists():
+                try:
+                    for file in prediction_dir.iterdir():
+                        file.unlink()
+                    prediction_dir.rmdir()
+                    
+                    del self.metadata["predictions"][prediction_id]
+                    self._save_metadata()
+                    return True
+                except Exception as e:
+                    logger.error(f"Error deleting prediction {prediction_id}: {str(e)}")
+                    return False
+            return False
     
     def predict_order_volume(self, model_id: str, months: int = 6) -> Optional[Dict[str, Any]]:
         """Generate order volume predictions using the specified model.
@@ -269,8 +323,7 @@ class PredictionService:
         }
         
         # Save metadata
-        self.metadata["predictions"][prediction_id] = metadata
-        self._save_metadata()
+        self._update_metadata(prediction_id, metadata)
         
         # Return the result with prediction ID
         return {
@@ -753,6 +806,54 @@ class PredictionService:
         
         return result
     
+    def get_order_volume_rollup(self, model_id: str, by: str = "total") -> Optional[Dict[str, Any]]:
+        """Get forecast totals of the latest order volume prediction of a model.
+        
+        Rollups are precomputed when a prediction is saved; predictions saved
+        before rollups existed get theirs computed on first request.
+        
+        Args:
+            model_id: ID of the model
+            by: Comma-separated dimensions (source, destination, type, month;
+                at most two) or total
+            
+        Returns:
+            Dictionary with the rollup rows or None if the model has no
+            order volume prediction
+            
+        Raises:
+            ValueError: If ``by`` is not a standard rollup
+        """
+        key = parse_rollup(by)
+        
+        model_predictions = [p for p in self.list_predictions(model_id=model_id)
+                             if p.get("model_type") == "order_volume"]
+        if not model_predictions:
+            logger.warning(f"No order volume predictions found for model {model_id}")
+            return None
+        
+        latest_prediction = model_predictions[0]
+        prediction_id = latest_prediction["prediction_id"]
+        prediction_dir = self.base_path / prediction_id
+        
+        if not (prediction_dir / ROLLUPS_FILE).exists():
+            prediction_file = find_file(latest_prediction.get("prediction_file") or prediction_dir / "prediction_data.json")
+            if not prediction_file:
+                logger.error(f"Prediction file not found for ID {prediction_id}")
+                return None
+            logger.info(f"Computing rollups for prediction {prediction_id}")
+            write_rollups(prediction_dir, list(iter_json_array(prediction_file)))
+        
+        rows = read_rollup(prediction_dir, key)
+        return {
+            "model_id": model_id,
+            "prediction_id": prediction_id,
+            "created_at": latest_prediction.get("created_at"),
+            "by": key,
+            "row_count": len(rows),
+            "rollup": rows
+        }
+    
     def get_order_volume_by_lane(
         self,
         model_id: str,
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Retention of stored predictions.
+
+Every prediction run leaves its JSON and CSV files under ``data/predictions``
+for good. The retention job keeps the PREDICTION_HOT_COUNT most recent
+predictions of each model as they are and archives older ones: their files
+are re-encoded without indentation and compressed in place (zstd, or gzip
+without the optional ``zstandard`` package), and readers decompress them on
+access (see ``utils.archive``). Predictions of deleted models, and their
+score caches, are removed. Each run reports the bytes it reclaimed and writes
+the report to ``retention_report.json``.
+"""
+
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+from services.prediction_service import PredictionService
+from utils.archive import archive_file, is_archived, resolve_codec
+from utils.rollups import ROLLUPS_FILE
+
+logger = logging.getLogger(__name__)
+
+RETENTION_REPORT_FILE = "retention_report.json"
+
+# Files of a prediction directory that stay uncompressed (small, read on every request)
+HOT_FILES = (ROLLUPS_FILE,)
+
+
+def _directory_bytes(path: Path) -> int:
+    """Total size of the files in a directory."""
+    return sum(file.stat().st_size for file in path.iterdir() if file.is_file()) if path.is_dir() else 0
+
+
+class RetentionService:
+    """Service applying the prediction retention policy."""
+
+    def __init__(self, prediction_service: Optional[PredictionService] = None,
+                 hot_count: Optional[int] = None, codec: Optional[str] = None):
+        """Initialize the retention service.
+
+        Args:
+            prediction_service: Prediction service whose predictions are managed
+            hot_count: Most recent predictions kept uncompressed per model
+                (defaults to PREDICTION_HOT_COUNT)
+            codec: Archive codec, zstd or gzip (defaults to ARCHIVE_CODEC)
+        """
+        self.prediction_service = prediction_service or PredictionService()
+        # The latest prediction of a model is always kept hot: downloads serve its files by path
+        self.hot_count = max(1, settings.PREDICTION_HOT_COUNT if hot_count is None else hot_count)
+        self.codec = resolve_codec(codec or settings.ARCHIVE_CODEC)
+
+    def _archive_prediction(self, prediction_id: str, metadata: Dict[str, Any]) -> int:
+        """Compress the files of one prediction, record them and return the bytes reclaimed."""
+        prediction_dir = self.prediction_service.base_path / prediction_id
+        changes = {}
+        before = _directory_bytes(prediction_dir)
+        for file in sorted(prediction_dir.iterdir()):
+            if file.is_file() and file.name not in HOT_FILES and not is_archived(file) and not file.name.startswith("."):
+                archived = archive_file(file, self.codec)
+                if metadata.get("prediction_file") and Path(metadata["prediction_file"]).name == file.name:
+                    changes["prediction_file"] = str(archived)
+        after = _directory_bytes(prediction_dir)
+        changes["archived"] = {
+            "codec": self.codec,
+            "archived_at": datetime.now().isoformat(),
+            "original_bytes": before,
+            "archived_bytes": after
+        }
+        self.prediction_service._update_metadata(prediction_id, changes, merge=True)
+        return before - after
+
+    def _delete_prediction(self, prediction_id: str) -> int:
+        """Delete one prediction and return the bytes reclaimed."""
+        prediction_dir = self.prediction_service.base_path / prediction_id
+        size = _directory_bytes(prediction_dir)
+        if prediction_dir.exists():
+            if not self.prediction_service.delete_prediction(prediction_id):
+                return 0
+        else:
+            self.prediction_service._update_metadata(prediction_id, None)
+        return size
+
+    def run(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Apply the retention policy once.
+
+        Args:
+            dry_run: Only report what would be archived and deleted
+
+        Returns:
+            Report with the archived and deleted prediction IDs, the score
+            caches removed and the bytes reclaimed
+        """
+        start = time.perf_counter()
+        service = self.prediction_service
+        # Read both stores from disk: other workers may have saved predictions
+        # and registered models since this service loaded them. Each change is
+        # then saved on its own under the metadata lock, so predictions saved
+        # while the job runs are kept.
+        service.metadata = service._load_metadata()
+        model_ids = set(service.model_service._load_metadata()["models"])
+        report = {
+            "started_at": datetime.now().isoformat(),
+            "dry_run": dry_run,
+            "hot_count": self.hot_count,
+            "codec": self.codec,
+            "archived": [],
+            "deleted": [],
+            "score_caches_deleted": [],
+            "reclaimed_bytes": 0
+        }
+
+        predictions_by_model: Dict[Optional[str], list] = {}
+        for prediction in service.list_predictions():
+            predictions_by_model.setdefault(prediction.get("model_id"), []).append(prediction)
+
+        for model_id, predictions in predictions_by_model.items():
+            if model_id is None:
+                continue
+            for position, prediction in enumerate(predictions):
+                prediction_id = prediction.get("prediction_id")
+                if not prediction_id:
+                    continue
+                try:
+                    if model_id not in model_ids:
+                        report["deleted"].append(prediction_id)
+                        if not dry_run:
+                            report["reclaimed_bytes"] += self._delete_prediction(prediction_id)
+                    elif position >= self.hot_count and "archived" not in prediction:
+                        report["archived"].append(prediction_id)
+                        if not dry_run:
+                            report["reclaimed_bytes"] += self._archive_prediction(prediction_id, prediction)
+                except Exception as e:
+                    logger.error(f"Error applying retention to prediction {prediction_id}: {str(e)}")
+
+        # Score caches of deleted models
+        score_cache_dir = service.base_path / "score_cache"
+        if score_cache_dir.is_dir():
+            for cache_file in score_cache_dir.glob("*.npz"):
+                if cache_file.stem not in model_ids:
+                    report["score_caches_deleted"].append(cache_file.stem)
+                    if not dry_run:
+                        report["reclaimed_bytes"] += cache_file.stat().st_size
+                        cache_file.unlink()
+
+        report["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+
+        logger.info(f"Prediction retention{' (dry run)' if dry_run else ''}: archived {len(report['archived'])}, "
+                    f"deleted {len(report['deleted'])} predictions, reclaimed {report['reclaimed_bytes']:,} bytes")
+        if not dry_run:
+            with open(service.base_path / RETENTION_REPORT_FILE, "w") as f:
+                json.dump(report, f, indent=2)
+        return report
+
+
+def run_retention_loop(interval_hours: float, stop_event: threading.Event) -> None:
+    """Run the retention job every ``interval_hours`` until ``stop_event`` is set.
+
+    The first run starts one interval after startup.
+    """
+    while not stop_event.wait(interval_hours * 3600):
+        try:
+            RetentionService().run()
+        except Exception as e:
+            logger.error(f"Error running prediction retention: {str(e)}")
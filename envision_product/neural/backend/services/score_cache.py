@@ -0,0 +1,126 @@
+"""
+Per-model index of row hashes and their scores.
+
+Scheduled scoring runs see mostly the same rows every month. The index maps
+the 64-bit hash of a row (``utils.hashing.row_hashes``) to the score a model
+gave it, so a scoring job only sends new or changed rows through the model.
+Each model's index is one ``.npz`` file with three parallel arrays sorted by
+key (hash, score and the run that last saw the row), about 20 bytes per row,
+looked up with a binary search. The index records a fingerprint of the model
+that served the scores and is discarded when it changes. When it grows past
+SCORE_CACHE_MAX_ROWS, the rows seen least recently are evicted.
+"""
+
+import os
+import logging
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreCache:
+    """Row hash to score index of one model."""
+
+    def __init__(self, model_id: str, fingerprint: str, base_path: str = "data/predictions/score_cache"):
+        """Load a model's index.
+
+        Args:
+            model_id: ID of the model
+            fingerprint: Identifies the weights and backend producing the
+                scores; an index written under another fingerprint is ignored
+            base_path: Directory holding the indexes
+        """
+        self.base_path = Path(base_path)
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.base_path / f"{model_id}.npz"
+        self.fingerprint = fingerprint
+
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.values = np.empty(0, dtype=np.float64)
+        self.last_seen = np.empty(0, dtype=np.uint32)
+        self.run = 1
+        self._load()
+
+        self._seen = np.zeros(len(self.keys), dtype=bool)
+        self._new_keys: List[np.ndarray] = []
+        self._new_values: List[np.ndarray] = []
+
+    def _load(self) -> None:
+        if not self.index_file.exists():
+            return
+        try:
+            with np.load(self.index_file) as index:
+                if str(index["fingerprint"]) != self.fingerprint:
+                    logger.info(f"Score cache {self.index_file.name} is for another model version, starting afresh")
+                    return
+                self.keys = index["keys"]
+                self.values = index["values"]
+                self.last_seen = index["last_seen"]
+                self.run = int(index["run"]) + 1
+        except Exception as e:
+            logger.error(f"Error loading score cache {self.index_file}: {str(e)}")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Find cached scores.
+
+        Args:
+            keys: Row hashes
+
+        Returns:
+            Mask of the keys found and their scores (NaN where not found)
+        """
+        values = np.full(len(keys), np.nan)
+        if not len(self.keys):
+            return np.zeros(len(keys), dtype=bool), values
+
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        hit = self.keys[positions] == keys
+        values[hit] = self.values[positions[hit]]
+        self._seen[positions[hit]] = True
+        return hit, values
+
+    def add(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """Stage new scores; they are merged into the index by ``save``."""
+        if len(keys):
+            self._new_keys.append(np.asarray(keys, dtype=np.uint64))
+            self._new_values.append(np.asarray(values, dtype=np.float64))
+
+    def save(self) -> None:
+        """Merge staged scores into the index and write it atomically."""
+        last_seen = self.last_seen.copy()
+        last_seen[self._seen] = self.run
+
+        keys = np.concatenate([self.keys] + self._new_keys)
+        values = np.concatenate([self.values] + self._new_values)
+        new_rows = len(keys) - len(self.keys)
+        last_seen = np.concatenate([last_seen, np.full(new_rows, self.run, dtype=np.uint32)])
+
+        # Keep the latest score of each key (new scores come last)
+        order = np.argsort(keys, kind="stable")[::-1]
+        keys, values, last_seen = keys[order], values[order], last_seen[order]
+        keys, first = np.unique(keys, return_index=True)
+        values, last_seen = values[first], last_seen[first]
+
+        if len(keys) > settings.SCORE_CACHE_MAX_ROWS:
+            keep = np.sort(np.argsort(last_seen, kind="stable")[-settings.SCORE_CACHE_MAX_ROWS:])
+            logger.info(f"Evicting {len(keys) - len(keep)} rows from score cache {self.index_file.name}")
+            keys, values, last_seen = keys[keep], values[keep], last_seen[keep]
+
+        staging_file = self.index_file.with_name(f".{self.index_file.name}.tmp")
+        with open(staging_file, "wb") as f:
+            np.savez(f, keys=keys, values=values, last_seen=last_seen,
+                     run=np.uint32(self.run), fingerprint=np.str_(self.fingerprint))
+        os.replace(staging_file, self.index_file)
+
+        self.keys, self.values, self.last_seen = keys, values, last_seen
+        self._seen = np.zeros(len(keys), dtype=bool)
+        self._new_keys, self._new_values = [], []
+        self.run += 1
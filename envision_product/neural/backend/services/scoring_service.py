@@ -0,0 +1,321 @@
+"""
+Batch scoring of uploaded files against registered models.
+
+A scoring job streams the file in chunks (Parquet batches, or CSV chunks for
+files without a Parquet copy), builds features for each chunk with the
+model's vectorized ``predict_frame`` and appends the scored rows to a Parquet
+result as they complete. Chunks are scored in worker processes that each load
+the model once; at most two chunks per worker are in flight, so memory stays
+bounded whatever the file size. Job progress is kept in
+``data/predictions/jobs/<job_id>.json``.
+
+Incremental jobs hash every row and look the hashes up in the model's
+``ScoreCache``: only rows the model has not scored before are sent to the
+workers, and cached scores are merged back in file order.
+"""
+
+import os
+import json
+import uuid
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+from services.score_cache import ScoreCache
+from utils.columnar import count_rows, iter_table_chunks
+from utils.hashing import row_hashes
+
+logger = logging.getLogger(__name__)
+
+# Column holding the score in the result, by model type
+PREDICTION_COLUMNS = {
+    "order_volume": "PREDICTED ORDER VOLUME",
+    "tender_performance": "predicted_performance",
+    "carrier_performance": "predicted_performance",
+}
+
+# Model loaded by each scoring worker process
+_worker_model = None
+
+
+def _load_model(model_type: str, model_id: str):
+    """Load a model through ModelService (honouring variants and sharing)."""
+    from services.model_service import ModelService
+
+    model_service = ModelService()
+    loaders = {
+        "order_volume": model_service.load_order_volume_model,
+        "tender_performance": model_service.load_tender_performance_model,
+        "carrier_performance": model_service.load_carrier_performance_model,
+    }
+    model = loaders[model_type](model_id)
+    if model is None:
+        raise ValueError(f"Could not load {model_type} model {model_id}")
+    return model
+
+
+def _model_fingerprint(model_id: str) -> str:
+    """Identify the weights and backend that will serve a model's scores."""
+    from services.model_service import ModelService
+
+    model_service = ModelService()
+    serving_id = model_service.resolve_serving_model_id(model_id)
+    model_path = model_service.get_model_path(serving_id)
+    modified = max((f.stat().st_mtime_ns for f in model_path.rglob("*") if f.is_file()), default=0) if model_path else 0
+    return f"{serving_id}:{settings.INFERENCE_BACKEND}:{modified}"
+
+
+def _init_worker(model_type: str, model_id: str) -> None:
+    """Load the model once per worker process."""
+    global _worker_model
+    _worker_model = _load_model(model_type, model_id)
+
+
+def _score_chunk(chunk: pd.DataFrame) -> np.ndarray:
+    """Score one chunk with the worker's model."""
+    return _worker_model.predict_frame(chunk)
+
+
+class ScoringService:
+    """Service running and tracking file scoring jobs."""
+
+    def __init__(self, base_path: str = "data/predictions"):
+        """Initialize the service.
+
+        Args:
+            base_path: Base directory for predictions; jobs and results are
+                stored under ``jobs/`` and ``scored/``
+        """
+        self.jobs_path = Path(base_path) / "jobs"
+        self.results_path = Path(base_path) / "scored"
+        self.jobs_path.mkdir(parents=True, exist_ok=True)
+        self.results_path.mkdir(parents=True, exist_ok=True)
+
+    def _job_file(self, job_id: str) -> Path:
+        return self.jobs_path / f"{job_id}.json"
+
+    def _save_job(self, job: Dict[str, Any]) -> None:
+        """Write a job's state atomically so readers never see a partial file."""
+        job["updated_at"] = datetime.now().isoformat()
+        staging_file = self.jobs_path / f".{job['job_id']}.json.tmp"
+        with open(staging_file, "w") as f:
+            json.dump(job, f, indent=2)
+        os.replace(staging_file, self._job_file(job["job_id"]))
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the state of a scoring job.
+
+        Args:
+            job_id: ID of the job
+
+        Returns:
+            Job dictionary or None if the job does not exist
+        """
+        job_file = self._job_file(job_id)
+        if not job_file.exists():
+            return None
+        try:
+            with open(job_file, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading scoring job {job_id}: {str(e)}")
+            return None
+
+    def create_job(self, model_type: str, model_id: str, file_id: str, file_path: str,
+                   incremental: Optional[bool] = None) -> Dict[str, Any]:
+        """Register a pending scoring job.
+
+        Args:
+            model_type: Type of the model (order_volume, tender_performance
+                or carrier_performance)
+            model_id: ID of the model to score with
+            file_id: ID of the uploaded file
+            file_path: Path to the uploaded file
+            incremental: Reuse cached scores of unchanged rows (defaults to
+                the SCORING_INCREMENTAL setting)
+
+        Returns:
+            The job dictionary
+        """
+        job_id = f"score_{uuid.uuid4().hex[:8]}_{datetime.now().strftime('%Y%m%d')}"
+        job = {
+            "job_id": job_id,
+            "model_type": model_type,
+            "model_id": model_id,
+            "file_id": file_id,
+            "file_path": file_path,
+            "status": "pending",
+            "incremental": settings.SCORING_INCREMENTAL if incremental is None else incremental,
+            "total_rows": count_rows(file_path),
+            "rows_scored": 0,
+            "rows_reused": 0,
+            "chunks_scored": 0,
+            "progress": 0.0,
+            "result_path": None,
+            "error": None,
+            "created_at": datetime.now().isoformat()
+        }
+        self._save_job(job)
+        return job
+
+    def run_job(self, job_id: str, workers: Optional[int] = None,
+                chunk_rows: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Score a file, writing the result incrementally.
+
+        Args:
+            job_id: ID of a job created with ``create_job``
+            workers: Worker processes (defaults to the SCORING_WORKERS
+                setting, one per CPU when 0); 1 scores in this process
+            chunk_rows: Rows per chunk (defaults to SCORING_CHUNK_ROWS)
+
+        Returns:
+            The final job dictionary, or None if the job does not exist
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        job = self.get_job(job_id)
+        if job is None:
+            logger.error(f"Scoring job {job_id} not found")
+            return None
+
+        workers = workers or settings.SCORING_WORKERS or os.cpu_count() or 1
+        chunk_rows = chunk_rows or settings.SCORING_CHUNK_ROWS
+        prediction_column = PREDICTION_COLUMNS[job["model_type"]]
+        result_path = self.results_path / f"{job_id}.parquet"
+        staging_path = self.results_path / f".{job_id}.parquet.tmp"
+
+        job["status"] = "running"
+        self._save_job(job)
+
+        cache = None
+        if job.get("incremental"):
+            cache = ScoreCache(job["model_id"], _model_fingerprint(job["model_id"]),
+                               base_path=str(self.results_path.parent / "score_cache"))
+
+        writer = None
+        executor = None
+        try:
+            if workers > 1:
+                # spawn: worker processes must not inherit TensorFlow state from the server
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(job["model_type"], job["model_id"])
+                )
+
+                def score(chunk: pd.DataFrame):
+                    return executor.submit(_score_chunk, chunk)
+            else:
+                model = _load_model(job["model_type"], job["model_id"])
+
+                def score(chunk: pd.DataFrame):
+                    return _ImmediateResult(model.predict_frame(chunk))
+
+            def submit(chunk: pd.DataFrame):
+                """Score a chunk, sending only rows missing from the cache to the model."""
+                if cache is None:
+                    return chunk, None, None, score(chunk)
+                keys = row_hashes(chunk, exclude=[prediction_column])
+                hit, cached = cache.lookup(keys)
+                misses = chunk[~hit]
+                result = score(misses) if len(misses) else _ImmediateResult(np.empty(0))
+                return chunk, keys, (hit, cached), result
+
+            def write(chunk: pd.DataFrame, keys: Optional[np.ndarray], lookup, result) -> None:
+                nonlocal writer
+                predictions = result.result()
+                if lookup is not None:
+                    hit, merged = lookup
+                    merged[~hit] = predictions
+                    cache.add(keys[~hit], predictions)
+                    predictions = merged
+                    job["rows_reused"] += int(hit.sum())
+
+                scored = chunk.reset_index(drop=True)
+                scored[prediction_column] = predictions
+                table = pa.Table.from_pandas(scored, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(str(staging_path), table.schema, compression="snappy")
+                writer.write_table(table.cast(writer.schema))
+
+                job["rows_scored"] += len(scored)
+                job["chunks_scored"] += 1
+                if job["total_rows"]:
+                    job["progress"] = round(job["rows_scored"] / job["total_rows"], 4)
+                self._save_job(job)
+
+            # Results are written in file order; at most 2 chunks per worker are in flight
+            pending = deque()
+            for chunk in iter_table_chunks(job["file_path"], chunk_rows=chunk_rows):
+                pending.append(submit(chunk))
+                if len(pending) >= 2 * workers:
+                    write(*pending.popleft())
+            while pending:
+                write(*pending.popleft())
+
+            if writer is None:
+                raise ValueError("The file has no rows to score")
+            writer.close()
+            writer = None
+            os.replace(staging_path, result_path)
+            if cache is not None:
+                cache.save()
+
+            job.update({
+                "status": "completed",
+                "total_rows": job["rows_scored"],
+                "progress": 1.0,
+                "result_path": str(result_path)
+            })
+            logger.info(f"Scoring job {job_id} completed: {job['rows_scored']} rows, "
+                        f"{job['rows_reused']} reused from the score cache")
+        except Exception as e:
+            logger.error(f"Error in scoring job {job_id}: {str(e)}")
+            job.update({"status": "failed", "error": str(e)})
+            if writer is not None:
+                writer.close()
+            if staging_path.exists():
+                staging_path.unlink()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        self._save_job(job)
+        return job
+
+    def list_jobs(self, model_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List scoring jobs, newest first.
+
+        Args:
+            model_id: Optional filter by model ID
+
+        Returns:
+            List of job dictionaries
+        """
+        jobs = []
+        for job_file in self.jobs_path.glob("*.json"):
+            job = self.get_job(job_file.stem)
+            if job and (model_id is None or job.get("model_id") == model_id):
+                jobs.append(job)
+        jobs.sort(key=lambda job: job.get("created_at", ""), reverse=True)
+        return jobs
+
+
+class _ImmediateResult:
+    """Future-like wrapper for chunks scored in this process."""
+
+    def __init__(self, value: np.ndarray) -> None:
+        self._value = value
+
+    def result(self) -> np.ndarray:
+        return self._value
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Vocabulary search over the names a model was trained on.
+
+The fitted encoders of a model list the carriers, cities and order types it
+knows. VocabService reads them from the model directory (``vocab.json`` of a
+compressed model, else the pickled preprocessors) and builds a
+VocabularyIndex per model for autocomplete and typo correction. Indexes are
+cached per model until its encoder file changes.
+"""
+
+import os
+import pickle
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.model_service import ModelService
+from utils.vocab_search import VocabularyIndex
+
+logger = logging.getLogger(__name__)
+
+# Vocabulary fields and the encoders they are read from (performance models, order volume models)
+VOCAB_FIELDS = {
+    "carrier": ("carrier_encoder",),
+    "source_city": ("source_city_encoder", "source_encoder"),
+    "dest_city": ("dest_city_encoder", "dest_encoder"),
+    "order_type": ("type_encoder",),
+}
+
+# Category that stands for grouped infrequent values rather than a name
+GROUPED_CATEGORY = "OTHER"
+
+_indexes: Dict[str, Tuple[Tuple[str, int], VocabularyIndex, List[str]]] = {}
+_indexes_lock = threading.Lock()
+
+
+def _encoder_file(model_path: Path) -> Optional[Path]:
+    """File holding a model's fitted encoders (the JSON vocabulary first)."""
+    from models.artifacts import PREPROCESSOR_FILES, VOCAB_FILE
+
+    for name in (VOCAB_FILE,) + PREPROCESSOR_FILES:
+        if (model_path / name).exists():
+            return model_path / name
+    return None
+
+
+def read_vocabularies(encoder_file: Path) -> Tuple[Dict[str, List[str]], List[str]]:
+    """Names per vocabulary field from a model's encoder file.
+
+    Args:
+        encoder_file: ``vocab.json`` or a pickled preprocessor file
+
+    Returns:
+        Field name to names, and the fields whose encoder has no vocabulary
+        (hashing encoders)
+    """
+    from models.artifacts import VOCAB_FILE, load_vocabularies
+
+    if encoder_file.name == VOCAB_FILE:
+        preprocessors = load_vocabularies(str(encoder_file.parent))
+    else:
+        with open(encoder_file, "rb") as f:
+            preprocessors = pickle.load(f)
+
+    vocabularies, unavailable = {}, []
+    for field, names in VOCAB_FIELDS.items():
+        encoder = next((preprocessors.get(name) for name in names if preprocessors.get(name) is not None), None)
+        if encoder is None:
+            continue
+        if not hasattr(encoder, "categories_"):
+            unavailable.append(field)
+            continue
+        vocabularies[field] = [value for value in encoder.categories_[0] if value != GROUPED_CATEGORY]
+    return vocabularies, unavailable
+
+
+class VocabService:
+    """Service for searching the vocabularies of registered models."""
+
+    def __init__(self, model_service: Optional[ModelService] = None):
+        """Initialize the vocabulary service.
+
+        Args:
+            model_service: Model service to resolve model directories with
+        """
+        self.model_service = model_service or ModelService()
+
+    def get_index(self, model_id: str) -> Optional[Tuple[VocabularyIndex, List[str]]]:
+        """Vocabulary index of a model, built on first use.
+
+        Args:
+            model_id: ID of the model
+
+        Returns:
+            The index and the fields without a vocabulary, or None if the
+            model or its encoders are not found
+        """
+        model_path = self.model_service.get_model_path(model_id)
+        if not model_path:
+            return None
+        encoder_file = _encoder_file(Path(model_path))
+        if encoder_file is None:
+            logger.error(f"No encoders found for model {model_id}")
+            return None
+        version = (str(encoder_file), os.stat(encoder_file).st_mtime_ns)
+
+        with _indexes_lock:
+            cached = _indexes.get(model_id)
+        if cached and cached[0] == version:
+            return cached[1], cached[2]
+
+        vocabularies, unavailable = read_vocabularies(encoder_file)
+        index = VocabularyIndex(vocabularies)
+        logger.info(f"Built vocabulary index of model {model_id}: {index.sizes()}")
+        with _indexes_lock:
+            _indexes[model_id] = (version, index, unavailable)
+        return index, unavailable
+
+    def search(self, model_id: str, query: str, field: Optional[str] = None, limit: int = 10) -> Optional[Dict[str, Any]]:
+        """Autocomplete or correct a name against a model's vocabulary.
+
+        Args:
+            model_id: ID of the model
+            query: Text typed by the user
+            field: Optional field to search (carrier, source_city, dest_city
+                or order_type); all fields of the model by default
+            limit: Most results to return
+
+        Returns:
+            Search result dictionary or None if the model is not found
+
+        Raises:
+            ValueError: If the model has no such field
+        """
+        resolved = self.get_index(model_id)
+        if resolved is None:
+            return None
+        index, unavailable = resolved
+        if field in unavailable:
+            raise ValueError(f"Field {field} of model {model_id} is hashed and has no vocabulary")
+
+        result = index.search(query, fields=[field] if field else None, limit=limit)
+        return {
+            "model_id": model_id,
+            **result,
+            "fields": index.sizes(),
+            "unavailable_fields": unavailable
+        }
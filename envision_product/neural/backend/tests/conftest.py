@@ -0,0 +1,179 @@
+"""
+Fixtures and data builders shared by the backend tests.
+
+Tests that touch the model and prediction stores run in the ``workspace``
+fixture, a temporary working directory, and register their models with
+``register_model``. Data builders live here so that no test module has to
+import another.
+"""
+
+import os
+import sys
+import json
+import pickle
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+CARRIERS = ["RBTW", "FDEG", "UPSN", "ODFL"]
+CITIES = [f"CITY{i}" for i in range(12)]
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Temporary working directory for the model and prediction stores."""
+    pytest.importorskip("pydantic_settings")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def register_model(model_dir: Path, model_type: str, model_id: Optional[str] = None,
+                   weights: Optional[List[Dict]] = None, preprocessors: Optional[Dict] = None,
+                   metadata: Optional[Dict] = None) -> str:
+    """Register a model directory, first writing NumPy weights and pickled preprocessors into it."""
+    from models.inference import save_numpy_weights
+    from services.model_service import ModelService
+
+    model_dir.mkdir(parents=True, exist_ok=True)
+    if weights is not None:
+        save_numpy_weights(weights, str(model_dir / "model_weights.npz"))
+    if preprocessors is not None:
+        with open(model_dir / "preprocessors.pkl", "wb") as f:
+            pickle.dump(preprocessors, f)
+    return ModelService().register_model(model_dir, {"model_type": model_type, **(metadata or {})}, model_id=model_id)
+
+
+def build_dense_layers(input_dim: int = 50, seed: int = 0):
+    """Build random layers with the tender performance stack."""
+    rng = np.random.default_rng(seed)
+    widths = [input_dim, 64, 32, 16, 1]
+    return [
+        {
+            "kernel": rng.normal(size=(fan_in, fan_out)).astype(np.float32) * 0.2,
+            "bias": rng.normal(size=fan_out).astype(np.float32) * 0.05,
+            "activation": "sigmoid" if i == len(widths) - 2 else "relu"
+        }
+        for i, (fan_in, fan_out) in enumerate(zip(widths[:-1], widths[1:]))
+    ]
+
+
+def build_lanes(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Build legacy-format tender rows, including unseen carriers and cities."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "CARRIER": rng.choice(CARRIERS + ["NEWC"], rows),
+        "SOURCE_CITY": rng.choice(CITIES, rows),
+        "DEST_CITY": rng.choice(CITIES + ["UNSEEN"], rows),
+        "TENDER_PERF_PERCENTAGE": rng.uniform(50, 100, rows)
+    })
+
+
+class LinearModel:
+    """Linear stand-in for the trained network."""
+
+    def __init__(self, width: int, seed: int = 0):
+        self.weights = np.random.default_rng(seed).normal(size=(width, 1)) * 50
+
+    def predict(self, features, verbose=0):
+        return np.asarray(features, dtype=np.float64) @ self.weights
+
+
+def build_forecast_predictions(lanes: int, months: int, seed: int = 0):
+    """Order volume prediction records, as predict_future returns them."""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "SOURCE CITY": f"SOURCE{lane % 13}",
+            "DESTINATION CITY": f"DEST{lane % 41}",
+            "ORDER TYPE": ["FTL", "LTL", "IMDL"][lane % 3],
+            "PREDICTION DATE": f"2025-{month:02d}",
+            "PREDICTED ORDER VOLUME": int(rng.integers(0, 500))
+        }
+        for lane in range(lanes) for month in range(1, months + 1)
+    ]
+
+
+@pytest.fixture
+def legacy_tender_model(workspace, monkeypatch):
+    """Registered legacy tender model (NumPy backend) and a CSV of lanes to score."""
+    pytest.importorskip("sklearn")
+    from sklearn.preprocessing import OneHotEncoder
+    from config.settings import settings
+
+    monkeypatch.setenv("INFERENCE_BACKEND", "numpy")
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "numpy")
+
+    def fit(column, values):
+        encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
+        return encoder.fit(pd.DataFrame({column: values}))
+
+    feature_columns = (
+        [f"CARRIER_{i}" for i in range(len(CARRIERS))]
+        + [f"SOURCE_{i}" for i in range(len(CITIES))]
+        + [f"DEST_{i}" for i in range(9)]
+    )
+
+    model_dir = workspace / "trained"
+    model_dir.mkdir()
+    with open(model_dir / "encoders.pkl", "wb") as f:
+        pickle.dump({
+            "carrier_encoder": fit("CARRIER", CARRIERS),
+            "source_city_encoder": fit("SOURCE_CITY", CITIES),
+            "dest_city_encoder": fit("DEST_CITY_GROUPED", CITIES[:8] + ["OTHER"]),
+            "target_column": "TENDER_PERF_PERCENTAGE",
+            "data_format": "legacy",
+            "feature_columns": feature_columns
+        }, f)
+
+    rng = np.random.default_rng(3)
+    widths = [len(feature_columns), 16, 1]
+    model_id = register_model(model_dir, "tender_performance", weights=[
+        {
+            "kernel": rng.normal(size=(fan_in, fan_out)).astype(np.float32),
+            "bias": rng.normal(size=fan_out).astype(np.float32) * 0.1,
+            "activation": "sigmoid" if i == len(widths) - 2 else "relu"
+        }
+        for i, (fan_in, fan_out) in enumerate(zip(widths[:-1], widths[1:]))
+    ])
+
+    data_path = workspace / "lanes.csv"
+    build_lanes(2_500).to_csv(data_path, index=False)
+    return model_id, str(data_path)
+
+
+def build_tender_predictions(count: int):
+    """Tender training predictions in the stored format."""
+    return [
+        {
+            "carrier": ["RBTW", "FDEG", "UPSN"][i % 3],
+            "source_city": ["ELWOOD", "JOLIET"][i % 2],
+            "dest_city": ["St. Louis", "DALLAS", "ATLANTA"][i % 3],
+            "predicted_performance": round(50 + i % 50 + 0.25, 2),
+            "actual_performance": 90.0,
+            "absolute_error": abs(40 - i % 50 - 0.25),
+            "percent_error": 1.5,
+            "note": "escaped \"quotes\", brackets ] and braces }"
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def tender_model(workspace):
+    """Registered tender model with stored training predictions."""
+    from services.lane_index import clear_lane_indexes
+
+    clear_lane_indexes()
+    model_dir = workspace / "trained"
+    (model_dir / "training_predictions").mkdir(parents=True)
+    predictions = build_tender_predictions(3_000)
+    with open(model_dir / "training_predictions" / "prediction_data.json", "w") as f:
+        json.dump({"model_id": "m", "predictions": predictions}, f)
+
+    return register_model(model_dir, "tender_performance"), predictions
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk by-lanes endpoints of the carrier and tender performance models.
+
+A bulk request resolves a list of lanes against the lane index of the stored
+predictions and answers each lane at its input position, like one by-lane
+request per lane would, optionally scoring the lanes that have no stored
+predictions with the model in one batch.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+
+import numpy as np
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic_settings")
+
+from conftest import build_tender_predictions
+from utils.lane_utils import filter_by_lane
+from utils.streaming import simplify_prediction
+
+
+class ConstantModel:
+    """Stand-in model scoring every lane at a fixed performance."""
+
+    def __init__(self):
+        self.frames = []
+
+    def predict_frame(self, frame):
+        self.frames.append(frame)
+        return np.full(len(frame), 87.5)
+
+
+def bulk_request(lanes, **kwargs):
+    from api.predictions import BulkLaneRequest
+
+    return BulkLaneRequest(lanes=lanes, **kwargs)
+
+
+def test_results_match_one_lookup_per_lane(tender_model):
+    from api.predictions import get_tender_performance_by_lanes
+    from services.prediction_service import PredictionService
+
+    model_id, predictions = tender_model
+    lanes = [
+        {"source_city": "elwood", "dest_city": "st louis"},
+        {"source_city": "JOLIET", "dest_city": "Dallas", "carrier": "fdeg"},
+        {"source_city": "NOWHERE", "dest_city": "Dallas", "carrier": "RBTW"},
+        {"source_city": "elwood", "dest_city": "st louis", "carrier": "rbtw"}
+    ]
+
+    result = asyncio.run(get_tender_performance_by_lanes(
+        model_id=model_id, request=bulk_request(lanes), prediction_service=PredictionService()))
+
+    assert result["lane_count"] == 4
+    assert (result["stored_count"], result["scored_count"], result["not_found_count"]) == (3, 0, 1)
+    for i, (lane, answer) in enumerate(zip(lanes, result["results"])):
+        expected = filter_by_lane(predictions, source_city=lane["source_city"],
+                                  destination_city=lane["dest_city"], carrier=lane.get("carrier"))
+        assert answer["index"] == i
+        assert answer["source"] == ("stored" if expected else "not_found")
+        assert answer["predictions"] == [simplify_prediction(p) for p in expected]
+        if expected:
+            assert answer["avg_predicted_performance"] == pytest.approx(
+                np.mean([p["predicted_performance"] for p in expected]))
+
+
+def test_missing_lanes_are_scored_in_one_batch(tender_model, monkeypatch):
+    from api.predictions import get_tender_performance_by_lanes
+    from services.prediction_service import PredictionService
+
+    model_id, _ = tender_model
+    service = PredictionService()
+    model = ConstantModel()
+    monkeypatch.setattr(service.model_service, "load_tender_performance_model", lambda model_id: model)
+    lanes = [
+        {"source_city": "NOWHERE", "dest_city": "Dallas", "carrier": "RBTW", "dest_state": "TX"},
+        {"source_city": "elwood", "dest_city": "st louis", "carrier": "RBTW"},
+        {"source_city": "NOWHERE", "dest_city": "Dallas"},
+        {"source_city": "ELWOOD", "dest_city": "Toronto", "carrier": "UPSN"}
+    ]
+
+    result = asyncio.run(get_tender_performance_by_lanes(
+        model_id=model_id, request=bulk_request(lanes, score_missing=True), prediction_service=service))
+
+    assert [answer["source"] for answer in result["results"]] == ["scored", "stored", "not_found", "scored"]
+    assert len(model.frames) == 1
+    assert model.frames[0][["CARRIER", "SOURCE_CITY", "DEST_CITY", "DEST_STATE"]].values.tolist() == [
+        ["RBTW", "NOWHERE", "Dallas", "TX"], ["UPSN", "ELWOOD", "Toronto", ""]]
+    assert result["results"][0]["predictions"] == [{**lanes[0], "predicted_performance": 87.5}]
+
+
+def test_model_type_is_checked(tender_model):
+    from fastapi import HTTPException
+    from api.predictions import get_carrier_performance_by_lanes
+    from services.prediction_service import PredictionService
+
+    model_id, _ = tender_model
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_carrier_performance_by_lanes(
+            model_id=model_id, request=bulk_request([{"source_city": "A", "dest_city": "B"}]),
+            prediction_service=PredictionService()))
+    assert error.value.status_code == 400
+
+
+def main():
+    """Compare 2,000 per-lane filters of a 300k-row prediction file with one bulk lookup."""
+    import tempfile
+    from services.lane_index import LaneIndex
+    from utils.streaming import iter_json_array
+
+    predictions = build_tender_predictions(300_000)
+    rng = np.random.default_rng(0)
+    lanes = [{"source_city": str(rng.choice(["ELWOOD", "JOLIET"])), "destination_city": str(rng.choice(["DALLAS", "ATLANTA"])),
+              "carrier": str(rng.choice(["RBTW", "FDEG", "UPSN"]))} for _ in range(2_000)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "prediction_data.json")
+        with open(path, "w") as f:
+            json.dump({"predictions": predictions}, f)
+
+        # Each by-lane request re-reads and filters the file; time 20 and extrapolate
+        start = time.perf_counter()
+        for lane in lanes[:20]:
+            filter_by_lane(list(iter_json_array(path)), **lane)
+        per_lane_seconds = (time.perf_counter() - start) / 20
+
+        start = time.perf_counter()
+        LaneIndex(list(iter_json_array(path))).lookup_many(lanes)
+        bulk_seconds = time.perf_counter() - start
+
+    print(f"{len(predictions):,} predictions, {len(lanes):,} lanes")
+    print(f"one request per lane: ~{per_lane_seconds * len(lanes):.0f} s ({per_lane_seconds * 1000:.0f} ms per lane)")
+    print(f"bulk lookup (building the index included): {bulk_seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the Parquet copies of uploaded CSV files.
+
+Reading an upload through its Parquet copy must return the same frame as
+``pd.read_csv``, prune columns on request, and fall back to the CSV when the
+copy is missing or older than the upload. Run this file directly to compare
+load times on a generated upload.
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.columnar import convert_csv_to_parquet, parquet_path_for, read_table
+
+
+def write_upload(path: str, n_rows: int = 5000, seed: int = 0) -> pd.DataFrame:
+    """Write a tender-performance-like upload without a file extension."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "CARRIER": rng.choice(["RBTW", "FDEG", "SCNN", None], n_rows),
+        "SOURCE_CITY": rng.choice(["PHARR", "RICHMOND", "LAREDO"], n_rows),
+        "DEST_CITY": rng.choice(["ELWOOD", "LANCASTER"], n_rows),
+        "TENDER_PERF_PERCENTAGE": np.round(rng.random(n_rows) * 100, 2),
+        "TOTAL_ORDERS": rng.integers(1, 50, n_rows),
+        "COMMENT": rng.choice(["late", "ok"], n_rows)
+    })
+    df.to_csv(path, index=False)
+    return df
+
+
+@pytest.fixture
+def upload(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "3f2b9c1e")
+    write_upload(path)
+    return path
+
+
+def test_parquet_copy_matches_csv(upload):
+    schema = convert_csv_to_parquet(upload, chunk_rows=1000)
+    assert schema["rows"] == 5000
+    assert {column["name"]: column["dtype"] for column in schema["columns"]}["CARRIER"] == "category"
+
+    pd.testing.assert_frame_equal(read_table(upload), pd.read_csv(upload))
+
+
+def test_column_pruning_and_categoricals(upload):
+    convert_csv_to_parquet(upload)
+    df = read_table(upload, columns=["CARRIER", "TOTAL_ORDERS", "NOT_A_COLUMN"], categorical=True)
+
+    assert list(df.columns) == ["CARRIER", "TOTAL_ORDERS"]
+    assert isinstance(df["CARRIER"].dtype, pd.CategoricalDtype)
+
+
+def test_stale_or_missing_copy_falls_back_to_csv(upload):
+    convert_csv_to_parquet(upload)
+    write_upload(upload, seed=1)
+    os.utime(parquet_path_for(upload), (0, 0))
+    pd.testing.assert_frame_equal(read_table(upload), pd.read_csv(upload))
+
+    os.remove(parquet_path_for(upload))
+    pd.testing.assert_frame_equal(read_table(upload), pd.read_csv(upload))
+
+
+def main():
+    """Compare CSV and Parquet load times for a generated upload."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "upload")
+        write_upload(path, n_rows=1_000_000)
+        convert_csv_to_parquet(path)
+
+        for label, load in (
+            ("read_csv", lambda: pd.read_csv(path)),
+            ("parquet", lambda: read_table(path)),
+            ("parquet, 2 columns, categorical", lambda: read_table(path, ["CARRIER", "TENDER_PERF_PERCENTAGE"], True)),
+        ):
+            start = time.perf_counter()
+            df = load()
+            elapsed = time.perf_counter() - start
+            print(f"{label:<34} {elapsed * 1000:8.1f} ms {df.memory_usage(deep=True).sum() / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
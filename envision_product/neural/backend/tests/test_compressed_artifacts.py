@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Accuracy and size checks for the compressed model artifact format.
+
+Quantized weights must stay within the documented accuracy delta of the
+float32 network, and the JSON vocabularies must encode exactly like the
+scikit-learn objects they replace. Run this file directly to print the
+size, load time and accuracy delta per precision.
+"""
+
+import os
+import sys
+import time
+import pickle
+import tempfile
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models.inference import NumpyInferenceModel, load_inference_model, save_numpy_weights
+from models.artifacts import (
+    ARTIFACT_MANIFEST,
+    COMPRESSED_WEIGHTS_FILE,
+    PRECISIONS,
+    compress_model_directory,
+    load_compressed_weights,
+    load_vocabularies,
+    save_compressed_weights,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+INPUT_DIM = 400
+
+# Documented accuracy delta on sigmoid outputs in [0, 1] (see README)
+MAX_MEAN_ABS_DELTA = {"float16": 1e-4, "int8": 5e-3}
+MAX_ABS_DELTA = {"float16": 1e-3, "int8": 2e-2}
+
+# Compressed weights must be at least this many times smaller than float32
+MIN_SIZE_RATIO = {"float16": 1.8, "int8": 3.0}
+
+
+def build_dense_layers(input_dim: int = INPUT_DIM, seed: int = 0):
+    """Build He-initialized layers with the carrier performance stack."""
+    rng = np.random.default_rng(seed)
+    widths = [input_dim, 128, 64, 32, 1]
+    dense_layers = []
+    for i, (fan_in, fan_out) in enumerate(zip(widths[:-1], widths[1:])):
+        dense_layers.append({
+            "kernel": (rng.normal(size=(fan_in, fan_out)) * np.sqrt(2.0 / fan_in)).astype(np.float32),
+            "bias": (rng.normal(size=fan_out) * 0.05).astype(np.float32),
+            "activation": "sigmoid" if i == len(widths) - 2 else "relu"
+        })
+    return dense_layers
+
+
+def sample_features(n_samples: int, input_dim: int = INPUT_DIM) -> np.ndarray:
+    """Generate one-hot-like feature rows with a few scaled numeric columns."""
+    rng = np.random.default_rng(1)
+    X = (rng.random((n_samples, input_dim)) < 0.05).astype(np.float32)
+    X[:, :3] = rng.normal(size=(n_samples, 3))
+    return X
+
+
+def build_preprocessors():
+    """Fit scikit-learn preprocessors like the carrier performance model does."""
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    carriers = pd.DataFrame({"CARRIER": ["RBTW", "FDEG", "SCNN", "RBTW"]})
+    carrier_encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
+    carrier_encoder.fit(carriers)
+
+    numeric = pd.DataFrame({"YEAR": [2023, 2024, 2024, 2025], "MONTH": [1, 6, 9, 12]})
+    scaler = StandardScaler()
+    scaler.fit(numeric)
+
+    return {
+        "carrier_encoder": carrier_encoder,
+        "source_state_encoder": None,
+        "scaler": scaler,
+        "data_format": "new",
+        "feature_columns": ["CARRIER_0", "CARRIER_1", "CARRIER_2"]
+    }
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_accuracy_delta_within_documented_bounds(tmp_path, precision):
+    dense_layers = build_dense_layers()
+    path = str(tmp_path / COMPRESSED_WEIGHTS_FILE)
+    save_compressed_weights(dense_layers, path, precision)
+
+    X = sample_features(2000)
+    reference = NumpyInferenceModel(dense_layers).predict(X)
+    compressed = NumpyInferenceModel(load_compressed_weights(path)).predict(X)
+
+    delta = np.abs(reference - compressed)
+    assert compressed.shape == reference.shape
+    assert delta.mean() < MAX_MEAN_ABS_DELTA[precision]
+    assert delta.max() < MAX_ABS_DELTA[precision]
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_compressed_weights_are_smaller(tmp_path, precision):
+    dense_layers = build_dense_layers()
+    float32_path = str(tmp_path / "model_weights.npz")
+    compressed_path = str(tmp_path / COMPRESSED_WEIGHTS_FILE)
+    save_numpy_weights(dense_layers, float32_path)
+    save_compressed_weights(dense_layers, compressed_path, precision)
+
+    ratio = os.path.getsize(float32_path) / os.path.getsize(compressed_path)
+    assert ratio >= MIN_SIZE_RATIO[precision]
+
+
+def test_vocabularies_match_sklearn(tmp_path):
+    pytest.importorskip("sklearn")
+    preprocessors = build_preprocessors()
+    with open(tmp_path / "preprocessors.pkl", "wb") as f:
+        pickle.dump(preprocessors, f)
+    save_numpy_weights(build_dense_layers(), str(tmp_path / "model_weights.npz"))
+
+    compress_model_directory(str(tmp_path), "int8")
+    restored = load_vocabularies(str(tmp_path))
+
+    # Unknown carriers encode to all-zero rows, as with handle_unknown='ignore'
+    carriers = pd.DataFrame({"CARRIER": ["FDEG", "UNKNOWN", "RBTW"]})
+    np.testing.assert_array_equal(
+        restored["carrier_encoder"].transform(carriers),
+        preprocessors["carrier_encoder"].transform(carriers)
+    )
+    assert list(restored["carrier_encoder"].categories_[0]) == list(preprocessors["carrier_encoder"].categories_[0])
+
+    numeric = pd.DataFrame({"YEAR": [2024, 2026], "MONTH": [3, 11]})
+    np.testing.assert_allclose(restored["scaler"].transform(numeric), preprocessors["scaler"].transform(numeric))
+
+    assert restored["source_state_encoder"] is None
+    assert restored["data_format"] == "new"
+    assert restored["feature_columns"] == preprocessors["feature_columns"]
+
+
+def test_float32_weights_are_served_unless_compressed_ones_are_asked_for(tmp_path):
+    pytest.importorskip("sklearn")
+    with open(tmp_path / "preprocessors.pkl", "wb") as f:
+        pickle.dump(build_preprocessors(), f)
+    dense_layers = build_dense_layers()
+    save_numpy_weights(dense_layers, str(tmp_path / "model_weights.npz"))
+    compress_model_directory(str(tmp_path), "int8")
+
+    X = sample_features(100)
+    reference = NumpyInferenceModel(dense_layers).predict(X)
+    np.testing.assert_array_equal(load_inference_model(str(tmp_path), "numpy").predict(X), reference)
+
+    # Asked for, the compressed weights are served by any backend
+    quantized = load_inference_model(str(tmp_path), "keras", compressed=True).predict(X)
+    assert 0 < np.abs(quantized - reference).max() < MAX_ABS_DELTA["int8"]
+
+
+def test_dropped_originals_are_served_from_compressed_weights(tmp_path):
+    pytest.importorskip("sklearn")
+    with open(tmp_path / "preprocessors.pkl", "wb") as f:
+        pickle.dump(build_preprocessors(), f)
+    dense_layers = build_dense_layers()
+    save_numpy_weights(dense_layers, str(tmp_path / "model_weights.npz"))
+
+    manifest = compress_model_directory(str(tmp_path), "int8", drop_original=True)
+    assert os.path.exists(tmp_path / ARTIFACT_MANIFEST)
+    assert not os.path.exists(tmp_path / "model_weights.npz")
+    assert not os.path.exists(tmp_path / "preprocessors.pkl")
+    assert manifest["max_abs_delta"] < MAX_ABS_DELTA["int8"]
+
+    # Even the keras backend falls back to the compressed weights
+    model = load_inference_model(str(tmp_path), "keras")
+    assert isinstance(model, NumpyInferenceModel)
+
+    X = sample_features(100)
+    delta = np.abs(model.predict(X) - NumpyInferenceModel(dense_layers).predict(X))
+    assert delta.max() < MAX_ABS_DELTA["int8"]
+
+
+def main():
+    """Print size, load time and accuracy delta per precision."""
+    dense_layers = build_dense_layers()
+    X = sample_features(2000)
+    reference = NumpyInferenceModel(dense_layers).predict(X)
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        float32_path = os.path.join(model_dir, "model_weights.npz")
+        save_numpy_weights(dense_layers, float32_path)
+        start = time.perf_counter()
+        NumpyInferenceModel.from_file(float32_path)
+        logger.info(f"float32: {os.path.getsize(float32_path)} bytes, load {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        for precision in PRECISIONS:
+            path = os.path.join(model_dir, f"{precision}.npz")
+            save_compressed_weights(dense_layers, path, precision)
+            start = time.perf_counter()
+            model = NumpyInferenceModel(load_compressed_weights(path))
+            load_ms = (time.perf_counter() - start) * 1000
+            delta = np.abs(model.predict(X) - reference)
+            logger.info(
+                f"{precision}: {os.path.getsize(path)} bytes, load {load_ms:.2f} ms, "
+                f"mean abs delta {delta.mean():.2e}, max abs delta {delta.max():.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
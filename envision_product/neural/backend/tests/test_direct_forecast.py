@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for the direct multi-horizon order volume architecture.
+
+A direct model forecasts the next ``horizon`` months of a lane in one forward
+pass from its lagged monthly volumes. Training rows are windows cut from each
+lane's monthly series, and a forecast for all lanes is one batched call.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("sklearn")
+
+from models.order_volume_model import OrderVolumeModel
+from models.preprocessing import as_categoricals
+
+
+def build_series(lanes: int, months: int, seed: int = 0) -> pd.DataFrame:
+    """Monthly order volumes of lanes with a trend and a yearly season (some months missing)."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for lane in range(lanes):
+        base, trend, season = rng.uniform(50, 300), rng.uniform(-1, 3), rng.uniform(10, 60)
+        for month in range(months):
+            if rng.random() < 0.05:
+                continue
+            year, month_of_year = 2022 + month // 12, month % 12 + 1
+            volume = base + trend * month + season * np.sin(2 * np.pi * month_of_year / 12) + rng.normal(0, 5)
+            rows.append({
+                "ORDER MONTH": f"{year} {month_of_year:02d}",
+                "SOURCE CITY": f"SOURCE{lane % 7}",
+                "DESTINATION CITY": f"DEST{lane}",
+                "ORDER TYPE": ["FTL", "LTL"][lane % 2],
+                "ORDER VOLUME": max(int(volume), 0)
+            })
+    return pd.DataFrame(rows)
+
+
+class MultiOutputLinearModel:
+    """Linear stand-in for the trained network, with one output per horizon month."""
+
+    def __init__(self, width: int, outputs: int, seed: int = 0):
+        self.weights = np.random.default_rng(seed).normal(size=(width, outputs)) * 20
+
+    def predict(self, features, verbose=0):
+        return np.asarray(features, dtype=np.float64) @ self.weights
+
+
+def direct_model(data: pd.DataFrame, horizon: int = 3, lags: int = 4) -> OrderVolumeModel:
+    model = OrderVolumeModel(architecture="direct", horizon=horizon, lags=lags)
+    model.raw_data = as_categoricals(data)
+    model.preprocess_data()
+    return model
+
+
+def test_training_windows_match_a_per_lane_loop():
+    data = build_series(5, 10)
+    model = direct_model(data)
+    processed = model.preprocessed_data
+
+    expected_lags, expected_targets = [], []
+    for _, lane in data.groupby(["SOURCE CITY", "DESTINATION CITY", "ORDER TYPE"], sort=False):
+        volumes = dict(zip(lane["ORDER MONTH"], lane["ORDER VOLUME"]))
+        series = [volumes.get(f"{2022 + m // 12} {m % 12 + 1:02d}", 0) for m in range(10)]
+        for origin in range(1, 10 - 3 + 1):
+            expected_lags.append([series[m] if m >= 0 else 0 for m in range(origin - 4, origin)])
+            expected_targets.append(series[origin:origin + 3])
+
+    assert len(processed) == 5 * 7
+    np.testing.assert_array_equal(processed[["ORDER VOLUME_1", "ORDER VOLUME_2", "ORDER VOLUME_3"]], expected_targets)
+    lags = model.lag_scaler.inverse_transform(processed[["LAG_4", "LAG_3", "LAG_2", "LAG_1"]])
+    np.testing.assert_allclose(lags, expected_lags, atol=1e-3)
+
+    model.prepare_train_test_split()
+    assert model.y_train.shape[1] == 3
+    assert "LAG_1" in model.X_train.columns and "ORDER VOLUME_1" not in model.X_train.columns
+
+
+def test_direct_architecture_needs_more_months_than_the_horizon():
+    with pytest.raises(ValueError):
+        direct_model(build_series(2, 3), horizon=3)
+    with pytest.raises(ValueError):
+        OrderVolumeModel(architecture="recursive")
+
+
+def test_predict_future_is_one_forward_pass_per_horizon():
+    model = direct_model(build_series(6, 12))
+    model.model = MultiOutputLinearModel(model.preprocessed_data.shape[1] - 3, 3)
+
+    predictions = model.predict_future(months=5)
+
+    lanes = model.raw_data[["SOURCE CITY", "DESTINATION CITY", "ORDER TYPE"]].astype(object).drop_duplicates()
+    assert len(predictions) == 5 * len(lanes)
+    assert predictions["PREDICTION DATE"].tolist()[:5] == ["2023-01", "2023-02", "2023-03", "2023-04", "2023-05"]
+
+    # Reference: the first pass from the last 4 months, the second from its predictions
+    volumes, next_month = model._recent_volumes(lanes)
+    first = model.model.predict(model._direct_feature_matrix(
+        lanes, np.full(len(lanes), 2023), np.full(len(lanes), 1), volumes))
+    rolled = np.hstack([volumes, np.maximum(first, 0)])[:, -4:]
+    second = model.model.predict(model._direct_feature_matrix(
+        lanes, np.full(len(lanes), 2023), np.full(len(lanes), 4), rolled))
+    expected = np.maximum(np.round(np.hstack([first, second])[:, :5]), 0).reshape(-1)
+    assert next_month == 2023 * 12
+    np.testing.assert_array_equal(predictions["PREDICTED ORDER VOLUME"], expected)
+
+
+def test_predict_frame_picks_the_horizon_month_of_each_row():
+    model = direct_model(build_series(4, 12))
+    model.model = MultiOutputLinearModel(model.preprocessed_data.shape[1] - 3, 3)
+    forecast = model.predict_future(months=3)
+
+    rows = forecast.rename(columns={"PREDICTION DATE": "ORDER MONTH"})
+    rows["ORDER MONTH"] = rows["ORDER MONTH"].str.replace("-", " ")
+    np.testing.assert_array_equal(model.predict_frame(rows), forecast["PREDICTED ORDER VOLUME"])
+
+    outside = rows.head(2).assign(**{"ORDER MONTH": ["2022 06", "2023 09"]})
+    assert np.isnan(model.predict_frame(outside)).all()
+
+
+class SklearnNetwork:
+    """scikit-learn MLP standing in for the Keras network (TensorFlow is optional here)."""
+
+    def __init__(self, X, y):
+        from sklearn.neural_network import MLPRegressor
+
+        self.network = MLPRegressor(hidden_layer_sizes=(128, 64, 32), max_iter=300, random_state=42)
+        self.network.fit(np.asarray(X, dtype=np.float32), np.asarray(y, dtype=np.float32))
+
+    def predict(self, features, verbose=0):
+        predictions = self.network.predict(np.asarray(features, dtype=np.float32))
+        return predictions.reshape(len(predictions), -1)
+
+
+def main():
+    """Compare the iterative and direct architectures on a 12-month holdout of 400 lanes."""
+    data = build_series(400, 48)
+    history, holdout = data[data["ORDER MONTH"] < "2025 01"], data[data["ORDER MONTH"] >= "2025 01"]
+
+    for architecture in ("iterative", "direct"):
+        model = OrderVolumeModel(architecture=architecture, horizon=12, lags=12)
+        model.raw_data = as_categoricals(history.reset_index(drop=True))
+        model.preprocess_data()
+        model.prepare_train_test_split()
+        start = time.perf_counter()
+        model.model = SklearnNetwork(model.X_train, model.y_train)
+        train_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        forecast = model.predict_future(months=12)
+        forecast_seconds = time.perf_counter() - start
+
+        actual = holdout.assign(**{"PREDICTION DATE": holdout["ORDER MONTH"].str.replace(" ", "-")})
+        merged = forecast.merge(actual, on=["SOURCE CITY", "DESTINATION CITY", "ORDER TYPE", "PREDICTION DATE"])
+        mae = np.mean(np.abs(merged["PREDICTED ORDER VOLUME"] - merged["ORDER VOLUME"]))
+        print(f"{architecture:9s}: holdout MAE {mae:.1f}, 12-month forecast of {len(forecast) // 12} lanes "
+              f"in {forecast_seconds * 1000:.0f} ms ({len(model.X_train):,} training rows, fit {train_seconds:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
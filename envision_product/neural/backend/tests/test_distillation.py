@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for distilled serving variants.
+
+Synthetic lanes recombine the one-hot feature groups of real rows and must
+stay valid one-hot vectors. A distilled student serves its teacher only while
+its MAE against the teacher is within DISTILLATION_FIDELITY_TOLERANCE and its
+directory exists; variants are hidden from listings and deleted with their
+teacher.
+"""
+
+import os
+import sys
+import time
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import build_lanes, register_model
+from models.distillation import feature_groups, measure_fidelity, synthesize_feature_rows
+
+LANE_COLUMNS = ["CARRIER", "SOURCE_CITY", "DEST_CITY"]
+
+
+def build_feature_matrix(rows: int, seed: int = 0) -> pd.DataFrame:
+    """One-hot lane features as the encoders name them, plus a scaled numerical column."""
+    lanes = build_lanes(rows, seed)
+    groups = []
+    for column in LANE_COLUMNS:
+        codes = pd.Categorical(lanes[column]).codes
+        groups.append(pd.DataFrame(np.eye(codes.max() + 1, dtype=np.float32)[codes]).add_prefix(f"{column}_"))
+    groups.append(pd.DataFrame({"DISTANCE": np.random.default_rng(seed).random(rows, dtype=np.float32)}))
+    return pd.concat(groups, axis=1)
+
+
+@pytest.fixture
+def distilled_model(workspace, monkeypatch):
+    """Register a teacher with a distilled student; returns a factory taking the student's fidelity."""
+    from config.settings import settings
+
+    monkeypatch.setattr(settings, "DISTILLATION_FIDELITY_TOLERANCE", 1.0)
+
+    def register(fidelity):
+        teacher_id = register_model(workspace / "teacher", "tender_performance", model_id="teacher")
+        student_id = register_model(workspace / "student", "tender_performance", model_id="teacher_student",
+                                    metadata={"variant_of": teacher_id, "fidelity": fidelity})
+        from services.model_service import ModelService
+
+        service = ModelService()
+        service.metadata["models"][teacher_id]["serving_variant"] = student_id
+        service._save_metadata()
+        return teacher_id, student_id
+
+    return register
+
+
+def test_feature_groups_follow_encoder_prefixes():
+    groups = feature_groups(["CARRIER_0", "CARRIER_12", "SOURCE_CITY_3", "DEST_STATE_1", "SOURCE_CITY_4",
+                             "DISTANCE", "ORDER_TYPE_FTL"])
+
+    assert groups == {
+        "CARRIER": ["CARRIER_0", "CARRIER_12"],
+        "SOURCE_CITY": ["SOURCE_CITY_3", "SOURCE_CITY_4"],
+        "DEST_STATE": ["DEST_STATE_1"],
+        "DISTANCE": ["DISTANCE"],
+        "ORDER_TYPE_FTL": ["ORDER_TYPE_FTL"],
+    }
+
+
+def test_synthetic_rows_are_valid_one_hot_lanes():
+    X = build_feature_matrix(300)
+
+    synthetic = synthesize_feature_rows(X, 5_000, seed=7)
+
+    assert list(synthetic.columns) == list(X.columns) and len(synthetic) == 5_000
+    for column in LANE_COLUMNS:
+        group = synthetic.filter(regex=f"^{column}_\\d+$").to_numpy()
+        assert set(np.unique(group)) == {0.0, 1.0}
+        np.testing.assert_array_equal(group.sum(axis=1), 1.0)
+    assert set(synthetic["DISTANCE"]) <= set(X["DISTANCE"])
+
+    # Groups are drawn from independent rows, so unseen lanes appear
+    def lanes(frame):
+        return set(map(tuple, frame.drop(columns=["DISTANCE"]).to_numpy(dtype=int)))
+    assert lanes(synthetic) - lanes(X)
+
+    pd.testing.assert_frame_equal(synthesize_feature_rows(X, 5_000, seed=7), synthetic)
+
+
+def test_fidelity_is_measured_in_percentage_points():
+    teacher = np.array([[0.50], [0.60], [0.70], [0.80]])
+    student = np.array([0.51, 0.58, 0.70, 0.84])
+
+    fidelity = measure_fidelity(student, teacher)
+
+    assert fidelity["samples"] == 4
+    assert fidelity["mae"] == pytest.approx(1.75)
+    assert fidelity["max_abs_error"] == pytest.approx(4.0)
+    assert fidelity["p95_abs_error"] == pytest.approx(np.percentile([1, 2, 0, 4], 95))
+
+
+@pytest.mark.parametrize("fidelity, serves_student", [
+    ({"mae": 0.4}, True),
+    ({"mae": 1.0}, True),
+    ({"mae": 1.5}, False),
+    ({}, False),
+])
+def test_students_serve_only_within_the_fidelity_tolerance(distilled_model, fidelity, serves_student):
+    from services.model_service import ModelService
+
+    teacher_id, student_id = distilled_model(fidelity)
+
+    service = ModelService()
+    assert service.resolve_serving_model_id(teacher_id) == (student_id if serves_student else teacher_id)
+    assert service.resolve_serving_model_id(student_id) == student_id
+
+
+def test_students_without_a_directory_are_not_served(distilled_model):
+    from services.model_service import ModelService
+
+    teacher_id, student_id = distilled_model({"mae": 0.4})
+    shutil.rmtree(ModelService().get_model_path(student_id))
+
+    assert ModelService().resolve_serving_model_id(teacher_id) == teacher_id
+
+
+def test_variants_are_hidden_from_listings(distilled_model):
+    from services.model_service import ModelService
+
+    teacher_id, student_id = distilled_model({"mae": 0.4})
+    service = ModelService()
+
+    assert [model["model_id"] for model in service.list_models()] == [teacher_id]
+    assert sorted(model["model_id"] for model in service.list_models(include_variants=True)) == \
+        sorted([teacher_id, student_id])
+
+
+def test_deleting_a_teacher_deletes_its_variant(distilled_model):
+    from services.model_service import ModelService
+
+    teacher_id, student_id = distilled_model({"mae": 0.4})
+    service = ModelService()
+    student_path = service.get_model_path(student_id)
+
+    assert service.delete_model(teacher_id)
+
+    assert not student_path.exists()
+    assert ModelService().metadata["models"] == {}
+
+
+def test_deleting_a_variant_serves_the_teacher_again(distilled_model):
+    from services.model_service import ModelService
+
+    teacher_id, student_id = distilled_model({"mae": 0.4})
+    assert ModelService().delete_model(student_id)
+
+    service = ModelService()
+    assert "serving_variant" not in service.get_model_metadata(teacher_id)
+    assert service.resolve_serving_model_id(teacher_id) == teacher_id
+
+
+def main():
+    """Time synthesizing one million lanes from 10,000 real rows."""
+    X = build_feature_matrix(10_000)
+    start = time.perf_counter()
+    synthetic = synthesize_feature_rows(X, 1_000_000)
+    print(f"synthesized {len(synthetic):,} rows of {X.shape[1]} features in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tests for draft training and promotion.
+
+A draft trains on a stratified sample that grows until the test MAE is
+stable, the full training set is used or the time budget runs out; each
+sample must contain the smaller ones and keep every carrier/lane's share.
+Promoting a draft reuses its cached preprocessing.
+"""
+
+import os
+import sys
+import time
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import build_lanes, register_model
+
+LANE_COLUMNS = ["CARRIER", "SOURCE_CITY", "DEST_CITY"]
+
+
+class StubModel:
+    """Model class stand-in: one-hot lanes, no network, MAE from ``mae(samples)``."""
+
+    instances = []
+    preprocess_calls = 0
+
+    def __init__(self, data_path=None, model_path=None, inference_backend=None):
+        self.data_path = data_path
+        self.model = None
+        self.built = False
+        self.preprocessed_data = None
+        self.trained_on = []
+        StubModel.instances.append(self)
+        if data_path:
+            self.load_data()
+        if model_path:
+            with open(os.path.join(model_path, "width.txt")) as f:
+                self.model = SimpleNamespace(input_shape=(None, int(f.read())))
+
+    @staticmethod
+    def mae(samples: int) -> float:
+        return 100 / samples
+
+    def load_data(self):
+        self.raw_data = pd.read_csv(self.data_path)
+
+    def preprocess_data(self):
+        StubModel.preprocess_calls += 1
+        self.preprocessed_data = pd.get_dummies(self.raw_data[LANE_COLUMNS], dtype=float).assign(
+            TENDER_PERF_PERCENTAGE=self.raw_data["TENDER_PERF_PERCENTAGE"])
+
+    def prepare_train_test_split(self, test_size=0.2):
+        data = self.preprocessed_data
+        test = np.arange(len(data)) % round(1 / test_size) == 0
+        features = data.drop(columns=["TENDER_PERF_PERCENTAGE"])
+        self.X_train, self.X_test = features[~test], features[test]
+        self.y_train, self.y_test = data["TENDER_PERF_PERCENTAGE"][~test], data["TENDER_PERF_PERCENTAGE"][test]
+
+    def build_model(self):
+        self.built = True
+        self.model = SimpleNamespace(input_shape=(None, self.X_train.shape[1]))
+
+    def train(self, epochs, batch_size, validation_split):
+        self.trained_on.append(len(self.X_train))
+
+    def evaluate(self):
+        return {"mae": self.mae(len(self.X_train))}
+
+    def save_model(self, path):
+        with open(os.path.join(path, "width.txt"), "w") as f:
+            f.write(str(self.model.input_shape[-1]))
+        return True
+
+
+@pytest.fixture
+def stub_models(workspace, monkeypatch):
+    """StubModel as every model class, and a CSV of 2,000 lanes to train on."""
+    import services.model_service as model_service
+
+    monkeypatch.setattr(model_service, "get_model_class", lambda model_type: StubModel)
+    monkeypatch.setattr(StubModel, "instances", [])
+    monkeypatch.setattr(StubModel, "preprocess_calls", 0)
+    data_path = workspace / "lanes.csv"
+    build_lanes(2_000).to_csv(data_path, index=False)
+    return str(data_path)
+
+
+def test_draft_samples_are_nested_and_stratified(workspace):
+    from services.model_service import ModelService
+
+    lanes = build_lanes(3_000)
+    train_index = lanes.index[::2]
+    rank, stratum_size = ModelService()._draft_sample_ranks(SimpleNamespace(raw_data=lanes), "tender_performance",
+                                                            train_index)
+
+    strata = lanes.iloc[train_index].groupby(LANE_COLUMNS).ngroup().to_numpy()
+    sizes = np.bincount(strata)
+    np.testing.assert_array_equal(stratum_size, sizes[strata])
+
+    previous = np.zeros(len(rank), dtype=bool)
+    for fraction in (0.05, 0.1, 0.25, 0.5, 1.0):
+        sample = rank < np.ceil(fraction * stratum_size)
+        assert not (previous & ~sample).any()  # each sample contains the smaller ones
+        np.testing.assert_array_equal(np.bincount(strata[sample], minlength=len(sizes)), np.ceil(fraction * sizes))
+        previous = sample
+    assert previous.all()
+
+    # Without stratification columns the whole training set is one stratum
+    rank, stratum_size = ModelService()._draft_sample_ranks(SimpleNamespace(raw_data=lanes), "order_volume",
+                                                            train_index)
+    assert sorted(rank) == list(range(len(train_index))) and set(stratum_size) == {len(train_index)}
+
+
+@pytest.mark.parametrize("params, mae, stop_reason, stages", [
+    ({"initial_fraction": 0.25}, StubModel.mae, "full_sample", 3),
+    ({"initial_fraction": 0.25}, lambda samples: 5.0, "stable", 2),
+    ({"initial_fraction": 0.25, "time_budget": 1e-9}, StubModel.mae, "time_budget", 1),
+])
+def test_drafts_stop_when_stable_complete_or_out_of_time(stub_models, monkeypatch, params, mae, stop_reason, stages):
+    from services.model_service import DRAFT_PREPROCESSING_CACHE, ModelService
+
+    monkeypatch.setattr(StubModel, "mae", staticmethod(mae))
+    service = ModelService()
+
+    result = service.train_draft_model("tender_performance", stub_models, params)
+
+    draft_info = result["draft_info"]
+    assert draft_info["stop_reason"] == stop_reason
+    assert draft_info["stable"] == (stop_reason == "stable")
+    assert len(draft_info["stages"]) == stages
+    assert [stage["fraction"] for stage in draft_info["stages"]] == [0.25, 0.5, 1.0][:stages]
+
+    model = StubModel.instances[0]
+    assert model.trained_on == [stage["samples"] for stage in draft_info["stages"]]
+    assert model.trained_on == sorted(model.trained_on)
+    if stop_reason == "full_sample":
+        assert model.trained_on[-1] == len(model.X_train)
+
+    metadata = service.get_model_metadata(result["model_id"])
+    assert metadata["draft"] and metadata["draft_info"] == draft_info
+    assert metadata["evaluation"] == draft_info["stages"][-1]["evaluation"]
+    assert (service.get_model_path(result["model_id"]) / DRAFT_PREPROCESSING_CACHE).exists()
+
+
+def test_promotion_reuses_the_cached_preprocessing(stub_models):
+    from services.model_service import DRAFT_PREPROCESSING_CACHE, ModelService
+
+    service = ModelService()
+    draft_id = service.train_draft_model("tender_performance", stub_models, {"initial_fraction": 0.5})["model_id"]
+    cache_file = service.get_model_path(draft_id) / DRAFT_PREPROCESSING_CACHE
+    StubModel.preprocess_calls = 0
+
+    promoted_id = service.promote_draft_model(draft_id, {"epochs": 1})
+
+    assert StubModel.preprocess_calls == 0
+    promoted = StubModel.instances[-1]
+    pd.testing.assert_frame_equal(promoted.preprocessed_data, pd.read_pickle(cache_file))
+    assert not promoted.built  # trained on from the draft network
+    metadata = service.get_model_metadata(promoted_id)
+    assert promoted_id != draft_id and service.get_model_metadata(draft_id)["draft"]
+    assert metadata["promoted_from"] == draft_id and not metadata.get("draft")
+
+    # Without the cache the draft's training data is preprocessed again
+    cache_file.unlink()
+    assert service.promote_draft_model(draft_id, {"epochs": 1})
+    assert StubModel.preprocess_calls == 1
+
+
+def test_only_drafts_can_be_promoted(workspace):
+    pytest.importorskip("fastapi")
+    from fastapi import BackgroundTasks, HTTPException
+    from api.models import promote_draft_model
+    from services.model_service import ModelService
+
+    model_id = register_model(workspace / "full", "tender_performance", model_id="full")
+    service = ModelService()
+
+    assert service.promote_draft_model(model_id) is None
+    assert service.promote_draft_model("missing") is None
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(promote_draft_model(model_id, BackgroundTasks(), model_service=service))
+    assert error.value.status_code == 400
+
+
+def main():
+    """Time the stratified sample ranks of one million tender rows."""
+    from services.model_service import ModelService
+
+    lanes = build_lanes(1_000_000)
+    start = time.perf_counter()
+    rank, stratum_size = ModelService()._draft_sample_ranks(SimpleNamespace(raw_data=lanes), "tender_performance",
+                                                            lanes.index)
+    print(f"ranked {len(rank):,} rows in {len(np.unique(stratum_size)):,} stratum sizes "
+          f"in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for the feature-hashing encoding of categorical columns.
+
+With ``encoding='hashing'`` the performance models hash each categorical
+value into a fixed number of signed feature columns, so the input width does
+not depend on the training vocabulary and unseen values need no lookup.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("sklearn")
+
+from conftest import LinearModel
+from models.artifacts import decode_vocabularies, encode_vocabularies
+from models.features import HashingEncoder, fit_one_hot, make_encoder, one_hot_block
+
+
+def build_performance(rows: int, seed: int = 0, carriers: int = 20, cities: int = 40) -> pd.DataFrame:
+    """New-format carrier performance rows."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "CARRIER": rng.choice([f"CARRIER{i}" for i in range(carriers)], rows),
+        "TRACKING_MONTH": rng.choice([f"2024 {month:02d}" for month in range(1, 13)], rows),
+        "SOURCE_CITY": rng.choice([f"SOURCE{i}" for i in range(cities)], rows),
+        "SOURCE_STATE": rng.choice(["TX", "CA", "ON"], rows),
+        "SOURCE_COUNTRY": rng.choice(["US", "CA"], rows),
+        "DEST_CITY": rng.choice([f"DEST{i}" for i in range(cities)], rows),
+        "DEST_STATE": rng.choice(["NY", "IL", "QC"], rows),
+        "DEST_COUNTRY": rng.choice(["US", "CA"], rows),
+        "ORDER_COUNT": rng.integers(1, 50, rows),
+        "AVG_TRANSIT_DAYS": rng.uniform(1, 5, rows),
+        "ACTUAL_TRANSIT_DAYS": rng.uniform(1, 6, rows),
+        "ONTIME_PERFORMANCE": rng.uniform(50, 100, rows)
+    })
+
+
+def hashing_model(data: pd.DataFrame, hash_features: int = 16):
+    from models.carrier_performance_model import CarrierPerformanceModel
+
+    model = CarrierPerformanceModel(encoding="hashing", hash_features=hash_features)
+    model.raw_data = data
+    model.data_format = model._detect_data_format(data)
+    model.preprocess_data()
+    return model
+
+
+def test_hashing_encoder_is_fixed_width_signed_and_deterministic():
+    encoder = HashingEncoder(8).fit(pd.DataFrame({"CARRIER": ["A", "B", "C"]}))
+    encoded = encoder.transform(pd.DataFrame({"CARRIER": ["A", "B", "UNSEEN", None, "A"]}))
+
+    assert encoded.shape == (5, 8)
+    assert np.abs(encoded[[0, 1, 2, 4]]).sum(axis=1).tolist() == [1.0, 1.0, 1.0, 1.0]
+    assert not encoded[3].any()  # missing values encode to zeros
+    np.testing.assert_array_equal(encoded[0], encoded[4])
+    np.testing.assert_array_equal(encoded, HashingEncoder(8).transform(np.array([["A"], ["B"], ["UNSEEN"], [None], ["A"]])))
+    assert encoder.max_value_ == "C"
+
+    signs = HashingEncoder(8).transform(pd.DataFrame({"C": [f"V{i}" for i in range(200)]})).sum(axis=1)
+    assert set(signs) == {-1.0, 1.0}
+    assert set(HashingEncoder(8, signed=False).transform(pd.DataFrame({"C": ["V1", "V2"]})).sum(axis=1)) == {1.0}
+
+    with pytest.raises(ValueError):
+        make_encoder("binary")
+
+
+def test_values_hash_alike_whatever_their_dtype():
+    # A month column with gaps is read as floats in training, as integers or strings later
+    trained = pd.DataFrame({"TRACKING_MONTH": [202401, None, 202402]}, dtype="float64")
+    encoder = HashingEncoder(64).fit(trained)
+    expected = encoder.transform(trained)[[0, 2]]
+
+    for months in ([202401, 202402], np.array([202401, 202402], dtype=np.int32), ["202401", "202402"]):
+        np.testing.assert_array_equal(encoder.transform(pd.DataFrame({"TRACKING_MONTH": months})), expected)
+
+
+def test_hashing_encoder_gathers_categoricals_by_code():
+    values = pd.Series(["b", "a", "c", "a", "b"])
+    expected = HashingEncoder(4).fit_transform(values.to_frame("COL"))
+
+    encoder = HashingEncoder(4)
+    np.testing.assert_array_equal(fit_one_hot(encoder, values.astype("category"), "COL"), expected)
+    block, names = one_hot_block(encoder, pd.Series(["c", "z"], dtype="category"), "COL", "COL")
+    np.testing.assert_array_equal(block, encoder.transform(pd.DataFrame({"COL": ["c", "z"]})))
+    assert names == ["COL_0", "COL_1", "COL_2", "COL_3"]
+
+
+def test_input_width_does_not_depend_on_the_vocabulary():
+    small = hashing_model(build_performance(300, seed=1, carriers=5, cities=10))
+    large = hashing_model(build_performance(300, seed=2, carriers=40, cities=120))
+
+    assert small.feature_columns == large.feature_columns
+    assert len(small.feature_columns) == 8 * 16 + 3
+    assert small.feature_info["encoding"] == "hashing"
+    # Destinations are hashed as they are rather than grouped into the top 50
+    assert large.raw_data["DEST_CITY"].nunique() > 50
+
+
+def test_hashed_predictions_match_per_lane_predictions():
+    model = hashing_model(build_performance(400))
+    model.model = LinearModel(len(model.feature_columns))
+    lanes = pd.DataFrame({
+        "CARRIER": ["CARRIER1", "NEW CARRIER"], "SOURCE_CITY": ["SOURCE2", "NEW SOURCE"],
+        "SOURCE_STATE": ["TX", "TX"], "SOURCE_COUNTRY": ["US", "US"],
+        "DEST_CITY": ["DEST3", "NEW DEST"], "DEST_STATE": ["NY", "NY"], "DEST_COUNTRY": ["US", "US"]
+    })
+
+    predicted = model.predict_frame(lanes)
+
+    for lane, value in zip(lanes.itertuples(index=False), predicted):
+        result = model.predict(lane.CARRIER, lane.SOURCE_CITY, lane.DEST_CITY, lane.SOURCE_STATE,
+                               lane.SOURCE_COUNTRY, lane.DEST_STATE, lane.DEST_COUNTRY)
+        assert result["ontime_performance"] == pytest.approx(value, rel=1e-4)
+
+
+def test_hashing_encoders_round_trip_through_the_vocabulary():
+    model = hashing_model(build_performance(200))
+    preprocessors = {"carrier_encoder": model.carrier_encoder, "time_encoder": model.time_encoder,
+                     "encoding": "hashing"}
+
+    restored = decode_vocabularies(encode_vocabularies(preprocessors))
+
+    assert restored["encoding"] == "hashing"
+    assert restored["time_encoder"].max_value_ == "2024 12"
+    values = pd.DataFrame({"CARRIER": ["CARRIER1", "UNSEEN"]})
+    np.testing.assert_array_equal(restored["carrier_encoder"].transform(values), model.carrier_encoder.transform(values))
+
+
+def main():
+    """Compare one-hot and hashed preprocessing widths and times on 20k rows with 2,000 carriers."""
+    from models.carrier_performance_model import CarrierPerformanceModel
+
+    data = build_performance(20_000, carriers=2_000, cities=3_000)
+    for encoding in ("onehot", "hashing"):
+        model = CarrierPerformanceModel(encoding=encoding)
+        model.raw_data = data.copy()
+        model.data_format = "new"
+        start = time.perf_counter()
+        model.preprocess_data()
+        seconds = time.perf_counter() - start
+        print(f"{encoding}: {len(model.feature_columns):,} input features, preprocess_data {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for batch scoring of uploaded files.
+
+The vectorized ``predict_frame`` must match the per-lane ``predict`` path, and
+a scoring job must write every row of the file, in order, to its Parquet
+result whether chunks are scored in-process or by worker processes.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("sklearn")
+pytest.importorskip("pyarrow")
+pytest.importorskip("pydantic_settings")
+
+from conftest import build_lanes
+
+
+def test_predict_frame_matches_single_lane_predictions(legacy_tender_model):
+    from services.model_service import ModelService
+
+    model_id, data_path = legacy_tender_model
+    model = ModelService().load_tender_performance_model(model_id)
+    lanes = pd.read_csv(data_path).head(50)
+
+    expected = [model.predict(row.CARRIER, row.SOURCE_CITY, row.DEST_CITY)["predicted_performance"]
+                for row in lanes.itertuples()]
+    np.testing.assert_allclose(model.predict_frame(lanes), expected, rtol=1e-5)
+
+
+def test_loaded_networks_are_reused_until_the_model_changes(legacy_tender_model, monkeypatch):
+    import models.inference
+    from config.settings import settings
+    from services.model_service import ModelService, clear_serving_networks
+
+    loads = []
+    load_inference_model = models.inference.load_inference_model
+    monkeypatch.setattr(models.inference, "load_inference_model",
+                        lambda path, backend, **options: loads.append(options) or load_inference_model(path, backend, **options))
+    monkeypatch.setattr(settings, "XLA_INFERENCE", False)
+    monkeypatch.setattr(settings, "SERVE_COMPRESSED_WEIGHTS", True)
+    clear_serving_networks()
+
+    model_id, _ = legacy_tender_model
+    service = ModelService()
+    first = service.load_tender_performance_model(model_id)
+    second = service.load_tender_performance_model(model_id)
+    assert second is not first and second.model is first.model
+    assert loads == [{"xla": False, "compressed": True}]
+
+    weights = service.get_model_path(model_id) / "model_weights.npz"
+    os.utime(weights, ns=(weights.stat().st_atime_ns, weights.stat().st_mtime_ns + 1_000_000_000))
+    assert service.load_tender_performance_model(model_id).model is not first.model
+    assert len(loads) == 2
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_scoring_job_writes_every_row_in_order(legacy_tender_model, workers):
+    from services.model_service import ModelService
+    from services.scoring_service import ScoringService
+
+    model_id, data_path = legacy_tender_model
+    scoring_service = ScoringService()
+    job = scoring_service.create_job("tender_performance", model_id, "file", data_path)
+    job = scoring_service.run_job(job["job_id"], workers=workers, chunk_rows=400)
+
+    assert job["status"] == "completed", job["error"]
+    assert job["rows_scored"] == 2_500 and job["chunks_scored"] == 7 and job["progress"] == 1.0
+
+    result = pd.read_parquet(job["result_path"])
+    lanes = pd.read_csv(data_path)
+    pd.testing.assert_frame_equal(result[lanes.columns], lanes)
+    model = ModelService().load_tender_performance_model(model_id)
+    np.testing.assert_allclose(result["predicted_performance"], model.predict_frame(lanes), rtol=1e-5)
+
+
+def test_incremental_rescoring_only_scores_changed_rows(legacy_tender_model, monkeypatch):
+    from services.model_service import ModelService
+    from services.scoring_service import ScoringService
+    from models.tender_performance_model import TenderPerformanceModel
+
+    model_id, data_path = legacy_tender_model
+    scoring_service = ScoringService()
+    job = scoring_service.create_job("tender_performance", model_id, "file", data_path)
+    assert scoring_service.run_job(job["job_id"], workers=1, chunk_rows=400)["rows_reused"] == 0
+
+    # Next month: 100 rows change lane and 300 new rows arrive, in a new column order
+    lanes = pd.read_csv(data_path)
+    lanes.loc[:99, "DEST_CITY"] = "NEWCITY"
+    lanes = pd.concat([lanes, build_lanes(300, seed=1)], ignore_index=True)
+    lanes = lanes[lanes.columns[::-1]]
+    lanes.to_csv(data_path, index=False)
+
+    scored_rows = []
+    predict_frame = TenderPerformanceModel.predict_frame
+    monkeypatch.setattr(TenderPerformanceModel, "predict_frame",
+                        lambda self, data: scored_rows.append(len(data)) or predict_frame(self, data))
+
+    job = scoring_service.create_job("tender_performance", model_id, "file", data_path)
+    job = scoring_service.run_job(job["job_id"], workers=1, chunk_rows=400)
+    assert job["status"] == "completed", job["error"]
+    assert job["rows_scored"] == 2_800 and job["rows_reused"] == 2_400
+    assert sum(scored_rows) == 400
+
+    result = pd.read_parquet(job["result_path"])
+    model = ModelService().load_tender_performance_model(model_id)
+    np.testing.assert_allclose(result["predicted_performance"], predict_frame(model, lanes), rtol=1e-5)
+
+    # A full (non-incremental) run scores every row again
+    scored_rows.clear()
+    job = scoring_service.create_job("tender_performance", model_id, "file", data_path, incremental=False)
+    assert scoring_service.run_job(job["job_id"], workers=1, chunk_rows=400)["rows_reused"] == 0
+    assert sum(scored_rows) == 2_800
+
+
+def main():
+    """Compare per-lane and vectorized scoring throughput on a trained model directory."""
+    from services.model_service import ModelService
+
+    model_id = sys.argv[1] if len(sys.argv) > 1 else None
+    if not model_id:
+        print("usage: python tests/test_file_scoring.py <tender_performance model_id>")
+        return
+    model = ModelService().load_tender_performance_model(model_id)
+    lanes = model.raw_data.head(2_000)
+
+    start = time.perf_counter()
+    for row in lanes.itertuples():
+        model.predict(row.CARRIER, row.SOURCE_CITY, row.DEST_CITY)
+    per_lane = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.predict_frame(lanes)
+    vectorized = time.perf_counter() - start
+    print(f"{len(lanes)} lanes: per-lane {per_lane:.2f}s, vectorized {vectorized:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
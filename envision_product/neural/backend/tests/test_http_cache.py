@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for HTTP caching of versioned resources.
+
+A conditional GET for an unchanged resource version must be answered with
+304 without running the endpoint, a new version must be served in full, and
+prediction downloads must carry validators and be compressed.
+"""
+
+import os
+import sys
+import gzip
+import json
+import asyncio
+
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic_settings")
+
+from fastapi import FastAPI
+
+from conftest import register_model
+from utils.http_cache import ConditionalGetMiddleware, is_not_modified, make_etag
+
+
+def get(app, path: str, headers: dict = None, query: str = ""):
+    """Send a GET through an ASGI app; return status, headers and body."""
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        "http_version": "1.1", "scheme": "http", "server": ("test", 80), "client": ("test", 1234), "root_path": ""
+    }
+    messages = []
+
+    async def run():
+        requested = False
+        done = asyncio.Event()
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                done.set()
+
+        await app(scope, receive, send)
+
+    asyncio.run(run())
+    start = next(message for message in messages if message["type"] == "http.response.start")
+    response_headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    body = b"".join(message.get("body", b"") for message in messages if message["type"] == "http.response.body")
+    return start["status"], response_headers, body
+
+
+def test_conditional_requests():
+    etag = make_etag("v1", "/a", "")
+    assert is_not_modified({"if-none-match": f'"other", {etag[2:]}'}, etag, None)
+    assert not is_not_modified({"if-none-match": '"other"'}, etag, 1_700_000_000)
+    assert is_not_modified({"if-modified-since": "Tue, 14 Nov 2023 22:13:20 GMT"}, etag, 1_700_000_000.5)
+    assert not is_not_modified({"if-modified-since": "Tue, 14 Nov 2023 22:13:19 GMT"}, etag, 1_700_000_000)
+
+
+def test_unchanged_version_is_not_recomputed():
+    versions = {"m1": "v1"}
+    calls = []
+    app = FastAPI()
+    app.add_middleware(ConditionalGetMiddleware, max_age=60,
+                       resolvers=[(r"^/items/([^/]+)$", lambda item_id: (versions[item_id], None))])
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        calls.append(item_id)
+        return {"item_id": item_id, "version": versions[item_id]}
+
+    @app.get("/other")
+    async def other():
+        return {}
+
+    status, headers, _ = get(app, "/items/m1")
+    assert status == 200 and headers["cache-control"] == "public, max-age=60"
+    etag = headers["etag"]
+
+    status, headers, body = get(app, "/items/m1", {"If-None-Match": etag})
+    assert status == 304 and body == b"" and headers["etag"] == etag and calls == ["m1"]
+
+    # Another query string is another representation
+    assert get(app, "/items/m1", {"If-None-Match": etag}, query="simplified=false")[0] == 200
+
+    versions["m1"] = "v2"
+    status, headers, body = get(app, "/items/m1", {"If-None-Match": etag})
+    assert status == 200 and headers["etag"] != etag and json.loads(body)["version"] == "v2"
+
+    assert "etag" not in get(app, "/other")[1]
+
+
+def test_prediction_downloads_are_cached_and_compressed(workspace):
+    from services.model_service import ModelService
+    from main import app
+
+    training_predictions = workspace / "trained" / "training_predictions"
+    training_predictions.mkdir(parents=True)
+    predictions = [{"carrier": f"C{i % 7}", "source_city": "ELWOOD", "dest_city": "DALLAS",
+                    "predicted_performance": 90.5} for i in range(2_000)]
+    with open(training_predictions / "prediction_data.json", "w") as f:
+        json.dump({"predictions": predictions}, f)
+    model_id = register_model(workspace / "trained", "tender_performance")
+
+    path = f"/api/predictions/tender-performance/{model_id}/download"
+    status, headers, body = get(app, path, {"Accept-Encoding": "gzip"}, query="format=ndjson&carrier=C3")
+    assert status == 200 and headers["content-encoding"] == "gzip" and "last-modified" in headers
+    assert len(gzip.decompress(body).splitlines()) == len([p for p in predictions if p["carrier"] == "C3"])
+
+    status, _, body = get(app, path, {"Accept-Encoding": "gzip", "If-None-Match": headers["etag"]},
+                          query="format=ndjson&carrier=C3")
+    assert status == 304 and body == b""
+
+    # Regenerated predictions are a new version
+    stored = ModelService().get_model_path(model_id) / "training_predictions" / "prediction_data.json"
+    os.utime(stored, ns=(stored.stat().st_atime_ns, stored.stat().st_mtime_ns + 1_000_000_000))
+    assert get(app, path, {"If-None-Match": headers["etag"]}, query="format=ndjson&carrier=C3")[0] == 200
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the API.
+
+Importing ``main`` must not load TensorFlow, scikit-learn or matplotlib;
+those are imported on first use or by the background warm-up. Run this file
+directly to print the measured import time.
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Seconds allowed for ``import main`` in a fresh interpreter
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", "2.0"))
+
+HEAVY_MODULES = ("tensorflow", "sklearn", "matplotlib", "matplotlib.pyplot", "onnxruntime")
+
+PROBE = f"""
+import sys, time, json
+sys.path.insert(0, {BACKEND_DIR!r})
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+
+def measure_import(cwd: str) -> dict:
+    """Import ``main`` in a fresh interpreter and report time and heavy modules."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.fixture(scope="module")
+def import_report(tmp_path_factory):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("pydantic_settings")
+    # main creates its data directories relative to the working directory
+    return measure_import(str(tmp_path_factory.mktemp("import_time")))
+
+
+def test_import_does_not_load_heavy_modules(import_report):
+    assert import_report["loaded"] == []
+
+
+def test_import_within_budget(import_report):
+    assert import_report["seconds"] < IMPORT_TIME_BUDGET
+
+
+def main():
+    """Print the import time of ``main``."""
+    import tempfile
+    with tempfile.TemporaryDirectory() as cwd:
+        report = measure_import(cwd)
+    print(f"import main: {report['seconds']:.3f}s (budget {IMPORT_TIME_BUDGET:.1f}s), heavy modules loaded: {report['loaded'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Parity tests and latency benchmark for the model inference backends.
+
+The Keras networks used by the three model classes are exported to NumPy
+weights and an ONNX graph; both must reproduce the Keras predictions, as
+must the XLA-compiled bucketed wrapper used for TensorFlow serving.
+Run this file directly to print a latency comparison against Keras.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import logging
+
+import numpy as np
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models.inference import (
+    BATCH_BUCKETS,
+    NumpyInferenceModel,
+    OnnxInferenceModel,
+    XLAInferenceModel,
+    export_inference_artifacts,
+    import_tensorflow,
+    load_inference_model,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+INPUT_DIM = 120
+PARITY_TOLERANCE = 1e-5
+
+
+def build_network(kind: str, input_dim: int = INPUT_DIM):
+    """Build a network with the same layer stack as the model classes.
+
+    Args:
+        kind: 'carrier', 'tender' or 'order_volume'
+        input_dim: Number of input features
+
+    Returns:
+        Compiled and briefly trained Keras model
+    """
+    tf = import_tensorflow()
+    layers = tf.keras.layers
+
+    if kind == "carrier":
+        stack = [
+            layers.Dense(128, activation='relu'),
+            layers.BatchNormalization(),
+            layers.Dropout(0.3),
+            layers.Dense(64, activation='relu'),
+            layers.BatchNormalization(),
+            layers.Dropout(0.2),
+            layers.Dense(32, activation='relu'),
+            layers.Dense(1, activation='sigmoid')
+        ]
+    elif kind == "tender":
+        stack = [
+            layers.Dense(64, activation='relu'),
+            layers.Dropout(0.3),
+            layers.Dense(32, activation='relu'),
+            layers.Dropout(0.2),
+            layers.Dense(16, activation='relu'),
+            layers.Dense(1, activation='sigmoid')
+        ]
+    else:
+        stack = [
+            layers.Dense(128, activation='relu'),
+            layers.Dropout(0.3),
+            layers.Dense(64, activation='relu'),
+            layers.Dropout(0.2),
+            layers.Dense(32, activation='relu'),
+            layers.Dense(1)
+        ]
+
+    model = tf.keras.models.Sequential([layers.Input(shape=(input_dim,))] + stack)
+    model.compile(optimizer='adam', loss='mean_squared_error')
+
+    # A short fit moves the batch normalization statistics away from identity
+    rng = np.random.default_rng(0)
+    X = rng.random((512, input_dim), dtype=np.float32)
+    y = rng.random((512, 1), dtype=np.float32)
+    model.fit(X, y, epochs=2, batch_size=64, verbose=0)
+    return model
+
+
+def sample_features(n_samples: int, input_dim: int = INPUT_DIM) -> np.ndarray:
+    """Generate one-hot-like feature rows with a few scaled numeric columns."""
+    rng = np.random.default_rng(1)
+    X = (rng.random((n_samples, input_dim)) < 0.05).astype(np.float32)
+    X[:, :3] = rng.normal(size=(n_samples, 3))
+    return X
+
+
+@pytest.fixture(scope="module", params=["carrier", "tender", "order_volume"])
+def exported_model(request):
+    """Build, export and yield (keras_model, model_dir) for each architecture."""
+    pytest.importorskip("tensorflow")
+    with tempfile.TemporaryDirectory() as model_dir:
+        model = build_network(request.param)
+        model.save(os.path.join(model_dir, "model.keras"))
+        export_inference_artifacts(model, model_dir)
+        yield model, model_dir
+
+
+def test_numpy_backend_matches_keras(exported_model):
+    keras_model, model_dir = exported_model
+    X = sample_features(256)
+
+    numpy_model = load_inference_model(model_dir, "numpy")
+    assert isinstance(numpy_model, NumpyInferenceModel)
+
+    expected = keras_model.predict(X, verbose=0)
+    actual = numpy_model.predict(X)
+    assert actual.shape == expected.shape
+    assert np.max(np.abs(actual - expected)) < PARITY_TOLERANCE
+
+
+def test_onnx_backend_matches_keras(exported_model):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    keras_model, model_dir = exported_model
+    X = sample_features(256)
+
+    onnx_model = load_inference_model(model_dir, "onnx")
+    assert isinstance(onnx_model, OnnxInferenceModel)
+
+    expected = keras_model.predict(X, verbose=0)
+    actual = onnx_model.predict(X)
+    assert actual.shape == expected.shape
+    assert np.max(np.abs(actual - expected)) < PARITY_TOLERANCE
+
+
+def test_single_row_predictions(exported_model):
+    keras_model, model_dir = exported_model
+    X = sample_features(1)
+
+    numpy_model = load_inference_model(model_dir, "numpy")
+    assert numpy_model.predict(X).shape == (1, 1)
+    assert abs(numpy_model.predict(X)[0][0] - keras_model.predict(X, verbose=0)[0][0]) < PARITY_TOLERANCE
+
+
+def test_xla_wrapper_matches_keras(exported_model):
+    keras_model, _ = exported_model
+    xla_model = XLAInferenceModel(keras_model)
+
+    # Exact bucket sizes, sizes that need padding, and a multi-chunk batch
+    for n_samples in (1, 5, 64, 100, BATCH_BUCKETS[-1] + 3):
+        X = sample_features(n_samples)
+        expected = keras_model.predict(X, verbose=0)
+        actual = xla_model.predict(X)
+        assert actual.shape == expected.shape
+        assert np.max(np.abs(actual - expected)) < PARITY_TOLERANCE
+
+
+def test_xla_wrapper_does_not_retrace(exported_model):
+    keras_model, _ = exported_model
+    xla_model = XLAInferenceModel(keras_model)
+
+    for n_samples in (1, 3, 8, 50, 300, 2000):
+        xla_model.predict(sample_features(n_samples))
+
+    for function in xla_model._functions.values():
+        assert function.experimental_get_tracing_count() == 1
+
+
+def time_predict(model, X: np.ndarray, repeats: int) -> float:
+    """Return the median latency of ``model.predict(X)`` in milliseconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X, verbose=0)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def benchmark_backends(batch_sizes=(1, 8, 64, 512, 4096), repeats: int = 50) -> None:
+    """Print median predict latency per backend and batch size."""
+    with tempfile.TemporaryDirectory() as model_dir:
+        keras_model = build_network("carrier")
+        keras_model.save(os.path.join(model_dir, "model.keras"))
+        export_inference_artifacts(keras_model, model_dir)
+
+        backends = {
+            "keras": keras_model,
+            "xla": XLAInferenceModel(keras_model),
+            "numpy": load_inference_model(model_dir, "numpy")
+        }
+        try:
+            backends["onnx"] = OnnxInferenceModel(os.path.join(model_dir, "model.onnx"))
+        except Exception as e:
+            logger.warning(f"Skipping ONNX benchmark: {str(e)}")
+
+        header = f"{'batch':>6} " + " ".join(f"{name + ' ms':>12}" for name in backends)
+        print(header)
+        print("-" * len(header))
+        for batch_size in batch_sizes:
+            X = sample_features(batch_size)
+            for model in backends.values():
+                model.predict(X, verbose=0)  # warm up
+            row = [time_predict(model, X, repeats) for model in backends.values()]
+            print(f"{batch_size:>6} " + " ".join(f"{latency:>12.3f}" for latency in row))
+
+
+def main():
+    """Run the latency benchmark."""
+    logger.info("Benchmarking inference backends against plain Keras predict")
+    benchmark_backends()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the inference thread and batch size autotuner.
+
+Batched predictions must match unbatched ones, the thread grid must stay
+within the cores per worker, and a tuning run must benchmark the registered
+models in worker processes, store the chosen setting per host and apply it.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+
+import numpy as np
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import build_dense_layers, register_model
+from models.inference import INFERENCE_CONFIG, NumpyInferenceModel, configure_inference, save_numpy_weights
+
+
+@pytest.fixture
+def reset_inference_config():
+    yield
+    configure_inference()
+
+
+def test_batched_predictions_match(reset_inference_config):
+    model = NumpyInferenceModel(build_dense_layers(input_dim=40))
+    x = np.random.default_rng(0).standard_normal((1000, 40)).astype(np.float32)
+    expected = model.predict(x)
+
+    np.testing.assert_allclose(model.predict(x, batch_size=64), expected, rtol=1e-5, atol=1e-6)
+    configure_inference(intra_op_threads=1, batch_size=300)
+    assert INFERENCE_CONFIG == {"intra_op_threads": 1, "inter_op_threads": None, "batch_size": 300}
+    np.testing.assert_allclose(model.predict(x), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_thread_grid_and_choice():
+    pytest.importorskip("pydantic_settings")
+    from services.inference_tuner import choose_best, thread_grid
+
+    assert thread_grid(8, 1, "numpy") == [(1, 1), (2, 1), (4, 1), (8, 1)]
+    assert thread_grid(12, 1, "numpy") == [(1, 1), (2, 1), (4, 1), (8, 1), (12, 1)]
+    assert thread_grid(8, 3, "keras") == [(1, 1), (1, 2), (2, 1), (2, 2)]
+    assert thread_grid(2, 4, "keras") == [(1, 1)]
+
+    def result(intra, batch, rate):
+        return {"intra_op_threads": intra, "inter_op_threads": 1, "batch_size": batch, "rows_per_second": rate}
+
+    # Near ties go to fewer threads, then to smaller batches
+    assert choose_best([result(1, 4096, 100), result(4, 4096, 103), result(2, 1024, 180)]) == result(2, 1024, 180)
+    assert choose_best([result(2, 4096, 180), result(2, 1024, 176), result(8, 256, 181)]) == result(2, 1024, 176)
+
+
+def test_tuning_is_stored_per_host_and_applied(workspace, reset_inference_config):
+    from services.inference_tuner import AUTOTUNE_BATCH_SIZES, TUNING_FILE, InferenceTuner, thread_grid
+
+    tuner = InferenceTuner(backend="numpy", workers=2)
+    assert tuner.tune() is None
+    assert tuner.diagnostics()["status"] == "not_tuned"
+
+    register_model(workspace / "tender_performance_1", "tender_performance", model_id="tender_performance_1", weights=build_dense_layers(input_dim=30))
+    register_model(workspace / "carrier_performance_1", "carrier_performance", model_id="carrier_performance_1", weights=build_dense_layers(input_dim=50))
+    tuner = InferenceTuner(backend="numpy", workers=2)
+
+    tuning = tuner.ensure_tuned()
+
+    assert tuning["host"] == socket.gethostname()
+    assert tuning["models"] == ["carrier_performance_1", "tender_performance_1"]
+    assert tuning["workers"] == 2
+    assert len(tuning["results"]) == len(AUTOTUNE_BATCH_SIZES) * len(thread_grid(tuning["cpu_count"], 2, "numpy"))
+    assert all(result["rows_per_second"] > 0 for result in tuning["results"])
+    assert INFERENCE_CONFIG == {key: tuning[key] for key in ("intra_op_threads", "inter_op_threads", "batch_size")}
+    assert not tuner.is_tuning()
+
+    # Stored per host, and reused while cores, workers, backend and models are unchanged
+    with open(workspace / "data" / "models" / TUNING_FILE) as f:
+        assert json.load(f)["hosts"][socket.gethostname()]["tuned_at"] == tuning["tuned_at"]
+    assert InferenceTuner(backend="numpy", workers=2).ensure_tuned()["tuned_at"] == tuning["tuned_at"]
+    assert InferenceTuner(backend="numpy", workers=2).diagnostics()["status"] == "tuned"
+    assert InferenceTuner(backend="numpy", workers=3).diagnostics()["status"] == "outdated"
+
+    register_model(workspace / "order_volume_1", "order_volume", model_id="order_volume_1", weights=build_dense_layers(input_dim=20))
+    assert InferenceTuner(backend="numpy", workers=2).diagnostics()["status"] == "outdated"
+
+
+def test_diagnostics_endpoint(workspace, reset_inference_config):
+    import asyncio
+    from api.diagnostics import get_inference_diagnostics
+
+    diagnostics = asyncio.run(get_inference_diagnostics())
+    assert diagnostics["status"] == "not_tuned"
+    assert diagnostics["host"]["host"] == socket.gethostname()
+    assert diagnostics["applied"] == {"intra_op_threads": None, "inter_op_threads": None, "batch_size": None}
+    assert diagnostics["tuning"] is None
+
+
+def main():
+    """Time one tender-sized network over the batch sizes and thread settings of this host."""
+    import tempfile
+    from services.inference_tuner import AUTOTUNE_BATCH_SIZES, benchmark_setting, cpu_count, thread_grid
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        save_numpy_weights(build_dense_layers(input_dim=200), os.path.join(model_dir, "model_weights.npz"))
+        start = time.perf_counter()
+        for intra_op_threads, inter_op_threads in thread_grid(cpu_count(), 1, "numpy"):
+            for result in benchmark_setting([model_dir], "numpy", intra_op_threads, inter_op_threads):
+                print(f"{intra_op_threads} threads, batch {result['batch_size']:>6}: "
+                      f"{result['rows_per_second']:>12,.0f} rows/s")
+        print(f"{len(AUTOTUNE_BATCH_SIZES)} batch sizes on {cpu_count()} cores in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
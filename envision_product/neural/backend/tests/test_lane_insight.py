@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for the lane insight endpoint's lane indexes and model fan-out.
+
+A lane insight looks a lane up in the stored predictions of the latest
+order volume, tender performance and carrier performance models. The lookups
+run concurrently on cached lane indexes and must return what filter_by_lane
+returns on the full prediction files.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+
+import numpy as np
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import register_model
+from services.lane_index import LaneIndex, clear_lane_indexes, load_lane_index
+from utils.lane_utils import filter_by_lane
+
+CITIES = ["Dallas", "St. Louis", "ST LOUIS", "Chicago", "New-York", "Toronto"]
+CARRIERS = ["FDEG", "fdeg", "UPSN", "ODFL"]
+
+
+def build_forecast(rows: int, seed: int = 0):
+    """Order volume forecast records."""
+    rng = np.random.default_rng(seed)
+    return [{
+        "SOURCE CITY": str(rng.choice(CITIES)), "DESTINATION CITY": str(rng.choice(CITIES)),
+        "ORDER TYPE": str(rng.choice(["FTL", "ltl"])), "PREDICTION DATE": f"2025-{rng.integers(1, 13):02d}",
+        "PREDICTED ORDER VOLUME": int(rng.integers(0, 300))
+    } for _ in range(rows)]
+
+
+def build_performance(rows: int, seed: int = 0):
+    """Carrier performance prediction records."""
+    rng = np.random.default_rng(seed)
+    return [{
+        "carrier": str(rng.choice(CARRIERS)), "source_city": str(rng.choice(CITIES)),
+        "dest_city": str(rng.choice(CITIES)), "predicted_performance": float(rng.uniform(50, 100))
+    } for _ in range(rows)]
+
+
+def test_lookups_match_filter_by_lane():
+    forecast, performance = build_forecast(600), build_performance(600, seed=1)
+    forecast_index, performance_index = LaneIndex(forecast), LaneIndex(performance)
+
+    for source in CITIES + ["Nowhere"]:
+        for destination in CITIES:
+            assert forecast_index.lookup(source, destination) == filter_by_lane(
+                forecast, source_city=source, destination_city=destination)
+            assert forecast_index.lookup(source, destination, order_type="LTL") == filter_by_lane(
+                forecast, source_city=source, destination_city=destination, order_type="LTL")
+            for carrier in ["fdeg", "UPSN", "NONE"]:
+                assert performance_index.lookup(source, destination, carrier=carrier) == filter_by_lane(
+                    performance, source_city=source, destination_city=destination, carrier=carrier)
+
+    assert LaneIndex([]).lookup("Dallas", "Chicago") == []
+
+
+def test_lane_indexes_are_cached_until_the_file_changes(tmp_path):
+    clear_lane_indexes()
+    path = tmp_path / "prediction_data.json"
+    path.write_text(json.dumps({"predictions": build_forecast(50)}))
+
+    index = load_lane_index(path)
+    assert load_lane_index(path) is index
+
+    path.write_text(json.dumps({"predictions": build_forecast(80, seed=2)}))
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    rebuilt = load_lane_index(path)
+    assert rebuilt is not index and len(rebuilt) == 80
+
+
+@pytest.fixture
+def prediction_service(workspace):
+    """Prediction service with an order volume and a carrier performance model and their predictions."""
+    from services.prediction_service import PredictionService
+
+    clear_lane_indexes()
+    for model_type in ("order_volume", "carrier_performance"):
+        register_model(workspace / model_type, model_type, model_id=f"{model_type}_1")
+    service = PredictionService()
+    service.save_prediction({"model_id": "order_volume_1", "predictions": build_forecast(400)})
+    service.save_prediction({"model_id": "carrier_performance_1", "predictions": build_performance(400)})
+    return service
+
+
+def test_insight_combines_the_latest_model_of_each_type(prediction_service):
+    from services.lane_insight_service import LaneInsightService
+
+    insight = asyncio.run(LaneInsightService(prediction_service).get_lane_insight("st louis", "Chicago", carrier="FDEG"))
+    sources = insight["sources"]
+
+    assert list(sources) == ["order_volume", "tender_performance", "carrier_performance"]
+    assert sources["tender_performance"]["status"] == "no_model"
+
+    forecast = sources["order_volume"]
+    assert forecast["status"] == "ok" and forecast["model_id"] == "order_volume_1"
+    assert forecast["predictions"] == filter_by_lane(build_forecast(400), source_city="st louis", destination_city="Chicago")
+    assert forecast["summary"]["total_volume"] == sum(p["PREDICTED ORDER VOLUME"] for p in forecast["predictions"])
+
+    performance = sources["carrier_performance"]
+    assert performance["predictions"] == filter_by_lane(
+        build_performance(400), source_city="st louis", destination_city="Chicago", carrier="FDEG")
+    assert performance["summary"]["carrier_count"] == 2  # FDEG and fdeg
+
+
+def test_model_types_are_queried_concurrently(prediction_service, monkeypatch):
+    import services.lane_insight_service as lane_insight_service
+
+    def slow_index(path):
+        time.sleep(0.3)
+        return load_lane_index(path)
+
+    def failing_index(path):
+        raise OSError("disk error")
+
+    monkeypatch.setattr(lane_insight_service, "load_lane_index", slow_index)
+    insight = asyncio.run(lane_insight_service.LaneInsightService(prediction_service).get_lane_insight("Dallas", "Toronto"))
+    assert insight["sources"]["order_volume"]["elapsed_ms"] >= 300
+    assert insight["sources"]["carrier_performance"]["elapsed_ms"] >= 300
+    assert insight["elapsed_ms"] < 550
+
+    monkeypatch.setattr(lane_insight_service, "load_lane_index", failing_index)
+    insight = asyncio.run(lane_insight_service.LaneInsightService(prediction_service).get_lane_insight("Dallas", "Toronto"))
+    assert insight["sources"]["order_volume"] == {
+        "model_id": "order_volume_1", "status": "error", "detail": "disk error",
+        "elapsed_ms": insight["sources"]["order_volume"]["elapsed_ms"]
+    }
+
+
+def main():
+    """Compare filtering a loaded 500k-row prediction file per lane with a lane index lookup."""
+    performance = build_performance(500_000)
+
+    start = time.perf_counter()
+    filtered = filter_by_lane(performance, source_city="Dallas", destination_city="Toronto", carrier="UPSN")
+    filter_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = LaneIndex(performance)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    looked_up = index.lookup("Dallas", "Toronto", carrier="UPSN")
+    lookup_seconds = time.perf_counter() - start
+
+    assert looked_up == filtered
+    print(f"{len(performance):,} predictions, {len(filtered):,} on the lane")
+    print(f"filter_by_lane: {filter_seconds * 1000:.0f} ms")
+    print(f"lane index: built once in {build_seconds * 1000:.0f} ms, lookup {lookup_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Tests for columnar lane handling.
+
+filter_by_lane, group_by_lane and batch_standardize_lane_fields run on
+LaneFrame; their results must match the per-record functions (is_lane_match,
+get_lane_id, standardize_lane_fields) on records mixing field name
+variations, capitalization, punctuation and missing or empty values.
+"""
+
+import os
+import sys
+import time
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.lane_utils import (
+    LaneFrame, batch_standardize_lane_fields, filter_by_lane, get_lane_id, group_by_lane,
+    is_lane_match, normalize_city_name, standardize_lane_fields
+)
+
+CITIES = ["St. Louis", "ST LOUIS", "st-louis", "Elwood, IL", "ELWOOD IL", "Joliet", "", None, 12]
+CARRIERS = ["RBTW", "rbtw", "FDEG", "A_B", "", None]
+ORDER_TYPES = ["FTL", "ftl", "LTL", "B", None]
+
+
+def build_records(count: int, seed: int = 0):
+    """Records with mixed lane field variations, as different sources produce them."""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        record = {"predicted_performance": i}
+        record[rng.choice(["source_city", "SOURCE CITY", "origin"])] = rng.choice(CITIES)
+        if rng.random() < 0.3:
+            # Lower-priority variation alongside the first
+            record["SOURCE"] = rng.choice(CITIES)
+        record[rng.choice(["dest_city", "DESTINATION CITY", "destination_city"])] = rng.choice(CITIES)
+        if rng.random() < 0.9:
+            record[rng.choice(["carrier", "CARRIER"])] = rng.choice(CARRIERS)
+        if rng.random() < 0.7:
+            record[rng.choice(["order_type", "ORDER TYPE"])] = rng.choice(ORDER_TYPES)
+        records.append(record)
+    return records
+
+
+@pytest.mark.parametrize("criteria", [
+    {"source_city": "st louis"},
+    {"source_city": "Elwood IL", "destination_city": "ST. LOUIS", "carrier": "RBTW"},
+    {"destination_city": "joliet", "order_type": "ftl"},
+    {"carrier": "a_b"},
+    {"source_city": "12"},
+    {"source_city": ",", "carrier": "fdeg"},
+    {"source_city": "Nowhere"},
+])
+def test_filter_by_lane_matches_per_record_matching(criteria):
+    records = build_records(3_000)
+    norm = {
+        key: normalize_city_name(value) if key.endswith("city") else value
+        for key, value in criteria.items()
+    }
+    expected = [record for record in records if is_lane_match(record, **norm)]
+    assert filter_by_lane(records, **criteria) == expected
+
+
+@pytest.mark.parametrize("include_carrier,include_order_type", [(True, False), (False, False), (True, True)])
+def test_group_by_lane_matches_lane_ids(include_carrier, include_order_type):
+    records = build_records(3_000, seed=1)
+    expected = {}
+    for record in records:
+        lane_id = get_lane_id(record, include_carrier=include_carrier, include_order_type=include_order_type)
+        if lane_id:
+            expected.setdefault(lane_id, []).append(record)
+
+    grouped = group_by_lane(records, include_carrier=include_carrier, include_order_type=include_order_type)
+    assert list(grouped) == list(expected)
+    assert grouped == expected
+
+
+def test_batch_standardize_matches_per_record():
+    records = build_records(1_000, seed=2)
+    assert batch_standardize_lane_fields(records) == [standardize_lane_fields(record) for record in records]
+
+
+def test_nan_values_are_kept_like_the_per_record_functions():
+    # Records from DataFrame.to_dict carry NaN for missing cells; only None is missing
+    records = build_records(2_000, seed=3)
+    rng = random.Random(3)
+    for record in records:
+        for field in list(record):
+            if field != "predicted_performance" and rng.random() < 0.2:
+                record[field] = rng.choice([np.nan, float("nan"), None])
+
+    expected = {}
+    for record in records:
+        expected.setdefault(get_lane_id(record, include_order_type=False), []).append(record)
+    expected.pop("", None)
+    assert group_by_lane(records) == expected
+    assert "NAN" in {lane_id.split("_")[0] for lane_id in expected}
+    assert filter_by_lane(records, source_city="nan") == [
+        record for record in records if is_lane_match(record, source_city="NAN")]
+    assert batch_standardize_lane_fields(records) == [standardize_lane_fields(record) for record in records]
+
+
+def test_lane_frame_from_dataframe():
+    frame = pd.DataFrame({
+        "SOURCE CITY": ["Elwood, IL", None, "joliet"],
+        "SOURCE": ["X", "Joliet", "Y"],
+        "DESTINATION CITY": ["St. Louis", "ST LOUIS", np.nan],
+        "CARRIER": ["rbtw", "RBTW", "FDEG"]
+    }, index=[10, 20, 30])
+    lanes = LaneFrame.from_frame(frame)
+
+    assert lanes.mask(source_city="joliet", destination_city="st louis", carrier="RBTW").tolist() == [False, True, False]
+    assert lanes.group_positions() == {
+        "ELWOOD IL_ST LOUIS_rbtw": [0], "JOLIET_ST LOUIS_RBTW": [1]
+    }
+
+
+def main():
+    """Compare per-record and columnar lane filtering and grouping at 1M predictions."""
+    rng = np.random.default_rng(0)
+    count = 1_000_000
+    cities = [f"City {i}, ST" for i in range(300)]
+    carriers = [f"CAR{i}" for i in range(40)]
+    records = [
+        {"carrier": carrier, "source_city": source, "dest_city": dest, "predicted_performance": 90.0}
+        for carrier, source, dest in zip(rng.choice(carriers, count).tolist(), rng.choice(cities, count).tolist(),
+                                         rng.choice(cities, count).tolist())
+    ]
+
+    start = time.perf_counter()
+    norm_source, norm_dest = normalize_city_name("city 5 st"), normalize_city_name("City 7, ST")
+    expected = [record for record in records if is_lane_match(record, source_city=norm_source, destination_city=norm_dest)]
+    per_record_filter = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert filter_by_lane(records, source_city="city 5 st", destination_city="City 7, ST") == expected
+    columnar_filter = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected_lanes = {}
+    for record in records:
+        expected_lanes.setdefault(get_lane_id(record), []).append(record)
+    per_record_group = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert group_by_lane(records) == expected_lanes
+    columnar_group = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lanes = LaneFrame.from_records(records)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    lanes.mask(source_city="city 5 st", destination_city="City 7, ST")
+    reused_filter = time.perf_counter() - start
+    start = time.perf_counter()
+    groups = lanes.group_positions()
+    reused_group = time.perf_counter() - start
+
+    print(f"{count:,} predictions")
+    print(f"filter: per-record {per_record_filter:.2f}s, columnar {columnar_filter:.2f}s "
+          f"(LaneFrame build {build:.2f}s, then {reused_filter * 1000:.1f}ms per filter)")
+    print(f"group:  per-record {per_record_group:.2f}s, columnar {columnar_group:.2f}s "
+          f"({len(groups):,} lanes; {reused_group:.2f}s for positions on a built LaneFrame)")
+
+
+if __name__ == "__main__":
+    main()
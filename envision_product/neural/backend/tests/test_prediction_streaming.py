@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming prediction listings and downloads.
+
+Stored predictions must be decoded record by record, whatever the read block
+size, and the listing and download endpoints must stream the same filtered,
+simplified records the stored JSON holds.
+"""
+
+import io
+import os
+import sys
+import gzip
+import json
+import time
+import asyncio
+
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic_settings")
+
+from conftest import build_tender_predictions, register_model
+from utils.streaming import iter_json_array, lane_filter, select_records
+
+
+def read_body(response) -> bytes:
+    """Collect a StreamingResponse body."""
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("block_size", [1, 13, 64 * 1024])
+def test_iter_json_array_matches_json_load(tmp_path, block_size):
+    document = {"model_id": "m", "predictions": build_tender_predictions(200), "metrics": {"mae": 1e-3}}
+    path = tmp_path / "prediction_data.json"
+    path.write_text(json.dumps(document, indent=2))
+
+    fields = {}
+    assert list(iter_json_array(path, fields=fields, block_size=block_size)) == document["predictions"]
+    assert fields == {"model_id": "m", "metrics": {"mae": 1e-3}}
+
+
+def test_tender_download_streams_filtered_simplified_csv(tender_model):
+    from api.predictions import download_tender_performance_predictions
+    from services.prediction_service import PredictionService
+
+    model_id, predictions = tender_model
+    response = asyncio.run(download_tender_performance_predictions(
+        model_id=model_id, format="csv.gz", simplified=True, source_city="elwood",
+        dest_city="st louis", carrier=None, prediction_service=PredictionService()
+    ))
+    assert "filtered_simplified.csv.gz" in response.headers["content-disposition"]
+
+    downloaded = pd.read_csv(io.BytesIO(gzip.decompress(read_body(response))))
+    expected = [p for p in predictions if p["source_city"] == "ELWOOD" and p["dest_city"] == "St. Louis"]
+    assert len(downloaded) == len(expected) == 500
+    assert list(downloaded.columns) == ["carrier", "source_city", "dest_city", "predicted_performance"]
+    assert downloaded["predicted_performance"].tolist() == [p["predicted_performance"] for p in expected]
+
+
+def test_tender_listing_streams_every_prediction_as_ndjson(tender_model):
+    from api.predictions import get_tender_performance_predictions
+    from services.prediction_service import PredictionService
+
+    model_id, predictions = tender_model
+    response = asyncio.run(get_tender_performance_predictions(
+        model_id=model_id, simplified=False, format="ndjson", source_city=None, dest_city=None,
+        carrier="fdeg", prediction_service=PredictionService()
+    ))
+    assert response.media_type == "application/x-ndjson"
+
+    lines = read_body(response).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [p for p in predictions if p["carrier"] == "FDEG"]
+
+
+def test_tender_listing_pages_the_stored_predictions(tender_model):
+    from api.predictions import get_tender_performance_predictions
+    from services.prediction_service import PredictionService
+    from utils.streaming import simplify_prediction
+
+    model_id, predictions = tender_model
+    response = asyncio.run(get_tender_performance_predictions(
+        model_id=model_id, simplified=True, format="json", source_city=None, dest_city=None,
+        carrier="fdeg", prediction_service=PredictionService()
+    ))
+
+    expected = [simplify_prediction(p) for p in predictions if p["carrier"] == "FDEG"]
+    assert response["prediction_count"] == len(expected) == 1_000
+    assert response["predictions"] == expected[:100]
+
+
+def test_carrier_listing_pages_the_latest_predictions(workspace):
+    from api.predictions import get_carrier_performance_predictions
+    from services.prediction_service import PredictionService
+
+    model_id = register_model(workspace / "trained", "carrier_performance")
+    predictions = build_tender_predictions(3_000)
+    prediction_id = PredictionService().save_prediction({"model_id": model_id, "predictions": predictions})
+
+    response = asyncio.run(get_carrier_performance_predictions(
+        model_id=model_id, simplified=True, format="json", source_city="joliet", dest_city=None,
+        carrier=None, prediction_service=PredictionService()
+    ))
+
+    expected = [p for p in predictions if p["source_city"] == "JOLIET"]
+    assert response["prediction_id"] == prediction_id and response["data"]["model_id"] == model_id
+    assert response["data"]["prediction_count"] == len(expected) == 1_500
+    assert response["data"]["predictions"][0] == {
+        "carrier": expected[0]["carrier"], "source_city": "JOLIET", "dest_city": expected[0]["dest_city"],
+        "predicted_performance": expected[0]["predicted_performance"],
+        "predicted_ontime_performance": expected[0]["predicted_performance"]
+    }
+    assert [p["carrier"] for p in response["data"]["predictions"]] == [p["carrier"] for p in expected[:100]]
+
+
+def main():
+    """Compare time to first record of json.load and the streaming reader."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "prediction_data.json")
+        with open(path, "w") as f:
+            json.dump({"predictions": build_tender_predictions(1_000_000)}, f)
+
+        start = time.perf_counter()
+        with open(path) as f:
+            json.load(f)["predictions"][0]
+        loaded = time.perf_counter() - start
+
+        start = time.perf_counter()
+        next(iter(select_records(iter_json_array(path), lane_filter(carrier="FDEG"), simplify=True)))
+        streamed = time.perf_counter() - start
+        print(f"First record of 1,000,000: json.load {loaded:.2f}s, streamed {streamed * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for categorical preprocessing in the model classes.
+
+Loading lane columns as categoricals and preprocessing on their codes must
+give the same encoders, features and future predictions as the object-string
+path it replaces.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("sklearn")
+
+from conftest import LinearModel
+from models.features import fit_one_hot, one_hot_block
+from models.preprocessing import as_categoricals, group_other, lane_codes, top_categories
+
+
+def build_orders(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Order volume rows with many destinations (so that some are grouped as OTHER)."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "ORDER MONTH": rng.choice([f"2024 {month:02d}" for month in range(1, 13)], rows),
+        "SOURCE CITY": rng.choice([f"SOURCE{i}" for i in range(20)], rows),
+        "DESTINATION CITY": rng.choice([f"DEST{i}" for i in range(90)], rows),
+        "ORDER TYPE": rng.choice(["FTL", "LTL", "IMDL"], rows),
+        "ORDER VOLUME": rng.integers(0, 500, rows)
+    })
+
+
+def test_top_categories_and_grouping_match_object_strings():
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        values = pd.Series(rng.choice([f"C{i}" for i in range(70)], rng.integers(20, 300)))
+        categorical = values.astype("category")
+
+        top = values.value_counts().nlargest(50).index.tolist()
+        assert top_categories(categorical, 50) == top
+
+        grouped = group_other(categorical, top)
+        assert isinstance(grouped.dtype, pd.CategoricalDtype)
+        assert grouped.astype(object).tolist() == values.apply(lambda x: x if x in top else "OTHER").tolist()
+
+
+def test_fit_one_hot_matches_fit_transform():
+    from sklearn.preprocessing import OneHotEncoder
+
+    values = pd.Series(["b", "a", "c", "a", "b"], dtype="category").cat.add_categories(["unused"])
+    expected_encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
+    expected = expected_encoder.fit_transform(values.astype(object).to_frame("COL"))
+
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
+    np.testing.assert_array_equal(fit_one_hot(encoder, values, "COL"), expected)
+    assert encoder.categories_[0].tolist() == expected_encoder.categories_[0].tolist()
+
+    unseen = pd.Series(["c", "z", "a"], dtype="category")
+    block, names = one_hot_block(encoder, unseen, "COL", "COL")
+    np.testing.assert_array_equal(block, expected_encoder.transform(unseen.astype(object).to_frame("COL")))
+    assert names == ["COL_0", "COL_1", "COL_2"]
+
+
+def test_lane_codes_number_lanes_in_order_of_appearance():
+    frame = as_categoricals(pd.DataFrame({
+        "SOURCE CITY": ["A", "B", "A", "A"], "DESTINATION CITY": ["X", "Y", "X", "Y"]
+    }))
+    assert lane_codes(frame, ["SOURCE CITY", "DESTINATION CITY"]).tolist() == [0, 1, 0, 2]
+
+
+def test_order_volume_preprocessing_on_categoricals_matches_strings():
+    from models.order_volume_model import OrderVolumeModel
+
+    orders = build_orders(2_000)
+    object_model, categorical_model = OrderVolumeModel(), OrderVolumeModel()
+    object_model.raw_data = orders.copy()
+    categorical_model.raw_data = as_categoricals(orders.copy())
+
+    expected = object_model.preprocess_data()
+    processed = categorical_model.preprocess_data()
+
+    pd.testing.assert_frame_equal(processed, expected)
+    assert categorical_model.dest_encoder.categories_[0].tolist() == object_model.dest_encoder.categories_[0].tolist()
+    assert categorical_model.raw_data["LANE_ID"].nunique() == orders.groupby(
+        ["SOURCE CITY", "DESTINATION CITY", "ORDER TYPE"]).ngroups
+
+
+def test_predict_future_matches_per_lane_predictions():
+    from models.order_volume_model import OrderVolumeModel
+
+    model = OrderVolumeModel()
+    model.raw_data = as_categoricals(build_orders(120))
+    processed = model.preprocess_data()
+    model.model = LinearModel(processed.shape[1] - 1)
+
+    predictions = model.predict_future(months=3)
+
+    lanes = model.raw_data[["SOURCE CITY", "DESTINATION CITY", "ORDER TYPE"]].astype(object).drop_duplicates()
+    assert len(predictions) == 3 * len(lanes)
+    assert predictions["PREDICTION DATE"].tolist()[:3] == ["2025-01", "2025-02", "2025-03"]
+
+    # Reference: one lane and month at a time, as predict_future used to
+    top_dests = model.dest_encoder.categories_[0]
+    expected = []
+    for source, destination, order_type in lanes.itertuples(index=False):
+        for year, month in [(2025, 1), (2025, 2), (2025, 3)]:
+            features = np.hstack([
+                model.scaler.transform(pd.DataFrame({"YEAR": [year], "MONTH": [month]})),
+                model.source_encoder.transform(pd.DataFrame({"SOURCE CITY": [source]})),
+                model.dest_encoder.transform(pd.DataFrame({
+                    "DEST_CITY_GROUPED": [destination if destination in top_dests else "OTHER"]
+                })),
+                model.type_encoder.transform(pd.DataFrame({"ORDER TYPE": [order_type]}))
+            ])
+            expected.append((source, destination, order_type, max(round(model.model.predict(features)[0][0]), 0)))
+
+    assert list(predictions[["SOURCE CITY", "DESTINATION CITY", "ORDER TYPE", "PREDICTED ORDER VOLUME"]]
+                .itertuples(index=False, name=None)) == expected
+
+
+def main():
+    """Compare object-string and categorical preprocessing of 1M order rows."""
+    from models.order_volume_model import OrderVolumeModel
+
+    orders = build_orders(1_000_000)
+    object_model, categorical_model = OrderVolumeModel(), OrderVolumeModel()
+    object_model.raw_data = orders.copy()
+    categorical_model.raw_data = as_categoricals(orders.copy())
+
+    object_bytes = object_model.raw_data.memory_usage(deep=True).sum()
+    categorical_bytes = categorical_model.raw_data.memory_usage(deep=True).sum()
+
+    start = time.perf_counter()
+    object_model.preprocess_data()
+    object_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    categorical_model.preprocess_data()
+    categorical_seconds = time.perf_counter() - start
+
+    print(f"{len(orders):,} order rows")
+    print(f"raw_data memory: object {object_bytes / 1e6:.0f} MB, categorical {categorical_bytes / 1e6:.0f} MB")
+    print(f"preprocess_data: object {object_seconds:.2f}s, categorical {categorical_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
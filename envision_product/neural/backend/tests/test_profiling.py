@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass streaming data profiler.
+
+Profiling a file in chunks must give the same counts, min, max, mean and top
+values as pandas on the whole file, a median within the sketch's rank error,
+and previews must be cached by content hash.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.profiling import QuantileSketch, profile_chunks
+
+
+def build_frame(rows: int = 20_000, seed: int = 0) -> pd.DataFrame:
+    """Build a shipment-like frame with missing values."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "CARRIER": rng.choice(["RBTW", "FDEG", "UPSN", "ODFL", "SAIA", "ABFS"], rows, p=[0.3, 0.25, 0.2, 0.1, 0.1, 0.05]),
+        "SOURCE CITY": rng.choice([f"CITY{i}" for i in range(40)], rows),
+        "ORDER VOLUME": rng.integers(0, 500, rows),
+        "ON TIME PERCENTAGE": rng.normal(85, 10, rows)
+    })
+    df.loc[rng.random(rows) < 0.05, "ON TIME PERCENTAGE"] = np.nan
+    df.loc[rng.random(rows) < 0.02, "SOURCE CITY"] = np.nan
+    return df
+
+
+def chunked(df: pd.DataFrame, chunk_rows: int):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def test_chunked_profile_matches_pandas():
+    df = build_frame()
+    profile = profile_chunks(chunked(df, 1_500), max_workers=3)
+
+    assert profile.rows == len(df)
+    assert profile.sample_rows == df.head(10).to_dict(orient="records")
+    for column in ("ORDER VOLUME", "ON TIME PERCENTAGE"):
+        info = profile.columns[column].to_dict()
+        assert info["missing"] == df[column].isna().sum()
+        assert info["min"] == df[column].min() and info["max"] == df[column].max()
+        assert info["mean"] == pytest.approx(df[column].mean(), rel=1e-9)
+        # Within 1% of rank of the exact median
+        rank = (df[column].dropna() <= info["median"]).mean()
+        assert abs(rank - 0.5) < 0.01
+
+    for column in ("CARRIER", "SOURCE CITY"):
+        info = profile.columns[column].to_dict()
+        assert info["missing"] == df[column].isna().sum()
+        expected = df[column].value_counts().head(5)
+        assert info["top_values"] == {str(k): int(v) for k, v in expected.items()}
+
+
+def test_quantile_sketch_is_exact_when_small_and_bounded_when_large():
+    values = np.random.default_rng(1).random(1_000)
+    sketch = QuantileSketch()
+    sketch.update(values)
+    assert sketch.quantile(0.5) == pytest.approx(np.median(values))
+
+    large = np.random.default_rng(2).random(1_000_000)
+    merged = QuantileSketch()
+    for part in np.array_split(large, 50):
+        other = QuantileSketch()
+        other.update(part)
+        merged.merge(other)
+    assert sum(len(level) for level in merged.levels) < 4 * merged.size
+    assert abs(merged.quantile(0.5) - 0.5) < 0.01
+
+
+def test_preview_is_cached_by_content_hash(tmp_path, monkeypatch):
+    pytest.importorskip("pydantic_settings")
+    from services import data_processor
+    from services.data_processor import DataProcessor
+
+    csv_path = tmp_path / "upload.csv"
+    build_frame(2_000).to_csv(csv_path, index=False)
+    copy_path = tmp_path / "copy.csv"
+    copy_path.write_bytes(csv_path.read_bytes())
+
+    processor = DataProcessor(preview_path=str(tmp_path / "previews"))
+    first = processor.generate_preview("first", str(csv_path))
+    assert first["total_rows"] == 2_000 and "error" not in first
+
+    # The same content under another ID is served from the cache
+    monkeypatch.setattr(data_processor, "profile_chunks", None)
+    second = processor.generate_preview("second", str(copy_path))
+    assert second["file_id"] == "second"
+    assert second["column_info"] == first["column_info"]
+
+
+def main():
+    """Compare full-load and streaming profiling time on a large frame."""
+    df = build_frame(2_000_000)
+
+    start = time.perf_counter()
+    for column in df.columns:
+        if pd.api.types.is_numeric_dtype(df[column]):
+            df[column].min(), df[column].max(), df[column].mean(), df[column].median()
+        else:
+            df[column].value_counts().head(5)
+    full_load = time.perf_counter() - start
+
+    for workers in (1, 4):
+        start = time.perf_counter()
+        profile_chunks(chunked(df, 100_000), max_workers=workers)
+        streaming = time.perf_counter() - start
+        print(f"{workers} worker(s): streaming {streaming * 1000:.0f} ms vs full load {full_load * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for the prediction retention job.
+
+The most recent predictions of each model must stay as they are, older ones
+must be compressed and still be readable, and the predictions and score
+caches of deleted models must be removed, all accounted for in the report.
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import build_forecast_predictions, register_model
+
+
+def save_predictions(service, model_id: str, count: int, lanes: int = 200):
+    """Save ``count`` predictions of a model, oldest first, and return their IDs newest first."""
+    prediction_ids = []
+    for seed in range(count):
+        prediction_ids.append(service.save_prediction({"model_id": model_id,
+                                                       "predictions": build_forecast_predictions(lanes, 3, seed)}))
+        time.sleep(0.002)
+    return prediction_ids[::-1]
+
+
+def test_older_predictions_are_archived_and_still_readable(workspace):
+    from services.prediction_service import PredictionService
+    from services.retention_service import RETENTION_REPORT_FILE, RetentionService
+    from utils.archive import is_archived
+    from utils.rollups import ROLLUPS_FILE
+    from utils.streaming import iter_json_array
+
+    register_model(workspace / "ov1", "order_volume", model_id="ov1")
+    service = PredictionService(base_path=str(workspace / "predictions"))
+    prediction_ids = save_predictions(service, "ov1", 4)
+    expected = {prediction_id: service.get_prediction(prediction_id)["data"] for prediction_id in prediction_ids}
+
+    report = RetentionService(service, hot_count=2, codec="gzip").run()
+
+    assert report["archived"] == prediction_ids[2:]
+    assert report["deleted"] == []
+    assert report["reclaimed_bytes"] > 0
+    for prediction_id in prediction_ids:
+        prediction_dir = service.base_path / prediction_id
+        prediction = service.get_prediction(prediction_id)
+        assert prediction["data"] == expected[prediction_id]
+        assert list(iter_json_array(prediction["prediction_file"])) == expected[prediction_id]["predictions"]
+        if prediction_id in report["archived"]:
+            assert sorted(file.name for file in prediction_dir.iterdir()) == [
+                "prediction_data.csv.gz", "prediction_data.json.gz", ROLLUPS_FILE]
+            assert is_archived(prediction["prediction_file"])
+            assert prediction["archived"]["codec"] == "gzip"
+        else:
+            assert not is_archived(prediction["prediction_file"])
+            assert "archived" not in prediction
+
+    # The rollups of an archived prediction are still served, the report is stored
+    assert service.get_order_volume_rollup("ov1")["prediction_id"] == prediction_ids[0]
+    with open(service.base_path / RETENTION_REPORT_FILE) as f:
+        assert json.load(f)["archived"] == report["archived"]
+
+    # Archived predictions are not archived again, and metadata survives a restart
+    assert RetentionService(service, hot_count=2, codec="gzip").run()["archived"] == []
+    reloaded = PredictionService(base_path=str(workspace / "predictions"))
+    assert reloaded.get_prediction(prediction_ids[-1])["data"] == expected[prediction_ids[-1]]
+
+
+def test_predictions_of_deleted_models_are_removed(workspace):
+    import numpy as np
+    from services.prediction_service import PredictionService
+    from services.retention_service import RetentionService
+
+    register_model(workspace / "ov1", "order_volume", model_id="ov1")
+    service = PredictionService(base_path=str(workspace / "predictions"))
+    kept = save_predictions(service, "ov1", 1)
+    orphaned = save_predictions(service, "gone", 2)
+    score_cache_dir = service.base_path / "score_cache"
+    score_cache_dir.mkdir()
+    for model_id in ("ov1", "gone"):
+        np.savez(score_cache_dir / f"{model_id}.npz", keys=np.arange(1000))
+    orphaned_bytes = (sum(file.stat().st_size for prediction_id in orphaned
+                          for file in (service.base_path / prediction_id).iterdir())
+                      + (score_cache_dir / "gone.npz").stat().st_size)
+
+    dry_run = RetentionService(service, hot_count=1).run(dry_run=True)
+    assert sorted(dry_run["deleted"]) == sorted(orphaned)
+    assert dry_run["score_caches_deleted"] == ["gone"]
+    assert dry_run["reclaimed_bytes"] == 0
+    assert all((service.base_path / prediction_id).exists() for prediction_id in orphaned)
+
+    report = RetentionService(service, hot_count=1).run()
+
+    assert sorted(report["deleted"]) == sorted(orphaned)
+    assert report["reclaimed_bytes"] == orphaned_bytes
+    assert [p["prediction_id"] for p in service.list_predictions()] == kept
+    assert not any((service.base_path / prediction_id).exists() for prediction_id in orphaned)
+    assert sorted(file.name for file in score_cache_dir.iterdir()) == ["ov1.npz"]
+
+
+def test_predictions_saved_during_a_run_are_kept(workspace, monkeypatch):
+    from services.prediction_service import PredictionService
+    from services.retention_service import RetentionService
+
+    register_model(workspace / "ov1", "order_volume", model_id="ov1")
+    service = PredictionService(base_path=str(workspace / "predictions"))
+    prediction_ids = save_predictions(service, "ov1", 3)
+
+    # Another worker saves a prediction while the job archives
+    saved_meanwhile = []
+    archive_prediction = RetentionService._archive_prediction
+
+    def archive_and_save(self, prediction_id, metadata):
+        if not saved_meanwhile:
+            worker = PredictionService(base_path=str(workspace / "predictions"))
+            saved_meanwhile.append(worker.save_prediction({"model_id": "ov1",
+                                                           "predictions": build_forecast_predictions(10, 3)}))
+        return archive_prediction(self, prediction_id, metadata)
+
+    monkeypatch.setattr(RetentionService, "_archive_prediction", archive_and_save)
+    report = RetentionService(service, hot_count=1, codec="gzip").run()
+
+    assert report["archived"] == prediction_ids[1:]
+    stored = PredictionService(base_path=str(workspace / "predictions")).metadata["predictions"]
+    assert sorted(stored) == sorted(prediction_ids + saved_meanwhile)
+    assert all("archived" in stored[prediction_id] for prediction_id in report["archived"])
+
+
+def main():
+    """Report the bytes reclaimed by archiving 4 of 5 predictions of 6,000 rows each."""
+    import tempfile
+    from services.prediction_service import PredictionService
+    from services.retention_service import RetentionService
+
+    with tempfile.TemporaryDirectory() as workspace:
+        os.chdir(workspace)
+        register_model(Path(workspace) / "ov1", "order_volume", model_id="ov1")
+        service = PredictionService(base_path=os.path.join(workspace, "predictions"))
+        save_predictions(service, "ov1", 5, lanes=2_000)
+
+        retention = RetentionService(service, hot_count=1)
+        report = retention.run()
+        archived = [service.metadata["predictions"][prediction_id]["archived"] for prediction_id in report["archived"]]
+        original = sum(entry["original_bytes"] for entry in archived)
+
+        start = time.perf_counter()
+        service.get_prediction(report["archived"][0])
+        read_seconds = time.perf_counter() - start
+
+    print(f"archived {len(archived)} predictions with {retention.codec}: {original:,} -> "
+          f"{original - report['reclaimed_bytes']:,} bytes ({report['reclaimed_bytes'] / original:.0%} reclaimed) "
+          f"in {report['elapsed_seconds'] * 1000:.0f} ms")
+    print(f"read an archived prediction: {read_seconds * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the precomputed rollups of order volume forecasts.
+
+Saving an order volume prediction stores its totals by source, destination,
+order type, month and their pairs in ``rollups.json``; the rollup endpoint
+serves them from that file.
+"""
+
+import os
+import sys
+import json
+import time
+from collections import defaultdict
+
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import build_forecast_predictions
+from utils.rollups import DIMENSIONS, ROLLUPS, ROLLUPS_FILE, compute_rollups, parse_rollup, rollup_key
+
+
+def naive_rollup(predictions, dimensions):
+    totals, counts = defaultdict(int), defaultdict(int)
+    for row in predictions:
+        key = tuple(row[DIMENSIONS[name][0]] for name in dimensions)
+        totals[key] += row["PREDICTED ORDER VOLUME"]
+        counts[key] += 1
+    fields = [DIMENSIONS[name][1] for name in dimensions]
+    return [dict(zip(fields, key), total_volume=totals[key], prediction_count=counts[key]) for key in sorted(totals)]
+
+
+def test_rollups_match_a_per_row_sum():
+    predictions = build_forecast_predictions(120, 6)
+
+    rollups = compute_rollups(predictions)
+
+    assert set(rollups) == {rollup_key(dimensions) for dimensions in ROLLUPS}
+    assert len(rollups) == 1 + 4 + 6
+    for dimensions in ROLLUPS:
+        assert rollups[rollup_key(dimensions)] == naive_rollup(predictions, dimensions)
+    # Stored rows are plain JSON values
+    assert json.loads(json.dumps(rollups)) == rollups
+
+
+def test_parse_rollup_resolves_dimensions_in_any_order():
+    assert parse_rollup("month, Source") == "source,month"
+    assert parse_rollup("") == parse_rollup("total") == "total"
+
+    with pytest.raises(ValueError):
+        parse_rollup("carrier")
+    with pytest.raises(ValueError):
+        parse_rollup("source,destination,type")
+
+
+@pytest.fixture
+def prediction_service(workspace, monkeypatch):
+    from services.prediction_service import PredictionService
+
+    service = PredictionService(base_path=str(workspace / "predictions"))
+    monkeypatch.setattr(service, "_get_model_type", lambda model_id: "order_volume")
+    return service
+
+
+def test_saving_a_prediction_stores_its_rollups(prediction_service):
+    predictions = build_forecast_predictions(30, 3)
+    prediction_id = prediction_service.save_prediction({"model_id": "ov1", "predictions": predictions})
+
+    assert (prediction_service.base_path / prediction_id / ROLLUPS_FILE).exists()
+    result = prediction_service.get_order_volume_rollup("ov1", by="type,source")
+    assert result["prediction_id"] == prediction_id
+    assert result["by"] == "source,type"
+    assert result["rollup"] == naive_rollup(predictions, ("source", "type"))
+
+    assert prediction_service.get_order_volume_rollup("missing") is None
+    with pytest.raises(ValueError):
+        prediction_service.get_order_volume_rollup("ov1", by="carrier")
+
+
+def test_rollups_of_older_predictions_are_computed_on_request(prediction_service):
+    predictions = build_forecast_predictions(10, 2)
+    prediction_id = prediction_service.save_prediction({"model_id": "ov1", "predictions": predictions})
+    (prediction_service.base_path / prediction_id / ROLLUPS_FILE).unlink()
+
+    result = prediction_service.get_order_volume_rollup("ov1")
+
+    assert result["rollup"] == [{"total_volume": sum(row["PREDICTED ORDER VOLUME"] for row in predictions),
+                                 "prediction_count": len(predictions)}]
+    assert (prediction_service.base_path / prediction_id / ROLLUPS_FILE).exists()
+
+
+def main():
+    """Compare summing a stored 240k-row forecast per request with serving its stored rollup."""
+    import tempfile
+    from utils.rollups import read_rollup, write_rollups
+    from utils.streaming import iter_json_array
+
+    predictions = build_forecast_predictions(20_000, 12)
+    with tempfile.TemporaryDirectory() as prediction_dir:
+        prediction_file = os.path.join(prediction_dir, "prediction_data.json")
+        with open(prediction_file, "w") as f:
+            json.dump({"predictions": predictions}, f)
+
+        start = time.perf_counter()
+        naive = naive_rollup(iter_json_array(prediction_file), ("destination", "month"))
+        naive_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        write_rollups(prediction_dir, predictions)
+        write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        served = read_rollup(prediction_dir, "destination,month")
+        read_seconds = time.perf_counter() - start
+
+    assert served == naive
+    print(f"{len(predictions):,} predictions, rollup by destination and month ({len(served):,} rows)")
+    print(f"sum per request: {naive_seconds * 1000:.0f} ms")
+    print(f"precompute all {len(ROLLUPS)} rollups once: {write_seconds * 1000:.0f} ms, "
+          f"serve stored rollup: {read_seconds * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for publishing model weights for memory-mapped sharing across workers.
+
+A published directory must serve the same predictions as the source model
+from read-only memory-mapped tensors, carry the model's vocabulary and other
+files, and be republished when the source weights change.
+"""
+
+import os
+import sys
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import build_dense_layers
+from models.inference import NumpyInferenceModel, load_inference_model, save_numpy_weights
+from models.artifacts import VOCAB_FILE, load_vocabularies
+from models.shared_weights import (
+    SHARED_MANIFEST,
+    is_published,
+    map_shared_weights,
+    publish_model_directory,
+)
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """Model directory with exported weights, pickled encoders and metadata."""
+    from sklearn.preprocessing import OneHotEncoder
+    import pandas as pd
+
+    path = tmp_path / "models" / "tender_performance_20250101000000"
+    path.mkdir(parents=True)
+    (tmp_path / "shared").mkdir()
+    save_numpy_weights(build_dense_layers(), str(path / "model_weights.npz"))
+
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
+    encoder.fit(pd.DataFrame({"CARRIER": ["RBTW", "FDEG"]}))
+    with open(path / "encoders.pkl", "wb") as f:
+        pickle.dump({"carrier_encoder": encoder, "data_format": "legacy"}, f)
+    with open(path / "model_metadata.json", "w") as f:
+        json.dump({"model_type": "tender_performance"}, f)
+    return path
+
+
+def test_published_weights_match_source(model_dir, tmp_path):
+    pytest.importorskip("sklearn")
+    target = tmp_path / "shared" / model_dir.name
+    publish_model_directory(str(model_dir), str(target))
+
+    X = np.random.default_rng(1).random((32, 50), dtype=np.float32)
+    expected = load_inference_model(str(model_dir), "numpy").predict(X)
+
+    # The published directory is mapped whatever backend is requested
+    shared = load_inference_model(str(target), "keras")
+    assert isinstance(shared, NumpyInferenceModel)
+    np.testing.assert_allclose(shared.predict(X), expected, rtol=1e-6)
+
+
+def test_published_tensors_are_read_only_maps(model_dir, tmp_path):
+    pytest.importorskip("sklearn")
+    target = tmp_path / "shared" / model_dir.name
+    publish_model_directory(str(model_dir), str(target))
+
+    model = map_shared_weights(str(target))
+    for kernel, bias, _ in model._layers:
+        assert isinstance(kernel, np.memmap) and isinstance(bias, np.memmap)
+        assert not kernel.flags.writeable
+
+
+def test_published_directory_carries_vocabulary_and_files(model_dir, tmp_path):
+    pytest.importorskip("sklearn")
+    target = tmp_path / "shared" / model_dir.name
+    publish_model_directory(str(model_dir), str(target))
+
+    assert os.path.exists(target / VOCAB_FILE)
+    assert not os.path.exists(target / "encoders.pkl")
+    assert os.path.exists(target / "model_metadata.json")
+
+    vocabulary = load_vocabularies(str(target))
+    assert list(vocabulary["carrier_encoder"].categories_[0]) == ["FDEG", "RBTW"]
+
+
+def test_float32_weights_are_published_unless_compressed_ones_are_asked_for(model_dir, tmp_path):
+    pytest.importorskip("sklearn")
+    from models.artifacts import compress_model_directory
+
+    compress_model_directory(str(model_dir), "int8")
+    target = tmp_path / "shared" / model_dir.name
+    X = np.random.default_rng(1).random((32, 50), dtype=np.float32)
+    expected = load_inference_model(str(model_dir), "numpy").predict(X)
+
+    publish_model_directory(str(model_dir), str(target))
+    np.testing.assert_array_equal(map_shared_weights(str(target)).predict(X), expected)
+
+    # Switching to the compressed weights makes the published copy stale
+    assert not is_published(str(model_dir), str(target), compressed=True)
+    publish_model_directory(str(model_dir), str(target), compressed=True)
+    assert is_published(str(model_dir), str(target), compressed=True)
+    assert np.abs(map_shared_weights(str(target)).predict(X) - expected).max() > 0
+
+
+def test_changed_source_is_republished(model_dir, tmp_path):
+    pytest.importorskip("sklearn")
+    target = tmp_path / "shared" / model_dir.name
+    publish_model_directory(str(model_dir), str(target))
+    assert is_published(str(model_dir), str(target))
+
+    save_numpy_weights(build_dense_layers(seed=5), str(model_dir / "model_weights.npz"))
+    os.utime(model_dir / "model_weights.npz", ns=(0, 0))
+    assert not is_published(str(model_dir), str(target))
+
+    publish_model_directory(str(model_dir), str(target))
+    assert is_published(str(model_dir), str(target))
+    assert os.path.exists(target / SHARED_MANIFEST)
+    assert os.listdir(tmp_path / "shared") == [model_dir.name]
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for column-wise assembly of training data predictions.
+
+``predict_on_training_data`` predicts every row in one batch and writes the
+results straight from columns; the records and files it produces must match
+what the per-row loop produced.
+"""
+
+import os
+import sys
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("sklearn")
+pytest.importorskip("pydantic_settings")
+
+from models.records import error_columns, frame_records, prediction_frame, write_records_json
+from conftest import build_lanes
+
+
+def load_model(model_id, rows):
+    from services.model_service import ModelService
+
+    model = ModelService().load_tender_performance_model(model_id)
+    model.raw_data = build_lanes(rows)
+    return model
+
+
+def test_training_predictions_match_per_row_results(legacy_tender_model, tmp_path):
+    model_id, _ = legacy_tender_model
+    model = load_model(model_id, 300)
+    output_dir = tmp_path / "training_predictions"
+
+    result = model.predict_on_training_data(output_dir=str(output_dir))
+
+    expected = []
+    for row in model.raw_data.itertuples():
+        predicted = model.predict(row.CARRIER, row.SOURCE_CITY, row.DEST_CITY)["predicted_performance"]
+        absolute_error = abs(row.TENDER_PERF_PERCENTAGE - predicted)
+        expected.append({
+            "carrier": row.CARRIER, "source_city": row.SOURCE_CITY, "source_state": None,
+            "source_country": None, "dest_city": row.DEST_CITY, "dest_state": None, "dest_country": None,
+            "actual_performance": row.TENDER_PERF_PERCENTAGE, "predicted_performance": predicted,
+            "absolute_error": absolute_error,
+            "percent_error": absolute_error / row.TENDER_PERF_PERCENTAGE * 100
+        })
+
+    predictions = result["predictions"]
+    assert [list(record) for record in predictions] == [list(record) for record in expected]
+    for record, expected_record in zip(predictions, expected):
+        for field, value in expected_record.items():
+            if isinstance(value, float):
+                assert record[field] == pytest.approx(value, rel=1e-5)
+            else:
+                assert record[field] == value
+    assert result["metrics"]["count"] == 300
+    assert result["metrics"]["mae"] == pytest.approx(np.mean([r["absolute_error"] for r in expected]), rel=1e-5)
+
+    with open(output_dir / "prediction_data.json") as f:
+        stored = json.load(f)
+    assert stored["model_info"]["prediction_count"] == 300
+    assert [record["carrier"] for record in stored["predictions"]] == [record["carrier"] for record in predictions]
+    np.testing.assert_allclose([r["predicted_performance"] for r in stored["predictions"]],
+                               [r["predicted_performance"] for r in predictions], rtol=1e-12)
+    assert list(pd.read_csv(output_dir / "prediction_data.csv").columns) == list(expected[0])
+
+
+def test_predictions_can_be_left_out_of_the_result(legacy_tender_model, tmp_path):
+    model_id, _ = legacy_tender_model
+    model = load_model(model_id, 50)
+
+    result = model.predict_on_training_data(output_dir=str(tmp_path), return_predictions=False)
+
+    assert "predictions" not in result and result["metrics"]["count"] == 50
+    assert (tmp_path / "prediction_data.json").exists()
+
+
+def test_training_predictions_are_made_by_the_model_itself(legacy_tender_model, monkeypatch):
+    from services.model_service import ModelService
+
+    model_id, _ = legacy_tender_model
+    requested = []
+    for loader in ("load_tender_performance_model", "load_carrier_performance_model"):
+        monkeypatch.setattr(ModelService, loader,
+                            lambda self, model_id, prefer_variant=True: requested.append(prefer_variant))
+    service = ModelService()
+
+    assert service.predict_tender_performance_on_training_data(model_id) is None
+    monkeypatch.setattr(service, "get_model_metadata", lambda model_id: {"model_type": "carrier_performance"})
+    assert service.predict_carrier_performance_on_training_data(model_id) is None
+
+    # A distilled student serving the model must not stand in for it
+    assert requested == [False, False]
+
+
+def test_records_turn_missing_and_infinite_values_into_none(tmp_path):
+    data = pd.DataFrame({"CARRIER": ["A", "B"], "COUNT": [3.0, 4.0]})
+    errors = error_columns(np.array([0.0, 50.0]), np.array([10.0, 40.0]))
+    data["percent_error"] = errors["percent_error"]
+    frame = prediction_frame(data, {"carrier": "CARRIER", "count": "COUNT", "state": None,
+                                    "percent_error": "percent_error"},
+                             ints=("count",), floats=("percent_error",))
+
+    assert frame_records(frame) == [
+        {"carrier": "A", "count": 3, "state": None, "percent_error": None},
+        {"carrier": "B", "count": 4, "state": None, "percent_error": 20.0}
+    ]
+    write_records_json(str(tmp_path / "out.json"), {"metrics": {"mae": 1.5}}, frame)
+    with open(tmp_path / "out.json") as f:
+        assert json.load(f) == {"metrics": {"mae": 1.5}, "predictions": frame_records(frame)}
+
+
+def main():
+    """Time per-row and column-wise assembly and writing of 300k training predictions."""
+    rows = 300_000
+    rng = np.random.default_rng(0)
+    data = build_lanes(rows)
+    predicted = rng.uniform(50, 100, rows)
+    output_dir = "training_predictions_benchmark"
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    predictions = []
+    for i, row in data.iterrows():
+        actual = row["TENDER_PERF_PERCENTAGE"]
+        absolute_error = float(abs(actual - predicted[i]))
+        percent_error = absolute_error / actual * 100
+        predictions.append({
+            "carrier": row["CARRIER"], "source_city": row["SOURCE_CITY"], "dest_city": row["DEST_CITY"],
+            "actual_performance": float(actual), "predicted_performance": float(predicted[i]),
+            "absolute_error": absolute_error,
+            "percent_error": float(percent_error) if not np.isinf(percent_error) else None
+        })
+    per_row_assembly = time.perf_counter() - start
+    start = time.perf_counter()
+    with open(os.path.join(output_dir, "per_row.json"), "w") as f:
+        json.dump({"predictions": predictions}, f, indent=2)
+    per_row_write = time.perf_counter() - start
+
+    start = time.perf_counter()
+    errors = error_columns(data["TENDER_PERF_PERCENTAGE"].to_numpy(), predicted)
+    data = data.assign(predicted_performance=predicted, **errors)
+    frame = prediction_frame(data, {
+        "carrier": "CARRIER", "source_city": "SOURCE_CITY", "dest_city": "DEST_CITY",
+        "actual_performance": "TENDER_PERF_PERCENTAGE", "predicted_performance": "predicted_performance",
+        "absolute_error": "absolute_error", "percent_error": "percent_error"
+    }, floats=("actual_performance", "predicted_performance", "absolute_error", "percent_error"))
+    columnar_assembly = time.perf_counter() - start
+    start = time.perf_counter()
+    write_records_json(os.path.join(output_dir, "columnar.json"), {}, frame)
+    columnar_write = time.perf_counter() - start
+    start = time.perf_counter()
+    frame_records(frame)
+    records = time.perf_counter() - start
+
+    print(f"{rows:,} training predictions")
+    print(f"per-row:  assembly {per_row_assembly:.2f}s, write {per_row_write:.2f}s")
+    print(f"columnar: assembly {columnar_assembly:.2f}s, write {columnar_write:.2f}s "
+          f"(+{records:.2f}s when per-row dictionaries are returned)")
+
+
+if __name__ == "__main__":
+    main()
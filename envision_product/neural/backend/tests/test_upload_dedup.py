@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for content-addressed upload storage.
+
+Uploading the same content twice must store one blob referenced by both file
+IDs, report the duplicate, and keep the blob until the last file referencing
+it is deleted.
+"""
+
+import io
+import os
+import sys
+import asyncio
+
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic_settings")
+
+from fastapi import UploadFile
+
+from services.file_service import FileService
+
+CSV_CONTENT = b"CARRIER,SOURCE CITY,ORDER VOLUME\nRBTW,ELWOOD,12\nFDEG,JOLIET,7\n"
+
+
+def upload(file_service: FileService, content: bytes, filename: str = "extract.csv") -> str:
+    """Upload bytes through FileService.save_file."""
+    return asyncio.run(file_service.save_file(UploadFile(file=io.BytesIO(content), filename=filename)))
+
+
+def test_identical_uploads_share_one_blob(tmp_path):
+    file_service = FileService(storage_path=str(tmp_path / "uploads"))
+    first = upload(file_service, CSV_CONTENT)
+    second = upload(file_service, CSV_CONTENT, filename="extract_again.csv")
+
+    assert first != second
+    assert file_service.get_file_path(first) == file_service.get_file_path(second)
+    content_hash = file_service.get_content_hash(first)
+    blobs = os.listdir(tmp_path / "uploads" / "blobs")
+    assert sorted(name for name in blobs if not name.endswith(".parquet")) == [content_hash]
+    assert file_service.find_duplicates(second) == [first]
+    assert file_service.metadata["blobs"][content_hash]["refcount"] == 2
+
+
+def test_blob_is_freed_with_its_last_reference(tmp_path):
+    file_service = FileService(storage_path=str(tmp_path / "uploads"))
+    first = upload(file_service, CSV_CONTENT)
+    second = upload(file_service, CSV_CONTENT)
+    other = upload(file_service, CSV_CONTENT + b"ODFL,AURORA,3\n")
+    blob_path = file_service.get_file_path(first)
+
+    assert file_service.delete_file(first)
+    assert os.path.exists(blob_path)
+
+    # A service created before the first deletion sees the current refcount
+    assert FileService(storage_path=str(tmp_path / "uploads")).delete_file(second)
+    assert not os.path.exists(blob_path)
+    assert os.path.exists(file_service.get_file_path(other))
+
+
+def test_concurrent_uploads_keep_every_reference(tmp_path):
+    pytest.importorskip("pyarrow")
+    storage_path = str(tmp_path / "uploads")
+    contents = [CSV_CONTENT] * 6 + [CSV_CONTENT + f"ODFL,AURORA,{i}\n".encode() for i in range(6)]
+
+    async def upload_all():
+        # One service per upload, as separate requests would have
+        return await asyncio.gather(*[
+            FileService(storage_path=storage_path).save_file(UploadFile(file=io.BytesIO(content), filename="x.csv"))
+            for content in contents
+        ])
+
+    file_ids = asyncio.run(upload_all())
+
+    file_service = FileService(storage_path=storage_path)
+    assert sorted(file_service.metadata["files"]) == sorted(file_ids)
+    content_hash = file_service.get_content_hash(file_ids[0])
+    assert file_service.metadata["blobs"][content_hash]["refcount"] == 6
+    assert all("parquet_path" in blob for blob in file_service.metadata["blobs"].values())
+    assert not [name for name in os.listdir(storage_path) if name.endswith((".upload", ".parquet"))]
+
+    # The shared blob outlives all but its last reference
+    blob_path = file_service.get_file_path(file_ids[0])
+    for file_id in file_ids[:5]:
+        assert FileService(storage_path=storage_path).delete_file(file_id)
+        assert os.path.exists(blob_path) and os.path.exists(blob_path + ".parquet")
+    assert FileService(storage_path=storage_path).delete_file(file_ids[5])
+    assert not os.path.exists(blob_path)
+
+
+def test_duplicate_upload_reuses_preview(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    from services import data_processor
+    from services.data_processor import DataProcessor
+
+    file_service = FileService(storage_path=str(tmp_path / "uploads"))
+    processor = DataProcessor(preview_path=str(tmp_path / "previews"))
+    first = upload(file_service, CSV_CONTENT)
+    processor.generate_preview(first, file_service.get_file_path(first), file_service.get_content_hash(first))
+
+    second = upload(file_service, CSV_CONTENT)
+    monkeypatch.setattr(data_processor, "profile_chunks", None)
+    preview = processor.get_preview(second, file_service.get_file_path(second), file_service.get_content_hash(second))
+    assert preview["file_id"] == second and preview["total_rows"] == 2
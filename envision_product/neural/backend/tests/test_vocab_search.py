@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for autocomplete and typo correction over model vocabularies.
+
+Prefix completions must match a scan of the sorted names, fuzzy matches must
+rank names by trigram similarity, and VocabService must read the names from
+a model's fitted encoders.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import register_model
+from utils.lane_utils import normalize_city_name
+from utils.vocab_search import VocabularyIndex, trigrams
+
+CITIES = ["Dallas", "Dalton", "Dallas Fort Worth", "St. Louis", "Saint Paul", "Elwood", "Joliet",
+          "Atlanta", "Toronto", "TORONTO", "Chicago", "Chico"]
+
+
+def build_cities(count: int, seed: int = 0):
+    """Random city-like names."""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("ABCDEFGHIJKLMNOPRSTUVWY"))
+    return ["".join(rng.choice(letters, rng.integers(4, 12))) + ("" if i % 3 else " CITY") for i in range(count)]
+
+
+def test_prefix_completions_match_a_sorted_scan():
+    names = build_cities(3_000)
+    index = VocabularyIndex({"source_city": names})
+    keys = sorted({normalize_city_name(name) for name in names})
+
+    for prefix in ["A", "AB", "KL", "ZZ", "S", "MEO"] + [key[:3] for key in keys[::300]]:
+        expected = [key for key in keys if key.startswith(prefix)][:10]
+        results = index.search(prefix, limit=10)["results"]
+        completions = [normalize_city_name(r["value"]) for r in results if r["match"] == "prefix"]
+        assert completions == expected
+
+
+def test_typos_are_corrected_by_trigram_similarity():
+    index = VocabularyIndex({"dest_city": CITIES, "carrier": ["FDEG", "UPSN", "RBTW"]})
+
+    result = index.search("Dalas", limit=3)
+    assert result["exact"] == []
+    assert [r["value"] for r in result["results"]][0] == "Dallas"
+    assert all(r["match"] == "fuzzy" for r in result["results"])
+
+    # Similarities are Dice coefficients of the padded trigram sets
+    query = trigrams("DALAS")
+    for r in result["results"]:
+        key = trigrams(normalize_city_name(r["value"]))
+        assert r["similarity"] == round(2 * len(query & key) / (len(query) + len(key)), 3)
+
+    assert index.search("st louis")["exact"] == [{"field": "dest_city", "value": "St. Louis"}]
+    assert [r["value"] for r in index.search("chic", fields=["dest_city"])["results"]][:2] == ["Chicago", "Chico"]
+    # Names that normalize to the same key are kept once
+    assert index.sizes()["dest_city"] == len(CITIES) - 1
+    assert index.search("fdeg", fields=["carrier"])["exact"] == [{"field": "carrier", "value": "FDEG"}]
+
+    with pytest.raises(ValueError):
+        index.search("x", fields=["state"])
+
+
+def test_vocab_service_reads_the_fitted_encoders(workspace):
+    pytest.importorskip("sklearn")
+    from sklearn.preprocessing import OneHotEncoder
+    from models.features import HashingEncoder
+    from services.vocab_service import VocabService
+
+    def fit(column, values):
+        return OneHotEncoder(handle_unknown="ignore").fit(pd.DataFrame({column: values}))
+
+    register_model(workspace / "onehot", "carrier_performance", model_id="onehot", preprocessors={
+        "carrier_encoder": fit("CARRIER", ["FDEG", "UPSN"]),
+        "source_city_encoder": fit("SOURCE_CITY", ["Dallas", "Joliet"]),
+        "dest_city_encoder": fit("DEST_CITY_GROUPED", ["Atlanta", "OTHER"]),
+        "time_encoder": fit("TRACKING_MONTH", ["2024 01"])
+    })
+    register_model(workspace / "hashed", "carrier_performance", model_id="hashed", preprocessors={
+        "carrier_encoder": HashingEncoder(8).fit(pd.DataFrame({"CARRIER": ["FDEG"]})),
+        "source_city_encoder": fit("SOURCE_CITY", ["Dallas"]),
+        "dest_city_encoder": HashingEncoder(8)
+    })
+
+    service = VocabService()
+    result = service.search("onehot", "d")
+    assert result["fields"] == {"carrier": 2, "source_city": 2, "dest_city": 1}
+    assert result["results"] == [{"field": "source_city", "value": "Dallas", "match": "prefix"}]
+    assert service.search("onehot", "OTHER", field="dest_city")["exact"] == []
+
+    hashed = service.search("hashed", "dal")
+    assert hashed["unavailable_fields"] == ["carrier", "dest_city"]
+    assert hashed["results"][0]["value"] == "Dallas"
+    with pytest.raises(ValueError):
+        service.search("hashed", "fdeg", field="carrier")
+    assert service.search("missing", "dal") is None
+
+
+def main():
+    """Time autocomplete and typo correction over 5,000 city names."""
+    names = build_cities(5_000)
+    start = time.perf_counter()
+    index = VocabularyIndex({"source_city": names, "dest_city": names})
+    build_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(1)
+    queries = [names[i][:int(rng.integers(1, 6))] for i in rng.integers(0, len(names), 1_000)]
+    typos = [name[:2] + name[3:] for name in (names[i] for i in rng.integers(0, len(names), 1_000))]
+
+    for label, batch in [("prefix", queries), ("typo", typos)]:
+        start = time.perf_counter()
+        for query in batch:
+            index.search(query, limit=10)
+        print(f"{label} search over 2 x {len(names):,} names: {(time.perf_counter() - start) / len(batch) * 1e6:.0f} us per query")
+    print(f"index built in {build_seconds * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Compressed archival of stored files.
+
+Old predictions are kept as compressed copies next to where they were
+stored: ``prediction_data.json`` becomes ``prediction_data.json.zst`` (zstd,
+when the optional ``zstandard`` package is installed) or
+``prediction_data.json.gz``. ``open_text`` opens any of these by suffix, so
+readers decompress on access and never need the original file back.
+"""
+
+import io
+import os
+import gzip
+import json
+import shutil
+import logging
+from pathlib import Path
+from typing import IO, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Archive codecs and their file suffixes, in lookup order
+ARCHIVE_SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+
+
+def zstd_available() -> bool:
+    """Whether the optional ``zstandard`` package is installed."""
+    try:
+        import zstandard  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_codec(codec: str = "zstd") -> str:
+    """The codec to archive with: zstd falls back to gzip without ``zstandard``."""
+    if codec not in ARCHIVE_SUFFIXES:
+        raise ValueError(f"Unknown archive codec: {codec}. Expected one of {', '.join(ARCHIVE_SUFFIXES)}")
+    if codec == "zstd" and not zstd_available():
+        return "gzip"
+    return codec
+
+
+def is_archived(path: Union[str, Path]) -> bool:
+    return Path(path).suffix in ARCHIVE_SUFFIXES.values()
+
+
+def find_file(path: Union[str, Path]) -> Optional[Path]:
+    """A stored file or its archived copy, whichever exists.
+
+    Args:
+        path: Path of the file as originally stored (or of an archive)
+
+    Returns:
+        Existing path, or None
+    """
+    path = Path(path)
+    if path.exists():
+        return path
+    original = path.with_suffix("") if is_archived(path) else path
+    for candidate in [original] + [original.with_name(original.name + suffix) for suffix in ARCHIVE_SUFFIXES.values()]:
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def open_text(path: Union[str, Path]) -> IO[str]:
+    """Open a stored or archived text file for reading, decompressing by suffix."""
+    path = Path(path)
+    if path.suffix == ARCHIVE_SUFFIXES["gzip"]:
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.suffix == ARCHIVE_SUFFIXES["zstd"]:
+        import zstandard
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True),
+                                encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _open_compressed(path: Path, codec: str) -> IO[bytes]:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(path, "wb"), closefd=True)
+    return gzip.open(path, "wb", compresslevel=GZIP_LEVEL)
+
+
+def archive_file(path: Union[str, Path], codec: str = "zstd", compact_json: bool = True) -> Path:
+    """Replace a file by a compressed copy.
+
+    The copy is written to a staging file and moved into place before the
+    original is removed, so the data is always readable under one of the
+    two names.
+
+    Args:
+        path: File to archive
+        codec: zstd or gzip (zstd falls back to gzip without ``zstandard``)
+        compact_json: Re-encode ``.json`` files without indentation first
+
+    Returns:
+        Path of the archived file
+    """
+    path = Path(path)
+    codec = resolve_codec(codec)
+    archived = path.with_name(path.name + ARCHIVE_SUFFIXES[codec])
+    staging = archived.with_name(f".{archived.name}.tmp")
+
+    with _open_compressed(staging, codec) as output:
+        if compact_json and path.suffix == ".json":
+            with open(path, "r", encoding="utf-8") as f:
+                document = json.load(f)
+            output.write(json.dumps(document, separators=(",", ":")).encode("utf-8"))
+        else:
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, output)
+
+    os.replace(staging, archived)
+    path.unlink()
+    return archived
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Columnar storage for uploaded data files.
+
+Uploads are converted once from CSV to Parquet (``<upload>.parquet`` next to
+the raw file). The CSV is streamed in chunks, dtypes are fixed from the first
+chunk, and carrier/city/state/country/type columns are stored as
+dictionary-encoded categoricals. ``read_table`` is the single entry point
+for reading an upload: it loads the Parquet copy with column pruning when it
+exists and falls back to ``pd.read_csv`` otherwise.
+"""
+
+import os
+import re
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PARQUET_SUFFIX = ".parquet"
+
+# Rows per CSV chunk (and Parquet row group) during conversion
+CONVERSION_CHUNK_ROWS = 100_000
+
+# Column name tokens stored as categoricals
+CATEGORICAL_COLUMN_PATTERN = re.compile(r"(CARRIER|CITY|STATE|COUNTRY|TYPE|LANE)", re.IGNORECASE)
+
+
+def parquet_path_for(path: str) -> str:
+    """Path of the Parquet copy of an uploaded file."""
+    return f"{path}{PARQUET_SUFFIX}"
+
+
+def is_categorical_column(name: str) -> bool:
+    """Whether a column is stored as a categorical."""
+    return bool(CATEGORICAL_COLUMN_PATTERN.search(str(name)))
+
+
+def _has_parquet_copy(path: str) -> bool:
+    """Whether an up-to-date Parquet copy of ``path`` exists."""
+    parquet_path = parquet_path_for(path)
+    if not os.path.exists(parquet_path):
+        return False
+    return not os.path.exists(path) or os.path.getmtime(parquet_path) >= os.path.getmtime(path)
+
+
+def _arrow_schema(chunk: pd.DataFrame):
+    """Build the Parquet schema from the first CSV chunk."""
+    import pyarrow as pa
+
+    fields = []
+    for column in chunk.columns:
+        dtype = chunk[column].dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            arrow_type = pa.bool_()
+        elif pd.api.types.is_integer_dtype(dtype):
+            arrow_type = pa.int64()
+        elif pd.api.types.is_numeric_dtype(dtype):
+            arrow_type = pa.float64()
+        elif is_categorical_column(column):
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields)
+
+
+def _prepare_chunk(chunk: pd.DataFrame, schema) -> pd.DataFrame:
+    """Cast string columns of a chunk so they match the schema."""
+    import pyarrow as pa
+
+    for field in schema:
+        if pa.types.is_dictionary(field.type) or pa.types.is_string(field.type):
+            values = chunk[field.name]
+            chunk[field.name] = values.where(values.isna(), values.astype(str))
+    return chunk
+
+
+def convert_csv_to_parquet(csv_path: str, parquet_path: Optional[str] = None,
+                           chunk_rows: int = CONVERSION_CHUNK_ROWS) -> Optional[Dict[str, Any]]:
+    """Stream a CSV file into a Parquet copy.
+
+    Args:
+        csv_path: Path to the CSV file
+        parquet_path: Output path (defaults to ``parquet_path_for(csv_path)``)
+        chunk_rows: Rows per chunk and row group
+
+    Returns:
+        Schema dictionary (columns with their stored dtype, row count), or
+        None if pyarrow is unavailable or the file cannot be converted
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        logger.warning("pyarrow is not installed, uploads are kept as CSV only")
+        return None
+
+    parquet_path = parquet_path or parquet_path_for(csv_path)
+    staging_path = f"{parquet_path}.tmp"
+    writer = None
+    rows = 0
+
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+            if writer is None:
+                schema = _arrow_schema(chunk)
+                writer = pq.ParquetWriter(staging_path, schema, compression="snappy")
+            table = pa.Table.from_pandas(_prepare_chunk(chunk, schema), schema=schema, preserve_index=False)
+            writer.write_table(table)
+            rows += len(chunk)
+
+        if writer is None:
+            logger.warning(f"{csv_path} has no rows, skipping Parquet conversion")
+            return None
+        writer.close()
+        writer = None
+        os.replace(staging_path, parquet_path)
+    except Exception as e:
+        # e.g. a column that is numeric in the first chunk and text later
+        logger.warning(f"Could not convert {csv_path} to Parquet, keeping CSV only: {str(e)}")
+        if writer is not None:
+            writer.close()
+        if os.path.exists(staging_path):
+            os.remove(staging_path)
+        return None
+
+    return {
+        "format": "parquet",
+        "rows": rows,
+        "columns": [
+            {
+                "name": field.name,
+                "dtype": "category" if pa.types.is_dictionary(field.type) else str(field.type)
+            }
+            for field in schema
+        ]
+    }
+
+
+def _decode_dictionaries(table):
+    """Cast dictionary-encoded columns of an Arrow table to plain strings.
+
+    Decoding dictionaries in Arrow is much faster than astype in pandas.
+    """
+    import pyarrow as pa
+
+    return table.cast(pa.schema([
+        pa.field(field.name, field.type.value_type if pa.types.is_dictionary(field.type) else field.type)
+        for field in table.schema
+    ]))
+
+
+def read_columns(path: str) -> List[str]:
+    """Column names of an uploaded file, read from the Parquet footer when possible."""
+    if _has_parquet_copy(path):
+        try:
+            import pyarrow.parquet as pq
+            return list(pq.read_schema(parquet_path_for(path)).names)
+        except ImportError:
+            pass
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def count_rows(path: str) -> Optional[int]:
+    """Row count of an uploaded file from the Parquet footer (None without a copy)."""
+    if _has_parquet_copy(path):
+        try:
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(parquet_path_for(path)).metadata.num_rows
+        except ImportError:
+            pass
+    return None
+
+
+def read_table(path: str, columns: Optional[List[str]] = None, categorical: bool = False) -> pd.DataFrame:
+    """Read an uploaded data file.
+
+    Args:
+        path: Path to the uploaded (CSV) file
+        columns: Optional columns to load; names missing from the file are ignored
+        categorical: Keep categorical columns as ``category`` dtype. By default
+            they are returned as object strings, like ``pd.read_csv``.
+
+    Returns:
+        DataFrame with the requested columns
+    """
+    if _has_parquet_copy(path):
+        try:
+            import pyarrow.parquet as pq
+
+            parquet_path = parquet_path_for(path)
+            if columns is not None:
+                available = set(pq.read_schema(parquet_path).names)
+                columns = [column for column in columns if column in available]
+
+            table = pq.read_table(parquet_path, columns=columns)
+            if not categorical:
+                table = _decode_dictionaries(table)
+            return table.to_pandas()
+        except ImportError:
+            logger.warning("pyarrow is not installed, reading the CSV copy")
+
+    if columns is not None:
+        wanted = set(columns)
+        df = pd.read_csv(path, usecols=lambda column: column in wanted)
+    else:
+        df = pd.read_csv(path)
+
+    if categorical:
+        for column in df.columns:
+            if is_categorical_column(column) and pd.api.types.is_string_dtype(df[column].dtype):
+                df[column] = df[column].astype("category")
+    return df
+
+
+def iter_table_chunks(path: str, chunk_rows: int = CONVERSION_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Stream an uploaded data file in chunks of at most ``chunk_rows`` rows.
+
+    Batches come from the Parquet copy when it exists (with categorical
+    columns decoded to strings, as in ``read_table``), otherwise from the CSV.
+
+    Args:
+        path: Path to the uploaded (CSV) file
+        chunk_rows: Maximum rows per chunk
+
+    Yields:
+        DataFrame chunks in file order
+    """
+    if _has_parquet_copy(path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            parquet_file = pq.ParquetFile(parquet_path_for(path))
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+                yield _decode_dictionaries(pa.Table.from_batches([batch])).to_pandas()
+            return
+        except ImportError:
+            logger.warning("pyarrow is not installed, reading the CSV copy")
+
+    yield from pd.read_csv(path, chunksize=chunk_rows)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Content hashing for uploaded files and their rows.
+"""
+
+import hashlib
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Bytes read per block when hashing
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str, block_size: int = HASH_BLOCK_SIZE) -> str:
+    """Hex SHA-256 digest of a file's content, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def row_hashes(frame: pd.DataFrame, exclude: Optional[Iterable[str]] = None) -> np.ndarray:
+    """64-bit hash of each row's values.
+
+    Columns are hashed in name order, so reordering the columns of an
+    extract does not change the hashes. Categorical columns hash like their
+    values, so Parquet and CSV reads of the same rows agree.
+
+    Args:
+        frame: Rows to hash
+        exclude: Columns left out of the hash
+
+    Returns:
+        uint64 array with one hash per row
+    """
+    excluded = set(exclude or ())
+    columns = sorted(column for column in frame.columns if column not in excluded)
+    return pd.util.hash_pandas_object(frame[columns], index=False).to_numpy(dtype=np.uint64)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+HTTP caching for immutable API resources.
+
+Stored predictions and model metadata only change when a new version is
+written, so a GET for them can be answered from a version key without
+running the endpoint. ``ConditionalGetMiddleware`` maps request paths to a
+resolver returning that key (and a modification time); it derives a weak
+ETag from the key and the URL, answers matching ``If-None-Match`` /
+``If-Modified-Since`` requests with 304, and adds ``ETag``,
+``Last-Modified`` and ``Cache-Control`` to successful responses.
+"""
+
+import re
+import hashlib
+import logging
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, List, Mapping, Optional, Pattern, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+# A resolver returns the resource's version key and modification time (or None
+# when the resource has no stored version yet)
+Validators = Tuple[str, Optional[float]]
+Resolver = Callable[..., Optional[Validators]]
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag identifying a resource version.
+
+    Weak, because compression middleware changes the bytes of a response but
+    not its meaning.
+    """
+    digest = hashlib.sha1("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against an ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, last_modified: Optional[float]) -> bool:
+    """Whether a conditional request can be answered with 304.
+
+    ``If-None-Match`` takes precedence; ``If-Modified-Since`` is only used
+    without it (RFC 9110, section 13.2.2).
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def cache_headers(etag: str, last_modified: Optional[float], max_age: int) -> dict:
+    """Validator and Cache-Control headers for a resource version."""
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+class ConditionalGetMiddleware(BaseHTTPMiddleware):
+    """Answer conditional GETs for versioned resources without running the endpoint."""
+
+    def __init__(self, app, resolvers: Sequence[Tuple[Pattern, Resolver]], max_age: int = 300):
+        """Initialize the middleware.
+
+        Args:
+            app: ASGI application
+            resolvers: (path pattern, resolver) pairs; the first pattern that
+                matches the request path is used and its groups are passed
+                to the resolver
+            max_age: Cache-Control max-age in seconds
+        """
+        super().__init__(app)
+        self.resolvers: List[Tuple[Pattern, Resolver]] = [
+            (re.compile(pattern) if isinstance(pattern, str) else pattern, resolver)
+            for pattern, resolver in resolvers
+        ]
+        self.max_age = max_age
+
+    async def _validators(self, path: str) -> Optional[Validators]:
+        for pattern, resolver in self.resolvers:
+            match = pattern.match(path)
+            if match:
+                try:
+                    return await run_in_threadpool(resolver, *match.groups())
+                except Exception as e:
+                    logger.error(f"Error resolving cache validators for {path}: {str(e)}")
+                    return None
+        return None
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method not in ("GET", "HEAD"):
+            return await call_next(request)
+
+        validators = await self._validators(request.url.path)
+        if validators is None:
+            return await call_next(request)
+
+        version, last_modified = validators
+        etag = make_etag(version, request.url.path, request.url.query)
+        headers = cache_headers(etag, last_modified, self.max_age)
+        if is_not_modified(request.headers, etag, last_modified):
+            return Response(status_code=304, headers=headers)
+
+        response = await call_next(request)
+        if response.status_code == 200:
+            for name, value in headers.items():
+                response.headers[name] = value
+        return response
@@ -6,10 +6,17 @@ This module provides standardized functions for lane identification and matching
 as well as helper functions for lane-based filtering. These utilities ensure consistent
 handling of lanes across different parts of the application, regardless of field naming
 conventions or capitalization.
+
+The dict-based functions work on single records. LaneFrame is their columnar
+counterpart for whole datasets, and filter_by_lane, group_by_lane and
+batch_standardize_lane_fields use it.
 """
 
 import logging
-from typing import Dict, List, Optional, Any, Tuple, Union
+from typing import Callable, Dict, List, Optional, Any, Tuple, Union
+
+import numpy as np
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -189,22 +196,13 @@ def filter_by_lane(
     if not any([source_city, destination_city, carrier, order_type]):
         return data_list
     
-    # Normalize filter parameters if provided
-    norm_source = normalize_city_name(source_city) if source_city else None
-    norm_dest = normalize_city_name(destination_city) if destination_city else None
-    
-    result = []
-    for item in data_list:
-        if is_lane_match(
-            data=item,
-            source_city=norm_source,
-            destination_city=norm_dest,
-            carrier=carrier,
-            order_type=order_type
-        ):
-            result.append(item)
-    
-    return result
+    mask = LaneFrame.from_records(data_list).mask(
+        source_city=source_city,
+        destination_city=destination_city,
+        carrier=carrier,
+        order_type=order_type
+    )
+    return [data_list[i] for i in np.flatnonzero(mask)]
 
 def standardize_lane_fields(data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -249,7 +247,18 @@ def batch_standardize_lane_fields(data_list: List[Dict[str, Any]]) -> List[Dict[
     Returns:
         List of dictionaries with standardized fields
     """
-    return [standardize_lane_fields(item) for item in data_list]
+    if not data_list:
+        return []
+    
+    standardized = LaneFrame.from_records(data_list).standardized()
+    result = []
+    for i, item in enumerate(data_list):
+        item = dict(item)
+        for field, values in standardized.items():
+            if values[i]:
+                item[field] = values[i]
+        result.append(item)
+    return result
 
 def group_by_lane(
     data_list: List[Dict[str, Any]],
@@ -267,21 +276,230 @@ def group_by_lane(
     Returns:
         Dictionary with lane IDs as keys and lists of matching items as values
     """
-    result = {}
-    
-    for item in data_list:
-        lane_id = get_lane_id(
-            item, 
-            include_carrier=include_carrier, 
-            include_order_type=include_order_type
-        )
+    if not data_list:
+        return {}
+    
+    groups = LaneFrame.from_records(data_list).group_positions(
+        include_carrier=include_carrier,
+        include_order_type=include_order_type
+    )
+    return {lane_id: [data_list[i] for i in positions] for lane_id, positions in groups.items()} 
+
+# Columnar lane handling
+#
+# The functions above probe every field name variation of every record. For
+# whole datasets, LaneFrame resolves the variations once per dataset into
+# canonical columns, factorizes each column and normalizes only its distinct
+# values, so filtering and grouping are integer comparisons over arrays.
+
+# Canonical lane fields and their name variations, in lookup order
+LANE_FIELDS = {
+    "source_city": SOURCE_CITY_FIELDS,
+    "destination_city": DESTINATION_CITY_FIELDS,
+    "carrier": CARRIER_FIELDS,
+    "order_type": ORDER_TYPE_FIELDS
+}
+
+
+class _LaneColumn:
+    """A factorized lane field: one code per row and the distinct values."""
+    
+    def __init__(self, values, normalize: Optional[Callable[[str], str]] = None):
+        values = pd.Series(values, dtype=object)
+        # factorize drops NaN-like values, but only None is missing: others are kept as str() gives them
+        na = values.isna().to_numpy()
+        if na.any():
+            values = values.copy()
+            values[na] = [None if value is None else str(value) for value in values[na]]
+        codes, uniques = pd.factorize(values)
+        # Values as get_value_from_dict_with_variations returns them
+        self.codes = codes
+        self.values = np.array([str(value) for value in uniques], dtype=object)
+        # Codes of non-empty values (empty values are left out of lane IDs); -1 codes
+        # index the appended -1
+        self.value_codes = np.append(np.where(self.values == "", -1, np.arange(len(self.values))), -1)[codes]
+        
+        # Matching keys; empty keys count as missing, like falsy dict values
+        keys = [normalize(value) if normalize else value for value in self.values]
+        key_uniques, key_codes = np.unique(np.array(keys, dtype=object).astype(str), return_inverse=True)
+        key_codes = np.where(key_uniques[key_codes] == "", -1, key_codes)
+        self.keys = key_uniques
+        self.key_codes = np.append(key_codes, -1)[codes]
+    
+    @classmethod
+    def empty(cls, rows: int) -> '_LaneColumn':
+        return cls([None] * rows)
+    
+    def mask(self, key: str) -> np.ndarray:
+        """Rows whose key equals ``key``."""
+        position = np.searchsorted(self.keys, key)
+        if position >= len(self.keys) or self.keys[position] != key:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.key_codes == position
+    
+    def raw(self) -> np.ndarray:
+        """Per-row values (None where missing)."""
+        values = np.append(self.values, None)
+        return values[self.codes]
+
+
+class LaneFrame:
+    """Columnar lane fields of a dataset, for vectorized filtering and grouping.
+    
+    Matching follows the dict-based functions of this module: city names are
+    compared with normalize_city_name, carriers and order types
+    case-insensitively, and lane IDs are built like get_lane_id.
+    """
+    
+    def __init__(self, columns: Dict[str, Any], rows: int):
+        """Create a LaneFrame from per-row values of the canonical lane fields.
         
-        if not lane_id:
-            continue
+        Args:
+            columns: Canonical field name to per-row values (missing fields
+                are treated as absent)
+            rows: Number of rows
+        """
+        self.rows = rows
+        self.source_city = self._column(columns.get("source_city"), rows, normalize_city_name)
+        self.destination_city = self._column(columns.get("destination_city"), rows, normalize_city_name)
+        self.carrier = self._column(columns.get("carrier"), rows, str.upper)
+        self.order_type = self._column(columns.get("order_type"), rows, str.upper)
+    
+    @staticmethod
+    def _column(values, rows: int, normalize: Callable[[str], str]) -> _LaneColumn:
+        return _LaneColumn(values, normalize) if values is not None else _LaneColumn.empty(rows)
+    
+    @staticmethod
+    def _coalesce(columns: List[pd.Series]) -> Optional[pd.Series]:
+        """First value of each row that is not None across variation columns.
         
-        if lane_id not in result:
-            result[lane_id] = []
+        Only None counts as missing, as in get_value_from_dict_with_variations:
+        a NaN (common in records from ``DataFrame.to_dict``) is a value, "nan".
+        """
+        if not columns:
+            return None
+        values = columns[0]
+        for column in columns[1:]:
+            missing = values.isna().to_numpy(copy=True)
+            if missing.any():
+                missing[missing] = [value is None for value in values[missing]]
+            values = values.where(~missing, column)
+        return values
+    
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'LaneFrame':
+        """Resolve lane field variations among a DataFrame's columns (missing values count as None)."""
+        columns = {
+            field: cls._coalesce([frame[name].astype(object).where(frame[name].notna(), None).reset_index(drop=True)
+                                  for name in variations if name in frame.columns])
+            for field, variations in LANE_FIELDS.items()
+        }
+        return cls(columns, len(frame))
+    
+    @classmethod
+    def from_records(cls, data_list: List[Dict[str, Any]]) -> 'LaneFrame':
+        """Resolve lane field variations among the keys of a list of dictionaries."""
+        present = set()
+        for item in data_list:
+            present.update(item.keys())
         
-        result[lane_id].append(item)
-    
-    return result 
\ No newline at end of file
+        columns = {}
+        for field, variations in LANE_FIELDS.items():
+            columns[field] = cls._coalesce([
+                pd.Series([item.get(name) for item in data_list], dtype=object)
+                for name in variations if name in present
+            ])
+        return cls(columns, len(data_list))
+    
+    def __len__(self) -> int:
+        return self.rows
+    
+    def mask(
+        self,
+        source_city: Optional[str] = None,
+        destination_city: Optional[str] = None,
+        carrier: Optional[str] = None,
+        order_type: Optional[str] = None
+    ) -> np.ndarray:
+        """Boolean mask of rows matching the lane criteria (see is_lane_match)."""
+        mask = np.ones(self.rows, dtype=bool)
+        criteria = [
+            (self.source_city, normalize_city_name(source_city) if source_city else None),
+            (self.destination_city, normalize_city_name(destination_city) if destination_city else None),
+            (self.carrier, carrier.upper() if carrier else None),
+            (self.order_type, order_type.upper() if order_type else None)
+        ]
+        for column, key in criteria:
+            if key:
+                mask &= column.mask(key)
+        return mask
+    
+    def lane_ids(self, include_carrier: bool = True, include_order_type: bool = False) -> np.ndarray:
+        """Per-row lane IDs as get_lane_id builds them ("" without source or destination)."""
+        ids = np.full(self.rows, "", dtype=object)
+        for lane_id, positions in self.group_positions(include_carrier, include_order_type).items():
+            ids[positions] = lane_id
+        return ids
+    
+    def group_positions(self, include_carrier: bool = True, include_order_type: bool = False) -> Dict[str, List[int]]:
+        """Row positions of each lane, in order of first appearance.
+        
+        Args:
+            include_carrier: Whether to include carrier in the lane grouping
+            include_order_type: Whether to include order type in the lane grouping
+            
+        Returns:
+            Dictionary with lane IDs as keys and lists of row positions as values
+        """
+        parts = [self.source_city, self.destination_city]
+        if include_carrier:
+            parts.append(self.carrier)
+        if include_order_type:
+            parts.append(self.order_type)
+        
+        valid = np.flatnonzero((self.source_city.key_codes >= 0) & (self.destination_city.key_codes >= 0))
+        if not len(valid):
+            return {}
+        
+        # Rows of a lane share the codes of its parts: normalized city keys, and
+        # carrier and order type values as given
+        part_codes = [part.key_codes if i < 2 else part.value_codes for i, part in enumerate(parts)]
+        codes = pd.DataFrame({i: part_code[valid] for i, part_code in enumerate(part_codes)})
+        groups = codes.groupby(list(codes.columns), sort=False).ngroup().to_numpy()
+        order = np.argsort(groups, kind="stable")
+        positions = valid[order]
+        starts = np.flatnonzero(np.diff(groups[order], prepend=-1))
+        firsts = positions[starts]
+        
+        # Lane ID of each group, built from its first row
+        lane_ids = pd.Series(parts[0].keys.astype(object)[part_codes[0][firsts]])
+        lane_ids = lane_ids + "_" + parts[1].keys.astype(object)[part_codes[1][firsts]]
+        for part, part_code in zip(parts[2:], part_codes[2:]):
+            values = pd.Series(np.append(part.values, "").astype(object)[part_code[firsts]])
+            lane_ids = lane_ids.where(values == "", lane_ids + "_" + values)
+        lane_ids = lane_ids.tolist()
+        
+        # Slicing a list is much cheaper than splitting an array per group
+        bounds = starts.tolist() + [len(positions)]
+        positions = positions.tolist()
+        groups_positions = [positions[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        if len(set(lane_ids)) == len(lane_ids):
+            return dict(zip(lane_ids, groups_positions))
+        
+        # Different parts can join to the same ID (e.g. carrier "A_B" vs carrier "A" and order type "B")
+        result: Dict[str, List[int]] = {}
+        for lane_id, group_positions in zip(lane_ids, groups_positions):
+            if lane_id in result:
+                result[lane_id] = sorted(result[lane_id] + group_positions)
+            else:
+                result[lane_id] = group_positions
+        return result
+    
+    def standardized(self) -> Dict[str, np.ndarray]:
+        """Per-row values of each canonical lane field (None where missing)."""
+        return {
+            "source_city": self.source_city.raw(),
+            "destination_city": self.destination_city.raw(),
+            "carrier": self.carrier.raw(),
+            "order_type": self.order_type.raw()
+        }
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Single-pass, mergeable data profiling for file previews.
+
+A file is profiled chunk by chunk. Each chunk produces a ``TableProfile``
+(exact row and missing counts, running moments, a quantile sketch for
+numeric columns and a heavy-hitter summary for the others), and chunk
+profiles are merged in order, so chunks can be profiled in parallel and
+memory stays bounded by the chunk size.
+"""
+
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Values kept at the lowest sketch level; medians are exact up to this many values
+QUANTILE_SKETCH_SIZE = 2048
+
+# Distinct values tracked per categorical column; top values are exact up to this many
+HEAVY_HITTER_CAPACITY = 256
+
+SAMPLE_ROWS = 10
+TOP_VALUES = 5
+
+
+class RunningMoments:
+    """Count, mean, variance, min and max merged with Chan's parallel update."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> None:
+        """Add non-missing float values."""
+        if len(values) == 0:
+            return
+        other = RunningMoments()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other: "RunningMoments") -> None:
+        """Merge another set of moments into this one."""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+class QuantileSketch:
+    """KLL-style mergeable quantile sketch.
+
+    Values enter level 0; a level over capacity is sorted and every other
+    value (from a random offset) is promoted to the next level with twice the
+    weight. Level capacities shrink geometrically below the top level, so the
+    sketch holds O(size) values whatever the input length. Quantiles are exact
+    while nothing has been compacted.
+    """
+
+    def __init__(self, size: int = QUANTILE_SKETCH_SIZE, seed: int = 0) -> None:
+        self.size = size
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(self.size * (2 / 3) ** depth))
+
+    def _compact(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays at this level with its weight
+                held, items = items[:len(items) % 2], items[len(items) % 2:]
+                promoted = items[int(self._rng.integers(2))::2]
+                self.levels[level] = held
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                level = 0
+            else:
+                level += 1
+
+    def update(self, values: np.ndarray) -> None:
+        """Add non-missing float values."""
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compact()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Merge another sketch into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compact()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile (linear interpolation while exact)."""
+        if all(len(items) == 0 for items in self.levels):
+            return None
+        if len(self.levels) == 1:
+            return float(np.quantile(self.levels[0], q))
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        index = int(np.searchsorted(cumulative, q * cumulative[-1]))
+        return float(values[order][min(index, len(values) - 1)])
+
+
+class HeavyHitters:
+    """Mergeable top-k counts (Misra-Gries style summary).
+
+    Keeps the ``capacity`` most frequent values. Counts are exact until a
+    value is evicted; ``error`` bounds how far any count may be under.
+    """
+
+    def __init__(self, capacity: int = HEAVY_HITTER_CAPACITY) -> None:
+        self.capacity = capacity
+        self.counts: Dict[Any, int] = {}
+        self.error = 0
+
+    def update_counts(self, counts: Dict[Any, int]) -> None:
+        """Add exact counts (e.g. a chunk's ``value_counts``)."""
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+        self._prune()
+
+    def merge(self, other: "HeavyHitters") -> None:
+        """Merge another summary into this one."""
+        self.update_counts(other.counts)
+        self.error += other.error
+
+    def _prune(self) -> None:
+        if len(self.counts) <= self.capacity:
+            return
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        self.error += ranked[self.capacity][1]
+        self.counts = dict(ranked[:self.capacity])
+
+    def top(self, n: int = TOP_VALUES) -> Dict[Any, int]:
+        """The n most frequent values with their counts."""
+        return dict(sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n])
+
+
+class ColumnProfile:
+    """Mergeable statistics of one column."""
+
+    def __init__(self, dtype: str, numeric: bool) -> None:
+        self.dtype = dtype
+        self.numeric = numeric
+        self.missing = 0
+        self.moments = RunningMoments()
+        self.quantiles = QuantileSketch()
+        self.heavy_hitters = HeavyHitters()
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "ColumnProfile":
+        """Profile one chunk of a column."""
+        numeric = pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+        profile = cls(str(series.dtype), numeric)
+        profile.missing = int(series.isna().sum())
+        if numeric:
+            values = series.dropna().to_numpy(dtype=np.float64)
+            profile.moments.update(values)
+            profile.quantiles.update(values)
+        else:
+            profile.heavy_hitters.update_counts(series.value_counts(sort=False).to_dict())
+        return profile
+
+    def merge(self, other: "ColumnProfile") -> None:
+        """Merge the profile of a later chunk of the same column."""
+        self.missing += other.missing
+        if self.numeric and other.numeric:
+            # e.g. int64 in one CSV chunk and float64 (missing values) in another
+            if self.dtype != other.dtype:
+                self.dtype = str(np.result_type(self.dtype, other.dtype))
+            self.moments.merge(other.moments)
+            self.quantiles.merge(other.quantiles)
+        elif self.numeric != other.numeric:
+            # A column that only parses as text in some chunks is reported as
+            # text; the values of its numeric chunks are not counted
+            if self.numeric:
+                self.dtype, self.numeric = other.dtype, False
+                self.heavy_hitters = other.heavy_hitters
+        else:
+            self.heavy_hitters.merge(other.heavy_hitters)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Column information in the preview format."""
+        info: Dict[str, Any] = {"type": self.dtype, "missing": self.missing}
+        if self.numeric:
+            has_values = self.moments.count > 0
+            info.update({
+                "min": self.moments.min if has_values else None,
+                "max": self.moments.max if has_values else None,
+                "mean": self.moments.mean if has_values else None,
+                "median": self.quantiles.quantile(0.5)
+            })
+        else:
+            info["top_values"] = {str(value): count for value, count in self.heavy_hitters.top().items()}
+        return info
+
+
+class TableProfile:
+    """Mergeable profile of a table: row count, sample rows and column profiles."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.sample_rows: List[Dict[str, Any]] = []
+        self.columns: Dict[str, ColumnProfile] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "TableProfile":
+        """Profile one chunk."""
+        profile = cls()
+        profile.rows = len(df)
+        profile.sample_rows = df.head(SAMPLE_ROWS).to_dict(orient="records")
+        profile.columns = {column: ColumnProfile.from_series(df[column]) for column in df.columns}
+        return profile
+
+    def merge(self, other: "TableProfile") -> None:
+        """Merge the profile of the next chunk."""
+        self.rows += other.rows
+        if len(self.sample_rows) < SAMPLE_ROWS:
+            self.sample_rows.extend(other.sample_rows[:SAMPLE_ROWS - len(self.sample_rows)])
+        for column, column_profile in other.columns.items():
+            if column in self.columns:
+                self.columns[column].merge(column_profile)
+            else:
+                self.columns[column] = column_profile
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame], max_workers: int = 4) -> TableProfile:
+    """Profile a stream of chunks, profiling up to ``max_workers`` at a time.
+
+    Chunk profiles are merged in input order, and at most ``2 * max_workers``
+    chunks are held in memory.
+
+    Args:
+        chunks: DataFrame chunks of one table
+        max_workers: Number of chunks profiled concurrently
+
+    Returns:
+        Merged profile of all chunks
+    """
+    result = TableProfile()
+    if max_workers <= 1:
+        for chunk in chunks:
+            result.merge(TableProfile.from_frame(chunk))
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(TableProfile.from_frame, chunk))
+            if len(pending) >= 2 * max_workers:
+                result.merge(pending.popleft().result())
+        while pending:
+            result.merge(pending.popleft().result())
+    return result
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Precomputed rollups of order volume forecasts.
+
+Dashboards show forecast totals by source city, destination city, order type
+and month, and by pairs of these, rather than per-lane rows. When an order
+volume prediction is saved, every standard rollup is computed once, with one
+groupby per rollup over the prediction frame, and stored next to the
+predictions in ``rollups.json``. Rollup requests are then answered from that
+file instead of reading and summing the per-lane predictions.
+"""
+
+import os
+import json
+import logging
+from itertools import combinations
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_FILE = "rollups.json"
+
+# Rollup dimensions: query name -> (prediction column, output field), in canonical order
+DIMENSIONS = {
+    "source": ("SOURCE CITY", "source_city"),
+    "destination": ("DESTINATION CITY", "destination_city"),
+    "type": ("ORDER TYPE", "order_type"),
+    "month": ("PREDICTION DATE", "month"),
+}
+
+VOLUME_COLUMN = "PREDICTED ORDER VOLUME"
+
+# Name of the rollup over all predictions
+TOTAL = "total"
+
+# Standard rollups: the overall total, each dimension and each pair of dimensions
+ROLLUPS: List[Tuple[str, ...]] = [()] + [(name,) for name in DIMENSIONS] + list(combinations(DIMENSIONS, 2))
+
+
+def rollup_key(dimensions: Iterable[str]) -> str:
+    """Stored key of a rollup (dimension names in canonical order, comma-separated)."""
+    return ",".join(dimensions) or TOTAL
+
+
+def parse_rollup(by: str) -> str:
+    """Resolve a ``by`` query value to the key of a standard rollup.
+
+    Args:
+        by: Comma-separated dimension names in any order (``source``,
+            ``destination``, ``type``, ``month``), or ``total``/empty for
+            the overall total
+
+    Returns:
+        Rollup key
+
+    Raises:
+        ValueError: If a dimension is unknown or more than two are given
+    """
+    names = {name.strip().lower() for name in (by or "").split(",") if name.strip()} - {TOTAL}
+    unknown = names - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown rollup dimension(s): {', '.join(sorted(unknown))}. "
+                         f"Expected {', '.join(DIMENSIONS)} or {TOTAL}")
+    if len(names) > 2:
+        raise ValueError("Rollups are available by at most two dimensions")
+    return rollup_key(name for name in DIMENSIONS if name in names)
+
+
+def compute_rollups(predictions: Union[pd.DataFrame, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Compute every standard rollup of order volume predictions.
+
+    Args:
+        predictions: Prediction frame or records with the lane, PREDICTION
+            DATE and PREDICTED ORDER VOLUME columns
+
+    Returns:
+        Rollup key -> rows with the dimension fields, ``total_volume`` and
+        ``prediction_count``, sorted by the dimension values
+    """
+    frame = pd.DataFrame(predictions)
+    if frame.empty:
+        return {rollup_key(dimensions): [] for dimensions in ROLLUPS}
+
+    # Group on categorical codes; each column is factorized once for all rollups
+    columns = {name: frame[column].astype(str).astype("category") for name, (column, _) in DIMENSIONS.items()}
+    volumes = pd.to_numeric(frame[VOLUME_COLUMN], errors="coerce").fillna(0)
+
+    rollups = {}
+    for dimensions in ROLLUPS:
+        if not dimensions:
+            rollups[TOTAL] = [{"total_volume": volumes.sum().item(), "prediction_count": len(frame)}]
+            continue
+
+        grouped = volumes.groupby([columns[name] for name in dimensions], observed=True, sort=True)
+        table = grouped.agg(["sum", "count"]).reset_index()
+        table.columns = [DIMENSIONS[name][1] for name in dimensions] + ["total_volume", "prediction_count"]
+        for field in table.columns[:len(dimensions)]:
+            table[field] = table[field].astype(object)
+        rollups[rollup_key(dimensions)] = table.to_dict(orient="records")
+    return rollups
+
+
+def write_rollups(prediction_dir: Union[str, Path], predictions) -> Path:
+    """Compute the rollups of a prediction and store them next to it.
+
+    The file is written to a staging file and moved into place, so readers
+    never see a partial file.
+
+    Args:
+        prediction_dir: Directory of the stored prediction
+        predictions: Predictions accepted by ``compute_rollups``
+
+    Returns:
+        Path of the rollups file
+    """
+    path = Path(prediction_dir) / ROLLUPS_FILE
+    staging_path = path.with_name(f".{ROLLUPS_FILE}.tmp")
+    with open(staging_path, "w", encoding="utf-8") as f:
+        json.dump({"rollups": compute_rollups(predictions)}, f)
+    os.replace(staging_path, path)
+    return path
+
+
+def read_rollup(prediction_dir: Union[str, Path], key: str) -> List[Dict[str, Any]]:
+    """Rows of one stored rollup.
+
+    Raises:
+        FileNotFoundError: If the prediction has no stored rollups
+    """
+    with open(Path(prediction_dir) / ROLLUPS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)["rollups"].get(key, [])
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Streaming reads and writes of stored predictions.
+
+Prediction files hold one JSON document whose ``predictions`` array can have
+millions of records. ``iter_json_array`` decodes the records one at a time
+from a fixed-size read buffer instead of loading the document, and the
+encoders below turn a record iterator into NDJSON, CSV or gzipped CSV byte
+chunks for a ``StreamingResponse``. Filters and simplification are applied
+per record, so time to first byte and memory do not depend on the number
+of predictions.
+"""
+
+import io
+import re
+import csv
+import json
+import zlib
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from utils.archive import open_text
+from utils.lane_utils import is_lane_match, normalize_city_name
+
+logger = logging.getLogger(__name__)
+
+# Characters read from a prediction file at a time
+READ_BLOCK_SIZE = 64 * 1024
+
+# Records encoded per yielded chunk
+STREAM_BATCH_ROWS = 1000
+
+# Location fields kept by simplified predictions when present (new data format)
+LOCATION_FIELDS = ["source_state", "source_country", "dest_state", "dest_country"]
+
+_WHITESPACE = re.compile(r"\s*")
+_decoder = json.JSONDecoder()
+
+
+class _JsonReader:
+    """Decodes JSON values one at a time from a file, refilling a buffer as needed."""
+
+    def __init__(self, f, block_size: int):
+        self.f = f
+        self.block_size = block_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        block = self.f.read(self.block_size)
+        if not block:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + block
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at the end of the file)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, characters: str) -> str:
+        """Consume the next character, which must be one of ``characters``."""
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f"Malformed JSON: expected one of {characters!r}, got {character!r}")
+        self.pos += 1
+        return character
+
+    def value(self) -> Any:
+        """Decode the next value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number ending the buffer may continue in the next block
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(path: Union[str, Path], key: str = "predictions",
+                    fields: Optional[Dict[str, Any]] = None,
+                    block_size: int = READ_BLOCK_SIZE) -> Iterator[Any]:
+    """Iterate over the items of an array in a JSON document without loading it.
+
+    Args:
+        path: JSON file holding an object with the array under ``key``, or
+            the array itself (``.gz``/``.zst`` archives are decompressed)
+        key: Key of the array in the top-level object
+        fields: Optional dictionary filled with the object's other top-level
+            values (values after the array are filled once iteration ends)
+        block_size: Characters read at a time
+
+    Yields:
+        The array items in order
+    """
+    with open_text(path) as f:
+        reader = _JsonReader(f, block_size)
+        if reader.peek() == "[":
+            yield from _iter_array(reader)
+            return
+
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            name = reader.value()
+            reader.expect(":")
+            if name == key and reader.peek() == "[":
+                yield from _iter_array(reader)
+            else:
+                value = reader.value()
+                if fields is not None:
+                    fields[name] = value
+            if reader.expect(",}") == "}":
+                return
+
+
+def _iter_array(reader: _JsonReader) -> Iterator[Any]:
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(",]") == "]":
+            return
+
+
+def simplify_prediction(prediction: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep a carrier/tender prediction's lane, location and predicted performance."""
+    simplified = {
+        "carrier": prediction.get("carrier", ""),
+        "source_city": prediction.get("source_city", ""),
+        "dest_city": prediction.get("dest_city", "")
+    }
+    for field in LOCATION_FIELDS:
+        if field in prediction:
+            simplified[field] = prediction.get(field, "")
+    simplified["predicted_performance"] = prediction.get("predicted_performance", 0)
+    return simplified
+
+
+def lane_filter(source_city: Optional[str] = None, dest_city: Optional[str] = None,
+                carrier: Optional[str] = None,
+                order_type: Optional[str] = None) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """Build a record predicate for lane filters (None when no filter is given).
+
+    Matching follows ``utils.lane_utils.filter_by_lane``: city names are
+    normalized and carriers and order types compared case-insensitively.
+    """
+    if not any([source_city, dest_city, carrier, order_type]):
+        return None
+
+    norm_source = normalize_city_name(source_city) if source_city else None
+    norm_dest = normalize_city_name(dest_city) if dest_city else None
+
+    def matches(record: Dict[str, Any]) -> bool:
+        return is_lane_match(record, source_city=norm_source, destination_city=norm_dest,
+                             carrier=carrier, order_type=order_type)
+
+    return matches
+
+
+def select_records(records: Iterable[Dict[str, Any]],
+                   predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                   simplify: bool = False) -> Iterator[Dict[str, Any]]:
+    """Filter and optionally simplify records lazily."""
+    for record in records:
+        if predicate is None or predicate(record):
+            yield simplify_prediction(record) if simplify else record
+
+
+def ndjson_chunks(records: Iterable[Any], batch_rows: int = STREAM_BATCH_ROWS) -> Iterator[bytes]:
+    """Encode records as newline-delimited JSON."""
+    batch: List[str] = []
+    for record in records:
+        batch.append(json.dumps(record))
+        if len(batch) >= batch_rows:
+            yield ("\n".join(batch) + "\n").encode("utf-8")
+            batch = []
+    if batch:
+        yield ("\n".join(batch) + "\n").encode("utf-8")
+
+
+def csv_chunks(records: Iterable[Dict[str, Any]], fieldnames: Optional[List[str]] = None,
+               batch_rows: int = STREAM_BATCH_ROWS) -> Iterator[bytes]:
+    """Encode records as CSV.
+
+    Args:
+        records: Records to encode
+        fieldnames: Columns; defaults to the first record's keys (keys
+            missing from a record are empty, extra keys are dropped)
+        batch_rows: Rows per yielded chunk
+
+    Yields:
+        UTF-8 CSV chunks, starting with the header
+    """
+    buffer = io.StringIO()
+    writer = None
+    rows = 0
+    for record in records:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=fieldnames or list(record),
+                                    restval="", extrasaction="ignore", lineterminator="\n")
+            writer.writeheader()
+        writer.writerow(record)
+        rows += 1
+        if rows % batch_rows == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if writer is None and fieldnames:
+        csv.writer(buffer, lineterminator="\n").writerow(fieldnames)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream into a single gzip member."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def json_document_chunks(header: Dict[str, Any], records: Iterable[Any], key: str = "predictions",
+                         batch_rows: int = STREAM_BATCH_ROWS) -> Iterator[bytes]:
+    """Encode ``{**header, key: [records...]}`` as a JSON document, chunk by chunk."""
+    opening = json.dumps(header)[:-1]
+    yield f'{opening}{", " if header else ""}{json.dumps(key)}: ['.encode("utf-8")
+
+    first = True
+    batch: List[str] = []
+    for record in records:
+        batch.append(json.dumps(record))
+        if len(batch) >= batch_rows:
+            yield (("" if first else ", ") + ", ".join(batch)).encode("utf-8")
+            first = False
+            batch = []
+    if batch:
+        yield (("" if first else ", ") + ", ".join(batch)).encode("utf-8")
+    yield b"]}"
+
+
+def write_csv(records: Iterable[Dict[str, Any]], csv_path: Union[str, Path],
+              fieldnames: Optional[List[str]] = None) -> int:
+    """Write records to a CSV file as they are produced.
+
+    Args:
+        records: Records to write
+        csv_path: Output path
+        fieldnames: Columns (see ``csv_chunks``)
+
+    Returns:
+        Number of rows written
+    """
+    rows = 0
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = None
+        for record in records:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=fieldnames or list(record),
+                                        restval="", extrasaction="ignore", lineterminator="\n")
+                writer.writeheader()
+            writer.writerow(record)
+            rows += 1
+        if writer is None and fieldnames:
+            csv.writer(f, lineterminator="\n").writerow(fieldnames)
+    return rows
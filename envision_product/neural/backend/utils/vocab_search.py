@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Autocomplete and fuzzy search over model vocabularies.
+
+Lane forms need the city, carrier and order type names a model was trained
+on. A VocabularyIndex holds each field's names under their normalized keys
+(normalize_city_name) in two structures:
+
+- a prefix trie for autocomplete, where each node keeps the first names below
+  it in key order, so completing a prefix is a walk down the trie
+- a trigram index for typo correction, where names are ranked by the Dice
+  similarity of their trigram sets to the query's
+
+Both answer in well under a millisecond for thousands of names.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from utils.lane_utils import normalize_city_name
+
+# Names kept per trie node (the most completions a search can return)
+MAX_COMPLETIONS = 50
+
+# Least trigram similarity of a fuzzy match
+MIN_SIMILARITY = 0.3
+
+
+def trigrams(key: str) -> Set[str]:
+    """Trigrams of a key, padded so that short keys and word starts count."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: List[int] = []
+
+
+class PrefixTrie:
+    """Prefix trie over keys, completing a prefix to the first keys below it in key order."""
+
+    def __init__(self, keys: List[str], max_completions: int = MAX_COMPLETIONS):
+        """Build the trie.
+
+        Args:
+            keys: Keys in sorted order; completions are their positions
+            max_completions: Positions kept per node
+        """
+        self.root = _TrieNode()
+        for position, key in enumerate(keys):
+            node = self.root
+            if len(node.ids) < max_completions:
+                node.ids.append(position)
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                if len(node.ids) < max_completions:
+                    node.ids.append(position)
+
+    def complete(self, prefix: str, limit: int) -> List[int]:
+        """Positions of the first ``limit`` keys starting with ``prefix``."""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.ids[:limit]
+
+
+class TrigramIndex:
+    """Trigram postings of keys, for ranking keys by similarity to a misspelled query."""
+
+    def __init__(self, keys: List[str]):
+        sizes = []
+        postings: Dict[str, List[int]] = {}
+        for position, key in enumerate(keys):
+            grams = trigrams(key)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self.sizes = np.array(sizes, dtype=np.float64)
+        self.postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+
+    def search(self, key: str, limit: int, min_similarity: float = MIN_SIMILARITY) -> List[Tuple[int, float]]:
+        """Positions and similarities of the keys most similar to ``key``, best first."""
+        grams = trigrams(key)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return []
+
+        # Shared trigrams of every key, then their Dice similarity to the query
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.sizes))
+        scores = 2 * shared / (len(grams) + self.sizes)
+        candidates = np.flatnonzero(scores >= min_similarity)
+        if len(candidates) > limit:
+            # Keep every key tied with the limit-th best so that ties break by position
+            threshold = -np.partition(-scores[candidates], limit - 1)[limit - 1]
+            candidates = candidates[scores[candidates] >= threshold]
+        ranked = sorted(zip(candidates.tolist(), scores[candidates].tolist()), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+
+class _FieldIndex:
+    """Names of one vocabulary field with their trie and trigram index."""
+
+    def __init__(self, values: Iterable[Any]):
+        names: Dict[str, str] = {}
+        for value in values:
+            if value is None:
+                continue
+            key = normalize_city_name(str(value))
+            if key and key not in names:
+                names[key] = str(value)
+        self.keys = sorted(names)
+        self.values = [names[key] for key in self.keys]
+        self.positions = {key: position for position, key in enumerate(self.keys)}
+        self.trie = PrefixTrie(self.keys)
+        self.trigrams = TrigramIndex(self.keys)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class VocabularyIndex:
+    """Autocomplete and typo correction over the vocabulary fields of a model."""
+
+    def __init__(self, vocabularies: Dict[str, Iterable[Any]]):
+        """Index vocabularies.
+
+        Args:
+            vocabularies: Field name (e.g. ``carrier``, ``source_city``) to
+                the names the model knows for it
+        """
+        self.fields = {field: _FieldIndex(values) for field, values in vocabularies.items()}
+
+    def sizes(self) -> Dict[str, int]:
+        """Number of names per field."""
+        return {field: len(index) for field, index in self.fields.items()}
+
+    def search(self, query: str, fields: Optional[Iterable[str]] = None, limit: int = 10) -> Dict[str, Any]:
+        """Complete or correct a query against the vocabulary.
+
+        Names starting with the normalized query come first, in key order.
+        If there are fewer than ``limit`` of them, the most similar names by
+        trigrams follow as fuzzy matches.
+
+        Args:
+            query: Text typed by the user
+            fields: Fields to search (all by default)
+            limit: Most results to return (at most MAX_COMPLETIONS)
+
+        Returns:
+            Dictionary with the normalized query, exact matches and results
+            (field, value, match type and, for fuzzy matches, similarity)
+
+        Raises:
+            ValueError: If a field is unknown
+        """
+        fields = list(self.fields) if fields is None else list(fields)
+        unknown = [field for field in fields if field not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown vocabulary field(s): {', '.join(unknown)}. "
+                             f"Expected {', '.join(self.fields)}")
+        limit = max(1, min(limit, MAX_COMPLETIONS))
+        key = normalize_city_name(query or "")
+
+        exact = [
+            {"field": field, "value": self.fields[field].values[self.fields[field].positions[key]]}
+            for field in fields if key in self.fields[field].positions
+        ]
+
+        completions = [
+            (self.fields[field].keys[position], field, position)
+            for field in fields
+            for position in (self.fields[field].trie.complete(key, limit) if key else [])
+        ]
+        completions.sort()
+        results = [
+            {"field": field, "value": self.fields[field].values[position], "match": "prefix"}
+            for _, field, position in completions[:limit]
+        ]
+
+        if key and len(results) < limit:
+            seen = {(result["field"], result["value"]) for result in results}
+            candidates = [
+                (-similarity, self.fields[field].keys[position], field, position, similarity)
+                for field in fields
+                for position, similarity in self.fields[field].trigrams.search(key, limit)
+            ]
+            candidates.sort()
+            for _, _, field, position, similarity in candidates:
+                if len(results) >= limit:
+                    break
+                value = self.fields[field].values[position]
+                if (field, value) not in seen:
+                    seen.add((field, value))
+                    results.append({"field": field, "value": value, "match": "fuzzy",
+                                    "similarity": round(similarity, 3)})
+
+        return {"query": query, "normalized": key, "exact": exact, "results": results}